@@ -1,18 +1,61 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 import pandas as pd
+import numpy as np
 import os
 import traceback
 import warnings
 import shutil
-import mysql.connector
-from mysql.connector import Error
-from datetime import datetime
+import tempfile
+import json
+import uuid
+import time
+import threading
+from datetime import datetime, timedelta
+from utils.batch_scoring import BatchScorer
+from utils.job_manager import JobManager, JobQueueFull
+from utils.rescoring import RescoreSummary, rescore_chunk
+from utils.alerting import AlertEngine, load_alert_rules, make_sink
+from utils.event_stream import EventBroadcaster
+from utils.health_monitor import HealthMonitor
+from utils.thermal_thresholds import ThermalThresholdRegistry
+from utils.rul_predictor import WearRateCache
+from utils.incremental_training import IncrementalTrainer, MODEL_TARGETS
+from utils.failure_mode_predictor import FAILURE_MODES
+from utils.parquet_archive import ParquetArchive
+from utils.drift_monitor import DriftMonitor
+from utils.evaluation import ModelEvaluator, EVAL_GATES
+from utils.calibration import CALIBRATION_METHOD
+from utils.smart_poller import SmartPoller
+from utils.fleet_scoring import FleetCoordinator, score_shard
+from system_info_extractor import SMARTCTL_DEVICE
+from utils.thermal_predictor import DEFAULT_TEMP_THRESHOLD
+from utils.micro_batcher import MicroBatcher
+from utils.retention import load_retention_policies, retention_cutoffs, hourly_rollup_cutoff
+from utils.ingest import INGEST_CHUNK_SIZE, MAX_ERROR_SAMPLES, open_body, iter_ndjson_chunks, iter_csv_chunks, validate_samples
+from utils.storage import get_history_store, HISTORY_CHUNK_SIZE, ROLLUP_TABLES
 
 warnings.filterwarnings('ignore')
 
+# Accepted spellings of boolean request flags (JSON fields and query args)
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+FALSE_VALUES = ('0', 'false', 'no', 'off')
+
+def parse_flag(value, default=False):
+    """A JSON bool or one of TRUE_VALUES / FALSE_VALUES; anything else is a ValueError"""
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError(f"Invalid flag value {value!r}: use true or false")
+
 # -------------------------------
-# MySQL Database Configuration
+# Database Configuration
 # -------------------------------
 
 DB_CONFIG = {
@@ -22,216 +65,114 @@ DB_CONFIG = {
     'database': 'nvme_failure_db'
 }
 
-def get_db_connection():
-    """Get database connection"""
-    try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        return conn
-    except Error as e:
-        print(f"❌ MySQL Connection Error: {e}")
-        return None
+# 'mysql' (default) or 'sqlite' for an embedded store (edge collectors, load tests)
+STORAGE_BACKEND = os.environ.get("NVME_STORAGE_BACKEND", "mysql")
+SQLITE_PATH = os.environ.get("NVME_SQLITE_PATH", "data/nvme_history.db")
+
+history_store = get_history_store(STORAGE_BACKEND, db_config=DB_CONFIG, sqlite_path=SQLITE_PATH)
 
 def test_db_connection():
     """Test database connection"""
-    conn = get_db_connection()
-    if conn:
-        conn.close()
-        return True
-    return False
+    return history_store.is_available()
 
 def get_input_history(limit=100):
-    """Retrieve input history from database"""
-    conn = None
-    cursor = None
-    try:
-        conn = get_db_connection()
-        if not conn:
-            print("❌ Could not connect to database")
-            return []
-            
-        cursor = conn.cursor(dictionary=True)
-        
-        # Simple query - let Python handle datetime formatting
-        query = """
-            SELECT 
-                id, 
-                timestamp,
-                power_on_hours,
-                total_tbw_tb,
-                total_tbr_tb,
-                temperature_c,
-                percent_life_used,
-                media_errors,
-                unsafe_shutdowns,
-                crc_errors,
-                read_error_rate,
-                write_error_rate,
-                temp_threshold,
-                data_source,
-                notes,
-                created_at
-            FROM input_history 
-            ORDER BY timestamp DESC 
-            LIMIT %s
-        """
-        
-        cursor.execute(query, (limit,))
-        results = cursor.fetchall()
-        
-        # Convert datetime objects to strings
-        for row in results:
-            if row['timestamp']:
-                row['timestamp'] = row['timestamp'].strftime('%Y-%m-%d %H:%M:%S')
-            if row['created_at']:
-                row['created_at'] = row['created_at'].strftime('%Y-%m-%d %H:%M:%S')
-        
-        print(f"✓ Retrieved {len(results)} records from database")
-        return results
-        
-    except Error as e:
-        print(f"❌ MySQL Error: {e}")
-        return []
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
-
-def save_input_to_db(input_data, temp_threshold=None, data_source="manual", notes=""):
-    """Save input data to MySQL database"""
-    conn = None
-    cursor = None
-    try:
-        conn = get_db_connection()
-        if not conn:
-            return False, None
-            
-        cursor = conn.cursor()
-        
-        insert_query = """
-        INSERT INTO input_history (
-            timestamp, power_on_hours, total_tbw_tb, total_tbr_tb,
-            temperature_c, percent_life_used, media_errors, unsafe_shutdowns,
-            crc_errors, read_error_rate, write_error_rate,
-            temp_threshold, data_source, notes
-        ) VALUES (
-            NOW(), %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
-        )
-        """
-        
-        values = (
-            input_data.get('Power_On_Hours', 0),
-            input_data.get('Total_TBW_TB', 0),
-            input_data.get('Total_TBR_TB', 0),
-            input_data.get('Temperature_C', 0),
-            input_data.get('Percent_Life_Used', 0),
-            input_data.get('Media_Errors', 0),
-            input_data.get('Unsafe_Shutdowns', 0),
-            input_data.get('CRC_Errors', 0),
-            input_data.get('Read_Error_Rate', 0),
-            input_data.get('Write_Error_Rate', 0),
-            temp_threshold,
-            data_source,
-            notes
-        )
-        
-        cursor.execute(insert_query, values)
-        conn.commit()
-        
-        entry_id = cursor.lastrowid
-        print(f"✓ Saved input as entry #{entry_id}")
-        return True, entry_id
-        
-    except Error as e:
-        print(f"❌ MySQL Error: {e}")
-        return False, None
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    """Retrieve input history from the history store"""
+    return history_store.get_input_history(limit)
+
+def save_input_to_db(input_data, temp_threshold=None, data_source="manual", notes="", drive_id=None):
+    """Save input data to the history store; returns (success, entry_id)"""
+    return history_store.save_input(input_data, temp_threshold, data_source, notes, drive_id)
 
 def delete_history_entry(entry_id):
     """Delete a specific history entry"""
-    conn = None
-    cursor = None
-    try:
-        conn = get_db_connection()
-        if not conn:
-            return False
-            
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM input_history WHERE id = %s", (entry_id,))
-        conn.commit()
-        
-        deleted = cursor.rowcount > 0
-        if deleted:
-            print(f"✓ Deleted entry {entry_id}")
-        return deleted
-        
-    except Error as e:
-        print(f"❌ MySQL Error: {e}")
-        return False
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    return history_store.delete_history_entry(entry_id)
 
 def get_history_entry(entry_id):
     """Get a specific history entry by ID"""
-    conn = None
-    cursor = None
-    try:
-        conn = get_db_connection()
-        if not conn:
-            return None
-            
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM input_history WHERE id = %s", (entry_id,))
-        
-        result = cursor.fetchone()
-        if result and result['timestamp']:
-            result['timestamp'] = result['timestamp'].strftime('%Y-%m-%d %H:%M:%S')
-        if result and result['created_at']:
-            result['created_at'] = result['created_at'].strftime('%Y-%m-%d %H:%M:%S')
-        
-        return result
-        
-    except Error as e:
-        print(f"❌ MySQL Error: {e}")
-        return None
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    return history_store.get_history_entry(entry_id)
 
 def clear_all_history():
-    """Clear all history entries"""
-    conn = None
-    cursor = None
-    try:
-        conn = get_db_connection()
-        if not conn:
-            return 0
-            
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM input_history")
-        conn.commit()
-        
-        count = cursor.rowcount
-        print(f"✓ Cleared {count} entries from database")
-        return count
-        
-    except Error as e:
-        print(f"❌ MySQL Error: {e}")
-        return 0
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    """Clear all history entries (batched so no single long table-wide lock)"""
+    return history_store.clear_all_history(RETENTION_BATCH_SIZE, RETENTION_BATCH_PAUSE)
+
+# -------------------------------
+# Retention
+# -------------------------------
+
+RETENTION_BATCH_SIZE = int(os.environ.get("NVME_RETENTION_BATCH_SIZE", 5000))
+RETENTION_BATCH_PAUSE = float(os.environ.get("NVME_RETENTION_BATCH_PAUSE", 0.05))
+RETENTION_INTERVAL_HOURS = float(os.environ.get("NVME_RETENTION_INTERVAL_HOURS", 0))
+
+# Parquet archive of input_history for offline analytics (optional, needs pyarrow)
+ARCHIVE_DIR = os.environ.get("NVME_ARCHIVE_DIR", "data/archive")
+ARCHIVE_INTERVAL_MINUTES = float(os.environ.get("NVME_ARCHIVE_INTERVAL_MINUTES", 0))
+ARCHIVE_CHUNK_SIZE = int(os.environ.get("NVME_ARCHIVE_CHUNK_SIZE", 50000))
+ARCHIVE_SETTLE_SECONDS = float(os.environ.get("NVME_ARCHIVE_SETTLE_SECONDS", 60))
+
+parquet_archive = ParquetArchive(ARCHIVE_DIR, settle_seconds=ARCHIVE_SETTLE_SECONDS)
+
+def run_retention(dry_run=False, policies=None):
+    """Apply retention policies: downsample, then purge raw rows in batches"""
+    policies = policies or load_retention_policies()
+    max_id = None
+    if not dry_run and os.path.exists(parquet_archive.state_path):
+        # Archive in use: copy rows out before any of them are purged, and
+        # purge only rows the archive holds (export selects by created_at,
+        # retention by sample timestamp, so backfilled rows can be old but
+        # not yet archived)
+        try:
+            parquet_archive.export(history_store, chunk_size=ARCHIVE_CHUNK_SIZE)
+        except RuntimeError as e:
+            raise RuntimeError(f"Retention skipped, archive export did not finish: {e}") from e
+        max_id = parquet_archive.high_water_mark
+    return history_store.run_retention(
+        policies,
+        retention_cutoffs(policies),
+        hourly_rollup_cutoff(),
+        dry_run=dry_run,
+        batch_size=RETENTION_BATCH_SIZE,
+        pause=RETENTION_BATCH_PAUSE,
+        max_id=max_id
+    )
+
+def start_retention_scheduler():
+    """Run retention every NVME_RETENTION_INTERVAL_HOURS in a daemon thread (0 = disabled)"""
+    if RETENTION_INTERVAL_HOURS <= 0:
+        return None
+
+    def loop():
+        while True:
+            time.sleep(RETENTION_INTERVAL_HOURS * 3600)
+            try:
+                run_retention()
+            except Exception as e:
+                print(f"⚠️ Retention run failed: {e}")
+
+    thread = threading.Thread(target=loop, name="retention", daemon=True)
+    thread.start()
+    print(f"✓ Retention scheduled every {RETENTION_INTERVAL_HOURS}h")
+    return thread
+
+def start_archive_scheduler():
+    """Append new history to the Parquet archive every NVME_ARCHIVE_INTERVAL_MINUTES (0 = disabled)"""
+    if ARCHIVE_INTERVAL_MINUTES <= 0:
+        return None
+    if not ParquetArchive.available():
+        print("⚠️ NVME_ARCHIVE_INTERVAL_MINUTES set but pyarrow is not installed; archive disabled")
+        return None
+
+    def loop():
+        while True:
+            try:
+                parquet_archive.export(history_store, chunk_size=ARCHIVE_CHUNK_SIZE)
+            except Exception as e:
+                print(f"⚠️ Archive run failed: {e}")
+            time.sleep(ARCHIVE_INTERVAL_MINUTES * 60)
+
+    thread = threading.Thread(target=loop, name="archive", daemon=True)
+    thread.start()
+    print(f"✓ Parquet archive every {ARCHIVE_INTERVAL_MINUTES:g} min -> {ARCHIVE_DIR}")
+    return thread
 
 # -------------------------------
 # Import Predictors
@@ -242,12 +183,15 @@ try:
     from utils.thermal_predictor import ThermalPredictor
     from utils.power_predictor import PowerPredictor
     from utils.controller_predictor import ControllerPredictor
-    from system_info_extractor import get_system_info
+    from utils.failure_mode_predictor import FailureModePredictor
+    from utils.rul_predictor import RULPredictor
 
     wearout_predictor = WearoutPredictor()
     thermal_predictor = ThermalPredictor()
     power_predictor = PowerPredictor()
     controller_predictor = ControllerPredictor()
+    failure_mode_predictor = FailureModePredictor()
+    rul_predictor = RULPredictor()
 
     PREDICTORS_LOADED = True
     print("✓ Predictors loaded successfully")
@@ -265,6 +209,8 @@ except Exception as e:
             }
 
     wearout_predictor = thermal_predictor = power_predictor = controller_predictor = FallbackPredictor()
+    failure_mode_predictor = None
+    rul_predictor = None
 
 # -------------------------------
 # App Init
@@ -273,7 +219,358 @@ except Exception as e:
 app = Flask(__name__)
 CORS(app, resources={r"/api/*": {"origins": "*"}})
 
-DEFAULT_TEMP_THRESHOLD = 84
+# Multi-class failure mode model: 'auto' uses it once trained, 'off' keeps the binary models
+FAILURE_MODE_MODEL = os.environ.get("NVME_FAILURE_MODE_MODEL", "auto")
+
+# Warning-temperature thresholds per vendor/model/firmware, learned from SMART readings
+THERMAL_THRESHOLDS_PATH = os.environ.get("NVME_THERMAL_THRESHOLDS_PATH", "data/thermal_thresholds.json")
+threshold_registry = ThermalThresholdRegistry(THERMAL_THRESHOLDS_PATH)
+
+# Per-drive wear-rate fits for RUL, loaded from history on first use and
+# updated in place as new samples for cached drives are stored
+wear_rate_cache = WearRateCache()
+
+# Input drift: live feature histograms over a sliding window vs. training-set reference
+DRIFT_REFERENCE_PATH = os.environ.get("NVME_DRIFT_REFERENCE_PATH", "models/drift_reference.json")
+DRIFT_WINDOW_MINUTES = float(os.environ.get("NVME_DRIFT_WINDOW_MINUTES", 60))
+DRIFT_SLOTS = int(os.environ.get("NVME_DRIFT_SLOTS", 12))
+DRIFT_MIN_SAMPLES = int(os.environ.get("NVME_DRIFT_MIN_SAMPLES", 200))
+
+drift_monitor = DriftMonitor(
+    DRIFT_REFERENCE_PATH,
+    window_seconds=DRIFT_WINDOW_MINUTES * 60,
+    slots=DRIFT_SLOTS,
+    min_samples=DRIFT_MIN_SAMPLES
+)
+if drift_monitor.reference is None:
+    try:
+        drift_monitor.rebuild_reference()
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Drift reference not available: {e}")
+
+# Background scoring jobs run on their own small pool so they never tie up
+# the threads serving interactive /api/predict calls
+JOB_WORKERS = int(os.environ.get("NVME_JOB_WORKERS", 2))
+JOB_MAX_PENDING = int(os.environ.get("NVME_JOB_MAX_PENDING", 16))
+JOB_RESULTS_DIR = os.environ.get("NVME_JOB_RESULTS_DIR", os.path.join(tempfile.gettempdir(), "nvme_jobs"))
+
+batch_scorer = BatchScorer(
+    wearout_predictor,
+    thermal_predictor,
+    power_predictor,
+    controller_predictor,
+    default_temp_threshold=DEFAULT_TEMP_THRESHOLD,
+    threshold_registry=threshold_registry,
+    failure_mode=failure_mode_predictor if FAILURE_MODE_MODEL != "off" else None
+)
+
+# Fleet scoring: scoring jobs and bulk ingest chunks of at least
+# FLEET_MIN_ROWS rows are partitioned by drive hash across worker processes
+# (NVME_FLEET_WORKERS, spawned here), workers started on other nodes with
+# fleet_worker.py (connecting to NVME_FLEET_LISTEN, authenticated with the
+# hex NVME_FLEET_AUTHKEY) and other backends (NVME_FLEET_NODES, URLs)
+FLEET_WORKERS = int(os.environ.get("NVME_FLEET_WORKERS", 0))
+FLEET_NODES = [u for u in os.environ.get("NVME_FLEET_NODES", "").split(",") if u]
+FLEET_LISTEN = os.environ.get("NVME_FLEET_LISTEN") or None
+FLEET_AUTHKEY = os.environ.get("NVME_FLEET_AUTHKEY")
+FLEET_MIN_ROWS = int(os.environ.get("NVME_FLEET_MIN_ROWS", 2000))
+FLEET_TIMEOUT_SECONDS = float(os.environ.get("NVME_FLEET_TIMEOUT_SECONDS", 120))
+
+fleet_coordinator = FleetCoordinator(
+    batch_scorer,
+    local_workers=FLEET_WORKERS,
+    nodes=FLEET_NODES,
+    listen=FLEET_LISTEN,
+    authkey=bytes.fromhex(FLEET_AUTHKEY) if FLEET_AUTHKEY else None,
+    min_rows=FLEET_MIN_ROWS,
+    timeout=FLEET_TIMEOUT_SECONDS
+)
+
+job_manager = JobManager(
+    results_dir=JOB_RESULTS_DIR,
+    max_workers=JOB_WORKERS,
+    max_pending=JOB_MAX_PENDING
+)
+
+# Concurrent /api/predict calls are scored together: a batch closes after
+# PREDICT_BATCH_WAIT_MS or PREDICT_BATCH_MAX_ROWS rows, whichever comes first
+PREDICT_BATCHING = os.environ.get("NVME_PREDICT_BATCHING", "on") != "off"
+PREDICT_BATCH_MAX_ROWS = int(os.environ.get("NVME_PREDICT_BATCH_MAX_ROWS", 64))
+PREDICT_BATCH_WAIT_MS = float(os.environ.get("NVME_PREDICT_BATCH_WAIT_MS", 2))
+
+model_batcher = MicroBatcher(
+    lambda frame: score_model_rows(frame),
+    max_rows=PREDICT_BATCH_MAX_ROWS,
+    max_wait_ms=PREDICT_BATCH_WAIT_MS,
+    name="predict-batcher"
+) if PREDICT_BATCHING else None
+
+# Incremental training: continue boosting the current models on newly labeled history
+INCREMENTAL_ROUNDS = int(os.environ.get("NVME_INCREMENTAL_ROUNDS", 50))
+INCREMENTAL_MIN_ROWS = int(os.environ.get("NVME_INCREMENTAL_MIN_ROWS", 20))
+
+incremental_trainer = IncrementalTrainer(
+    history_store,
+    {
+        name: predictor for name, predictor in (
+            ("wearout", wearout_predictor),
+            ("controller", controller_predictor),
+            ("failure_mode", failure_mode_predictor)
+        ) if hasattr(predictor, "model")
+    },
+    rounds=INCREMENTAL_ROUNDS,
+    min_rows=INCREMENTAL_MIN_ROWS
+)
+
+# Evaluation harness: metrics per model version on held-out data, predictions
+# cached per (model version, dataset hash)
+EVAL_CACHE_DIR = os.environ.get("NVME_EVAL_CACHE_DIR", "models/eval_cache")
+
+model_evaluator = ModelEvaluator(
+    {
+        name: predictor for name, predictor in (
+            ("wearout", wearout_predictor),
+            ("controller", controller_predictor)
+        ) if hasattr(predictor, "load_version")
+    },
+    cache_dir=EVAL_CACHE_DIR
+)
+
+# Alert sink spec: 'log', 'queue', 'file:<path>' or 'webhook:<url>'
+ALERT_SINK = os.environ.get("NVME_ALERT_SINK", "log")
+ALERT_DEDUP_SECONDS = float(os.environ.get("NVME_ALERT_DEDUP_SECONDS", 900))
+ALERT_MAX_PER_MINUTE = float(os.environ.get("NVME_ALERT_MAX_PER_MINUTE", 60))
+
+alert_engine = AlertEngine(
+    load_alert_rules(),
+    make_sink(ALERT_SINK),
+    dedup_seconds=ALERT_DEDUP_SECONDS,
+    max_per_minute=ALERT_MAX_PER_MINUTE
+)
+
+# smartctl poller: samples each device at an adaptive interval and stores /
+# scores a sample only when it changed meaningfully (plus periodic heartbeats)
+SMART_POLLER = os.environ.get("NVME_SMART_POLLER", "off") != "off"
+SMART_POLL_DEVICES = [d for d in os.environ.get("NVME_SMART_POLL_DEVICES", SMARTCTL_DEVICE).split(",") if d]
+SMART_POLL_MIN_SECONDS = float(os.environ.get("NVME_SMART_POLL_MIN_SECONDS", 60))
+SMART_POLL_MAX_SECONDS = float(os.environ.get("NVME_SMART_POLL_MAX_SECONDS", 900))
+SMART_HEARTBEAT_MINUTES = float(os.environ.get("NVME_SMART_HEARTBEAT_MINUTES", 60))
+SMART_POLL_SCORE = os.environ.get("NVME_SMART_POLL_SCORE", "on") != "off"
+
+# On-demand reads (/api/system-info, /api/predict, event stream) reuse a sample this recent
+SYSTEM_INFO_MAX_AGE_SECONDS = float(os.environ.get("NVME_SYSTEM_INFO_MAX_AGE_SECONDS", 30))
+
+smart_poller = SmartPoller(
+    SMART_POLL_DEVICES,
+    min_interval=SMART_POLL_MIN_SECONDS,
+    max_interval=SMART_POLL_MAX_SECONDS,
+    heartbeat_seconds=SMART_HEARTBEAT_MINUTES * 60
+)
+
+def read_system_info(device=None):
+    """smartctl system info, from the poller's cache when recent enough"""
+    return smart_poller.latest(device, max_age=SYSTEM_INFO_MAX_AGE_SECONDS)
+
+# Live event stream: one poller reads health/system info for all dashboards
+STREAM_POLL_SECONDS = float(os.environ.get("NVME_STREAM_POLL_SECONDS", 10))
+STREAM_CLIENT_BUFFER = int(os.environ.get("NVME_STREAM_CLIENT_BUFFER", 256))
+
+event_broadcaster = EventBroadcaster(
+    poll_interval=STREAM_POLL_SECONDS,
+    max_buffer=STREAM_CLIENT_BUFFER
+)
+
+# Dependency checks run on a background interval; probes read the cache
+HEALTH_INTERVAL_SECONDS = float(os.environ.get("NVME_HEALTH_INTERVAL_SECONDS", 15))
+HEALTH_REQUIRED_CHECKS = [
+    c for c in os.environ.get("NVME_HEALTH_REQUIRED", "database,predictors").split(",") if c
+]
+
+health_monitor = HealthMonitor(
+    {
+        "database": test_db_connection,
+        "predictors": lambda: PREDICTORS_LOADED,
+        "smartctl": lambda: shutil.which("smartctl") is not None,
+        "total_records": lambda: history_store.estimate_history_count(),
+        "drift": lambda: drift_monitor.summary()
+    },
+    interval=HEALTH_INTERVAL_SECONDS,
+    required=HEALTH_REQUIRED_CHECKS
+).start()
+
+def health_snapshot():
+    """Health fields shared by /api/health and the 'health' stream event (cached, no I/O)"""
+    checks = health_monitor.values()
+    return {
+        "predictors_loaded": PREDICTORS_LOADED,
+        "smartctl_available": bool(checks.get("smartctl")),
+        "database_connected": bool(checks.get("database")),
+        "total_records": checks.get("total_records") if checks.get("database") else None
+    }
+
+event_broadcaster.add_source("health", health_snapshot)
+event_broadcaster.add_source("drift", drift_monitor.summary)
+if PREDICTORS_LOADED:
+    event_broadcaster.add_source("system", read_system_info)
+
+def record_local_threshold(system_info_data):
+    """Feed the local drive's reported warning threshold into the registry"""
+    drive = system_info_data.get("drive") or {}
+    if system_info_data.get("threshold_reported") and (drive.get("Vendor") or drive.get("Model")):
+        known = threshold_registry.lookup(drive.get("Vendor"), drive.get("Model"), drive.get("Firmware_Version"))
+        threshold_registry.record(
+            drive.get("Vendor"), drive.get("Model"), drive.get("Firmware_Version"),
+            system_info_data["temp_threshold"]
+        )
+        if known != threshold_registry.lookup(drive.get("Vendor"), drive.get("Model"), drive.get("Firmware_Version")):
+            threshold_registry.save()
+
+def publish_alerts(alerts):
+    for alert in alerts:
+        event_broadcaster.publish("alert", alert)
+
+def save_smart_record(record):
+    """
+    Store a smartctl poller record as an input_history row (data_source
+    'poller'); change records are also scored and checked for alerts,
+    heartbeats only keep the history continuous
+    """
+    sample = record["sample"]
+    drive = sample.get("drive") or {}
+    notes = ", ".join(f"{field} {old} -> {new}" for field, (old, new) in record["changes"].items()
+                      if field != "drive")
+    frame = pd.DataFrame([{
+        **sample["data"],
+        "temp_threshold": sample.get("temp_threshold"),
+        "Drive_ID": record["drive_id"],
+        "Vendor": drive.get("Vendor"),
+        "Model": drive.get("Model"),
+        "Firmware_Version": drive.get("Firmware_Version"),
+        "data_source": "poller",
+        "notes": f"{record['type']}: {notes}" if notes else record["type"]
+    }])
+
+    record_local_threshold(sample)
+    drift_monitor.observe(frame)
+    entry_ids = history_store.save_inputs_bulk(frame)
+    if not entry_ids:
+        print(f"⚠️ Poller record for {record['device']} not stored")
+        return
+    wear_rate_cache.update(frame.assign(id=entry_ids), only_known=True)
+
+    scored = SMART_POLL_SCORE and record["type"] != "heartbeat"
+    if scored:
+        scores = batch_scorer.score(frame)
+        history_store.save_predictions_bulk(prediction_rows_from_scores(scores, entry_ids))
+        publish_alerts(alert_engine.evaluate_frame(scores, frame["Drive_ID"], entry_ids))
+
+    event_broadcaster.publish("smart", {
+        "type": record["type"],
+        "device": record["device"],
+        "drive_id": record["drive_id"],
+        "changes": record["changes"],
+        "entry_id": entry_ids[0],
+        "scored": scored
+    })
+
+def start_smart_poller():
+    """Run the smartctl poller when NVME_SMART_POLLER is on"""
+    if not SMART_POLLER:
+        return None
+    if shutil.which("smartctl") is None:
+        print("⚠️ NVME_SMART_POLLER set but smartctl is not installed; poller disabled")
+        return None
+    return smart_poller.start(on_record=save_smart_record)
+
+def start_fleet_coordinator():
+    """Start the fleet scoring workers when NVME_FLEET_WORKERS or NVME_FLEET_LISTEN is set"""
+    if not (FLEET_WORKERS or FLEET_LISTEN):
+        return None
+    if FLEET_LISTEN and not FLEET_AUTHKEY:
+        print("❌ NVME_FLEET_LISTEN needs NVME_FLEET_AUTHKEY (shared with the remote workers); fleet workers disabled")
+        return None
+    try:
+        fleet_coordinator.start()
+    except (OSError, ValueError) as e:
+        print(f"❌ Fleet coordinator failed to start: {e}")
+        return None
+    return fleet_coordinator
+
+def failure_mode_enabled():
+    return (
+        FAILURE_MODE_MODEL != "off" and
+        failure_mode_predictor is not None and
+        failure_mode_predictor.model is not None
+    )
+
+def score_model_rows(frame):
+    """Wear-out / controller (and failure mode) results for every row, one model call each"""
+    rows = [{} for _ in range(len(frame))]
+
+    mode_rows = None
+    if failure_mode_enabled():
+        try:
+            mode_rows = failure_mode_predictor.predict_many(frame)
+        except Exception as e:
+            print(f"⚠️ Failure mode model failed, using binary models: {e}")
+
+    if mode_rows:
+        for row, modes in zip(rows, mode_rows):
+            row.update(modes)
+        return rows
+
+    for name, predictor in (("wearout", wearout_predictor), ("controller", controller_predictor)):
+        if hasattr(predictor, "predict_many"):
+            results = predictor.predict_many(frame)
+        else:
+            results = [predictor.predict(frame.iloc[[i]]) for i in range(len(frame))]
+        for row, result in zip(rows, results):
+            row[name] = result
+    return rows
+
+def score_models(input_df):
+    """Model results for a single-sample request, coalesced with concurrent requests when enabled"""
+    frame = input_df[FEATURES]
+    if model_batcher is not None:
+        return model_batcher.submit(frame)[0]
+    return score_model_rows(frame)[0]
+
+def current_model_version():
+    """Version id stored with predictions: the wearout and controller model hashes"""
+    return batch_scorer.model_version()
+
+def top_contributions(results, top_n=3):
+    """Keep the top_n feature contributions of each risk category"""
+    top = {}
+    for category in ("wearout", "thermal", "power", "controller"):
+        contributions = results.get(category, {}).get("contributions") or {}
+        ranked = sorted(contributions.items(), key=lambda x: x[1], reverse=True)[:top_n]
+        top[category] = {k: round(float(v), 2) for k, v in ranked}
+    return top
+
+def prediction_rows_from_scores(scored, input_ids, timestamps=None, model_version=None):
+    """Turn a BatchScorer result frame into prediction_history rows"""
+    model_version = model_version or current_model_version()
+    if timestamps is None:
+        timestamps = [None] * len(scored)
+    rows = []
+    for input_id, ts, record in zip(input_ids, timestamps, scored.to_dict(orient="records")):
+        if hasattr(ts, "to_pydatetime"):
+            ts = ts.to_pydatetime()
+        rows.append({
+            'input_id': int(input_id),
+            'model_version': model_version,
+            'timestamp': ts,
+            'wearout_risk': float(record['wearout_risk']),
+            'thermal_risk': float(record['thermal_risk']),
+            'power_risk': float(record['power_risk']),
+            'controller_risk': float(record['controller_risk']),
+            'overall_risk': float(record['overall_risk']),
+            'status': record['status'],
+            'highest_risk': record['highest_risk'],
+            'top_contributions': None
+        })
+    return rows
 
 FEATURES = [
     "Power_On_Hours",
@@ -345,7 +642,10 @@ def get_features():
 def system_info():
     """Get system info but DON'T save to database"""
     try:
-        result = get_system_info()
+        device = request.args.get('device')
+        if device and device not in smart_poller.states:
+            return jsonify({"success": False, "error": f"Device '{device}' is not polled"}), 400
+        result = read_system_info(device)
         return jsonify(result)
     except Exception as e:
         return jsonify({
@@ -355,23 +655,38 @@ def system_info():
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    """Simple health check endpoint"""
-    db_connected = test_db_connection()
+    """Simple health check endpoint (served from the health monitor cache)"""
+    snapshot = health_snapshot()
     return jsonify({
         "success": True,
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
-        "predictors_loaded": PREDICTORS_LOADED,
-        "smartctl_available": shutil.which("smartctl") is not None,
-        "database_connected": db_connected
+        "predictors_loaded": snapshot["predictors_loaded"],
+        "smartctl_available": snapshot["smartctl_available"],
+        "database_connected": snapshot["database_connected"],
+        "checked_at": health_monitor.snapshot()["checked_at"]
     })
 
+@app.route('/api/health/live', methods=['GET'])
+def liveness():
+    """Liveness probe: the process is serving requests. No I/O."""
+    return jsonify({"success": True, "status": "alive"})
+
+@app.route('/api/health/ready', methods=['GET'])
+def readiness():
+    """Readiness probe: cached dependency checks; 503 until required checks pass"""
+    ready = health_monitor.is_ready()
+    return jsonify({
+        "success": ready,
+        "status": "ready" if ready else "not ready",
+        **health_monitor.snapshot()
+    }), 200 if ready else 503
+
 @app.route('/api/db-status', methods=['GET'])
 def db_status():
     """Check database connection and get basic stats"""
     try:
-        conn = get_db_connection()
-        if not conn:
+        if not test_db_connection():
             return jsonify({
                 "success": False,
                 "connected": False,
@@ -379,15 +694,12 @@ def db_status():
                 "message": "Could not get database connection"
             })
         
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM input_history")
-        count = cursor.fetchone()[0]
-        cursor.close()
-        conn.close()
+        count = history_store.count_history()
         
         return jsonify({
             "success": True,
             "connected": True,
+            "backend": history_store.describe(),
             "total_records": count,
             "message": "Database connected"
         })
@@ -399,6 +711,65 @@ def db_status():
             "error": str(e)
         })
 
+@app.route('/api/stats', methods=['GET'])
+def fleet_stats():
+    """
+    Fleet statistics from the rollup tables.
+    ?granularity=hour|day&start=...&end=...&data_source=...&limit=...
+    """
+    try:
+        granularity = request.args.get('granularity', 'hour')
+        if granularity not in ROLLUP_TABLES:
+            return jsonify({"success": False, "error": "granularity must be 'hour' or 'day'"}), 400
+
+        start = request.args.get('start')
+        end = request.args.get('end')
+        data_source = request.args.get('data_source')
+        limit = request.args.get('limit', 1000, type=int)
+
+        buckets = history_store.get_rollup_stats(granularity, start, end, data_source, limit)
+        totals = history_store.get_rollup_totals(granularity, start, end, data_source)
+
+        return jsonify({
+            "success": True,
+            "granularity": granularity,
+            "count": len(buckets),
+            "totals": totals,
+            "data": buckets
+        })
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e),
+            "data": []
+        }), 500
+
+@app.route('/api/stats/rebuild', methods=['POST'])
+def rebuild_stats():
+    """Recompute rollups from raw history for a date range: {"start": ..., "end": ...}"""
+    try:
+        data = request.get_json(silent=True) or {}
+        start = data.get('start')
+        end = data.get('end') or datetime.now().isoformat()
+        if not start:
+            return jsonify({"success": False, "error": "start is required"}), 400
+
+        days = history_store.rebuild_rollups(start, end, retention_cutoffs(load_retention_policies()))
+        return jsonify({
+            "success": True,
+            "days_rebuilt": days
+        })
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
 @app.route('/api/history', methods=['GET'])
 def get_history():
     """Get input history"""
@@ -409,14 +780,7 @@ def get_history():
         history = get_input_history(limit)
         
         # Also get total count
-        conn = get_db_connection()
-        total_count = 0
-        if conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM input_history")
-            total_count = cursor.fetchone()[0]
-            cursor.close()
-            conn.close()
+        total_count = history_store.count_history()
         
         return jsonify({
             "success": True,
@@ -459,6 +823,9 @@ def delete_history(entry_id):
     try:
         deleted = delete_history_entry(entry_id)
         if deleted:
+            event_broadcaster.publish("history", {"action": "deleted", "entry_id": entry_id})
+            # Running sums cannot drop a single row; refit drives lazily
+            wear_rate_cache.forget()
             return jsonify({
                 "success": True,
                 "message": f"Entry {entry_id} deleted"
@@ -479,6 +846,8 @@ def clear_all_history_endpoint():
     """Clear all history (with confirmation)"""
     try:
         count = clear_all_history()
+        event_broadcaster.publish("history", {"action": "cleared", "count": count})
+        wear_rate_cache.forget()
         return jsonify({
             "success": True,
             "message": f"Deleted {count} entries"
@@ -489,177 +858,405 @@ def clear_all_history_endpoint():
             "error": str(e)
         }), 500
 
-@app.route('/api/predict', methods=['POST'])
-def predict():
+@app.route('/api/retention', methods=['GET'])
+def retention_policies():
+    """Show the active retention policies and their current cutoffs"""
     try:
-        if not request.is_json:
-            return jsonify({"success": False, "error": "JSON required"}), 400
+        policies = load_retention_policies()
+        cutoffs = retention_cutoffs(policies)
+        return jsonify({
+            "success": True,
+            "policies": policies,
+            "cutoffs": {k: v.isoformat() for k, v in cutoffs.items()},
+            "hourly_rollup_cutoff": hourly_rollup_cutoff().isoformat()
+        })
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 400
 
-        data = request.get_json()
-        
-        # Check if this is a history run with laptop status
-        laptop_working = data.pop('laptop_working', True)
-        from_history = data.pop('from_history', False)
-        entry_id = data.pop('history_entry_id', None)
+@app.route('/api/retention/run', methods=['POST'])
+def retention_run():
+    """Apply retention now; {"dry_run": true} only reports what would be purged"""
+    try:
+        data = request.get_json(silent=True) or {}
+        dry_run = parse_flag(data.get('dry_run'))
+        report = run_retention(dry_run=dry_run)
+        if report is None:
+            return jsonify({"success": False, "error": "Could not get database connection"}), 503
+        return jsonify({
+            "success": True,
+            "dry_run": dry_run,
+            "report": report
+        })
+    except RuntimeError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 409
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
 
-        print(f"\n{'='*60}")
-        print(f"PREDICTION REQUEST")
-        print(f"{'='*60}")
-        print(f"Laptop Working: {laptop_working}")
-        print(f"From History: {from_history}")
-        print(f"History ID: {entry_id}")
-        print(f"Input Data: {data}")
+@app.route('/api/archive', methods=['GET'])
+def archive_status():
+    """High-water mark, row/file counts and size of the Parquet history archive"""
+    return jsonify({
+        "success": True,
+        "available": ParquetArchive.available(),
+        "archive": parquet_archive.status()
+    })
 
-        # Validate input
-        input_df = pd.DataFrame([data])
+@app.route('/api/archive/run', methods=['POST'])
+def archive_run():
+    """
+    Append history rows above the high-water mark to the Parquet archive in
+    a background job. JSON: {"chunk_size": 50000, "max_rows": null}
+    """
+    try:
+        if not ParquetArchive.available():
+            return jsonify({"success": False, "error": "pyarrow is not installed"}), 503
 
-        for feature in FEATURES:
-            if feature not in input_df.columns:
-                input_df[feature] = 0
+        data = request.get_json(silent=True) or {}
+        chunk_size = int(data.get('chunk_size', ARCHIVE_CHUNK_SIZE))
+        max_rows = data.get('max_rows')
+        high_water_mark = parquet_archive.high_water_mark
 
-        results = {}
+        def process(frame):
+            return [{
+                "first_id": int(frame["id"].iloc[0]),
+                "last_id": int(frame["id"].iloc[-1]),
+                "rows": len(frame),
+                "partitions": frame[["date", "data_source"]].drop_duplicates().to_dict(orient="records")
+            }]
 
-        # Get temperature threshold
-        system_info_data = get_system_info()
-        temp_threshold = system_info_data.get("temp_threshold", DEFAULT_TEMP_THRESHOLD)
+        def finish(job):
+            job.summary = parquet_archive.status()
 
-        # ========== SAVE INPUT DATA TO DATABASE ==========
-        input_data = {
-            "Power_On_Hours": data.get('Power_On_Hours', 0),
-            "Total_TBW_TB": data.get('Total_TBW_TB', 0),
-            "Total_TBR_TB": data.get('Total_TBR_TB', 0),
-            "Temperature_C": data.get('Temperature_C', 0),
-            "Percent_Life_Used": data.get('Percent_Life_Used', 0),
-            "Media_Errors": data.get('Media_Errors', 0),
-            "Unsafe_Shutdowns": data.get('Unsafe_Shutdowns', 0),
-            "CRC_Errors": data.get('CRC_Errors', 0),
-            "Read_Error_Rate": data.get('Read_Error_Rate', 0),
-            "Write_Error_Rate": data.get('Write_Error_Rate', 0)
-        }
-        
-        notes = "Manual prediction"
-        if from_history:
-            notes = f"Run from history (entry {entry_id})"
-        
-        save_success, new_entry_id = save_input_to_db(
-            input_data,
-            temp_threshold=temp_threshold,
-            data_source="manual",
-            notes=notes
+        job = job_manager.submit(
+            "archive",
+            lambda: parquet_archive.iter_export(history_store, chunk_size=chunk_size,
+                                                max_rows=int(max_rows) if max_rows else None),
+            process,
+            params={"high_water_mark": high_water_mark},
+            on_complete=finish
         )
-        
-        if save_success:
-            print(f"✓ Saved input as entry #{new_entry_id}")
-        # =================================================
-
-        # ---------------- Wearout ----------------
-        try:
-            results['wearout'] = wearout_predictor.predict(input_df)
-        except:
-            results['wearout'] = {
-                "risk_percentage": 25,
-                "contributions": {"Power_On_Hours": 50, "Percent_Life_Used": 50},
-                "status": "Fallback"
-            }
-
-        # ---------------- Thermal ----------------
-        try:
-            if hasattr(thermal_predictor, "predict_with_threshold"):
-                results['thermal'] = thermal_predictor.predict_with_threshold(
-                    input_df,
-                    temp_threshold
-                )
-            else:
-                results['thermal'] = thermal_predictor.predict(input_df)
-
-        except Exception as e:
-            results['thermal'] = {
-                "risk_percentage": 25,
-                "contributions": {"Temperature_C": 100},
-                "status": "Thermal fallback"
-            }
-
-        # ---------------- Power ----------------
-        try:
-            results['power'] = power_predictor.predict(input_df)
-        except:
-            results['power'] = {
-                "risk_percentage": 20,
-                "contributions": {"Unsafe_Shutdowns": 100},
-                "status": "Fallback"
-            }
 
-        # ---------------- Controller ----------------
-        try:
-            results['controller'] = controller_predictor.predict(input_df)
-        except:
-            results['controller'] = {
-                "risk_percentage": 20,
-                "contributions": {"Media_Errors": 50, "CRC_Errors": 50},
-                "status": "Fallback"
-            }
+        return jsonify({
+            "success": True,
+            "high_water_mark": high_water_mark,
+            "job": job.to_dict()
+        }), 202
 
-        # ---------------- Summary with laptop status ----------------
-        results["summary"] = generate_summary(results, laptop_working)
-
-        results["metadata"] = {
-            "timestamp": datetime.now().isoformat(),
-            "predictors_loaded": PREDICTORS_LOADED,
-            "temp_threshold": temp_threshold,
-            "input_saved_to_db": save_success,
-            "new_entry_id": new_entry_id,
-            "laptop_working": laptop_working,
-            "from_history": from_history
-        }
+    except JobQueueFull as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 429
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
 
-        print(f"\n✓ Prediction complete")
-        print(f"{'='*60}\n")
+@app.route('/api/predictions/trend', methods=['GET'])
+def prediction_trend():
+    """Stored risk percentages over time for dashboards (?start&end&model_version&limit)"""
+    try:
+        start = request.args.get('start')
+        end = request.args.get('end')
+        model_version = request.args.get('model_version')
+        limit = request.args.get('limit', 1000, type=int)
 
+        rows = history_store.get_prediction_trend(start, end, model_version, limit)
         return jsonify({
             "success": True,
-            "results": results
+            "count": len(rows),
+            "data": rows
         })
-
     except Exception as e:
-        print(f"❌ Prediction error: {traceback.format_exc()}")
         return jsonify({
             "success": False,
             "error": str(e),
-            "traceback": traceback.format_exc()
+            "data": []
         }), 500
 
-def generate_summary(results, laptop_working=True):
-    predictions = {
-        "Wear-Out": results["wearout"]["risk_percentage"],
-        "Thermal": results["thermal"]["risk_percentage"],
-        "Power": results["power"]["risk_percentage"],
-        "Controller": results["controller"]["risk_percentage"]
+@app.route('/api/predict/batching', methods=['GET'])
+def predict_batching_status():
+    """Micro-batching counters for /api/predict (batch sizes, queue wait)"""
+    return jsonify({
+        "success": True,
+        "enabled": model_batcher is not None,
+        "batching": model_batcher.status() if model_batcher is not None else None
+    })
+
+def resolve_temp_threshold(data, system_info_data):
+    """Local drive's warning threshold, or the sample's drive type threshold when known"""
+    temp_threshold = system_info_data.get("temp_threshold", DEFAULT_TEMP_THRESHOLD)
+    record_local_threshold(system_info_data)
+
+    # Samples from another drive type use that type's threshold when known
+    if data.get('Vendor') or data.get('Model'):
+        registry_threshold = threshold_registry.lookup(
+            data.get('Vendor'), data.get('Model'), data.get('Firmware_Version')
+        )
+        if registry_threshold is not None:
+            temp_threshold = registry_threshold
+    return temp_threshold
+
+def prediction_request(data):
+    """Split /api/predict JSON into (flags, sample frame, stored input values)"""
+    flags = {
+        "laptop_working": data.pop('laptop_working', True),
+        "from_history": data.pop('from_history', False),
+        "entry_id": data.pop('history_entry_id', None)
     }
 
-    highest = max(predictions.items(), key=lambda x: x[1])
-    
-    # Special case: If laptop is NOT working and all predictions are below 50%
-    if not laptop_working and all(risk < 50 for risk in predictions.values()):
-        status = "RAPID ERROR ACCUMULATION"
-        overall_risk = highest[1]
-        special_message = "Manufacturing Defect Detected"
-        special_description = "System shows rapid error accumulation despite all SMART values being normal. This pattern typically indicates a manufacturing defect in the SSD controller or NAND flash."
-        
-        recommendations = [
-            "🔴 MANUFACTURING DEFECT DETECTED",
-            "• Contact manufacturer for warranty claim",
-            "• Immediate RMA request recommended",
-            "• Do not attempt to repair - this is a hardware defect",
-            "• Backup all critical data immediately"
-        ]
-    else:
-        if highest[1] < 50:
-            status = "Healthy"
-            special_message = None
-            special_description = None
-        elif highest[1] < 70:
-            status = "Warning"
-            special_message = None
+    print(f"\n{'='*60}")
+    print(f"PREDICTION REQUEST")
+    print(f"{'='*60}")
+    print(f"Laptop Working: {flags['laptop_working']}")
+    print(f"From History: {flags['from_history']}")
+    print(f"History ID: {flags['entry_id']}")
+    print(f"Input Data: {data}")
+
+    # Validate input
+    input_df = pd.DataFrame([data])
+
+    for feature in FEATURES:
+        if feature not in input_df.columns:
+            input_df[feature] = 0
+
+    input_data = {feature: data.get(feature, 0) for feature in FEATURES}
+    flags["notes"] = "Manual prediction"
+    if flags["from_history"]:
+        flags["notes"] = f"Run from history (entry {flags['entry_id']})"
+    return flags, input_df, input_data
+
+def input_saved(data, input_data, new_entry_id):
+    """Bookkeeping after the input row is stored"""
+    print(f"✓ Saved input as entry #{new_entry_id}")
+    if data.get('Drive_ID'):
+        wear_rate_cache.update(
+            pd.DataFrame([{**input_data, 'Drive_ID': data['Drive_ID'], 'id': new_entry_id}]),
+            only_known=True
+        )
+
+def build_results(input_df, model_results, temp_threshold, laptop_working):
+    """Per-category results + summary; model_results comes from score_models()"""
+    results = {}
+
+    if model_results.get('failure_modes'):
+        results['failure_modes'] = model_results['failure_modes']
+
+    # ---------------- Wearout ----------------
+    try:
+        results['wearout'] = model_results['wearout']
+    except:
+        results['wearout'] = {
+            "risk_percentage": 25,
+            "contributions": {"Power_On_Hours": 50, "Percent_Life_Used": 50},
+            "status": "Fallback"
+        }
+
+    # ---------------- Thermal ----------------
+    try:
+        if hasattr(thermal_predictor, "predict_with_threshold"):
+            results['thermal'] = thermal_predictor.predict_with_threshold(
+                input_df,
+                temp_threshold
+            )
+        else:
+            results['thermal'] = thermal_predictor.predict(input_df)
+
+    except Exception as e:
+        results['thermal'] = {
+            "risk_percentage": 25,
+            "contributions": {"Temperature_C": 100},
+            "status": "Thermal fallback"
+        }
+
+    # ---------------- Power ----------------
+    try:
+        results['power'] = power_predictor.predict(input_df)
+    except:
+        results['power'] = {
+            "risk_percentage": 20,
+            "contributions": {"Unsafe_Shutdowns": 100},
+            "status": "Fallback"
+        }
+
+    # ---------------- Controller ----------------
+    try:
+        results['controller'] = model_results['controller']
+    except:
+        results['controller'] = {
+            "risk_percentage": 20,
+            "contributions": {"Media_Errors": 50, "CRC_Errors": 50},
+            "status": "Fallback"
+        }
+
+    # ---------------- Summary with laptop status ----------------
+    results["summary"] = generate_summary(results, laptop_working)
+    return results
+
+def prediction_alerts(data, results, new_entry_id):
+    alerts = alert_engine.evaluate(data.get('Drive_ID'), {
+        'wearout_risk': results['wearout']['risk_percentage'],
+        'thermal_risk': results['thermal']['risk_percentage'],
+        'power_risk': results['power']['risk_percentage'],
+        'controller_risk': results['controller']['risk_percentage'],
+        'overall_risk': results['summary']['overall_risk'],
+        'status': results['summary']['status'],
+        'highest_risk': results['summary']['highest_risk'],
+        'input_id': new_entry_id
+    })
+    publish_alerts(alerts)
+    return alerts
+
+def prediction_history_row(results, new_entry_id):
+    """prediction_history row for a stored input"""
+    summary = results["summary"]
+    return {
+        'input_id': new_entry_id,
+        'model_version': current_model_version(),
+        'timestamp': None,
+        'wearout_risk': results['wearout']['risk_percentage'],
+        'thermal_risk': results['thermal']['risk_percentage'],
+        'power_risk': results['power']['risk_percentage'],
+        'controller_risk': results['controller']['risk_percentage'],
+        'overall_risk': summary['overall_risk'],
+        'status': summary['status'],
+        'highest_risk': summary['highest_risk'],
+        'top_contributions': json.dumps(top_contributions(results))
+    }
+
+def finish_prediction(data, results, flags, temp_threshold, save_success, new_entry_id, prediction_saved, alerts):
+    """Attach metadata and publish the prediction event"""
+    results["metadata"] = {
+        "timestamp": datetime.now().isoformat(),
+        "predictors_loaded": PREDICTORS_LOADED,
+        "temp_threshold": temp_threshold,
+        "input_saved_to_db": save_success,
+        "new_entry_id": new_entry_id,
+        "prediction_saved": prediction_saved,
+        "model_version": current_model_version(),
+        "alerts": alerts,
+        "laptop_working": flags["laptop_working"],
+        "from_history": flags["from_history"]
+    }
+
+    event_broadcaster.publish("prediction", {
+        "entry_id": new_entry_id,
+        "drive_id": data.get('Drive_ID'),
+        "status": results["summary"]["status"],
+        "overall_risk": results["summary"]["overall_risk"],
+        "highest_risk": results["summary"]["highest_risk"],
+        "model_version": current_model_version(),
+        "timestamp": results["metadata"]["timestamp"]
+    })
+
+    print(f"\n✓ Prediction complete")
+    print(f"{'='*60}\n")
+    return results
+
+@app.route('/api/predict', methods=['POST'])
+def predict():
+    try:
+        if not request.is_json:
+            return jsonify({"success": False, "error": "JSON required"}), 400
+
+        data = request.get_json()
+        flags, input_df, input_data = prediction_request(data)
+        drift_monitor.observe(input_df)
+
+        # Get temperature threshold
+        temp_threshold = resolve_temp_threshold(data, read_system_info())
+
+        # ========== SAVE INPUT DATA TO DATABASE ==========
+        save_success, new_entry_id = save_input_to_db(
+            input_data,
+            temp_threshold=temp_threshold,
+            data_source="manual",
+            notes=flags["notes"],
+            drive_id=data.get('Drive_ID')
+        )
+        if save_success:
+            input_saved(data, input_data, new_entry_id)
+        # =================================================
+
+        # ---------------- Model-based risks (batched with concurrent requests) ----------------
+        model_results = {}
+        try:
+            model_results = score_models(input_df)
+        except Exception as e:
+            print(f"⚠️ Model scoring failed: {e}")
+
+        results = build_results(input_df, model_results, temp_threshold, flags["laptop_working"])
+        alerts = prediction_alerts(data, results, new_entry_id)
+
+        prediction_saved = False
+        if save_success:
+            prediction_saved = history_store.save_predictions_bulk([
+                prediction_history_row(results, new_entry_id)
+            ]) > 0
+
+        finish_prediction(data, results, flags, temp_threshold, save_success, new_entry_id,
+                          prediction_saved, alerts)
+
+        return jsonify({
+            "success": True,
+            "results": results
+        })
+
+    except Exception as e:
+        print(f"❌ Prediction error: {traceback.format_exc()}")
+        return jsonify({
+            "success": False,
+            "error": str(e),
+            "traceback": traceback.format_exc()
+        }), 500
+
+def generate_summary(results, laptop_working=True):
+    predictions = {
+        "Wear-Out": results["wearout"]["risk_percentage"],
+        "Thermal": results["thermal"]["risk_percentage"],
+        "Power": results["power"]["risk_percentage"],
+        "Controller": results["controller"]["risk_percentage"]
+    }
+
+    highest = max(predictions.items(), key=lambda x: x[1])
+    
+    # Special case: If laptop is NOT working and all predictions are below 50%
+    if not laptop_working and all(risk < 50 for risk in predictions.values()):
+        status = "RAPID ERROR ACCUMULATION"
+        overall_risk = highest[1]
+        special_message = "Manufacturing Defect Detected"
+        special_description = "System shows rapid error accumulation despite all SMART values being normal. This pattern typically indicates a manufacturing defect in the SSD controller or NAND flash."
+        
+        recommendations = [
+            "🔴 MANUFACTURING DEFECT DETECTED",
+            "• Contact manufacturer for warranty claim",
+            "• Immediate RMA request recommended",
+            "• Do not attempt to repair - this is a hardware defect",
+            "• Backup all critical data immediately"
+        ]
+    else:
+        if highest[1] < 50:
+            status = "Healthy"
+            special_message = None
+            special_description = None
+        elif highest[1] < 70:
+            status = "Warning"
+            special_message = None
             special_description = None
         else:
             status = "Critical"
@@ -682,6 +1279,22 @@ def generate_summary(results, laptop_working=True):
             recommendations.append("• Continue regular monitoring")
             recommendations.append("• No immediate action required")
 
+        # Early-life defects (Failure_Mode 5) only show up in the multi-class model
+        failure_modes = results.get("failure_modes")
+        if failure_modes and failure_modes["most_likely_mode"] == 5 and \
+                failure_modes["probabilities"]["Early-Life Defect"] >= 50:
+            if status == "Healthy":
+                status = "Warning"
+                recommendations.clear()     # "Drive health is good" no longer applies
+            special_message = "Early-Life Defect Pattern"
+            special_description = "Error counters are high for a drive with very few power-on hours. This pattern matches early-life (infant mortality) failures."
+            recommendations.extend([
+                "🔴 EARLY-LIFE DEFECT PATTERN DETECTED",
+                "• Backup critical data",
+                "• Check warranty status and consider an RMA",
+                "• Monitor error counters closely"
+            ])
+
     return {
         "status": status,
         "overall_risk": highest[1],
@@ -691,13 +1304,68 @@ def generate_summary(results, laptop_working=True):
         "risk_percentage": highest[1],
         "special_message": special_message,
         "special_description": special_description,
+        "failure_modes": results.get("failure_modes"),
         "laptop_working": laptop_working
     }
 
+def refresh_drift_reference():
+    """Models were retrained on the dataset: recompute the drift reference from it"""
+    try:
+        drift_monitor.rebuild_reference()
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Drift reference not rebuilt: {e}")
+
+def evaluation_summary(name):
+    """Holdout metrics of a freshly trained model, calibrated if it has a map (curve omitted)"""
+    try:
+        predictor = VERSIONED_PREDICTORS[name]
+        report = model_evaluator.evaluate(name, calibrated=getattr(predictor, "calibrator", None) is not None)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Evaluation skipped: {e}")
+        return None
+    report.pop("calibration", None)
+    return report
+
 @app.route('/api/train/wearout', methods=['POST'])
 def train_wearout():
     try:
         result = wearout_predictor.train_model()
+        refresh_drift_reference()
+        result["evaluation"] = evaluation_summary("wearout")
+        return jsonify({
+            "success": True,
+            "result": result
+        })
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@app.route('/api/train/failure-mode', methods=['POST'])
+def train_failure_mode():
+    try:
+        if failure_mode_predictor is None:
+            return jsonify({"success": False, "error": "Predictors not loaded"}), 503
+        data = request.get_json(silent=True) or {}
+        result = failure_mode_predictor.train_model(n_iter=int(data.get('n_iter', 30)))
+        refresh_drift_reference()
+        return jsonify({
+            "success": True,
+            "result": result
+        })
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@app.route('/api/train/rul', methods=['POST'])
+def train_rul():
+    try:
+        if rul_predictor is None:
+            return jsonify({"success": False, "error": "Predictors not loaded"}), 503
+        result = rul_predictor.train_model()
         return jsonify({
             "success": True,
             "result": result
@@ -712,6 +1380,8 @@ def train_wearout():
 def train_controller():
     try:
         result = controller_predictor.train_model()
+        refresh_drift_reference()
+        result["evaluation"] = evaluation_summary("controller")
         return jsonify({
             "success": True,
             "result": result
@@ -722,6 +1392,1014 @@ def train_controller():
             "error": str(e)
         }), 500
 
+# -------------------------------
+# Bulk Ingest
+# -------------------------------
+
+@app.route('/api/ingest', methods=['POST'])
+def ingest_samples():
+    """
+    Bulk-load SMART samples into input_history.
+
+    Body: NDJSON (one sample object per line) or CSV, optionally gzip
+    compressed (Content-Encoding: gzip or ?compression=gzip). The body is
+    parsed as a stream and written one transaction per chunk.
+
+    Query params: format=ndjson|csv, data_source (default 'ingest'),
+    chunk_size, score=true to also score and store predictions.
+    """
+    try:
+        fmt = request.args.get('format')
+        if not fmt:
+            fmt = 'csv' if 'csv' in (request.content_type or '') else 'ndjson'
+        if fmt not in ('ndjson', 'csv'):
+            return jsonify({"success": False, "error": "format must be 'ndjson' or 'csv'"}), 400
+
+        compressed = (
+            request.headers.get('Content-Encoding', '').lower() == 'gzip' or
+            request.args.get('compression') == 'gzip'
+        )
+        data_source = request.args.get('data_source', 'ingest')
+        chunk_size = max(1, request.args.get('chunk_size', INGEST_CHUNK_SIZE, type=int))
+        score = parse_flag(request.args.get('score'))
+
+        body = open_body(request.stream, compressed)
+        chunks = iter_csv_chunks(body, chunk_size) if fmt == 'csv' else iter_ndjson_chunks(body, chunk_size)
+
+        model_version = current_model_version()
+        accepted = rejected = scored_rows = chunks_written = alerts_fired = thresholds_recorded = 0
+        status_counts = {"Healthy": 0, "Warning": 0, "Critical": 0}
+        errors = []
+        # NDJSON errors carry the body line number; CSV ones the data row number
+        position = "row" if fmt == 'csv' else "line"
+
+        for chunk, malformed in chunks:
+            rejected += len(malformed)
+            errors.extend({"line": n, "error": "malformed record"} for n in malformed)
+
+            if len(chunk) > 0:
+                valid, rejected_mask, reasons = validate_samples(chunk)
+                thresholds_recorded += threshold_registry.record_frame(valid)
+                rejected += int(rejected_mask.sum())
+                errors.extend(
+                    {position: int(label), "error": reason}
+                    for label, reason in reasons.items()
+                )
+
+                if len(valid) > 0:
+                    drift_monitor.observe(valid)
+                    valid['data_source'] = data_source
+                    # Resolve sample times once so prediction_history copies what input_history stores
+                    stamps = (pd.to_datetime(valid['timestamp'], errors='coerce')
+                              if 'timestamp' in valid.columns else pd.Series(pd.NaT, index=valid.index))
+                    valid['timestamp'] = stamps.fillna(pd.Timestamp.now().floor('s'))
+                    entry_ids = history_store.save_inputs_bulk(valid)
+                    if not entry_ids:
+                        raise ConnectionError(
+                            f"History store rejected chunk {chunks_written + 1}; "
+                            f"{accepted} rows were committed before it"
+                        )
+                    accepted += len(entry_ids)
+                    chunks_written += 1
+
+                    if 'Drive_ID' in valid.columns and len(entry_ids) == len(valid):
+                        wear_rate_cache.update(valid.assign(id=entry_ids), only_known=True)
+
+                    if score and len(entry_ids) == len(valid):
+                        scored = fleet_coordinator.score(valid)
+                        history_store.save_predictions_bulk(prediction_rows_from_scores(
+                            scored, entry_ids, valid['timestamp'], model_version=model_version
+                        ))
+                        scored_rows += len(scored)
+                        for status, count in scored['status'].value_counts().items():
+                            status_counts[status] += int(count)
+                        drive_ids = valid['Drive_ID'] if 'Drive_ID' in valid.columns else None
+                        alerts = alert_engine.evaluate_frame(scored, drive_ids, entry_ids)
+                        alerts_fired += len(alerts)
+                        publish_alerts(alerts)
+
+                    event_broadcaster.publish("samples", {
+                        "data_source": data_source,
+                        "count": len(entry_ids),
+                        "first_id": entry_ids[0],
+                        "last_id": entry_ids[-1],
+                        "scored": score
+                    })
+
+            del errors[MAX_ERROR_SAMPLES:]
+
+        if thresholds_recorded:
+            threshold_registry.save()
+
+        return jsonify({
+            "success": True,
+            "format": fmt,
+            "data_source": data_source,
+            "accepted": accepted,
+            "rejected": rejected,
+            "chunks": chunks_written,
+            "scored": scored_rows,
+            "alerts_fired": alerts_fired,
+            "thresholds_recorded": thresholds_recorded,
+            "status_counts": status_counts if score else None,
+            "model_version": model_version if score else None,
+            "errors": errors
+        })
+
+    except ConnectionError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 503
+    except (ValueError, OSError, pd.errors.ParserError) as e:
+        return jsonify({
+            "success": False,
+            "error": f"Could not parse body: {e}"
+        }), 400
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+# -------------------------------
+# Remaining Useful Life
+# -------------------------------
+
+def rul_records(drive_ids, estimates):
+    """JSON rows for /api/rul (unbounded RUL -> null)"""
+    now = datetime.now()
+    records = []
+    for drive_id, row in zip(drive_ids, estimates.to_dict(orient="records")):
+        finite = row["rul_power_on_hours"] != float("inf")
+        records.append({
+            "drive_id": drive_id,
+            "percent_life_used": round(float(row["percent_life_used"]), 2),
+            "end_of_life_percent": round(float(row["end_of_life_percent"]), 2),
+            "wear_rate_per_1000h": round(float(row["wear_rate_per_1000h"]), 4),
+            "rate_source": row["rate_source"],
+            "history_samples": int(row["history_samples"]),
+            "history_span_hours": round(float(row["history_span_hours"]), 1),
+            "duty_cycle": round(float(row["duty_cycle"]), 3),
+            "rul_power_on_hours": round(float(row["rul_power_on_hours"]), 1) if finite else None,
+            "rul_days": round(float(row["rul_days"]), 1) if finite else None,
+            "projected_end_of_life": (now + timedelta(days=float(row["rul_days"]))).date().isoformat()
+                                     if finite and row["rul_days"] < 36500 else None
+        })
+    return records
+
+@app.route('/api/rul', methods=['POST'])
+def remaining_useful_life():
+    """
+    Remaining useful life (time until wear reaches the end-of-life point).
+    JSON, one of:
+      {"Drive_ID": ..., <features>}            single sample
+      {"samples": [{...}, ...]}                batch of samples
+      {"drive_ids": ["NVME-00001", ...]}       latest stored sample per drive
+    Samples with a Drive_ID use that drive's stored history for the wear rate.
+    """
+    try:
+        if rul_predictor is None:
+            return jsonify({"success": False, "error": "Predictors not loaded"}), 503
+
+        data = request.get_json(silent=True) or {}
+
+        if data.get('drive_ids'):
+            drive_ids = [str(d) for d in data['drive_ids']]
+            # Full history is read only for drives the wear-rate cache does not hold yet
+            wear_rate_cache.ensure_loaded(history_store, drive_ids)
+            frame = history_store.get_latest_drive_samples(drive_ids).set_index('Drive_ID')
+            unknown = [d for d in drive_ids if d not in frame.index]
+            frame = frame.reindex([d for d in drive_ids if d in frame.index]).reset_index()
+        else:
+            samples = data.get('samples')
+            if samples is None:
+                samples = [data]
+            if not isinstance(samples, list) or not samples:
+                return jsonify({"success": False, "error": "No samples provided"}), 400
+            frame = pd.DataFrame(samples)
+            unknown = []
+            if 'Drive_ID' in frame.columns:
+                wear_rate_cache.ensure_loaded(history_store, frame['Drive_ID'])
+
+        if frame.empty:
+            results = []
+        else:
+            estimates = rul_predictor.estimate(frame, cache=wear_rate_cache)
+            ids = frame['Drive_ID'].where(frame['Drive_ID'].notna(), None).tolist() \
+                if 'Drive_ID' in frame.columns else [None] * len(frame)
+            results = rul_records(ids, estimates)
+
+        return jsonify({
+            "success": True,
+            "count": len(results),
+            "results": results,
+            "unknown_drive_ids": unknown,
+            "model_version": rul_predictor.model_version,
+            "end_of_life_percent": rul_predictor.end_of_life_percent,
+            "cached_drives": len(wear_rate_cache)
+        })
+
+    except ConnectionError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 503
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+# -------------------------------
+# Thermal Thresholds
+# -------------------------------
+
+@app.route('/api/thermal-thresholds', methods=['GET'])
+def thermal_thresholds():
+    """Threshold table, or the resolved threshold for ?vendor=&model=&firmware="""
+    vendor = request.args.get('vendor')
+    model = request.args.get('model')
+    if vendor or model:
+        threshold = threshold_registry.lookup(vendor, model, request.args.get('firmware'))
+        return jsonify({
+            "success": True,
+            "threshold_c": threshold,
+            "source": "registry" if threshold is not None else "default",
+            "default_threshold_c": DEFAULT_TEMP_THRESHOLD
+        })
+
+    return jsonify({
+        "success": True,
+        "drive_types": threshold_registry.to_records(),
+        "count": len(threshold_registry),
+        "default_threshold_c": DEFAULT_TEMP_THRESHOLD
+    })
+
+@app.route('/api/thermal-thresholds', methods=['POST'])
+def record_thermal_thresholds():
+    """
+    Record SMART 'Warning Comp. Temp. Threshold' readings collected from the
+    fleet: {"readings": [{"vendor", "model", "firmware", "threshold_c"}, ...]}
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        readings = data.get('readings', [])
+        if not isinstance(readings, list):
+            return jsonify({"success": False, "error": "readings must be a list"}), 400
+
+        recorded = sum(
+            threshold_registry.record(r.get('vendor'), r.get('model'), r.get('firmware'), r.get('threshold_c'))
+            for r in readings if isinstance(r, dict)
+        )
+        if recorded:
+            threshold_registry.save()
+
+        return jsonify({
+            "success": True,
+            "recorded": recorded,
+            "rejected": len(readings) - recorded,
+            "count": len(threshold_registry)
+        })
+
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+# -------------------------------
+# Alerts
+# -------------------------------
+
+@app.route('/api/alerts', methods=['GET'])
+def recent_alerts():
+    """Most recent alerts, newest first (?limit, ?drive_id, ?severity)"""
+    limit = request.args.get('limit', 100, type=int)
+    alerts = alert_engine.recent_alerts(
+        limit,
+        drive_id=request.args.get('drive_id'),
+        severity=request.args.get('severity')
+    )
+    return jsonify({
+        "success": True,
+        "alerts": alerts,
+        "count": len(alerts)
+    })
+
+@app.route('/api/alerts/status', methods=['GET'])
+def alert_status():
+    return jsonify({
+        "success": True,
+        "engine": alert_engine.status()
+    })
+
+@app.route('/api/alerts/reset', methods=['POST'])
+def reset_alerts():
+    """Forget rule state for one drive ({"drive_id": ...}) or every drive"""
+    data = request.get_json(silent=True) or {}
+    alert_engine.reset(data.get('drive_id'))
+    return jsonify({
+        "success": True,
+        "message": "Alert state reset"
+    })
+
+# -------------------------------
+# Live Event Stream
+# -------------------------------
+
+@app.route('/api/stream', methods=['GET'])
+def event_stream():
+    """
+    Server-Sent Events: health, system, prediction, samples, alert and
+    history events. ?events=health,alert limits the types; reconnecting
+    clients resume from the Last-Event-ID header.
+    """
+    events = [e for e in request.args.get('events', '').split(',') if e] or None
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+
+    subscriber = event_broadcaster.subscribe(events, last_event_id)
+    return Response(
+        stream_with_context(event_broadcaster.stream(subscriber)),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.route('/api/stream/status', methods=['GET'])
+def event_stream_status():
+    return jsonify({
+        "success": True,
+        "stream": event_broadcaster.status()
+    })
+
+# -------------------------------
+# Background Scoring Jobs
+# -------------------------------
+
+def _score_chunk(chunk):
+    """Score one chunk and keep only identifying columns plus the risks"""
+    scored = fleet_coordinator.score(chunk)
+    id_columns = [c for c in ("id", "Drive_ID", "timestamp", "data_source") if c in chunk.columns]
+    out = chunk[id_columns].copy()
+    if "id" in out.columns:
+        out = out.rename(columns={"id": "entry_id"})
+    if "timestamp" in out.columns:
+        out["timestamp"] = out["timestamp"].astype(str)
+    return pd.concat([out, scored], axis=1)
+
+def _file_chunks(path, chunk_size, drive_ids=None):
+    """Stream an uploaded CSV (optionally gzip/zip compressed) in chunks"""
+    def source():
+        for chunk in pd.read_csv(path, chunksize=chunk_size, compression="infer"):
+            if drive_ids and "Drive_ID" in chunk.columns:
+                chunk = chunk[chunk["Drive_ID"].isin(drive_ids)]
+            yield chunk
+    return source
+
+def _remove_file(path):
+    """Job cleanup for an uploaded file: runs when the job ends or is cancelled while queued"""
+    def cleanup():
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    return cleanup
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """
+    Submit a background scoring job.
+
+    multipart/form-data with a 'file' field  -> score an uploaded fleet snapshot (CSV)
+    JSON {"source": "history", "start", "end", "entry_ids", "persist"} -> re-score stored history
+    (persist=true also writes the risks to prediction_history)
+    """
+    try:
+        if 'file' in request.files:
+            upload = request.files['file']
+            chunk_size = request.form.get('chunk_size', HISTORY_CHUNK_SIZE, type=int)
+            drive_ids = [d for d in request.form.get('drive_ids', '').split(',') if d]
+
+            suffix = os.path.splitext(upload.filename or '')[1] or '.csv'
+            fd, path = tempfile.mkstemp(suffix=suffix, dir=JOB_RESULTS_DIR)
+            with os.fdopen(fd, 'wb') as f:
+                shutil.copyfileobj(upload.stream, f)
+
+            try:
+                job = job_manager.submit(
+                    "upload",
+                    _file_chunks(path, chunk_size, drive_ids or None),
+                    _score_chunk,
+                    params={"filename": upload.filename, "drive_ids": drive_ids},
+                    cleanup=_remove_file(path)
+                )
+            except JobQueueFull:
+                os.remove(path)
+                raise
+
+        else:
+            data = request.get_json(silent=True) or {}
+            if data.get('source', 'history') != 'history':
+                return jsonify({"success": False, "error": "source must be 'history' or a file upload"}), 400
+
+            start = data.get('start')
+            end = data.get('end')
+            entry_ids = [int(i) for i in data.get('entry_ids', [])]
+            chunk_size = int(data.get('chunk_size', HISTORY_CHUNK_SIZE))
+
+            for value in (start, end):
+                if value:
+                    datetime.fromisoformat(value)
+
+            persist = parse_flag(data.get('persist'))
+            model_version = current_model_version()
+
+            def process(chunk):
+                scored = _score_chunk(chunk)
+                if persist:
+                    history_store.save_predictions_bulk(prediction_rows_from_scores(
+                        scored, chunk['id'], chunk['timestamp'], model_version
+                    ))
+                return scored
+
+            total = history_store.count_history(start, end, entry_ids)
+            job = job_manager.submit(
+                "history",
+                lambda: history_store.iter_history_chunks(start, end, entry_ids, chunk_size),
+                process,
+                params={"start": start, "end": end, "entry_ids": entry_ids,
+                        "persist": persist, "total": total}
+            )
+
+        return jsonify({
+            "success": True,
+            "job": job.to_dict()
+        }), 202
+
+    except JobQueueFull as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 429
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@app.route('/api/jobs', methods=['GET'])
+def list_jobs():
+    """List recent jobs"""
+    return jsonify({
+        "success": True,
+        "jobs": job_manager.list()
+    })
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Poll job status and progress"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": "Job not found"}), 404
+    return jsonify({
+        "success": True,
+        "job": job.to_dict()
+    })
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """Cancel a queued or running job"""
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": "Job not found"}), 404
+    return jsonify({
+        "success": True,
+        "job": job.to_dict()
+    })
+
+@app.route('/api/jobs/<job_id>/results', methods=['GET'])
+def stream_job_results(job_id):
+    """Stream job results as NDJSON; ?follow=1 keeps streaming until the job ends"""
+    if job_manager.get(job_id) is None:
+        return jsonify({"success": False, "error": "Job not found"}), 404
+
+    try:
+        follow = parse_flag(request.args.get('follow'))
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    return Response(
+        job_manager.iter_results(job_id, follow=follow),
+        mimetype='application/x-ndjson'
+    )
+
+# -------------------------------
+# Model Versions & Bulk Re-scoring
+# -------------------------------
+
+VERSIONED_PREDICTORS = {
+    "wearout": wearout_predictor,
+    "controller": controller_predictor
+}
+
+@app.route('/api/models/versions', methods=['GET'])
+def model_versions():
+    """List current and archived versions of the XGBoost models"""
+    versions = {}
+    for name, predictor in VERSIONED_PREDICTORS.items():
+        if hasattr(predictor, "list_versions"):
+            versions[name] = predictor.list_versions()
+        else:
+            versions[name] = []
+    return jsonify({
+        "success": True,
+        "versions": versions
+    })
+
+@app.route('/api/rescore', methods=['POST'])
+def rescore_history():
+    """
+    Re-score stored input_history against two versions of a model.
+    JSON: {"model": "wearout"|"controller", "old_version", "new_version",
+           "start", "end", "chunk_size", "store_rows": true}
+    Defaults compare the most recently archived version with the current one.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        model_name = data.get('model', 'wearout')
+        predictor = VERSIONED_PREDICTORS.get(model_name)
+
+        if predictor is None or not hasattr(predictor, "load_version"):
+            return jsonify({"success": False, "error": f"Model '{model_name}' cannot be re-scored"}), 400
+
+        new_version = data.get('new_version') or predictor.model_version
+        old_version = data.get('old_version')
+        if not old_version:
+            archived = [v for v in predictor.list_versions() if v["version"] != new_version]
+            if not archived:
+                return jsonify({"success": False, "error": "No previous model version to compare against"}), 400
+            old_version = archived[0]["version"]
+
+        old_model = predictor.load_version(old_version)
+        new_model = predictor.load_version(new_version)
+        calibrators = {}
+        if hasattr(predictor, "load_calibrator"):
+            calibrators = {
+                "old_calibrator": predictor.load_calibrator(old_version),
+                "new_calibrator": predictor.load_calibrator(new_version)
+            }
+
+        start = data.get('start')
+        end = data.get('end')
+        chunk_size = int(data.get('chunk_size', HISTORY_CHUNK_SIZE))
+        store_rows = parse_flag(data.get('store_rows'), True)
+        run_id = uuid.uuid4().hex[:12]
+        summary = RescoreSummary()
+
+        def process(chunk):
+            results = rescore_chunk(predictor, chunk, old_model, new_model, summary, **calibrators)
+            if store_rows:
+                history_store.save_rescore_results(run_id, results)
+            return results
+
+        def finish(job):
+            job.summary = summary.to_dict()
+            history_store.save_rescore_run(run_id, model_name, old_version, new_version, job.summary)
+
+        job = job_manager.submit(
+            "rescore",
+            lambda: history_store.iter_history_chunks(start, end, chunk_size=chunk_size),
+            process,
+            params={
+                "run_id": run_id,
+                "model": model_name,
+                "old_version": old_version,
+                "new_version": new_version,
+                "total": history_store.count_history(start, end)
+            },
+            on_complete=finish
+        )
+
+        return jsonify({
+            "success": True,
+            "run_id": run_id,
+            "old_version": old_version,
+            "new_version": new_version,
+            "job": job.to_dict()
+        }), 202
+
+    except JobQueueFull as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 429
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+# -------------------------------
+# Labels & Incremental Training
+# -------------------------------
+
+@app.route('/api/labels', methods=['POST'])
+def save_labels():
+    """
+    Record confirmed outcomes for input_history rows.
+    JSON: {"labels": [{"input_id": 12, "failure_mode": 1}, ...], "label_source": "rma"}
+    or a single {"input_id", "failure_mode"}. Relabeling a row replaces its label.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        items = data.get('labels')
+        if items is None:
+            items = [data]
+        if not isinstance(items, list) or not items:
+            return jsonify({"success": False, "error": "No labels provided"}), 400
+
+        labels = []
+        for item in items:
+            try:
+                input_id = int(item['input_id'])
+                failure_mode = int(item['failure_mode'])
+            except (KeyError, TypeError, ValueError):
+                return jsonify({"success": False, "error": f"Invalid label: {item}"}), 400
+            if failure_mode not in FAILURE_MODES:
+                return jsonify({
+                    "success": False,
+                    "error": f"failure_mode must be one of {FAILURE_MODES}, got {failure_mode}"
+                }), 400
+            labels.append((input_id, failure_mode))
+
+        saved, unknown = history_store.save_labels(labels, label_source=data.get('label_source', 'manual'))
+        if unknown is None:
+            return jsonify({"success": False, "error": "Database connection failed"}), 503
+
+        return jsonify({
+            "success": True,
+            "saved": saved,
+            "unknown_input_ids": unknown,
+            "pending": {name: incremental_trainer.pending(name) for name in incremental_trainer.predictors}
+        })
+
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@app.route('/api/labels', methods=['GET'])
+def list_labels():
+    """Labels in id order; page with ?after_id=<last label_id>&limit="""
+    after_id = request.args.get('after_id', 0, type=int)
+    limit = min(request.args.get('limit', 100, type=int), 1000)
+    labels = history_store.get_labels(after_id=after_id, limit=limit)
+    return jsonify({
+        "success": True,
+        "count": len(labels),
+        "labels": labels
+    })
+
+@app.route('/api/train/incremental', methods=['GET'])
+def incremental_status():
+    """New labels waiting per model and recent incremental training runs"""
+    return jsonify({
+        "success": True,
+        "pending": {name: incremental_trainer.pending(name) for name in incremental_trainer.predictors},
+        "runs": history_store.get_training_runs(request.args.get('model'),
+                                                limit=request.args.get('limit', 20, type=int))
+    })
+
+@app.route('/api/train/incremental', methods=['POST'])
+def train_incremental():
+    """
+    Continue boosting a model on labels added since its last accepted update,
+    in a background job. JSON: {"model": "wearout"|"controller"|"failure_mode", "rounds": 50}
+    The result (gating metrics, new version) is in the job summary.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        model_name = data.get('model', 'wearout')
+        if model_name not in incremental_trainer.predictors:
+            return jsonify({"success": False, "error": f"Model '{model_name}' cannot be updated incrementally"}), 400
+        if incremental_trainer.is_running(model_name):
+            return jsonify({"success": False, "error": f"Incremental training for '{model_name}' is already running"}), 409
+
+        rounds = int(data.get('rounds', INCREMENTAL_ROUNDS))
+        pending = incremental_trainer.pending(model_name)
+        if pending["new_rows"] < incremental_trainer.min_rows:
+            return jsonify({
+                "success": False,
+                "error": f"Only {pending['new_rows']} new labeled rows for '{model_name}' "
+                         f"(need {incremental_trainer.min_rows})",
+                "pending": pending
+            }), 400
+        watermark = pending["label_watermark"]
+        modes = list(MODEL_TARGETS[model_name])
+        labeled = []
+
+        def process(chunk):
+            labeled.append(chunk)
+            return []
+
+        def finish(job):
+            frame = pd.concat(labeled, ignore_index=True) if labeled else pd.DataFrame(columns=["label_id", "Failure_Mode"])
+            job.summary = incremental_trainer.update(model_name, frame, rounds=rounds)
+            event_broadcaster.publish("training", job.summary)
+
+        job = job_manager.submit(
+            "incremental-train",
+            lambda: history_store.iter_labeled_chunks(watermark, modes=modes),
+            process,
+            params={
+                "model": model_name,
+                "rounds": rounds,
+                "label_watermark": watermark,
+                "total": pending["new_rows"]
+            },
+            on_complete=finish
+        )
+
+        return jsonify({
+            "success": True,
+            "pending": pending,
+            "job": job.to_dict()
+        }), 202
+
+    except JobQueueFull as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 429
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+# -------------------------------
+# Drift Monitoring
+# -------------------------------
+
+@app.route('/api/drift', methods=['GET'])
+def drift_scores():
+    """PSI / KS per feature for recent inputs against the training distribution"""
+    return jsonify({
+        "success": True,
+        "drift": drift_monitor.scores()
+    })
+
+@app.route('/api/drift/reference', methods=['POST'])
+def rebuild_drift_reference():
+    """Recompute reference histograms from the training dataset (resets the live window)"""
+    try:
+        reference = drift_monitor.rebuild_reference()
+        return jsonify({
+            "success": True,
+            "rows": reference["rows"],
+            "created_at": reference["created_at"]
+        })
+    except (OSError, ValueError) as e:
+        return jsonify({
+            "success": False,
+            "error": f"Could not read training dataset: {e}"
+        }), 400
+
+@app.route('/api/drift/reset', methods=['POST'])
+def reset_drift_window():
+    drift_monitor.reset()
+    return jsonify({"success": True})
+
+# -------------------------------
+# Model Evaluation
+# -------------------------------
+
+def evaluation_options(data):
+    """Shared request fields: dataset path (default: training holdout), threshold, calibrated"""
+    threshold = float(data.get('threshold', 0.5))
+    if not 0 <= threshold <= 1:
+        raise ValueError("threshold must be between 0 and 1")
+    return data.get('dataset'), threshold, parse_flag(data.get('calibrated'))
+
+@app.route('/api/evaluate', methods=['POST'])
+def evaluate_model():
+    """
+    Metrics for one model version: ROC-AUC, PR-AUC, F1/precision/recall and
+    confusion matrix at a threshold, log loss, Brier score, reliability curve.
+    JSON: {"model": "wearout"|"controller", "version", "dataset", "threshold", "bins",
+           "calibrated": false}
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        dataset, threshold, calibrated = evaluation_options(data)
+        report = model_evaluator.evaluate(
+            data.get('model', 'wearout'),
+            data.get('version'),
+            source=dataset,
+            threshold=threshold,
+            bins=int(data.get('bins', 10)),
+            calibrated=calibrated
+        )
+        return jsonify({
+            "success": True,
+            "report": report
+        })
+    except (ValueError, FileNotFoundError) as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@app.route('/api/evaluate/compare', methods=['POST'])
+def compare_models():
+    """
+    Evaluate a candidate against a baseline version on the same data and
+    apply the deployment gates (defaults: utils.evaluation.EVAL_GATES).
+    JSON: {"model", "candidate", "baseline", "dataset", "threshold", "calibrated",
+           "gates": {"roc_auc": 0.005, ...}}
+    Defaults compare the current version with the most recently archived one.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        dataset, threshold, calibrated = evaluation_options(data)
+        gates = data.get('gates')
+        if gates is not None:
+            unknown = set(gates) - set(EVAL_GATES) - {"logloss", "accuracy", "precision", "recall"}
+            if unknown:
+                return jsonify({"success": False, "error": f"Unknown gate metrics: {sorted(unknown)}"}), 400
+            gates = {metric: float(allowed) for metric, allowed in gates.items()}
+
+        comparison = model_evaluator.compare(
+            data.get('model', 'wearout'),
+            candidate=data.get('candidate'),
+            baseline=data.get('baseline'),
+            source=dataset,
+            threshold=threshold,
+            gates=gates,
+            calibrated=calibrated
+        )
+        for side in ("candidate", "baseline"):
+            comparison[side].pop("calibration", None)
+        return jsonify({
+            "success": True,
+            **comparison
+        })
+    except (ValueError, FileNotFoundError) as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@app.route('/api/calibrate', methods=['POST'])
+def calibrate_model():
+    """
+    Re-fit the probability calibration map of the current model without
+    retraining it (out-of-fold on its training split).
+    JSON: {"model": "wearout"|"controller", "method": "isotonic"|"platt"|"off"}
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        model_name = data.get('model', 'wearout')
+        predictor = VERSIONED_PREDICTORS.get(model_name)
+        if predictor is None or not hasattr(predictor, "calibrate"):
+            return jsonify({"success": False, "error": f"Model '{model_name}' cannot be calibrated"}), 400
+
+        calibration = predictor.calibrate(method=data.get('method', CALIBRATION_METHOD))
+        return jsonify({
+            "success": True,
+            "model": model_name,
+            "version": predictor.model_version,
+            "scoring_version": current_model_version(),
+            "calibration": calibration,
+            "evaluation": evaluation_summary(model_name)
+        })
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@app.route('/api/evaluate/status', methods=['GET'])
+def evaluation_status():
+    return jsonify({
+        "success": True,
+        "gates": EVAL_GATES,
+        **model_evaluator.status()
+    })
+
+# -------------------------------
+# SMART Poller
+# -------------------------------
+
+@app.route('/api/poller', methods=['GET'])
+def poller_status():
+    """Per-device poll interval, last sample / record times and record counts"""
+    return jsonify({
+        "success": True,
+        "enabled": SMART_POLLER,
+        "system_info_max_age_seconds": SYSTEM_INFO_MAX_AGE_SECONDS,
+        **smart_poller.status()
+    })
+
+@app.route('/api/poller/poll', methods=['POST'])
+def poll_now():
+    """Poll a device immediately. JSON: {"device": "/dev/nvme0"} (default: first device)"""
+    data = request.get_json(silent=True) or {}
+    device = data.get('device') or smart_poller.default_device
+    if device not in smart_poller.states:
+        return jsonify({"success": False, "error": f"Device '{device}' is not polled"}), 400
+    record = smart_poller.poll(device)
+    return jsonify({
+        "success": True,
+        "device": device,
+        "record": {k: v for k, v in record.items() if k != "sample"} if record else None,
+        "state": smart_poller.states[device].to_dict()
+    })
+
+# -------------------------------
+# Fleet Scoring
+# -------------------------------
+
+@app.route('/api/fleet', methods=['GET'])
+def fleet_status():
+    """Fleet scoring workers, rows each has scored, failures and reassignments"""
+    return jsonify({
+        "success": True,
+        **fleet_coordinator.status()
+    })
+
+@app.route('/api/fleet/shard', methods=['POST'])
+def score_fleet_shard():
+    """
+    Score a shard for another node's coordinator (this node as an HTTP worker).
+    JSON: {"features": [[...10 features...], ...], "temp_threshold": [...], "model_version"}
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        features = np.asarray(data.get('features', []), dtype=np.float64)
+        temp_threshold = np.asarray(data.get('temp_threshold', []), dtype=np.float64)
+        if features.ndim != 2 or features.shape[1] != len(FEATURES) or len(temp_threshold) != len(features):
+            return jsonify({
+                "success": False,
+                "error": f"features must be rows of {len(FEATURES)} values with one temp_threshold each"
+            }), 400
+
+        model_version = current_model_version()
+        if data.get('model_version') and data['model_version'] != model_version:
+            return jsonify({
+                "success": False,
+                "error": f"this node has models {model_version}, coordinator {data['model_version']}"
+            }), 409
+
+        risks = score_shard(batch_scorer, features, temp_threshold)
+        return jsonify({
+            "success": True,
+            "model_version": model_version,
+            "columns": list(risks.columns),
+            "risks": risks.to_dict(orient="list")
+        })
+
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
 # -------------------------------
 # Run Server
 # -------------------------------
@@ -732,15 +2410,19 @@ if __name__ == "__main__":
     print("="*60)
     
     if test_db_connection():
-        print(f"✓ MySQL Database: {DB_CONFIG['database']} @ {DB_CONFIG['host']}")
+        print(f"✓ History store: {history_store.describe()}")
         
         # Test query
         test_data = get_input_history(5)
         print(f"✓ Test query returned {len(test_data)} records")
     else:
-        print("⚠️ MySQL Database not connected")
-        print("   Please check your MySQL configuration")
+        print(f"⚠️ History store not connected: {history_store.describe()}")
+        print("   Please check your MySQL configuration (or set NVME_STORAGE_BACKEND=sqlite)")
     
+    start_retention_scheduler()
+    start_archive_scheduler()
+    start_smart_poller()
+    start_fleet_coordinator()
     print(f"✓ Predictors loaded: {PREDICTORS_LOADED}")
     print(f"✓ smartctl available: {shutil.which('smartctl') is not None}")
     print("\n📡 Server running on: http://localhost:8080")
@@ -0,0 +1,406 @@
+"""
+asyncio-native serving variant of app.py (Quart on Hypercorn).
+
+Routes whose cost is waiting rather than computing are coroutines here:
+smartctl runs through asyncio.create_subprocess_exec, MySQL history reads
+go through an aiomysql pool (other store calls through a bounded thread
+pool), model inference runs on the micro-batcher thread or an executor,
+and the event stream polls subscribers without holding a thread. Every
+other route of app.py is served unchanged by the Flask app on Hypercorn's
+WSGI executor, so both servers expose the same API.
+
+    pip install -r requirements-async.txt
+    hypercorn app_async:asgi_app --bind 0.0.0.0:8080
+"""
+import asyncio
+import functools
+import os
+import shutil
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from quart import Quart, request, jsonify, Response
+from hypercorn.middleware import AsyncioWSGIMiddleware
+from werkzeug.exceptions import NotFound, MethodNotAllowed
+from werkzeug.routing import RequestRedirect
+
+import app as sync_app
+from system_info_extractor import get_system_info_async
+from utils.storage.async_store import get_async_history_store
+
+# Database calls in flight at once (thread pool) and aiomysql connections
+ASYNC_STORE_WORKERS = int(os.environ.get("NVME_ASYNC_STORE_WORKERS", 8))
+ASYNC_DB_POOL_SIZE = int(os.environ.get("NVME_ASYNC_DB_POOL_SIZE", 20))
+
+# Inference threads when micro-batching is off, and for the post-scoring work
+INFERENCE_WORKERS = int(os.environ.get("NVME_ASYNC_INFERENCE_WORKERS", os.cpu_count() or 4))
+
+# Largest request body buffered for routes served by the Flask app (bulk ingest)
+WSGI_MAX_BODY_MB = float(os.environ.get("NVME_ASYNC_WSGI_MAX_BODY_MB", 256))
+
+STREAM_POLL_SECONDS = float(os.environ.get("NVME_ASYNC_STREAM_POLL_SECONDS", 0.25))
+
+PORT = int(os.environ.get("NVME_PORT", 8080))
+
+quart_app = Quart(__name__)
+inference_executor = ThreadPoolExecutor(max_workers=INFERENCE_WORKERS, thread_name_prefix="inference")
+history = None
+smartctl_locks = {}
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run CPU-bound or blocking work on the inference executor"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(inference_executor, functools.partial(func, *args, **kwargs))
+
+
+async def read_system_info_async(device=None):
+    """
+    app.read_system_info() for the event loop: the poller's cached sample when
+    recent enough, else one asyncio smartctl run per device (concurrent
+    requests wait for it), fed back through the poller's change detection
+    """
+    poller = sync_app.smart_poller
+    device = device or poller.default_device
+    max_age = sync_app.SYSTEM_INFO_MAX_AGE_SECONDS
+
+    sample = poller.cached(device, max_age)
+    if sample is not None:
+        return sample
+
+    async with smartctl_locks.setdefault(device, asyncio.Lock()):
+        sample = poller.cached(device, max_age)
+        if sample is None:
+            sample = await get_system_info_async(device)
+            # Records (history rows, scoring) are written off the event loop
+            await run_blocking(poller.observe, device, sample)
+    return sample
+
+
+async def score_models_async(input_df):
+    """score_models() without blocking the event loop"""
+    frame = input_df[sync_app.FEATURES]
+    if sync_app.model_batcher is not None:
+        return (await sync_app.model_batcher.submit_async(frame))[0]
+    return (await run_blocking(sync_app.score_model_rows, frame))[0]
+
+
+@quart_app.before_serving
+async def open_store():
+    global history
+    history = get_async_history_store(
+        sync_app.history_store,
+        sync_app.STORAGE_BACKEND,
+        db_config=sync_app.DB_CONFIG,
+        workers=ASYNC_STORE_WORKERS,
+        pool_size=ASYNC_DB_POOL_SIZE
+    )
+    print(f"✓ Async history store: {history.describe()}")
+
+
+@quart_app.after_serving
+async def close_store():
+    if history is not None:
+        await history.close()
+    inference_executor.shutdown(wait=False)
+
+
+@quart_app.after_request
+async def cors_headers(response):
+    if request.path.startswith("/api/"):
+        response.headers["Access-Control-Allow-Origin"] = "*"
+    return response
+
+# -------------------------------
+# Native async routes
+# -------------------------------
+
+@quart_app.route('/api/system-info', methods=['GET'])
+async def system_info():
+    """Get system info but DON'T save to database"""
+    try:
+        device = request.args.get('device')
+        if device and device not in sync_app.smart_poller.states:
+            return jsonify({"success": False, "error": f"Device '{device}' is not polled"}), 400
+        return jsonify(await read_system_info_async(device))
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
+@quart_app.route('/api/health', methods=['GET'])
+async def health_check():
+    """Simple health check endpoint (served from the health monitor cache)"""
+    snapshot = sync_app.health_snapshot()
+    return jsonify({
+        "success": True,
+        "status": "healthy",
+        "timestamp": datetime.now().isoformat(),
+        "predictors_loaded": snapshot["predictors_loaded"],
+        "smartctl_available": snapshot["smartctl_available"],
+        "database_connected": snapshot["database_connected"],
+        "checked_at": sync_app.health_monitor.snapshot()["checked_at"]
+    })
+
+
+@quart_app.route('/api/health/live', methods=['GET'])
+async def liveness():
+    """Liveness probe: the process is serving requests. No I/O."""
+    return jsonify({"success": True, "status": "alive"})
+
+
+@quart_app.route('/api/health/ready', methods=['GET'])
+async def readiness():
+    """Readiness probe: cached dependency checks; 503 until required checks pass"""
+    ready = sync_app.health_monitor.is_ready()
+    return jsonify({
+        "success": ready,
+        "status": "ready" if ready else "not ready",
+        **sync_app.health_monitor.snapshot()
+    }), 200 if ready else 503
+
+
+@quart_app.route('/api/history', methods=['GET'])
+async def get_history():
+    """Get input history"""
+    try:
+        limit = request.args.get('limit', 100, type=int)
+        records, total_count = await asyncio.gather(
+            history.get_input_history(limit),
+            history.count_history()
+        )
+        return jsonify({
+            "success": True,
+            "count": len(records),
+            "total_count": total_count,
+            "data": records
+        })
+    except Exception as e:
+        print(f"❌ Error in get_history: {e}")
+        return jsonify({
+            "success": False,
+            "error": str(e),
+            "data": []
+        }), 500
+
+
+@quart_app.route('/api/history/<int:entry_id>', methods=['GET'])
+async def get_history_entry_by_id(entry_id):
+    """Get specific history entry"""
+    try:
+        entry = await history.get_history_entry(entry_id)
+        if entry:
+            return jsonify({
+                "success": True,
+                "data": entry
+            })
+        return jsonify({
+            "success": False,
+            "error": "Entry not found"
+        }), 404
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
+@quart_app.route('/api/predict', methods=['POST'])
+async def predict():
+    """Same contract as app.predict(); smartctl and model scoring run concurrently"""
+    try:
+        if not request.is_json:
+            return jsonify({"success": False, "error": "JSON required"}), 400
+
+        data = await request.get_json()
+        flags, input_df, input_data = sync_app.prediction_request(data)
+        sync_app.drift_monitor.observe(input_df)
+
+        async def models():
+            try:
+                return await score_models_async(input_df)
+            except Exception as e:
+                print(f"⚠️ Model scoring failed: {e}")
+                return {}
+
+        system_info_data, model_results = await asyncio.gather(read_system_info_async(), models())
+        temp_threshold = await run_blocking(sync_app.resolve_temp_threshold, data, system_info_data)
+
+        save_success, new_entry_id = await history.save_input(
+            input_data,
+            temp_threshold=temp_threshold,
+            data_source="manual",
+            notes=flags["notes"],
+            drive_id=data.get('Drive_ID')
+        )
+        if save_success:
+            await run_blocking(sync_app.input_saved, data, input_data, new_entry_id)
+
+        # Heuristic predictors and alert sinks (webhooks) stay off the event loop
+        def finish_scoring():
+            results = sync_app.build_results(input_df, model_results, temp_threshold, flags["laptop_working"])
+            return results, sync_app.prediction_alerts(data, results, new_entry_id)
+
+        results, alerts = await run_blocking(finish_scoring)
+
+        prediction_saved = False
+        if save_success:
+            prediction_saved = await history.save_predictions_bulk([
+                sync_app.prediction_history_row(results, new_entry_id)
+            ]) > 0
+
+        await run_blocking(sync_app.finish_prediction, data, results, flags, temp_threshold, save_success,
+                           new_entry_id, prediction_saved, alerts)
+
+        return jsonify({
+            "success": True,
+            "results": results
+        })
+
+    except Exception as e:
+        print(f"❌ Prediction error: {traceback.format_exc()}")
+        return jsonify({
+            "success": False,
+            "error": str(e),
+            "traceback": traceback.format_exc()
+        }), 500
+
+
+@quart_app.route('/api/stream', methods=['GET'])
+async def event_stream():
+    """Server-Sent Events, as in app.py; idle clients cost no thread"""
+    events = [e for e in request.args.get('events', '').split(',') if e] or None
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+
+    subscriber = sync_app.event_broadcaster.subscribe(events, last_event_id)
+    response = Response(
+        sync_app.event_broadcaster.stream_async(subscriber, poll=STREAM_POLL_SECONDS),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+    response.timeout = None
+    return response
+
+# -------------------------------
+# ASGI entry point
+# -------------------------------
+
+def always_start_response(wsgi_app):
+    """
+    Hypercorn's WSGI wrapper sends http.response.start together with the
+    first body chunk, so an empty body (CORS preflights from flask-cors,
+    204s) never starts a response and is answered 500. Yield at least one,
+    possibly empty, chunk.
+    """
+    def wrapped(environ, start_response):
+        body = wsgi_app(environ, start_response)
+
+        def chunks():
+            try:
+                empty = True
+                for chunk in body:
+                    empty = False
+                    yield chunk
+                if empty:
+                    yield b""
+            finally:
+                if hasattr(body, "close"):
+                    body.close()
+        return chunks()
+    return wrapped
+
+
+class RouteDispatcher:
+    """
+    Sends requests for routes defined above to Quart and everything else
+    (including CORS preflights, handled by flask-cors) to the Flask app
+    """
+
+    def __init__(self, native, fallback):
+        self.native = native
+        self.fallback = fallback
+        self.adapter = None
+
+    def is_native(self, scope):
+        if scope["type"] != "http":
+            return True
+        if scope["method"] == "OPTIONS":
+            return False
+        if self.adapter is None:
+            self.adapter = self.native.url_map.bind("localhost")
+        try:
+            self.adapter.match(scope["path"], method=scope["method"])
+            return True
+        except (NotFound, MethodNotAllowed, RequestRedirect):
+            return False
+
+    async def __call__(self, scope, receive, send):
+        target = self.native if self.is_native(scope) else self.fallback
+        await target(scope, receive, send)
+
+
+asgi_app = RouteDispatcher(
+    quart_app,
+    AsyncioWSGIMiddleware(always_start_response(sync_app.app), max_body_size=int(WSGI_MAX_BODY_MB * 1024 * 1024))
+)
+
+
+async def check_preflight(path="/api/predict"):
+    """Run a browser CORS preflight through asgi_app in-process; returns (status, headers)"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "OPTIONS",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "server": ("localhost", PORT), "client": ("127.0.0.1", 0),
+        "headers": [
+            (b"host", b"localhost"),
+            (b"origin", b"http://localhost:8000"),
+            (b"access-control-request-method", b"POST"),
+            (b"access-control-request-headers", b"content-type")
+        ]
+    }
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    await asgi_app(scope, receive, send)
+    start = next((m for m in sent if m["type"] == "http.response.start"), None)
+    if start is None:
+        return None, {}
+    return start["status"], {k.decode().lower(): v.decode() for k, v in start["headers"]}
+
+# -------------------------------
+# Run Server
+# -------------------------------
+
+if __name__ == "__main__":
+    from hypercorn.asyncio import serve
+    from hypercorn.config import Config
+
+    print("\n" + "="*60)
+    print("NVMe Failure Prediction Backend (async)")
+    print("="*60)
+
+    sync_app.start_retention_scheduler()
+    sync_app.start_archive_scheduler()
+    sync_app.start_smart_poller()
+    sync_app.start_fleet_coordinator()
+    status, headers = asyncio.run(check_preflight())
+    if status == 200 and headers.get("access-control-allow-origin"):
+        print("✓ CORS preflight: 200")
+    else:
+        print(f"❌ CORS preflight for /api/predict returned {status}; browser POSTs will fail")
+    print(f"✓ Predictors loaded: {sync_app.PREDICTORS_LOADED}")
+    print(f"✓ smartctl available: {shutil.which('smartctl') is not None}")
+    print(f"\n📡 Server running on: http://localhost:{PORT}")
+    print("="*60 + "\n")
+
+    config = Config()
+    config.bind = [f"0.0.0.0:{PORT}"]
+    asyncio.run(serve(asgi_app, config))
@@ -0,0 +1,73 @@
+"""
+Append new input_history rows to the Parquet archive (partitioned by date
+and data_source), then print what is in it. Safe to run from cron: only rows
+above the stored high-water mark are copied.
+
+    python archive_history.py                         # export + status
+    python archive_history.py --status                # status only
+    python archive_history.py --sample --since 2026-01-01
+"""
+import argparse
+import os
+import sys
+
+from utils.parquet_archive import ParquetArchive
+from utils.storage import get_history_store
+
+
+def print_header(text):
+    print("\n" + "=" * 70)
+    print(f" {text}")
+    print("=" * 70)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--root", default=os.environ.get("NVME_ARCHIVE_DIR", "data/archive"))
+    parser.add_argument("--status", action="store_true", help="do not export, only report")
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument("--settle-seconds", type=float, default=60)
+    parser.add_argument("--sample", action="store_true", help="read back a per-source summary")
+    parser.add_argument("--since", help="first date for --sample (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    if not ParquetArchive.available():
+        print("❌ pyarrow is not installed (pip install pyarrow)")
+        return 1
+
+    archive = ParquetArchive(args.root, settle_seconds=args.settle_seconds)
+
+    if not args.status:
+        # Same store selection as app.py
+        from app import DB_CONFIG, STORAGE_BACKEND, SQLITE_PATH
+        store = get_history_store(STORAGE_BACKEND, db_config=DB_CONFIG, sqlite_path=SQLITE_PATH)
+        if not store.is_available():
+            print(f"❌ History store not reachable: {store.describe()}")
+            return 1
+
+        print_header(f"EXPORT {store.describe()} -> {os.path.abspath(args.root)}")
+        report = archive.export(store, chunk_size=args.chunk_size)
+        print(f"✓ {report['rows_exported']} rows in {report['partitions_touched']} partitions; "
+              f"high-water mark {report['previous_high_water_mark']} -> {report['high_water_mark']}")
+
+    print_header("ARCHIVE STATUS")
+    for key, value in archive.status().items():
+        print(f"{key:<18} {value}")
+
+    if args.sample:
+        print_header("ROWS PER DATA SOURCE")
+        frame = archive.read(columns=["data_source", "Temperature_C", "Percent_Life_Used"], start=args.since)
+        if frame.empty:
+            print("(no rows)")
+        else:
+            print(frame.groupby("data_source").agg(
+                rows=("Temperature_C", "size"),
+                mean_temp=("Temperature_C", "mean"),
+                mean_life_used=("Percent_Life_Used", "mean")
+            ).round(2).to_string())
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
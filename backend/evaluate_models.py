@@ -0,0 +1,109 @@
+"""
+Evaluate model versions on held-out data and gate deployments on the
+metrics: exits 1 if the candidate is worse than the baseline by more than
+the allowed margins (utils.evaluation.EVAL_GATES). Predictions are cached
+per (model version, dataset hash), so re-runs only recompute metrics.
+
+    python evaluate_models.py                          # current vs newest archived, both models
+    python evaluate_models.py wearout --baseline 22eb22c2e1da
+    python evaluate_models.py controller --dataset data/fleet_2026q3.csv --threshold 0.4
+    python evaluate_models.py wearout --report-only    # metrics of the current version, no gate
+"""
+import argparse
+import os
+import sys
+import warnings
+
+from utils.evaluation import ModelEvaluator
+
+warnings.filterwarnings('ignore')
+
+METRICS = ["roc_auc", "pr_auc", "f1", "precision", "recall", "accuracy", "best_f1",
+           "best_f1_threshold", "logloss", "brier", "ece"]
+
+
+def print_header(text):
+    print("\n" + "=" * 70)
+    print(f" {text}")
+    print("=" * 70)
+
+
+def load_predictors(names):
+    predictors = {}
+    if "wearout" in names:
+        from utils.wearout_predictor import WearoutPredictor
+        predictors["wearout"] = WearoutPredictor()
+    if "controller" in names:
+        from utils.controller_predictor import ControllerPredictor
+        predictors["controller"] = ControllerPredictor()
+    return predictors
+
+
+def print_report(report):
+    matrix = report["confusion_matrix"]
+    print(f"rows {report['rows']}  positives {report['positives']}  threshold {report['threshold']}")
+    print(f"confusion  tn {matrix['tn']}  fp {matrix['fp']}  fn {matrix['fn']}  tp {matrix['tp']}")
+    print("\nreliability   count  predicted  observed")
+    for row in report["calibration"]:
+        if row["count"]:
+            print(f"{row['bin'][0]:.1f}-{row['bin'][1]:.1f}  {row['count']:>9} "
+                  f"{row['mean_predicted']:>10.4f} {row['positive_rate']:>9.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("models", nargs="*", choices=["wearout", "controller"], default=[])
+    parser.add_argument("--candidate", help="version to evaluate (default: current)")
+    parser.add_argument("--baseline", help="version to compare with (default: newest archived)")
+    parser.add_argument("--dataset", help="CSV / Parquet with Failure_Mode (default: training holdout)")
+    parser.add_argument("--data", default="data/Clean_Final_NVMe_Dataset.csv", help="training dataset")
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument("--cache-dir", default=os.environ.get("NVME_EVAL_CACHE_DIR", "models/eval_cache"))
+    parser.add_argument("--calibrated", action="store_true", help="evaluate through the calibration maps")
+    parser.add_argument("--report-only", action="store_true", help="no baseline comparison")
+    args = parser.parse_args()
+
+    names = args.models or ["wearout", "controller"]
+    evaluator = ModelEvaluator(load_predictors(names), data_path=args.data, cache_dir=args.cache_dir)
+    failed = False
+
+    for name in names:
+        try:
+            if args.report_only:
+                report = evaluator.evaluate(name, args.candidate, args.dataset, args.threshold,
+                                            calibrated=args.calibrated)
+                print_header(f"{name.upper()} {report['version']} on {report['dataset']}")
+                for metric in METRICS:
+                    print(f"{metric:<18} {report[metric]:.6f}")
+                print_report(report)
+                continue
+
+            result = evaluator.compare(name, args.candidate, args.baseline, args.dataset, args.threshold,
+                                       calibrated=args.calibrated)
+        except (ValueError, OSError) as e:
+            print(f"❌ {name}: {e}")
+            failed = True
+            continue
+
+        candidate, baseline = result["candidate"], result["baseline"]
+        print_header(f"{name.upper()} {candidate['version']} vs {baseline['version']} on {candidate['dataset']}")
+        print(f"{'metric':<18} {'candidate':>11} {'baseline':>11} {'allowed':>9}")
+        gates = {check["metric"]: check for check in result["gate"]["checks"]}
+        for metric in METRICS:
+            check = gates.get(metric)
+            verdict = "" if check is None else f"{check['allowed']:>9} {'✓' if check['passed'] else '❌'}"
+            print(f"{metric:<18} {candidate[metric]:>11.6f} {baseline[metric]:>11.6f} {verdict}")
+        print_report(candidate)
+
+        if result["gate"]["passed"]:
+            print(f"\n✓ {name}: candidate passes all gates")
+        else:
+            print(f"\n❌ {name}: candidate fails the deployment gates")
+            failed = True
+
+    print(f"\nPrediction cache: {evaluator.status()}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""
+Export the pickled XGBoost models to compact artifacts, then benchmark
+loading/prediction and check prediction parity against the pickles.
+
+    python export_models.py                 # export + benchmark + parity
+    python export_models.py --check-only    # skip export, compare existing artifacts
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from utils.compact_model import export_compact, load_model_artifact, ubj_path, flat_dir
+
+warnings.filterwarnings('ignore')
+
+MODELS = {
+    "wearout": "models/wearout_model.pkl",
+    "controller": "models/controller_model.pkl"
+}
+
+FEATURES = [
+    "Power_On_Hours",
+    "Total_TBW_TB",
+    "Total_TBR_TB",
+    "Temperature_C",
+    "Percent_Life_Used",
+    "Media_Errors",
+    "Unsafe_Shutdowns",
+    "CRC_Errors",
+    "Read_Error_Rate",
+    "Write_Error_Rate"
+]
+
+# Max allowed |p_compact - p_pickle| (float32 thresholds, float64 leaf sum)
+PARITY_TOLERANCE = 1e-5
+
+
+def print_header(text):
+    print("\n" + "=" * 70)
+    print(f" {text}")
+    print("=" * 70)
+
+
+def artifact_size(model_format, path):
+    if model_format == "pickle":
+        return os.path.getsize(path)
+    if model_format == "ubj":
+        return os.path.getsize(ubj_path(path))
+    directory = flat_dir(path)
+    return sum(os.path.getsize(os.path.join(directory, f)) for f in os.listdir(directory))
+
+
+def time_call(fn, repeat):
+    """Best-of-repeat wall time in milliseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def parity_frame(data_path, rows):
+    """Dataset rows plus a few rows with missing values to exercise default directions"""
+    X = pd.read_csv(data_path, usecols=FEATURES, nrows=rows)[FEATURES].astype(np.float32)
+    with_missing = X.head(50).copy()
+    with_missing.iloc[::2, 3] = np.nan
+    with_missing.iloc[1::3, 4] = np.nan
+    return pd.concat([X, with_missing], ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check-only", action="store_true", help="do not re-export")
+    parser.add_argument("--data", default="data/Clean_Final_NVMe_Dataset.csv")
+    parser.add_argument("--rows", type=int, default=20000, help="rows used for parity/batch timing")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    X = parity_frame(args.data, args.rows)
+    single = X.head(1)
+    failed = False
+
+    for name, path in MODELS.items():
+        if not os.path.exists(path):
+            print(f"⚠️ {path} not found, skipping")
+            continue
+
+        print_header(f"{name.upper()} MODEL ({path})")
+        reference = joblib.load(path)
+
+        if not args.check_only:
+            info = export_compact(reference, path)
+            print(f"✓ Exported {info['num_trees']} trees / {info['num_nodes']} nodes "
+                  f"(max depth {info['max_depth']})")
+
+        expected = reference.predict_proba(X)[:, 1]
+
+        print(f"\n{'format':<8} {'size KB':>9} {'load ms':>9} {'1 row ms':>9} "
+              f"{len(X)} rows ms {'max |Δp|':>10}")
+        for model_format in ("pickle", "ubj", "flat"):
+            load_ms = time_call(lambda: load_model_artifact(path, model_format), args.repeat)
+            model = load_model_artifact(path, model_format)
+
+            single_ms = time_call(lambda: model.predict_proba(single), args.repeat * 20)
+            batch_ms = time_call(lambda: model.predict_proba(X), max(1, args.repeat // 2))
+
+            diff = float(np.abs(model.predict_proba(X)[:, 1] - expected).max())
+            ok = diff <= PARITY_TOLERANCE
+            failed = failed or not ok
+
+            print(f"{model_format:<8} {artifact_size(model_format, path) / 1024:>9.1f} {load_ms:>9.2f} "
+                  f"{single_ms:>9.3f} {batch_ms:>12.1f} {diff:>10.2e} {'✓' if ok else '❌'}")
+
+    if failed:
+        print(f"\n❌ Parity check failed (tolerance {PARITY_TOLERANCE})")
+        return 1
+
+    print(f"\n✓ All compact artifacts match the pickles within {PARITY_TOLERANCE}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
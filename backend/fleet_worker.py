@@ -0,0 +1,43 @@
+"""
+Fleet scoring worker: connects to a coordinator (app.py with
+NVME_FLEET_WORKERS / NVME_FLEET_LISTEN, or score_fleet.py), loads the
+predictors once and scores the drive shards it is sent until the
+coordinator closes the connection. The coordinator spawns its local
+workers itself; start this by hand only on other nodes:
+
+    NVME_FLEET_AUTHKEY=<hex key of the coordinator> python fleet_worker.py --connect coordinator-host:7070
+"""
+import argparse
+import os
+import sys
+import warnings
+from multiprocessing import AuthenticationError
+
+from utils.fleet_scoring import connect_worker
+
+warnings.filterwarnings('ignore')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connect", required=True, help="coordinator address, host:port")
+    parser.add_argument("--name", help="worker name (default: <hostname>-<pid>)")
+    args = parser.parse_args()
+
+    authkey = os.environ.get("NVME_FLEET_AUTHKEY")
+    if not authkey:
+        print("❌ NVME_FLEET_AUTHKEY is not set")
+        return 1
+
+    try:
+        connect_worker(args.connect, bytes.fromhex(authkey), name=args.name)
+    except (OSError, ValueError, AuthenticationError) as e:
+        print(f"❌ Cannot serve coordinator {args.connect}: {e}")
+        return 1
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""
+Score a fleet snapshot (CSV) across worker processes: drives are
+partitioned by a hash of Drive_ID, each worker loads the predictors once
+and scores its shards, and the risks are written back in input order.
+--benchmark compares throughput with scoring in a single process instead.
+
+    python score_fleet.py data/fleet.csv --workers 4 --out scored.csv
+    python score_fleet.py data/fleet.csv --workers 4 --benchmark
+    python score_fleet.py data/fleet.csv --nodes http://node2:8080,http://node3:8080 --out scored.csv
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from utils.batch_scoring import RISK_COLUMNS
+from utils.fleet_scoring import FleetCoordinator, build_scorer
+from utils.thermal_thresholds import ThermalThresholdRegistry
+
+warnings.filterwarnings('ignore')
+
+ID_COLUMNS = ["id", "Drive_ID", "timestamp", "data_source"]
+
+
+def print_header(text):
+    print("\n" + "=" * 70)
+    print(f" {text}")
+    print("=" * 70)
+
+
+def timed(score, frame):
+    started = time.perf_counter()
+    risks = score(frame)
+    return risks, time.perf_counter() - started
+
+
+def benchmark(coordinator, frame):
+    """Rows/s of the coordinator vs. one in-process scorer on the same frame, plus parity"""
+    coordinator.score(frame.head(coordinator.min_rows))       # warm up every worker
+    local, local_seconds = timed(coordinator.scorer.score, frame)
+    fleet, fleet_seconds = timed(coordinator.score, frame)
+
+    workers = len(coordinator.workers)
+    print_header(f"BENCHMARK {len(frame)} rows")
+    print(f"{'single process':<22} {len(frame) / local_seconds:>12,.0f} rows/s  {local_seconds:.2f}s")
+    print(f"{f'{workers} worker(s)':<22} {len(fleet) / fleet_seconds:>12,.0f} rows/s  {fleet_seconds:.2f}s")
+    print(f"{'speedup':<22} {local_seconds / fleet_seconds:>12.2f}x")
+
+    diff = np.abs(local[RISK_COLUMNS].to_numpy() - fleet[RISK_COLUMNS].to_numpy()).max()
+    same_status = bool((local["status"] == fleet["status"]).all())
+    print(f"{'max risk difference':<22} {diff:>12.2e}  statuses identical: {same_status}")
+    return 0 if diff < 1e-9 and same_status else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="fleet snapshot CSV (feature columns, optional Drive_ID)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="local worker processes")
+    parser.add_argument("--nodes", default="", help="comma-separated backend URLs to use as workers")
+    parser.add_argument("--listen", help="host:port for workers on other nodes (needs NVME_FLEET_AUTHKEY)")
+    parser.add_argument("--out", help="CSV to write the risks to")
+    parser.add_argument("--chunk-size", type=int, default=200000)
+    parser.add_argument("--timeout", type=float, default=120, help="seconds before a worker's shard is reassigned")
+    parser.add_argument("--benchmark", action="store_true", help="compare with a single process (first chunk)")
+    args = parser.parse_args()
+
+    authkey = os.environ.get("NVME_FLEET_AUTHKEY")
+    if args.listen and not authkey:
+        print("❌ --listen needs NVME_FLEET_AUTHKEY (shared with the remote workers)")
+        return 1
+
+    coordinator = FleetCoordinator(
+        build_scorer(ThermalThresholdRegistry(
+            os.environ.get("NVME_THERMAL_THRESHOLDS_PATH", "data/thermal_thresholds.json")
+        )),
+        local_workers=args.workers,
+        nodes=[u for u in args.nodes.split(",") if u],
+        listen=args.listen,
+        authkey=bytes.fromhex(authkey) if authkey else None,
+        min_rows=1,
+        timeout=args.timeout
+    )
+    coordinator.start()
+    if not coordinator.workers:
+        print("❌ No workers available")
+        coordinator.stop()
+        return 1
+
+    try:
+        chunks = pd.read_csv(args.source, chunksize=args.chunk_size, compression="infer")
+        if args.benchmark:
+            return benchmark(coordinator, next(chunks))
+
+        print_header(f"SCORING {args.source} on {len(coordinator.workers)} worker(s)")
+        rows = 0
+        started = time.perf_counter()
+        for i, chunk in enumerate(chunks):
+            risks = coordinator.score(chunk)
+            rows += len(chunk)
+            if args.out:
+                ids = chunk[[c for c in ID_COLUMNS if c in chunk.columns]]
+                pd.concat([ids, risks], axis=1).to_csv(args.out, mode="w" if i == 0 else "a",
+                                                       header=i == 0, index=False)
+            print(f"  {rows:>12,} rows  {rows / (time.perf_counter() - started):>10,.0f} rows/s  "
+                  f"{risks['status'].value_counts().to_dict()}")
+
+        status = coordinator.status()
+        print(f"\n✓ Scored {rows} rows in {time.perf_counter() - started:.1f}s "
+              f"({status['reassigned_rows']} reassigned, {status['fallback_rows']} scored locally after failures)")
+        for worker in status["workers"]:
+            print(f"  {worker['name']:<24} {worker['rows']:>12,} rows  {worker['failures']} failures")
+        return 0
+    finally:
+        coordinator.stop()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,7 +4,7 @@
 CREATE DATABASE IF NOT EXISTS nvme_failure_db;
 USE nvme_failure_db;
 
--- Create input history table (stores only input data, no predictions)
+-- Create input history table (stores only input data; model outputs go to prediction_history)
 CREATE TABLE IF NOT EXISTS input_history (
     id INT AUTO_INCREMENT PRIMARY KEY,
     timestamp DATETIME NOT NULL COMMENT 'Time when input was recorded',
@@ -25,29 +25,197 @@ CREATE TABLE IF NOT EXISTS input_history (
     temp_threshold FLOAT COMMENT 'Temperature threshold used',
     data_source VARCHAR(50) COMMENT 'Source of data (manual/system/sample)',
     notes TEXT COMMENT 'Additional notes',
+    drive_id VARCHAR(64) NULL COMMENT 'Drive identifier (bulk ingest / fleet collectors)',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT 'Record creation time',
     
     INDEX idx_timestamp (timestamp),
     INDEX idx_source (data_source),
+    INDEX idx_source_timestamp (data_source, timestamp),
+    INDEX idx_drive_timestamp (drive_id, timestamp),
     INDEX idx_temp_threshold (temp_threshold)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='Stores NVMe drive input data for analysis';
 
--- Create view for easy data analysis
+-- Retention: rows are purged per data_source by the backend (/api/retention/run
+-- or NVME_RETENTION_INTERVAL_HOURS) in small id-ordered batches after their
+-- aggregates are in the rollup tables. Time-range partitioning is not used
+-- because InnoDB does not allow foreign keys on partitioned tables
+-- (prediction_history references input_history).
+-- Existing installs: ALTER TABLE input_history ADD INDEX idx_source_timestamp (data_source, timestamp);
+-- Existing installs: ALTER TABLE input_history ADD COLUMN drive_id VARCHAR(64) NULL,
+--                    ADD INDEX idx_drive_timestamp (drive_id, timestamp);
+
+-- Model outputs for each input_history row, one row per (input, model version).
+-- Lets risk-over-time dashboards read stored risks instead of re-running models.
+CREATE TABLE IF NOT EXISTS prediction_history (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    input_id INT NOT NULL COMMENT 'input_history.id',
+    model_version VARCHAR(64) NOT NULL COMMENT 'Ensemble version (wearout + controller model hashes)',
+    timestamp DATETIME NOT NULL COMMENT 'Copy of input_history.timestamp for range scans without a join',
+
+    wearout_risk FLOAT COMMENT 'Wear-out risk %',
+    thermal_risk FLOAT COMMENT 'Thermal risk %',
+    power_risk FLOAT COMMENT 'Power risk %',
+    controller_risk FLOAT COMMENT 'Controller risk %',
+    overall_risk FLOAT COMMENT 'Highest of the four risks',
+    status ENUM('Healthy', 'Warning', 'Critical', 'RAPID ERROR ACCUMULATION') NOT NULL,
+    highest_risk ENUM('Wear-Out', 'Thermal', 'Power', 'Controller') NOT NULL,
+    top_contributions JSON NULL COMMENT 'Optional top feature contributions per category',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    UNIQUE KEY uq_input_version (input_id, model_version),
+    INDEX idx_timestamp (timestamp),
+    INDEX idx_version_timestamp (model_version, timestamp),
+    INDEX idx_status_timestamp (status, timestamp),
+    CONSTRAINT fk_prediction_input FOREIGN KEY (input_id)
+        REFERENCES input_history(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='Stored predictions keyed to input_history rows';
+
+-- Bulk re-scoring runs (old vs new model version over stored history)
+CREATE TABLE IF NOT EXISTS rescore_runs (
+    run_id VARCHAR(32) PRIMARY KEY,
+    model_name VARCHAR(32) NOT NULL COMMENT 'wearout / controller',
+    old_version VARCHAR(32) NOT NULL COMMENT 'Baseline model version',
+    new_version VARCHAR(32) NOT NULL COMMENT 'Candidate model version',
+    rows_scored INT COMMENT 'Number of history rows re-scored',
+    summary JSON COMMENT 'Mean risks, status transitions and delta histogram',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    finished_at DATETIME,
+
+    INDEX idx_model (model_name, created_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='Summary of bulk re-scoring runs';
+
+-- Per-row risks produced by a re-scoring run
+CREATE TABLE IF NOT EXISTS rescore_results (
+    run_id VARCHAR(32) NOT NULL,
+    input_id INT NOT NULL COMMENT 'input_history.id',
+    old_risk FLOAT COMMENT 'Risk % under the old model version',
+    new_risk FLOAT COMMENT 'Risk % under the new model version',
+
+    PRIMARY KEY (run_id, input_id),
+    INDEX idx_input (input_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='Per-row old/new risks from re-scoring runs';
+
+-- Confirmed outcomes for input_history rows (one label per row). Relabeling
+-- replaces the row with a new id, so incremental training can consume labels
+-- by id watermark.
+CREATE TABLE IF NOT EXISTS input_labels (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    input_id INT NOT NULL COMMENT 'input_history.id',
+    failure_mode TINYINT NOT NULL COMMENT 'Confirmed Failure_Mode (0 healthy, 1 wear-out, 4 controller, 5 early-life)',
+    label_source VARCHAR(50) COMMENT 'Who/what confirmed the outcome (rma, manual, ...)',
+    labeled_at DATETIME NOT NULL,
+
+    UNIQUE KEY uq_label_input (input_id),
+    CONSTRAINT fk_label_input FOREIGN KEY (input_id)
+        REFERENCES input_history(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='Confirmed failure modes for stored inputs';
+
+-- Incremental (warm-start) training runs over newly labeled rows
+CREATE TABLE IF NOT EXISTS training_runs (
+    run_id VARCHAR(32) PRIMARY KEY,
+    model_name VARCHAR(32) NOT NULL COMMENT 'wearout / controller / failure_mode',
+    base_version VARCHAR(32) NOT NULL COMMENT 'Model version boosting continued from',
+    new_version VARCHAR(32) NULL COMMENT 'Saved version (NULL when rejected)',
+    accepted BOOLEAN NOT NULL COMMENT 'Passed validation gating and was saved',
+    label_watermark INT NOT NULL COMMENT 'Highest input_labels.id consumed',
+    rows_used INT COMMENT 'Labeled rows boosted on',
+    metrics JSON COMMENT 'Validation metrics before/after',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    INDEX idx_model_accepted (model_name, accepted, label_watermark)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='Incremental training runs and their gating result';
+
+-- Hourly and daily rollups of input_history. Kept up to date by the backend
+-- on every insert (and rebuilt per day via /api/stats/rebuild), so fleet
+-- statistics read O(buckets) rows instead of scanning input_history.
+CREATE TABLE IF NOT EXISTS input_rollup_hourly (
+    bucket_start DATETIME NOT NULL COMMENT 'Start of the hour bucket',
+    data_source VARCHAR(50) NOT NULL,
+    total_inputs INT NOT NULL DEFAULT 0,
+    sum_power_hours DOUBLE NOT NULL DEFAULT 0,
+    sum_temperature DOUBLE NOT NULL DEFAULT 0,
+    sum_life_used DOUBLE NOT NULL DEFAULT 0,
+    sum_total_data_tb DOUBLE NOT NULL DEFAULT 0,
+    max_unsafe_shutdowns INT NOT NULL DEFAULT 0,
+    sum_temp_threshold DOUBLE NOT NULL DEFAULT 0,
+    temp_threshold_count INT NOT NULL DEFAULT 0,
+
+    PRIMARY KEY (bucket_start, data_source),
+    INDEX idx_source_bucket (data_source, bucket_start)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='Hourly aggregates of input_history';
+
+CREATE TABLE IF NOT EXISTS input_rollup_daily (
+    bucket_start DATETIME NOT NULL COMMENT 'Start of the day bucket',
+    data_source VARCHAR(50) NOT NULL,
+    total_inputs INT NOT NULL DEFAULT 0,
+    sum_power_hours DOUBLE NOT NULL DEFAULT 0,
+    sum_temperature DOUBLE NOT NULL DEFAULT 0,
+    sum_life_used DOUBLE NOT NULL DEFAULT 0,
+    sum_total_data_tb DOUBLE NOT NULL DEFAULT 0,
+    max_unsafe_shutdowns INT NOT NULL DEFAULT 0,
+    sum_temp_threshold DOUBLE NOT NULL DEFAULT 0,
+    temp_threshold_count INT NOT NULL DEFAULT 0,
+
+    PRIMARY KEY (bucket_start, data_source),
+    INDEX idx_source_bucket (data_source, bucket_start)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='Daily aggregates of input_history';
+
+-- One-time backfill from existing history (skipped once a table has rows)
+INSERT INTO input_rollup_hourly (
+    bucket_start, data_source, total_inputs,
+    sum_power_hours, sum_temperature, sum_life_used, sum_total_data_tb,
+    max_unsafe_shutdowns, sum_temp_threshold, temp_threshold_count
+)
+SELECT
+    TIMESTAMP(DATE(timestamp), MAKETIME(HOUR(timestamp), 0, 0)),
+    COALESCE(data_source, 'unknown'),
+    COUNT(*),
+    COALESCE(SUM(power_on_hours), 0),
+    COALESCE(SUM(temperature_c), 0),
+    COALESCE(SUM(percent_life_used), 0),
+    COALESCE(SUM(total_tbw_tb + total_tbr_tb), 0),
+    COALESCE(MAX(unsafe_shutdowns), 0),
+    COALESCE(SUM(temp_threshold), 0),
+    COUNT(temp_threshold)
+FROM input_history
+WHERE NOT EXISTS (SELECT 1 FROM input_rollup_hourly)
+GROUP BY TIMESTAMP(DATE(timestamp), MAKETIME(HOUR(timestamp), 0, 0)), COALESCE(data_source, 'unknown');
+
+INSERT INTO input_rollup_daily (
+    bucket_start, data_source, total_inputs,
+    sum_power_hours, sum_temperature, sum_life_used, sum_total_data_tb,
+    max_unsafe_shutdowns, sum_temp_threshold, temp_threshold_count
+)
+SELECT
+    TIMESTAMP(DATE(timestamp)),
+    COALESCE(data_source, 'unknown'),
+    COUNT(*),
+    COALESCE(SUM(power_on_hours), 0),
+    COALESCE(SUM(temperature_c), 0),
+    COALESCE(SUM(percent_life_used), 0),
+    COALESCE(SUM(total_tbw_tb + total_tbr_tb), 0),
+    COALESCE(MAX(unsafe_shutdowns), 0),
+    COALESCE(SUM(temp_threshold), 0),
+    COUNT(temp_threshold)
+FROM input_history
+WHERE NOT EXISTS (SELECT 1 FROM input_rollup_daily)
+GROUP BY TIMESTAMP(DATE(timestamp)), COALESCE(data_source, 'unknown');
+
+-- Create view for easy data analysis (reads the hourly rollup, not raw rows)
 CREATE OR REPLACE VIEW input_analysis AS
 SELECT 
-    DATE(timestamp) as date,
-    HOUR(timestamp) as hour,
+    DATE(bucket_start) as date,
+    HOUR(bucket_start) as hour,
     data_source,
-    COUNT(*) as total_inputs,
-    AVG(power_on_hours) as avg_power_hours,
-    AVG(temperature_c) as avg_temperature,
-    AVG(percent_life_used) as avg_life_used,
-    AVG(total_tbw_tb + total_tbr_tb) as avg_total_data_tb,
-    MAX(unsafe_shutdowns) as max_unsafe_shutdowns,
-    AVG(temp_threshold) as avg_temp_threshold
-FROM input_history
-GROUP BY DATE(timestamp), HOUR(timestamp), data_source
-ORDER BY date DESC, hour DESC;
+    total_inputs,
+    sum_power_hours / total_inputs as avg_power_hours,
+    sum_temperature / total_inputs as avg_temperature,
+    sum_life_used / total_inputs as avg_life_used,
+    sum_total_data_tb / total_inputs as avg_total_data_tb,
+    max_unsafe_shutdowns,
+    sum_temp_threshold / NULLIF(temp_threshold_count, 0) as avg_temp_threshold
+FROM input_rollup_hourly
+ORDER BY bucket_start DESC;
 
 -- Example queries for reference:
 
@@ -65,11 +233,11 @@ ORDER BY date DESC, hour DESC;
 -- FROM input_history 
 -- GROUP BY data_source;
 
--- 4. Daily statistics
--- SELECT DATE(timestamp) as day, 
---        COUNT(*) as inputs,
---        AVG(temperature_c) as avg_temp,
---        AVG(percent_life_used) as avg_wear
--- FROM input_history 
--- GROUP BY DATE(timestamp) 
+-- 4. Daily statistics (from the rollup table)
+-- SELECT DATE(bucket_start) as day, 
+--        SUM(total_inputs) as inputs,
+--        SUM(sum_temperature) / SUM(total_inputs) as avg_temp,
+--        SUM(sum_life_used) / SUM(total_inputs) as avg_wear
+-- FROM input_rollup_daily 
+-- GROUP BY DATE(bucket_start) 
 -- ORDER BY day DESC;
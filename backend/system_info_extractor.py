@@ -1,99 +1,159 @@
+import asyncio
 import subprocess
 import shutil
 import re
 
-DEFAULT_TEMP_THRESHOLD = 75
-
-def get_system_info():
+from utils.thermal_predictor import DEFAULT_TEMP_THRESHOLD
+
+# Seconds before a hung smartctl call is abandoned
+SMARTCTL_TIMEOUT = 10
+
+# Device read when none is given (the local NVMe drive)
+SMARTCTL_DEVICE = "/dev/disk0"
+
+def smartctl_command(device=None):
+    """smartctl invocation for an NVMe device, or None if smartctl is missing"""
+    smartctl_path = shutil.which("smartctl")
+    if smartctl_path is None:
+        return None
+    return [smartctl_path, "-a", "-d", "nvme", device or SMARTCTL_DEVICE]
+
+
+def unavailable(message):
+    return {
+        'success': False,
+        'data': None,
+        'temp_threshold': DEFAULT_TEMP_THRESHOLD,
+        'message': message
+    }
+
+
+def parse_smartctl_output(output):
+    """Model features, warning threshold and drive identity from `smartctl -a` text"""
+    data = {
+        "Power_On_Hours": 0,
+        "Total_TBW_TB": 0,
+        "Total_TBR_TB": 0,
+        "Temperature_C": 45,
+        "Percent_Life_Used": 25,
+        "Media_Errors": 0,
+        "Unsafe_Shutdowns": 0,
+        "CRC_Errors": 0,
+        "Read_Error_Rate": 0,
+        "Write_Error_Rate": 0
+    }
+
+    temp_threshold = DEFAULT_TEMP_THRESHOLD
+
+    drive = {
+        "Vendor": None,
+        "Model": None,
+        "Firmware_Version": None,
+        "Serial_Number": None
+    }
+
+    for line in output.splitlines():
+
+        if "Model Number:" in line:
+            model = line.split(":", 1)[1].strip()
+            drive["Model"] = model
+            drive["Vendor"] = model.split()[0] if model else None
+
+        elif "Serial Number:" in line:
+            drive["Serial_Number"] = line.split(":", 1)[1].strip()
+
+        elif "Firmware Version:" in line:
+            drive["Firmware_Version"] = line.split(":", 1)[1].strip()
+
+        elif "Temperature:" in line:
+            match = re.search(r"(\d+)", line)
+            if match:
+                data["Temperature_C"] = int(match.group(1))
+
+        elif "Percentage Used:" in line:
+            match = re.search(r"(\d+)", line)
+            if match:
+                data["Percent_Life_Used"] = int(match.group(1))
+
+        elif "Data Units Written:" in line:
+            units = int(re.findall(r"\d+", line.replace(",", ""))[0])
+            data["Total_TBW_TB"] = round(units * 512000 / 1e12, 2)
+
+        elif "Data Units Read:" in line:
+            units = int(re.findall(r"\d+", line.replace(",", ""))[0])
+            data["Total_TBR_TB"] = round(units * 512000 / 1e12, 2)
+
+        elif "Power On Hours:" in line:
+            data["Power_On_Hours"] = int(re.findall(r"\d+", line.replace(",", ""))[0])
+
+        elif "Unsafe Shutdowns:" in line:
+            data["Unsafe_Shutdowns"] = int(re.findall(r"\d+", line.replace(",", ""))[0])
+
+        elif "Media and Data Integrity Errors:" in line:
+            data["Media_Errors"] = int(re.findall(r"\d+", line.replace(",", ""))[0])
+
+        elif "CRC Errors:" in line:
+            data["CRC_Errors"] = int(re.findall(r"\d+", line.replace(",", ""))[0])
+
+    # Extract threshold OUTSIDE loop
+    match = re.search(
+        r"Warning\s+Comp\.\s+Temp\.\s+Threshold:\s+(\d+)\s*([CF])",
+        output,
+        re.IGNORECASE
+    )
+
+    if match:
+        value = int(match.group(1))
+        unit = match.group(2).upper()
+
+        if unit == "F":
+            temp_threshold = round((value - 32) * 5 / 9, 2)
+        else:
+            temp_threshold = value
+
+    return {
+        'success': True,
+        'data': data,
+        'temp_threshold': temp_threshold,
+        'threshold_reported': match is not None,
+        'drive': drive,
+        'message': 'System info extracted'
+    }
+
+
+
+def get_system_info(device=None):
     try:
-        smartctl_path = shutil.which("smartctl")
-
-        if smartctl_path is None:
-            return {
-                'success': False,
-                'data': None,
-                'temp_threshold': DEFAULT_TEMP_THRESHOLD,
-                'message': 'smartctl not installed'
-            }
-
-        cmd = [smartctl_path, "-a", "-d", "nvme", "/dev/disk0"]
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        output = result.stdout
-
-        data = {
-            "Power_On_Hours": 0,
-            "Total_TBW_TB": 0,
-            "Total_TBR_TB": 0,
-            "Temperature_C": 45,
-            "Percent_Life_Used": 25,
-            "Media_Errors": 0,
-            "Unsafe_Shutdowns": 0,
-            "CRC_Errors": 0,
-            "Read_Error_Rate": 0,
-            "Write_Error_Rate": 0
-        }
-
-        temp_threshold = DEFAULT_TEMP_THRESHOLD
-
-        for line in output.splitlines():
-
-            if "Temperature:" in line:
-                match = re.search(r"(\d+)", line)
-                if match:
-                    data["Temperature_C"] = int(match.group(1))
-
-            elif "Percentage Used:" in line:
-                match = re.search(r"(\d+)", line)
-                if match:
-                    data["Percent_Life_Used"] = int(match.group(1))
-
-            elif "Data Units Written:" in line:
-                units = int(re.findall(r"\d+", line.replace(",", ""))[0])
-                data["Total_TBW_TB"] = round(units * 512000 / 1e12, 2)
-
-            elif "Data Units Read:" in line:
-                units = int(re.findall(r"\d+", line.replace(",", ""))[0])
-                data["Total_TBR_TB"] = round(units * 512000 / 1e12, 2)
-
-            elif "Power On Hours:" in line:
-                data["Power_On_Hours"] = int(re.findall(r"\d+", line)[0])
-
-            elif "Unsafe Shutdowns:" in line:
-                data["Unsafe_Shutdowns"] = int(re.findall(r"\d+", line)[0])
-
-            elif "Media and Data Integrity Errors:" in line:
-                data["Media_Errors"] = int(re.findall(r"\d+", line)[0])
-
-            elif "CRC Errors:" in line:
-                data["CRC_Errors"] = int(re.findall(r"\d+", line)[0])
-
-        # Extract threshold OUTSIDE loop
-        match = re.search(
-            r"Warning\s+Comp\.\s+Temp\.\s+Threshold:\s+(\d+)\s*([CF])",
-            output,
-            re.IGNORECASE
-        )
+        cmd = smartctl_command(device)
+        if cmd is None:
+            return unavailable('smartctl not installed')
+
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=SMARTCTL_TIMEOUT)
+        return parse_smartctl_output(result.stdout)
 
-        if match:
-            value = int(match.group(1))
-            unit = match.group(2).upper()
+    except Exception as e:
+        return unavailable(str(e))
 
-            if unit == "F":
-                temp_threshold = round((value - 32) * 5 / 9, 2)
-            else:
-                temp_threshold = value
 
-        return {
-            'success': True,
-            'data': data,
-            'temp_threshold': temp_threshold,
-            'message': 'System info extracted'
-        }
+async def get_system_info_async(device=None):
+    """get_system_info() without blocking the event loop (asyncio subprocess)"""
+    try:
+        cmd = smartctl_command(device)
+        if cmd is None:
+            return unavailable('smartctl not installed')
+
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            stdout, _ = await asyncio.wait_for(process.communicate(), SMARTCTL_TIMEOUT)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise TimeoutError(f"smartctl timed out after {SMARTCTL_TIMEOUT}s")
+        return parse_smartctl_output(stdout.decode(errors="replace"))
 
     except Exception as e:
-        return {
-            'success': False,
-            'data': None,
-            'temp_threshold': DEFAULT_TEMP_THRESHOLD,
-            'message': str(e)
-        }
+        return unavailable(str(e))
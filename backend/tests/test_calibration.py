@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from utils.calibration import expected_calibration_error, fit_calibrator
+from utils.evaluation import calibration_curve
+
+
+def test_ece_matches_the_reliability_curve():
+    rng = np.random.default_rng(5)
+    proba = rng.random(5000)
+    y = (rng.random(5000) < proba ** 2).astype(np.int8)
+
+    curve, ece = calibration_curve(y, proba)
+
+    weighted_gap = sum(
+        b["count"] * abs(b["mean_predicted"] - b["positive_rate"]) for b in curve if b["count"]
+    ) / len(y)
+    assert ece == pytest.approx(weighted_gap)
+    assert ece == expected_calibration_error(proba, y)
+
+
+def test_calibration_lowers_ece_on_miscalibrated_scores():
+    rng = np.random.default_rng(5)
+    proba = rng.random(5000)
+    y = (rng.random(5000) < proba ** 2).astype(np.int8)
+
+    calibrator = fit_calibrator(proba, y, "isotonic")
+
+    assert calibrator.metrics["ece_after"] < calibrator.metrics["ece_before"]
+    assert calibrator.metrics["ece_before"] == pytest.approx(expected_calibration_error(proba, y))
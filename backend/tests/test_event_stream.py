@@ -0,0 +1,61 @@
+import time
+
+from utils.event_stream import EventBroadcaster
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def counting_source(counts, event):
+    def read():
+        counts[event] = counts.get(event, 0) + 1
+        return {"reads": counts[event]}
+    return read
+
+
+def test_poller_reads_only_sources_someone_wants():
+    broadcaster = EventBroadcaster(poll_interval=0.02)
+    counts = {}
+    broadcaster.add_source("health", counting_source(counts, "health"))
+    broadcaster.add_source("system", counting_source(counts, "system"))
+
+    subscriber = broadcaster.subscribe(events=["health"])
+
+    assert wait_for(lambda: counts.get("health", 0) >= 3)
+    assert "system" not in counts
+    frames, _ = subscriber.pop_all(0)
+    assert frames and all("event: health" in frame for frame in frames)
+    broadcaster.unsubscribe(subscriber)
+
+
+def test_new_subscriber_gets_a_fresh_snapshot_of_an_unwatched_source():
+    broadcaster = EventBroadcaster(poll_interval=60)
+    counts = {}
+    broadcaster.add_source("health", counting_source(counts, "health"))
+    broadcaster.add_source("system", counting_source(counts, "system"))
+
+    health = broadcaster.subscribe(events=["health"])
+    assert wait_for(lambda: counts.get("health") == 1)
+
+    system = broadcaster.subscribe(events=["system"])
+
+    assert wait_for(lambda: counts.get("system") == 1)
+    frames, _ = system.pop_all(1)
+    assert any("event: system" in frame for frame in frames)
+    broadcaster.unsubscribe(health)
+    broadcaster.unsubscribe(system)
+
+
+def test_poller_stops_without_subscribers():
+    broadcaster = EventBroadcaster(poll_interval=0.01)
+    broadcaster.add_source("health", lambda: {"ok": True})
+
+    subscriber = broadcaster.subscribe()
+    broadcaster.unsubscribe(subscriber)
+    broadcaster.wakeup.set()
+
+    assert wait_for(lambda: not broadcaster.status()["poller_running"])
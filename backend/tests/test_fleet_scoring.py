@@ -0,0 +1,124 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.batch_scoring import FEATURES
+from utils.fleet_scoring import FleetCoordinator, FleetWorker, WorkerError, drive_shards
+
+
+class FakeScorer:
+    """Stands in for BatchScorer: risk is a pure function of the row"""
+
+    def model_version(self):
+        return "v1"
+
+    def temp_thresholds(self, df):
+        return np.full(len(df), 70.0)
+
+    def score(self, df, temp_threshold=None):
+        return pd.DataFrame({
+            "overall_risk": df["Power_On_Hours"].to_numpy() * 2.0,
+            "thermal_risk": df["Temperature_C"].to_numpy() / 70.0
+        })
+
+
+class FakeWorker(FleetWorker):
+    kind = "fake"
+
+    def __init__(self, name, error=None):
+        super().__init__(name)
+        self.error = error
+
+    def _score(self, features, temp_threshold, model_version, timeout):
+        if self.error is not None:
+            raise self.error
+        return FakeScorer().score(pd.DataFrame(features, columns=FEATURES))
+
+
+def fleet_frame(rows):
+    df = pd.DataFrame(0.0, index=np.arange(rows) + 1000, columns=FEATURES)
+    df["Power_On_Hours"] = np.arange(rows, dtype=float)
+    df["Temperature_C"] = 35.0 + np.arange(rows) % 30
+    df["Drive_ID"] = [f"drive-{i % 97}" for i in range(rows)]
+    return df
+
+
+def coordinator(*workers, min_rows=10):
+    fleet = FleetCoordinator(FakeScorer(), min_rows=min_rows, shards=32)
+    fleet.workers = {w.name: w for w in workers}
+    return fleet
+
+
+def test_drive_shards_are_stable_per_drive():
+    df = fleet_frame(500)
+
+    shards = drive_shards(df, 32)
+
+    assert np.array_equal(shards, drive_shards(df.iloc[::-1], 32)[::-1])
+    by_drive = pd.Series(shards).groupby(df["Drive_ID"].to_numpy()).nunique()
+    assert (by_drive == 1).all()
+
+
+def test_workers_output_matches_local_scoring():
+    df = fleet_frame(500)
+    workers = [FakeWorker("a"), FakeWorker("b"), FakeWorker("c")]
+    fleet = coordinator(*workers)
+
+    risks = fleet.score(df)
+
+    pd.testing.assert_frame_equal(risks, FakeScorer().score(df).set_axis(df.index))
+    assert sum(w.rows for w in workers) == 500
+    assert fleet.status()["local_rows"] == 0
+
+
+def test_failed_worker_shards_go_to_the_others():
+    df = fleet_frame(500)
+    broken = FakeWorker("broken", error=WorkerError("refused", fatal=False))
+    healthy = [FakeWorker("a"), FakeWorker("b")]
+    fleet = coordinator(broken, *healthy)
+
+    risks = fleet.score(df)
+
+    pd.testing.assert_frame_equal(risks, FakeScorer().score(df).set_axis(df.index))
+    assert broken.failures == 1
+    assert not broken.available(time.time())
+    assert sum(w.rows for w in healthy) == 500
+    assert fleet.status()["reassigned_rows"] > 0
+
+
+def test_coordinator_scores_itself_when_every_worker_fails():
+    df = fleet_frame(200)
+    workers = [FakeWorker(name, error=WorkerError("down", fatal=False)) for name in ("a", "b")]
+    fleet = coordinator(*workers)
+
+    risks = fleet.score(df)
+
+    pd.testing.assert_frame_equal(risks, FakeScorer().score(df).set_axis(df.index))
+    assert fleet.status()["fallback_rows"] == 200
+
+
+def test_small_frames_are_scored_locally():
+    worker = FakeWorker("a")
+    fleet = coordinator(worker, min_rows=1000)
+
+    fleet.score(fleet_frame(20))
+
+    assert worker.rows == 0
+    assert fleet.status()["local_rows"] == 20
+
+
+def test_short_worker_reply_is_a_failure():
+    class ShortWorker(FakeWorker):
+        def _score(self, features, temp_threshold, model_version, timeout):
+            return super()._score(features[:-1], temp_threshold, model_version, timeout)
+
+    df = fleet_frame(300)
+    short = ShortWorker("short")
+    fleet = coordinator(short, FakeWorker("a"))
+
+    risks = fleet.score(df)
+
+    pd.testing.assert_frame_equal(risks, FakeScorer().score(df).set_axis(df.index))
+    assert short.failures == 1
+
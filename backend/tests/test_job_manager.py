@@ -0,0 +1,71 @@
+import json
+import threading
+
+import pandas as pd
+import pytest
+
+from utils.job_manager import JobManager, JobQueueFull
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return JobManager(results_dir=str(tmp_path / "jobs"), max_workers=1)
+
+
+def chunks(count, rows=3):
+    def source():
+        for i in range(count):
+            yield pd.DataFrame({"value": range(i * rows, (i + 1) * rows)})
+    return source
+
+
+def test_job_results_round_trip(manager):
+    completed = []
+    job = manager.submit("score", chunks(3), lambda chunk: chunk.assign(double=chunk["value"] * 2),
+                         params={"total": 9}, on_complete=completed.append)
+
+    lines = list(manager.iter_results(job.id, follow=True, poll_interval=0.01))
+
+    assert job.status == "completed"
+    assert completed == [job]
+    assert [json.loads(line) for line in lines] == [{"value": i, "double": i * 2} for i in range(9)]
+    assert job.to_dict()["progress_percent"] == 100.0
+    assert job.chunks_done == 3
+
+
+def test_failed_job_keeps_error_and_runs_cleanup(manager):
+    cleaned = []
+
+    def process(chunk):
+        raise ValueError("bad chunk")
+
+    job = manager.submit("score", chunks(2), process, cleanup=lambda: cleaned.append(True))
+    job.done_event.wait(5)
+
+    assert job.status == "failed"
+    assert job.error == "bad chunk"
+    assert cleaned == [True]
+
+
+def test_cancel_queued_job(manager):
+    release = threading.Event()
+    blocker = manager.submit("score", chunks(1), lambda chunk: release.wait(5) and [])
+    queued = manager.submit("score", chunks(1), lambda chunk: [])
+
+    manager.cancel(queued.id)
+    release.set()
+    blocker.done_event.wait(5)
+
+    assert queued.status == "cancelled"
+    assert queued.done_event.is_set()
+    assert list(manager.iter_results(queued.id)) == []
+
+
+def test_queue_limit(tmp_path):
+    manager = JobManager(results_dir=str(tmp_path / "jobs"), max_workers=1, max_pending=1)
+    release = threading.Event()
+    manager.submit("score", chunks(1), lambda chunk: release.wait(5) and [])
+
+    with pytest.raises(JobQueueFull):
+        manager.submit("score", chunks(1), lambda chunk: [])
+    release.set()
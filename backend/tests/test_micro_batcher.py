@@ -0,0 +1,129 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from utils.micro_batcher import MicroBatcher
+
+
+def frame(*values):
+    return pd.DataFrame({"value": list(values)})
+
+
+def doubled(batch):
+    if (batch["value"] < 0).any():
+        raise ValueError("negative value")
+    return list(batch["value"] * 2)
+
+
+def submit_concurrently(batcher, frames):
+    results = [None] * len(frames)
+
+    def run(i):
+        try:
+            results[i] = batcher.submit(frames[i], timeout=5)
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(frames))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_single_request_is_scored():
+    batcher = MicroBatcher(doubled)
+
+    assert batcher.submit(frame(1, 2, 3)) == [2, 4, 6]
+    assert batcher.status()["batches"] == 1
+
+
+def wait_for_queue(batcher, count):
+    deadline = time.time() + 5
+    while len(batcher.queue) < count and time.time() < deadline:
+        time.sleep(0.001)
+
+
+def test_requests_queued_behind_a_batch_are_coalesced():
+    gate = threading.Event()
+    scoring = threading.Event()
+
+    def gated(batch):
+        scoring.set()
+        gate.wait(5)
+        return doubled(batch)
+
+    batcher = MicroBatcher(gated, max_rows=64)
+    first = threading.Thread(target=batcher.submit, args=(frame(0),))
+    first.start()
+    scoring.wait(5)
+
+    frames = [frame(i, i + 100) for i in range(1, 9)]
+    results = []
+    runner = threading.Thread(target=lambda: results.extend(submit_concurrently(batcher, frames)))
+    runner.start()
+    wait_for_queue(batcher, len(frames))
+    gate.set()
+    runner.join()
+    first.join()
+
+    assert results == [[2 * i, 2 * (i + 100)] for i in range(1, 9)]
+    status = batcher.status()
+    assert status["requests"] == 9
+    assert status["rows"] == 17
+    assert status["batches"] == 2
+    assert status["largest_batch"] == 8
+
+
+def test_batches_never_exceed_max_rows():
+    sizes = []
+
+    def record(batch):
+        sizes.append(len(batch))
+        return doubled(batch)
+
+    batcher = MicroBatcher(record, max_rows=4, max_wait_ms=5)
+    results = submit_concurrently(batcher, [frame(i, i) for i in range(10)])
+
+    assert results == [[2 * i, 2 * i] for i in range(10)]
+    assert max(sizes) <= 4
+
+
+def test_bad_request_does_not_fail_the_rest_of_its_batch():
+    gate = threading.Event()
+    scoring = threading.Event()
+
+    def gated(batch):
+        scoring.set()
+        gate.wait(5)
+        return doubled(batch)
+
+    batcher = MicroBatcher(gated)
+    first = threading.Thread(target=batcher.submit, args=(frame(0),))
+    first.start()
+    scoring.wait(5)
+
+    frames = [frame(1), frame(-1), frame(3)]
+    results = []
+    runner = threading.Thread(target=lambda: results.extend(submit_concurrently(batcher, frames)))
+    runner.start()
+    wait_for_queue(batcher, len(frames))
+    gate.set()
+    runner.join()
+    first.join()
+
+    assert results[0] == [2]
+    assert isinstance(results[1], ValueError)
+    assert results[2] == [6]
+    assert batcher.status()["failed_batches"] == 1
+
+
+def test_lone_failing_request_raises():
+    batcher = MicroBatcher(doubled)
+
+    with pytest.raises(ValueError):
+        batcher.submit(frame(-1))
+    assert batcher.status()["failed_batches"] == 1
@@ -0,0 +1,211 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from utils.storage.sqlite_store import SQLiteHistoryStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteHistoryStore(str(tmp_path / "history.db"))
+
+
+def sample_frame(rows, timestamp="2026-01-05 10:15:00", data_source="bulk", temperature=40.0):
+    return pd.DataFrame({
+        "Power_On_Hours": [100.0 * (i + 1) for i in range(rows)],
+        "Temperature_C": [temperature] * rows,
+        "Percent_Life_Used": [10.0] * rows,
+        "Unsafe_Shutdowns": list(range(rows)),
+        "timestamp": [timestamp] * rows,
+        "data_source": [data_source] * rows,
+        "Drive_ID": [f"drive-{i}" for i in range(rows)]
+    })
+
+
+def count_rows(store, table):
+    with store.cursor() as (conn, cursor):
+        store.execute(cursor, f"SELECT COUNT(*) FROM {table}")
+        return cursor.fetchone()[0]
+
+
+def test_bulk_insert_returns_new_ids_in_frame_order(store):
+    ok, first_id = store.save_input({"Power_On_Hours": 1.0})
+    assert ok
+
+    ids = store.save_inputs_bulk(sample_frame(5))
+
+    assert ids == list(range(first_id + 1, first_id + 6))
+    for i, entry_id in enumerate(ids):
+        entry = store.get_history_entry(entry_id)
+        assert entry["power_on_hours"] == 100.0 * (i + 1)
+        assert entry["drive_id"] == f"drive-{i}"
+        assert entry["timestamp"].startswith("2026-01-05")
+
+
+def test_bulk_insert_ids_after_deleting_latest_row(store):
+    ids = store.save_inputs_bulk(sample_frame(3))
+    assert store.delete_history_entry(ids[-1])
+
+    more = store.save_inputs_bulk(sample_frame(2))
+
+    assert len(more) == 2
+    assert set(more).isdisjoint(ids[:-1])
+    assert [store.get_history_entry(i)["power_on_hours"] for i in more] == [100.0, 200.0]
+
+
+def test_bulk_insert_of_nothing_is_a_no_op(store):
+    assert store.save_inputs_bulk(pd.DataFrame()) == []
+    assert count_rows(store, "input_history") == 0
+
+
+def test_rollups_follow_inserts_and_deletes(store):
+    ids = store.save_inputs_bulk(sample_frame(4, temperature=40.0))
+    store.save_inputs_bulk(sample_frame(2, temperature=70.0))
+
+    for granularity in ("hour", "day"):
+        totals = store.get_rollup_totals(granularity)
+        assert totals["total_inputs"] == 6
+        assert totals["avg_temperature"] == pytest.approx(50.0)
+
+    assert store.delete_history_entry(ids[0])
+    for granularity in ("hour", "day"):
+        totals = store.get_rollup_totals(granularity)
+        assert totals["total_inputs"] == 5
+        assert totals["avg_temperature"] == pytest.approx(52.0)
+
+
+def test_deleting_last_row_of_a_bucket_drops_the_bucket(store):
+    ids = store.save_inputs_bulk(sample_frame(1, data_source="edge"))
+    store.save_inputs_bulk(sample_frame(1, data_source="bulk"))
+
+    assert store.delete_history_entry(ids[0])
+
+    assert store.get_rollup_totals("day", data_source="edge")["total_inputs"] == 0
+    assert store.get_rollup_totals("day", data_source="bulk")["total_inputs"] == 1
+    assert not store.delete_history_entry(ids[0])
+
+
+def test_retention_purge_keeps_rollup_totals(store):
+    old = (datetime.now() - timedelta(days=40)).strftime("%Y-%m-%d %H:%M:%S")
+    recent = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    store.save_inputs_bulk(sample_frame(3, timestamp=old, temperature=30.0))
+    store.save_inputs_bulk(sample_frame(2, timestamp=recent, temperature=60.0))
+
+    cutoff = datetime.now() - timedelta(days=30)
+    report = store.run_retention({"default": 30}, {"default": cutoff}, cutoff, pause=0)
+
+    assert report["default"]["rows_purged"] == 3
+    assert count_rows(store, "input_history") == 2
+    totals = store.get_rollup_totals("day")
+    assert totals["total_inputs"] == 5
+    assert totals["avg_temperature"] == pytest.approx(42.0)
+
+
+def test_retention_backfills_rows_older_than_the_rollups(store):
+    old = datetime.now() - timedelta(days=40)
+    store.save_inputs_bulk(sample_frame(3, timestamp=old.strftime("%Y-%m-%d %H:%M:%S")))
+    with store.cursor() as (conn, cursor):
+        store.execute(cursor, "DELETE FROM input_rollup_daily")
+        conn.commit()
+
+    cutoff = datetime.now() - timedelta(days=30)
+    report = store.run_retention({"default": 30}, {"default": cutoff}, cutoff, pause=0)
+
+    assert report["default"]["buckets_backfilled"] == 1
+    assert count_rows(store, "input_history") == 0
+    assert store.get_rollup_totals("day")["total_inputs"] == 3
+
+
+def test_retention_dry_run_changes_nothing(store):
+    old = (datetime.now() - timedelta(days=40)).strftime("%Y-%m-%d %H:%M:%S")
+    store.save_inputs_bulk(sample_frame(3, timestamp=old))
+
+    cutoff = datetime.now() - timedelta(days=30)
+    report = store.run_retention({"default": 30}, {"default": cutoff}, cutoff, dry_run=True)
+
+    assert report["default"]["rows_eligible"] == 3
+    assert count_rows(store, "input_history") == 3
+
+
+def test_rebuild_rollups_skips_purged_days(store):
+    old = datetime.now() - timedelta(days=40)
+    store.save_inputs_bulk(sample_frame(3, timestamp=old.strftime("%Y-%m-%d %H:%M:%S")))
+    cutoff = datetime.now() - timedelta(days=30)
+    store.run_retention({"default": 30}, {"default": cutoff}, cutoff, pause=0)
+
+    store.rebuild_rollups(old - timedelta(days=1), datetime.now())
+
+    assert store.get_rollup_totals("day")["total_inputs"] == 3
+
+
+def test_rebuild_rollups_resyncs_from_raw_rows(store):
+    store.save_inputs_bulk(sample_frame(4))
+    with store.cursor() as (conn, cursor):
+        store.execute(cursor, "UPDATE input_rollup_daily SET total_inputs = 99")
+        conn.commit()
+
+    assert store.rebuild_rollups("2026-01-05", "2026-01-05") == 1
+    assert store.get_rollup_totals("day")["total_inputs"] == 4
+
+
+def test_clear_all_history_empties_rollups(store):
+    store.save_inputs_bulk(sample_frame(3))
+
+    assert store.clear_all_history(pause=0) == 3
+    assert store.get_rollup_totals("hour")["total_inputs"] == 0
+
+
+def test_rescore_round_trip(store):
+    ids = store.save_inputs_bulk(sample_frame(3))
+    results = {"input_id": ids, "old_risk": [10.0, 20.0, 30.0], "new_risk": [12.0, 18.0, 30.0]}
+
+    assert store.save_rescore_results("run-1", results)
+    assert store.save_rescore_run("run-1", "wearout", "aaa", "bbb", {"rows": 3, "changed": 2})
+
+    with store.cursor() as (conn, cursor):
+        store.execute(cursor, "SELECT input_id, old_risk, new_risk FROM rescore_results "
+                              "WHERE run_id = %s ORDER BY input_id", ("run-1",))
+        assert cursor.fetchall() == list(zip(ids, results["old_risk"], results["new_risk"]))
+        store.execute(cursor, "SELECT model_name, old_version, new_version, rows_scored "
+                              "FROM rescore_runs WHERE run_id = %s", ("run-1",))
+        assert cursor.fetchone() == ("wearout", "aaa", "bbb", 3)
+
+
+def test_predictions_upsert_per_input_and_version(store):
+    ids = store.save_inputs_bulk(sample_frame(2))
+    row = {"input_id": ids[0], "model_version": "v1", "timestamp": "2026-01-05 10:15:00",
+           "overall_risk": 10.0, "status": "Normal", "highest_risk": "wearout"}
+
+    store.save_predictions_bulk([row, {**row, "input_id": ids[1]}])
+    store.save_predictions_bulk([{**row, "overall_risk": 80.0, "status": "High Risk"}])
+
+    trend = store.get_prediction_trend(model_version="v1")
+    assert len(trend) == 2
+    assert {r["input_id"]: r["overall_risk"] for r in trend} == {ids[0]: 80.0, ids[1]: 10.0}
+    assert all(r["timestamp"].startswith("2026-01-05") for r in trend)
+
+
+def test_labels_and_training_run_round_trip(store):
+    ids = store.save_inputs_bulk(sample_frame(3))
+
+    saved, unknown = store.save_labels([(ids[0], 1), (ids[1], 0), (999999, 4)])
+    assert (saved, unknown) == (2, [999999])
+    first = store.get_labels()
+    assert [(r["input_id"], r["failure_mode"]) for r in first] == [(ids[0], 1), (ids[1], 0)]
+
+    # A correction gets a new label id so it is past any watermark
+    store.save_labels([(ids[0], 4)])
+    relabeled = store.get_labels(after_id=max(r["label_id"] for r in first))
+    assert [(r["input_id"], r["failure_mode"]) for r in relabeled] == [(ids[0], 4)]
+    assert store.count_labels() == {0: 1, 4: 1}
+
+    watermark = relabeled[0]["label_id"]
+    assert store.save_training_run("run-1", "wearout", "aaa", "bbb", True, watermark, 2, {"f1": 0.9})
+    assert store.save_training_run("run-2", "wearout", "bbb", None, False, watermark + 5, 2, {})
+
+    assert store.label_watermark("wearout", "bbb") == watermark
+    assert store.label_watermark("wearout", "zzz") == 0
+    runs = store.get_training_runs("wearout")
+    assert {r["run_id"]: r["accepted"] for r in runs} == {"run-1": True, "run-2": False}
+    assert next(r for r in runs if r["run_id"] == "run-1")["metrics"] == {"f1": 0.9}
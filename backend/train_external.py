@@ -0,0 +1,92 @@
+"""
+Train the wear-out or controller model out of core: the training data is
+streamed in chunks into an XGBoost QuantileDMatrix (quantized in memory) or
+an ExtMemQuantileDMatrix (pages cached on disk), so the full dataset never
+has to fit in RAM. Tuned parameters are taken from the current model.
+
+    python train_external.py wearout --source data/big.csv
+    python train_external.py controller --source data/archive --memory external --cache-dir /tmp/xgb
+    python train_external.py wearout --source history    # labeled input_history rows
+"""
+import argparse
+import json
+import sys
+import warnings
+
+from utils.calibration import CALIBRATION_METHOD, CALIBRATION_METHODS
+from utils.external_training import MEMORY_MODES
+from utils.storage import get_history_store
+from utils.training_data import READ_CHUNK_ROWS, labeled_history_source
+
+warnings.filterwarnings('ignore')
+
+# Failure modes each model is trained on (0 = healthy)
+MODEL_MODES = {
+    "wearout": (0, 1),
+    "controller": (0, 4)
+}
+
+
+def print_header(text):
+    print("\n" + "=" * 70)
+    print(f" {text}")
+    print("=" * 70)
+
+
+def load_predictor(name):
+    if name == "wearout":
+        from utils.wearout_predictor import WearoutPredictor
+        return WearoutPredictor()
+    from utils.controller_predictor import ControllerPredictor
+    return ControllerPredictor()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("model", choices=sorted(MODEL_MODES))
+    parser.add_argument("--source", default="data/Clean_Final_NVMe_Dataset.csv",
+                        help="CSV file, Parquet file/directory, or 'history'")
+    parser.add_argument("--memory", choices=MEMORY_MODES, default="quantile")
+    parser.add_argument("--cache-dir", help="page cache directory for --memory external")
+    parser.add_argument("--chunk-size", type=int, default=READ_CHUNK_ROWS)
+    parser.add_argument("--rounds", type=int, help="boosting rounds (default: current model's n_estimators)")
+    parser.add_argument("--test-size", type=float, default=0.2)
+    parser.add_argument("--early-stopping", type=int, help="stop after N rounds without holdout improvement")
+    parser.add_argument("--calibration", choices=CALIBRATION_METHODS, default=CALIBRATION_METHOD)
+    args = parser.parse_args()
+
+    source = args.source
+    if source == "history":
+        # Same store selection as app.py
+        from app import DB_CONFIG, STORAGE_BACKEND, SQLITE_PATH
+        store = get_history_store(STORAGE_BACKEND, db_config=DB_CONFIG, sqlite_path=SQLITE_PATH)
+        if not store.is_available():
+            print(f"❌ History store not reachable: {store.describe()}")
+            return 1
+        source = labeled_history_source(store, MODEL_MODES[args.model])
+
+    print_header(f"{args.model.upper()} MODEL <- {args.source} ({args.memory})")
+    predictor = load_predictor(args.model)
+    try:
+        report = predictor.train_model_external(
+            source,
+            memory=args.memory,
+            rounds=args.rounds,
+            test_size=args.test_size,
+            chunk_size=args.chunk_size,
+            cache_dir=args.cache_dir,
+            early_stopping_rounds=args.early_stopping,
+            calibration=args.calibration
+        )
+    except (ValueError, RuntimeError, FileNotFoundError) as e:
+        print(f"❌ Training failed: {e}")
+        return 1
+
+    print_header("REPORT")
+    for key, value in report.items():
+        print(f"{key:<20} {json.dumps(value) if isinstance(value, (dict, list)) else value}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,378 @@
+import json
+import math
+import os
+import queue
+import threading
+import time
+import urllib.request
+from collections import OrderedDict, deque
+from datetime import datetime
+
+from utils.batch_scoring import WARNING_RISK, CRITICAL_RISK
+
+# Rules evaluated on every scored sample. Each rule keeps a few scalars of
+# state per drive, so evaluation is O(1) per sample and per rule. evaluate()
+# only proposes an alert; fired() records it once the engine has sent it, so
+# a deduplicated or rate-limited alert is proposed again on the next sample.
+DEFAULT_ALERT_RULES = [
+    {"name": "critical_risk", "type": "threshold", "metric": "overall_risk",
+     "threshold": CRITICAL_RISK, "severity": "critical"},
+    {"name": "warning_risk", "type": "threshold", "metric": "overall_risk",
+     "threshold": WARNING_RISK, "severity": "warning"},
+    {"name": "risk_jump", "type": "rate_of_change", "metric": "overall_risk",
+     "delta": 20, "severity": "warning"},
+    {"name": "consecutive_warnings", "type": "consecutive", "statuses": ["Warning", "Critical"],
+     "count": 3, "severity": "warning"}
+]
+
+SEVERITIES = ("info", "warning", "critical")
+
+
+class ThresholdRule:
+    """Fires when metric crosses threshold upwards; re-arms once it drops below threshold - hysteresis"""
+
+    def __init__(self, name, metric, threshold, severity="warning", hysteresis=5):
+        self.name = name
+        self.metric = metric
+        self.threshold = float(threshold)
+        self.severity = severity
+        self.hysteresis = float(hysteresis)
+
+    def evaluate(self, state, sample):
+        value = sample.get(self.metric)
+        if value is None:
+            return None
+        active = state.get("active", False)
+        if not active and value >= self.threshold:
+            return f"{self.metric} {value:.1f} crossed {self.threshold:g}"
+        if active and value < self.threshold - self.hysteresis:
+            state["active"] = False
+        return None
+
+    def fired(self, state):
+        state["active"] = True
+
+
+class RateOfChangeRule:
+    """Fires when metric rises by at least delta since the drive's previous sample"""
+
+    def __init__(self, name, metric, delta, severity="warning"):
+        self.name = name
+        self.metric = metric
+        self.delta = float(delta)
+        self.severity = severity
+
+    def evaluate(self, state, sample):
+        value = sample.get(self.metric)
+        if value is None:
+            return None
+        previous = state.get("last")
+        state["last"] = value
+        if previous is not None and value - previous >= self.delta:
+            return f"{self.metric} rose {value - previous:.1f} points ({previous:.1f} -> {value:.1f})"
+        return None
+
+    def fired(self, state):
+        pass
+
+
+class ConsecutiveRule:
+    """Fires once per run of at least count samples in a row with one of statuses"""
+
+    def __init__(self, name, count, statuses=("Warning", "Critical"), severity="warning"):
+        self.name = name
+        self.count = int(count)
+        self.statuses = set(statuses)
+        self.severity = severity
+
+    def evaluate(self, state, sample):
+        if sample.get("status") in self.statuses:
+            state["run"] = state.get("run", 0) + 1
+            if state["run"] >= self.count and not state.get("active", False):
+                return f"{state['run']} consecutive samples in {'/'.join(sorted(self.statuses))}"
+        else:
+            state["run"] = 0
+            state["active"] = False
+        return None
+
+    def fired(self, state):
+        state["active"] = True
+
+
+RULE_TYPES = {
+    "threshold": ThresholdRule,
+    "rate_of_change": RateOfChangeRule,
+    "consecutive": ConsecutiveRule
+}
+
+
+def build_rules(configs):
+    """Instantiate rule objects from dicts like DEFAULT_ALERT_RULES"""
+    rules = []
+    for config in configs:
+        config = dict(config)
+        rule_type = config.pop("type", None)
+        if rule_type not in RULE_TYPES:
+            raise ValueError(f"Unknown alert rule type: {rule_type}")
+        if config.get("severity", "warning") not in SEVERITIES:
+            raise ValueError(f"Unknown severity for rule '{config.get('name')}'")
+        rules.append(RULE_TYPES[rule_type](**config))
+    return rules
+
+
+def load_alert_rules():
+    """Alert rules; override with a JSON list in NVME_ALERT_RULES or a file in NVME_ALERT_RULES_FILE"""
+    raw = os.environ.get("NVME_ALERT_RULES")
+    path = os.environ.get("NVME_ALERT_RULES_FILE")
+    try:
+        if path and os.path.exists(path):
+            with open(path) as f:
+                raw = f.read()
+        if raw:
+            return build_rules(json.loads(raw))
+    except (ValueError, TypeError, OSError) as e:
+        print(f"[Alerting] Ignoring invalid alert rule override: {e}")
+    return build_rules(DEFAULT_ALERT_RULES)
+
+
+# -------------------------------
+# Sinks
+# -------------------------------
+
+class LogSink:
+    name = "log"
+
+    def send(self, alert):
+        print(f"🚨 [{alert['severity'].upper()}] {alert['drive_id']}: {alert['rule']} - {alert['message']}")
+
+
+class FileSink:
+    """Appends alerts as NDJSON lines"""
+    name = "file"
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def send(self, alert):
+        with open(self.path, "a") as f:
+            f.write(json.dumps(alert) + "\n")
+
+
+class WebhookSink:
+    """POSTs each alert as JSON to a URL"""
+    name = "webhook"
+
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, alert):
+        req = urllib.request.Request(
+            self.url,
+            data=json.dumps(alert).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            resp.read()
+
+
+class QueueSink:
+    """Keeps alerts in a bounded in-process queue for a consumer to drain"""
+    name = "queue"
+
+    def __init__(self, maxsize=1000):
+        self.queue = queue.Queue(maxsize=maxsize)
+
+    def send(self, alert):
+        try:
+            self.queue.put_nowait(alert)
+        except queue.Full:
+            self.queue.get_nowait()
+            self.queue.put_nowait(alert)
+
+
+def make_sink(spec):
+    """Sink from a spec string: 'log', 'queue', 'file:<path>' or 'webhook:<url>'"""
+    kind, _, target = (spec or "log").partition(":")
+    if kind == "file":
+        return FileSink(target or "alerts.ndjson")
+    if kind == "webhook":
+        if not target:
+            raise ValueError("webhook sink needs a URL, e.g. webhook:http://localhost:9000/alerts")
+        return WebhookSink(target)
+    if kind == "queue":
+        return QueueSink()
+    if kind == "log":
+        return LogSink()
+    raise ValueError(f"Unknown alert sink: {spec}")
+
+
+# -------------------------------
+# Engine
+# -------------------------------
+
+class AlertEngine:
+    """
+    Evaluates alert rules on scored samples with per-drive state in memory
+    (least recently seen drives are evicted beyond max_drives).
+
+    Alerts for the same (rule, drive) are deduplicated for dedup_seconds and
+    all notifications share a token bucket of max_per_minute. Delivery runs
+    on a background thread so a slow sink never blocks scoring.
+    """
+
+    def __init__(self, rules, sink, dedup_seconds=900, max_per_minute=60,
+                 max_drives=100000, history_size=500):
+        self.rules = rules
+        self.sink = sink
+        self.dedup_seconds = dedup_seconds
+        self.max_per_minute = max_per_minute
+        self.max_drives = max_drives
+
+        self.state = OrderedDict()
+        self.recent = deque(maxlen=history_size)
+        self.counters = {"evaluated": 0, "no_drive_id": 0, "fired": 0, "deduplicated": 0,
+                         "rate_limited": 0, "delivered": 0, "delivery_errors": 0}
+
+        self.tokens = float(max_per_minute)
+        self.tokens_updated = time.monotonic()
+        self.lock = threading.Lock()
+
+        self.outbox = queue.Queue(maxsize=1000)
+        self.worker = threading.Thread(target=self._deliver, name="alert-delivery", daemon=True)
+        self.worker.start()
+
+    def _drive_state(self, drive_id):
+        states = self.state.get(drive_id)
+        if states is None:
+            states = [{} for _ in self.rules]
+            self.state[drive_id] = states
+            if len(self.state) > self.max_drives:
+                self.state.popitem(last=False)
+        else:
+            self.state.move_to_end(drive_id)
+        return states
+
+    def _take_token(self, now):
+        elapsed = now - self.tokens_updated
+        self.tokens = min(self.max_per_minute, self.tokens + elapsed * self.max_per_minute / 60.0)
+        self.tokens_updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def evaluate(self, drive_id, sample):
+        """
+        Run every rule on one scored sample (dict with the risk columns,
+        overall_risk and status). Returns the alerts queued for delivery.
+        Samples without a Drive_ID are skipped: rule state is per drive.
+        """
+        if drive_id is None or drive_id == "" or (isinstance(drive_id, float) and math.isnan(drive_id)):
+            with self.lock:
+                self.counters["no_drive_id"] += 1
+            return []
+
+        drive_id = str(drive_id)
+        fired = []
+        now = time.monotonic()
+
+        with self.lock:
+            self.counters["evaluated"] += 1
+            states = self._drive_state(drive_id)
+
+            for rule, state in zip(self.rules, states):
+                message = rule.evaluate(state, sample)
+                if message is None:
+                    continue
+
+                last = state.get("sent_at")
+                if last is not None and now - last < self.dedup_seconds:
+                    self.counters["deduplicated"] += 1
+                    continue
+                if not self._take_token(now):
+                    self.counters["rate_limited"] += 1
+                    continue
+
+                rule.fired(state)
+                state["sent_at"] = now
+                alert = {
+                    "rule": rule.name,
+                    "severity": rule.severity,
+                    "drive_id": drive_id,
+                    "message": message,
+                    "overall_risk": round(float(sample.get("overall_risk", 0)), 2),
+                    "status": sample.get("status"),
+                    "highest_risk": sample.get("highest_risk"),
+                    "input_id": sample.get("input_id"),
+                    "timestamp": datetime.now().isoformat()
+                }
+                self.counters["fired"] += 1
+                self.recent.append(alert)
+                fired.append(alert)
+
+        for alert in fired:
+            try:
+                self.outbox.put_nowait(alert)
+            except queue.Full:
+                with self.lock:
+                    self.counters["delivery_errors"] += 1
+        return fired
+
+    def evaluate_frame(self, scored, drive_ids=None, input_ids=None):
+        """Evaluate each row of a BatchScorer frame in order; returns all fired alerts"""
+        records = scored.to_dict(orient="records")
+        drive_ids = list(drive_ids) if drive_ids is not None else [None] * len(records)
+        input_ids = list(input_ids) if input_ids is not None else [None] * len(records)
+
+        fired = []
+        for drive_id, input_id, record in zip(drive_ids, input_ids, records):
+            if input_id is not None:
+                record["input_id"] = int(input_id)
+            fired.extend(self.evaluate(drive_id, record))
+        return fired
+
+    def _deliver(self):
+        while True:
+            alert = self.outbox.get()
+            try:
+                self.sink.send(alert)
+                with self.lock:
+                    self.counters["delivered"] += 1
+            except Exception as e:
+                with self.lock:
+                    self.counters["delivery_errors"] += 1
+                print(f"[Alerting] {self.sink.name} delivery failed: {e}")
+
+    def recent_alerts(self, limit=100, drive_id=None, severity=None):
+        with self.lock:
+            alerts = list(self.recent)
+        if drive_id:
+            alerts = [a for a in alerts if a["drive_id"] == drive_id]
+        if severity:
+            alerts = [a for a in alerts if a["severity"] == severity]
+        return alerts[::-1][:limit]
+
+    def status(self):
+        with self.lock:
+            return {
+                "sink": self.sink.name,
+                "rules": [r.name for r in self.rules],
+                "tracked_drives": len(self.state),
+                "dedup_seconds": self.dedup_seconds,
+                "max_per_minute": self.max_per_minute,
+                "pending_delivery": self.outbox.qsize(),
+                **self.counters
+            }
+
+    def reset(self, drive_id=None):
+        """Forget rule state (and dedup timers) for one drive or all drives"""
+        with self.lock:
+            if drive_id is None:
+                self.state.clear()
+            else:
+                self.state.pop(drive_id, None)
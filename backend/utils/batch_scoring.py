@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+
+from utils.thermal_predictor import DEFAULT_TEMP_THRESHOLD
+
+FEATURES = [
+    "Power_On_Hours",
+    "Total_TBW_TB",
+    "Total_TBR_TB",
+    "Temperature_C",
+    "Percent_Life_Used",
+    "Media_Errors",
+    "Unsafe_Shutdowns",
+    "CRC_Errors",
+    "Read_Error_Rate",
+    "Write_Error_Rate"
+]
+
+# Same cutoffs as generate_summary() in app.py
+WARNING_RISK = 50
+CRITICAL_RISK = 70
+
+RISK_CATEGORIES = ["Wear-Out", "Thermal", "Power", "Controller"]
+RISK_COLUMNS = ["wearout_risk", "thermal_risk", "power_risk", "controller_risk"]
+
+# Risk used when a predictor has no vectorized path (fallback mode)
+FALLBACK_RISK = {
+    "wearout_risk": 25.0,
+    "thermal_risk": 25.0,
+    "power_risk": 20.0,
+    "controller_risk": 20.0
+}
+
+
+def prepare_features(df):
+    """Return a numeric frame with every model feature present (missing -> 0)"""
+    features = df.reindex(columns=FEATURES)
+    features = features.apply(pd.to_numeric, errors="coerce")
+    return features.fillna(0)
+
+
+def summarize_risks(risks):
+    """Vectorized equivalent of generate_summary() status/highest-risk logic"""
+    matrix = risks[RISK_COLUMNS].to_numpy(dtype=np.float64)
+    highest_index = matrix.argmax(axis=1)
+    overall = matrix[np.arange(len(matrix)), highest_index]
+
+    status = np.where(
+        overall >= CRITICAL_RISK, "Critical",
+        np.where(overall >= WARNING_RISK, "Warning", "Healthy")
+    )
+
+    risks = risks.copy()
+    risks["overall_risk"] = overall
+    risks["highest_risk"] = np.asarray(RISK_CATEGORIES)[highest_index]
+    risks["status"] = status
+    return risks
+
+
+class BatchScorer:
+    """Scores whole DataFrames with one vectorized call per predictor"""
+
+    def __init__(self, wearout, thermal, power, controller, default_temp_threshold=DEFAULT_TEMP_THRESHOLD,
+                 threshold_registry=None, failure_mode=None):
+        self.wearout = wearout
+        self.thermal = thermal
+        self.power = power
+        self.controller = controller
+        self.default_temp_threshold = default_temp_threshold
+        self.threshold_registry = threshold_registry
+        self.failure_mode = failure_mode
+
+    def _run(self, column, predictor, features, **kwargs):
+        if not hasattr(predictor, "predict_batch"):
+            return np.full(len(features), FALLBACK_RISK[column])
+        try:
+            return np.asarray(predictor.predict_batch(features, **kwargs), dtype=np.float64)
+        except Exception as e:
+            print(f"[BatchScorer] {column} failed, using fallback: {e}")
+            return np.full(len(features), FALLBACK_RISK[column])
+
+    def temp_thresholds(self, df):
+        """
+        Per-row temperature thresholds: the stored/reported value if present,
+        else the registry value for the row's vendor/model/firmware, else default
+        """
+        if "temp_threshold" in df.columns:
+            thresholds = pd.to_numeric(df["temp_threshold"], errors="coerce").to_numpy(dtype=np.float64)
+        else:
+            thresholds = np.full(len(df), np.nan)
+
+        if self.threshold_registry is not None and np.isnan(thresholds).any():
+            thresholds = np.where(np.isnan(thresholds), self.threshold_registry.lookup_batch(df), thresholds)
+
+        return np.where(np.isnan(thresholds), float(self.default_temp_threshold), thresholds)
+
+    def model_version(self):
+        """
+        Version id of the models behind score(): the failure mode model hash,
+        else the wearout and controller hashes with their calibration maps
+        """
+        if self.failure_mode is not None and getattr(self.failure_mode, "model", None) is not None:
+            return f"f-{self.failure_mode.model_version}"
+        wearout_version = getattr(self.wearout, "scoring_version", None) or "none"
+        controller_version = getattr(self.controller, "scoring_version", None) or "none"
+        return f"w-{wearout_version}.c-{controller_version}"
+
+    def _failure_mode_probabilities(self, features):
+        """One multi-class pass for all modes, or None to use the binary models"""
+        if self.failure_mode is None or getattr(self.failure_mode, "model", None) is None:
+            return None
+        try:
+            return np.asarray(self.failure_mode.predict_proba_batch(features), dtype=np.float64)
+        except Exception as e:
+            print(f"[BatchScorer] failure mode model failed, using binary models: {e}")
+            return None
+
+    def score(self, df, temp_threshold=None):
+        """Return a DataFrame with the four risk columns plus overall/highest/status"""
+        features = prepare_features(df)
+
+        if temp_threshold is None:
+            temp_threshold = self.temp_thresholds(df)
+
+        mode_proba = self._failure_mode_probabilities(features)
+        if mode_proba is not None:
+            modes = list(self.failure_mode.modes)
+            wearout_risk = mode_proba[:, modes.index(1)]
+            controller_risk = mode_proba[:, modes.index(4)]
+        else:
+            wearout_risk = self._run("wearout_risk", self.wearout, features)
+            controller_risk = self._run("controller_risk", self.controller, features)
+
+        risks = pd.DataFrame({
+            "wearout_risk": wearout_risk,
+            "thermal_risk": self._run("thermal_risk", self.thermal, features,
+                                      temp_threshold=temp_threshold),
+            "power_risk": self._run("power_risk", self.power, features),
+            "controller_risk": controller_risk
+        }, index=df.index)
+
+        risks = summarize_risks(risks)
+        if mode_proba is not None:
+            modes = list(self.failure_mode.modes)
+            for i, mode in enumerate(modes):
+                risks[f"mode_{mode}_probability"] = mode_proba[:, i]
+            risks["most_likely_mode"] = np.asarray(modes)[mode_proba.argmax(axis=1)]
+        return risks
@@ -0,0 +1,377 @@
+import numpy as np
+import joblib
+import os
+
+from xgboost import XGBClassifier
+from sklearn.model_selection import RandomizedSearchCV
+from scipy.stats import randint, uniform
+
+from utils.batch_scoring import FEATURES
+from utils.compact_model import export_compact, load_model_artifact
+from utils.training_data import load_training_data, split_training_data
+from utils.external_training import train_external
+from utils.versioned_model import VersionedModel
+from utils.calibration import (CALIBRATION_METHOD, CALIBRATION_METHODS, apply_calibration, calibration_path,
+                               fit_calibrator, load_calibration, out_of_fold_proba)
+
+
+# 'pickle' (default), 'ubj' (native booster) or 'flat' (memory-mapped tree arrays);
+# compact formats are written by export_models.py and on every save_model()
+MODEL_FORMAT = os.environ.get("NVME_MODEL_FORMAT", "pickle")
+
+
+class BinaryPredictor(VersionedModel):
+    """
+    XGBoost classifier for one failure mode against healthy drives, with an
+    optional calibration map stored next to the model.
+
+    Subclasses set targets (Failure_Mode -> class, the failure mode mapped
+    to 1) and label, the model name used in log messages.
+    """
+
+    targets = {}
+    label = ""
+
+    def __init__(self, model_path, model_format=MODEL_FORMAT):
+        super().__init__(model_path)
+        self.model_format = model_format
+        self.calibrator = None
+        self.FEATURES = list(FEATURES)
+
+        self.load_model()
+
+    @property
+    def modes_text(self):
+        return " vs ".join(str(mode) for mode in self.targets)
+
+    def _read_model(self, path):
+        self.model = load_model_artifact(path, self.model_format)
+
+    def _after_load(self):
+        self.calibrator = load_calibration(calibration_path(self.model_path), self.model_version)
+        return f", {self.calibrator.method} calibration" if self.calibrator else ""
+
+    def save_model(self):
+        """Save model and calibration map to disk, archiving the previous version first"""
+        if not super().save_model():
+            return False
+        self.save_calibration()
+        try:
+            export_compact(self.model, self.model_path)
+        except Exception as e:
+            print(f"[{self.log_name}] Compact export skipped: {e}")
+        return True
+
+    def save_calibration(self):
+        """Store the calibration map next to the model, tagged with its version"""
+        path = calibration_path(self.model_path)
+        if self.calibrator is not None:
+            self.calibrator.save(path, self.model_version)
+        elif os.path.exists(path):
+            os.remove(path)
+
+    @property
+    def scoring_version(self):
+        """Model version plus the calibration map's hash: changes when either one does"""
+        if self.calibrator is None:
+            return self.model_version
+        return f"{self.model_version}+{self.calibrator.version}"
+
+    def list_versions(self):
+        """Current and archived model versions, newest first"""
+        versions = []
+        stem = os.path.splitext(os.path.basename(self.model_path))[0] + "-"
+        if os.path.isdir(self.archive_dir):
+            for name in os.listdir(self.archive_dir):
+                if name.startswith(stem) and name.endswith(".pkl"):
+                    path = os.path.join(self.archive_dir, name)
+                    versions.append({
+                        "version": name[len(stem):-4],
+                        "current": False,
+                        "calibrated": os.path.exists(calibration_path(path)),
+                        "saved_at": os.path.getmtime(path)
+                    })
+        if self.model_version:
+            versions = [v for v in versions if v["version"] != self.model_version]
+            versions.append({
+                "version": self.model_version,
+                "current": True,
+                "calibrated": self.calibrator is not None,
+                "saved_at": os.path.getmtime(self.model_path)
+            })
+        return sorted(versions, key=lambda v: v["saved_at"], reverse=True)
+
+    def load_version(self, version=None):
+        """Return the model object for a version (None = current)"""
+        if version is None or version == self.model_version:
+            return self.model
+        path = self.archived_path(version)
+        if not os.path.exists(path):
+            raise ValueError(f"Unknown model version: {version}")
+        return joblib.load(path)
+
+    def load_calibrator(self, version=None):
+        """Calibration map of a version (None = current), or None if it has none"""
+        if version is None or version == self.model_version:
+            return self.calibrator
+        return load_calibration(calibration_path(self.archived_path(version)), version)
+
+    def fit_calibration(self, proba, y, method=CALIBRATION_METHOD):
+        """Fit the calibration map on held-out probabilities; saved with the model"""
+        self.calibrator = fit_calibrator(proba, y, method)
+        if self.calibrator is None:
+            return None
+        print(f"[{self.log_name}] {self.calibrator.method} calibration on {len(y)} rows: "
+              f"ECE {self.calibrator.metrics['ece_before']:.4f} -> {self.calibrator.metrics['ece_after']:.4f}")
+        return self.calibrator.summary()
+
+    def calibrate(self, data_path='data/Clean_Final_NVMe_Dataset.csv', method=CALIBRATION_METHOD):
+        """
+        Re-fit the calibration map of the current model without retraining it:
+        out-of-fold probabilities on its training split (the test split stays
+        unseen for evaluation). The model file and version do not change.
+        """
+        if self.model is None:
+            raise ValueError("Model not trained")
+        if method not in CALIBRATION_METHODS:
+            raise ValueError(f"calibration method must be one of {CALIBRATION_METHODS}")
+        base = self.model if hasattr(self.model, "get_params") else joblib.load(self.model_path)
+
+        X, y = load_training_data(data_path, self.targets, self.FEATURES)
+        X_train, _, y_train, _ = split_training_data(X, y, test_size=0.2, random_state=5)
+        del X, y
+
+        proba = out_of_fold_proba(base, X_train, y_train) if method != "off" else None
+        summary = self.fit_calibration(proba, y_train, method)
+        self.save_calibration()
+        return summary
+
+    def train_model(self, data_path='data/Clean_Final_NVMe_Dataset.csv'):
+        """Train the model (Failure_Mode targets, failure mode converted to 1)"""
+        print(f"[{self.log_name}] Training {self.label} model...")
+
+        # Read as float32 / int8 without intermediate frames
+        X, y = load_training_data(data_path, self.targets, self.FEATURES)
+
+        if len(y) == 0:
+            raise ValueError(f"Dataset is empty after filtering Failure_Mode {self.modes_text}")
+
+        X_train, X_test, y_train, y_test = split_training_data(X, y, test_size=0.2, random_state=5)
+        del X, y
+
+        # Handle imbalance
+        neg, pos = np.bincount(y_train, minlength=2)[:2]
+
+        if pos == 0:
+            raise ValueError("No class 1 samples found after filtering dataset!")
+
+        scale_pos_weight = neg / pos
+
+        # Base model
+        xgb_model = XGBClassifier(
+            objective="binary:logistic",
+            eval_metric="logloss",
+            scale_pos_weight=scale_pos_weight,
+            random_state=5,
+            use_label_encoder=False
+        )
+
+        # Better hyperparameter space
+        param_grid = {
+            "n_estimators": randint(100, 1500),
+            "max_depth": randint(2, 15),
+            "learning_rate": uniform(0.01, 0.3),
+            "subsample": uniform(0.5, 0.5),
+            "colsample_bytree": uniform(0.5, 0.5),
+            "gamma": uniform(0, 5),
+            "reg_lambda": uniform(0.1, 20),
+            "reg_alpha": uniform(0, 10),
+            "min_child_weight": randint(1, 15)
+        }
+
+        search = RandomizedSearchCV(
+            estimator=xgb_model,
+            param_distributions=param_grid,
+            n_iter=200,
+            scoring="f1",
+            cv=5,
+            verbose=2,
+            n_jobs=-1,
+            random_state=5
+        )
+
+        search.fit(X_train, y_train)
+
+        # refit=True already trained best_estimator_ on all of X_train
+        self.model = search.best_estimator_
+
+        # Calibration map from out-of-fold probabilities of the chosen parameters
+        calibration = None
+        self.calibrator = None
+        if CALIBRATION_METHOD != "off":
+            calibration = self.fit_calibration(out_of_fold_proba(self.model, X_train, y_train), y_train)
+
+        self.save_model()
+
+        accuracy = self.model.score(X_test, y_test)
+
+        return {
+            "status": "success",
+            "accuracy": float(accuracy),
+            "best_params": search.best_params_,
+            "best_cv_score": float(search.best_score_),
+            "calibration": calibration
+        }
+
+    def train_model_external(self, source='data/Clean_Final_NVMe_Dataset.csv', **options):
+        """
+        Train the model out of core from a CSV, Parquet file/directory or
+        labeled-history source, reusing the current model's tuned parameters.
+        Options are passed to train_external().
+        """
+        print(f"[{self.log_name}] Training {self.label} model out of core...")
+        base = self.model if hasattr(self.model, "get_params") else None
+        if base is None and os.path.exists(self.model_path):
+            base = joblib.load(self.model_path)
+
+        self.model, report, self.calibrator = train_external(
+            source, self.targets, self.FEATURES, base_model=base, **options
+        )
+        self.save_model()
+
+        print(f"[{self.log_name}] ✓ Trained on {report['rows_train']} rows, holdout accuracy {report['accuracy']:.4f}")
+        return report
+
+    def predict(self, input_df):
+        """Predict failure probability"""
+        if self.model is None:
+            return {
+                "risk_percentage": 0.0,
+                "contributions": {},
+                "status": "Model not trained"
+            }
+
+        input_df = input_df.copy()
+
+        # Ensure all features exist
+        for f in self.FEATURES:
+            if f not in input_df.columns:
+                input_df[f] = 0
+
+        input_df[self.FEATURES] = input_df[self.FEATURES].fillna(0)
+
+        proba = self.model.predict_proba(input_df[self.FEATURES])[:, 1]
+        risk_percentage = apply_calibration(self.calibrator, proba)[0] * 100
+
+        contributions = self.feature_contribution_percentage(input_df)
+
+        return {
+            "risk_percentage": float(risk_percentage),
+            "contributions": contributions,
+            "status": "High Risk" if risk_percentage > 50 else "Normal"
+        }
+
+    def predict_batch(self, input_df, model=None, calibrator=None):
+        """Predict failure probability for every row at once (vectorized)"""
+        if model is None:
+            model, calibrator = self.model, self.calibrator
+        if model is None:
+            return np.zeros(len(input_df), dtype=np.float32)
+
+        X = input_df.reindex(columns=self.FEATURES).fillna(0)
+
+        return apply_calibration(calibrator, model.predict_proba(X)[:, 1]) * 100
+
+    def predict_many(self, input_df):
+        """predict() results for every row; probabilities come from one predict_proba call"""
+        input_df = input_df.reindex(columns=self.FEATURES).fillna(0)
+        if self.model is None:
+            return [self.predict(input_df.iloc[[i]]) for i in range(len(input_df))]
+
+        risks = self.predict_batch(input_df)
+        # Gain-based contributions are the same for every row: compute them once
+        gain_percent = self.gain_contribution_percentage()
+        return [
+            {
+                "risk_percentage": float(risk),
+                "contributions": dict(gain_percent) if gain_percent is not None
+                else self.feature_contribution_percentage(input_df.iloc[[i]]),
+                "status": "High Risk" if risk > 50 else "Normal"
+            }
+            for i, risk in enumerate(risks)
+        ]
+
+    def gain_contribution_percentage(self):
+        """Gain-based importance (percent), or None when it is too flat to use"""
+        raw_importance = self.model.feature_importances_
+        gain_dict = dict(zip(self.FEATURES, raw_importance))
+
+        total_gain = sum(gain_dict.values())
+
+        if total_gain > 0:
+            gain_percent = {
+                f: float((gain_dict[f] / total_gain) * 100)
+                for f in self.FEATURES
+            }
+
+            # If model is confident but importance is not flat -> return it
+            if max(gain_percent.values()) > 5:
+                return dict(sorted(gain_percent.items(), key=lambda x: x[1], reverse=True))
+
+        return None
+
+    def feature_contribution_percentage(self, input_df, target_class=1, delta=0.05):
+        """
+        FIXED contribution logic:
+        1) Uses XGBoost feature_importances_ (gain-based)
+        2) Uses perturbation fallback if importance is too flat
+        """
+
+        input_df = input_df.copy()
+
+        for f in self.FEATURES:
+            if f not in input_df.columns:
+                input_df[f] = 0
+
+        input_df[self.FEATURES] = input_df[self.FEATURES].fillna(0)
+
+        # ---------------------------
+        # 1) XGBoost built-in importance
+        # ---------------------------
+        gain_percent = self.gain_contribution_percentage()
+        if gain_percent is not None:
+            return gain_percent
+
+        # ---------------------------
+        # 2) Perturbation fallback (improved)
+        # ---------------------------
+        base_proba = self.model.predict_proba(input_df[self.FEATURES])[0]
+        class_index = list(self.model.classes_).index(target_class)
+        base_value = base_proba[class_index]
+
+        contributions = {}
+
+        for feature in self.FEATURES:
+            modified = input_df.copy()
+
+            value = float(modified[feature].values[0])
+            change = delta * (abs(value) + 1.0)
+
+            modified[feature] = value + change
+
+            new_proba = self.model.predict_proba(modified[self.FEATURES])[0][class_index]
+            impact = abs(new_proba - base_value)
+
+            contributions[feature] = float(impact)
+
+        total_impact = sum(contributions.values())
+
+        if total_impact == 0:
+            return {f: 0.0 for f in self.FEATURES}
+
+        percent = {
+            f: float((contributions[f] / total_impact) * 100)
+            for f in self.FEATURES
+        }
+
+        return dict(sorted(percent.items(), key=lambda x: x[1], reverse=True))
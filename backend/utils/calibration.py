@@ -0,0 +1,181 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+
+# 'isotonic' (default), 'platt' or 'off'; used when a model is trained or re-calibrated
+CALIBRATION_METHOD = os.environ.get("NVME_CALIBRATION", "isotonic")
+CALIBRATION_METHODS = ("isotonic", "platt", "off")
+
+# Isotonic regression needs enough rows per step not to overfit; below this
+# the two-parameter Platt fit is used instead
+ISOTONIC_MIN_ROWS = 1000
+
+# Folds for out-of-fold calibration predictions at train time
+CALIBRATION_FOLDS = 5
+
+# Probabilities are clipped before the logit in Platt scaling
+EPSILON = 1e-6
+
+# Expected calibration error and the reliability curve: equal-width probability bins
+CALIBRATION_BINS = 10
+
+
+def calibration_path(model_path):
+    """Calibration map stored next to a model file (current or archived)"""
+    return os.path.splitext(model_path)[0] + ".calibration.json"
+
+
+def expected_calibration_error(proba, y, bins=CALIBRATION_BINS):
+    """Sum over equal-width bins of |predicted - observed| positives, per row"""
+    index = np.minimum((proba * bins).astype(np.int64), bins - 1)
+    gap = np.abs(np.bincount(index, weights=proba, minlength=bins) - np.bincount(index, weights=y, minlength=bins))
+    return float(gap.sum() / max(len(y), 1))
+
+
+class Calibrator:
+    """
+    Monotone map from raw model probability to calibrated probability.
+    isotonic: piecewise-linear interpolation through the fitted step points
+    (np.interp); platt: sigmoid(a * logit(p) + b). Both are a vectorized
+    pass over the batch, no second model call.
+    """
+
+    def __init__(self, method, x=None, y=None, a=None, b=None, rows=0, fitted_at=None, metrics=None):
+        self.method = method
+        self.x = np.asarray(x, dtype=np.float64) if x is not None else None
+        self.y = np.asarray(y, dtype=np.float64) if y is not None else None
+        self.a = a
+        self.b = b
+        self.rows = rows
+        self.fitted_at = fitted_at or datetime.now().isoformat()
+        self.metrics = metrics or {}
+
+    def apply(self, proba):
+        proba = np.asarray(proba, dtype=np.float64)
+        if self.method == "isotonic":
+            return np.interp(proba, self.x, self.y)
+        clipped = np.clip(proba, EPSILON, 1 - EPSILON)
+        z = self.a * np.log(clipped / (1 - clipped)) + self.b
+        return 1.0 / (1.0 + np.exp(-z))
+
+    @property
+    def version(self):
+        """Short hash of the map parameters; part of the scoring version id"""
+        params = {k: v for k, v in self.to_dict().items() if k not in ("rows", "fitted_at", "metrics")}
+        return hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:8]
+
+    def to_dict(self):
+        data = {
+            "method": self.method,
+            "rows": self.rows,
+            "fitted_at": self.fitted_at,
+            "metrics": self.metrics
+        }
+        if self.method == "isotonic":
+            data.update({"x": self.x.tolist(), "y": self.y.tolist()})
+        else:
+            data.update({"a": self.a, "b": self.b})
+        return data
+
+    def summary(self):
+        return {
+            "method": self.method,
+            "rows": self.rows,
+            "fitted_at": self.fitted_at,
+            **self.metrics
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data["method"],
+            x=data.get("x"),
+            y=data.get("y"),
+            a=data.get("a"),
+            b=data.get("b"),
+            rows=data.get("rows", 0),
+            fitted_at=data.get("fitted_at"),
+            metrics=data.get("metrics")
+        )
+
+    def save(self, path, model_version):
+        """Write the map, tagged with the model version it was fitted for"""
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"model_version": model_version, **self.to_dict()}, f)
+        os.replace(tmp, path)
+
+
+def load_calibration(path, model_version=None):
+    """Calibrator stored at path, or None if missing or fitted for another model version"""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Calibration map {path} unreadable: {e}")
+        return None
+    if model_version is not None and data.get("model_version") != model_version:
+        print(f"⚠️ Calibration map {path} is for model {data.get('model_version')}, not {model_version}; ignored")
+        return None
+    return Calibrator.from_dict(data)
+
+
+def apply_calibration(calibrator, proba):
+    """Calibrated probabilities, or the raw ones when there is no calibrator"""
+    return proba if calibrator is None else calibrator.apply(proba)
+
+
+def fit_calibrator(proba, y, method=CALIBRATION_METHOD):
+    """
+    Fit a Calibrator on held-out (or out-of-fold) probabilities of the
+    positive class. Returns None for method 'off'.
+    """
+    if method not in CALIBRATION_METHODS:
+        raise ValueError(f"calibration method must be one of {CALIBRATION_METHODS}")
+    if method == "off":
+        return None
+
+    proba = np.asarray(proba, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if len(np.unique(y)) < 2:
+        raise ValueError("Calibration data needs both classes")
+    if method == "isotonic" and len(y) < ISOTONIC_MIN_ROWS:
+        print(f"⚠️ Only {len(y)} calibration rows; using Platt scaling instead of isotonic")
+        method = "platt"
+
+    if method == "isotonic":
+        from sklearn.isotonic import IsotonicRegression
+        iso = IsotonicRegression(y_min=0.0, y_max=1.0, out_of_bounds="clip").fit(proba, y)
+        calibrator = Calibrator("isotonic", x=iso.X_thresholds_, y=iso.y_thresholds_, rows=len(y))
+    else:
+        from sklearn.linear_model import LogisticRegression
+        clipped = np.clip(proba, EPSILON, 1 - EPSILON)
+        logit = np.log(clipped / (1 - clipped)).reshape(-1, 1)
+        platt = LogisticRegression(C=1e6).fit(logit, y)
+        calibrator = Calibrator("platt", a=float(platt.coef_[0, 0]), b=float(platt.intercept_[0]), rows=len(y))
+
+    calibrator.metrics = {
+        "ece_before": expected_calibration_error(proba, y),
+        "ece_after": expected_calibration_error(calibrator.apply(proba), y),
+        "brier_before": float(np.mean((proba - y) ** 2)),
+        "brier_after": float(np.mean((calibrator.apply(proba) - y) ** 2))
+    }
+    return calibrator
+
+
+def out_of_fold_proba(model, X, y, folds=CALIBRATION_FOLDS, random_state=5):
+    """
+    Positive-class probabilities for every training row from clones of model
+    fitted on the other folds: calibration data the final model has not
+    memorized, without taking rows away from training or the test split.
+    """
+    from sklearn.base import clone
+    from sklearn.model_selection import StratifiedKFold, cross_val_predict
+
+    cv = StratifiedKFold(n_splits=folds, shuffle=True, random_state=random_state)
+    return cross_val_predict(clone(model), X, y, cv=cv, method="predict_proba")[:, 1]
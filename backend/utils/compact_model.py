@@ -0,0 +1,184 @@
+import json
+import os
+
+import numpy as np
+
+# Files written next to the pickle by export_compact():
+#   <stem>.ubj          XGBoost native UBJSON booster (portable across versions)
+#   <stem>.trees/       flattened tree arrays, one .npy per array, memory-mappable
+FLAT_ARRAYS = ("children", "feature", "threshold", "default_left", "roots")
+
+
+def ubj_path(model_path):
+    return os.path.splitext(model_path)[0] + ".ubj"
+
+
+def flat_dir(model_path):
+    return os.path.splitext(model_path)[0] + ".trees"
+
+
+def _base_margin(booster):
+    """Logit of the booster's base_score (stored as '5E-1' or '[5E-1]')"""
+    config = json.loads(booster.save_config())
+    raw = config["learner"]["learner_model_param"]["base_score"].strip("[]")
+    base_score = float(raw.split(",")[0])
+    objective = config["learner"]["objective"]["name"]
+    if objective != "binary:logistic":
+        raise ValueError(f"Flat export supports binary:logistic only, got {objective}")
+    return float(np.log(base_score / (1.0 - base_score))), objective
+
+
+def flatten_booster(booster):
+    """
+    Concatenate every tree of a binary:logistic booster into flat arrays.
+    Leaf values live in threshold (XGBoost stores them in split_conditions)
+    and leaves point to themselves. children is (nodes, 2) of global
+    [left, right] indices so all trees can be walked at once.
+    """
+    model = json.loads(booster.save_raw("json"))
+    trees = model["learner"]["gradient_booster"]["model"]["trees"]
+
+    left, right, feature, threshold, default_left, roots = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for tree in trees:
+        lc = np.asarray(tree["left_children"], dtype=np.int32)
+        rc = np.asarray(tree["right_children"], dtype=np.int32)
+        leaf = lc == -1
+
+        left.append(np.where(leaf, np.arange(len(lc)), lc) + offset)
+        right.append(np.where(leaf, np.arange(len(rc)), rc) + offset)
+        feature.append(np.where(leaf, 0, np.asarray(tree["split_indices"], dtype=np.int32)))
+        threshold.append(np.asarray(tree["split_conditions"], dtype=np.float32))
+        default_left.append(np.asarray(tree["default_left"], dtype=bool))
+        roots.append(offset)
+
+        parents = np.asarray(tree["parents"], dtype=np.int64)
+        depth = np.zeros(len(lc), dtype=np.int32)
+        for node in range(1, len(lc)):
+            depth[node] = depth[parents[node]] + 1
+        max_depth = max(max_depth, int(depth.max()))
+        offset += len(lc)
+
+    arrays = {
+        "children": np.column_stack([np.concatenate(left), np.concatenate(right)]).astype(np.int32),
+        "feature": np.concatenate(feature).astype(np.int32),
+        "threshold": np.concatenate(threshold).astype(np.float32),
+        "default_left": np.concatenate(default_left),
+        "roots": np.asarray(roots, dtype=np.int32)
+    }
+    return arrays, max_depth
+
+
+def export_compact(model, model_path):
+    """Write the UBJSON booster and the flat tree arrays for a fitted XGBClassifier"""
+    booster = model.get_booster()
+
+    booster.save_model(ubj_path(model_path))
+
+    arrays, max_depth = flatten_booster(booster)
+    base_margin, objective = _base_margin(booster)
+
+    out_dir = flat_dir(model_path)
+    os.makedirs(out_dir, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(out_dir, f"{name}.npy"), array)
+
+    meta = {
+        "objective": objective,
+        "base_margin": base_margin,
+        "max_depth": max_depth,
+        "num_trees": int(len(arrays["roots"])),
+        "num_nodes": int(len(arrays["threshold"])),
+        "feature_names": booster.feature_names,
+        "classes": [int(c) for c in model.classes_],
+        "feature_importances": [float(v) for v in model.feature_importances_]
+    }
+    with open(os.path.join(out_dir, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+
+    return {"ubj": ubj_path(model_path), "flat": out_dir, **meta}
+
+
+class FlatTreeModel:
+    """
+    Predicts from flattened tree arrays. Arrays are opened with
+    mmap_mode='r', so worker processes share one page-cached copy instead
+    of each unpickling its own. Exposes the parts of the XGBClassifier API
+    the predictors use (predict_proba, classes_, feature_importances_).
+
+    Walking the trees in numpy beats the XGBoost call overhead for single
+    rows and small batches; large batch jobs are faster on the native
+    booster ('ubj' or the pickle).
+    """
+
+    def __init__(self, directory, mmap=True):
+        with open(os.path.join(directory, "meta.json")) as f:
+            self.meta = json.load(f)
+
+        mode = "r" if mmap else None
+        for name in FLAT_ARRAYS:
+            setattr(self, name, np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mode))
+
+        self.base_margin = self.meta["base_margin"]
+        self.max_depth = self.meta["max_depth"]
+        self.classes_ = np.asarray(self.meta["classes"])
+        self.feature_importances_ = np.asarray(self.meta["feature_importances"], dtype=np.float32)
+        self.feature_names = self.meta["feature_names"]
+
+    def predict_margin(self, X, batch_rows=512):
+        """Walk all trees for all rows together: max_depth vectorized steps per batch"""
+        if hasattr(X, "to_numpy"):
+            X = X.to_numpy()
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+
+        if len(X) > batch_rows:
+            return np.concatenate([
+                self.predict_margin(X[i:i + batch_rows], batch_rows)
+                for i in range(0, len(X), batch_rows)
+            ])
+
+        n_rows, n_features = X.shape
+        flat_x = X.ravel()
+        row_base = (np.arange(n_rows, dtype=np.int64) * n_features)[:, None]
+        children = self.children.reshape(-1)
+        has_nan = bool(np.isnan(X).any())
+
+        nodes = np.broadcast_to(self.roots.astype(np.int64), (n_rows, len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            values = np.take(flat_x, row_base + np.take(self.feature, nodes))
+            go_right = ~(values < np.take(self.threshold, nodes))
+            if has_nan:
+                go_right = np.where(np.isnan(values), ~np.take(self.default_left, nodes), go_right)
+            nodes = np.take(children, nodes * 2 + go_right)
+
+        leaf_values = np.take(self.threshold, nodes).astype(np.float64)
+        return leaf_values.sum(axis=1) + self.base_margin
+
+    def predict_proba(self, X):
+        p = 1.0 / (1.0 + np.exp(-self.predict_margin(X)))
+        return np.column_stack([1.0 - p, p])
+
+    def predict(self, X):
+        return self.classes_[(self.predict_proba(X)[:, 1] > 0.5).astype(int)]
+
+
+def load_model_artifact(model_path, model_format="pickle"):
+    """
+    Load a predictor model in the requested format: 'pickle' (joblib),
+    'ubj' (native booster) or 'flat' (memory-mapped arrays). Falls back to
+    the pickle when the compact artifact has not been exported yet.
+    """
+    if model_format == "flat" and os.path.isdir(flat_dir(model_path)):
+        return FlatTreeModel(flat_dir(model_path))
+
+    if model_format == "ubj" and os.path.exists(ubj_path(model_path)):
+        from xgboost import XGBClassifier
+        model = XGBClassifier()
+        model.load_model(ubj_path(model_path))
+        return model
+
+    import joblib
+    return joblib.load(model_path)
@@ -0,0 +1,237 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from utils.batch_scoring import FEATURES, prepare_features
+
+# Reference histograms use training-set quantiles as bin edges (deciles)
+REFERENCE_BINS = 10
+
+# Population Stability Index bands (the usual rule of thumb)
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+
+# Empty bins are floored at this share so PSI stays finite
+MIN_BIN_SHARE = 1e-4
+
+
+def bin_edges(values, bins=REFERENCE_BINS):
+    """Interior quantile edges; duplicates collapse for discrete / zero-heavy features"""
+    quantiles = np.linspace(0, 1, bins + 1)[1:-1]
+    return np.unique(np.quantile(values, quantiles))
+
+
+def bin_index(values, edges):
+    """Bin of each value: 0 below the first edge ... len(edges) at or above the last"""
+    return np.searchsorted(edges, values, side="right")
+
+
+def build_reference(df, bins=REFERENCE_BINS, source=None):
+    """Per-feature bin edges and counts for a training frame"""
+    X = prepare_features(df)
+    features = {}
+    for feature in FEATURES:
+        values = X[feature].to_numpy(dtype=np.float64)
+        edges = bin_edges(values, bins)
+        counts = np.bincount(bin_index(values, edges), minlength=len(edges) + 1)
+        features[feature] = {
+            "edges": edges.tolist(),
+            "counts": counts.tolist(),
+            "mean": float(values.mean()),
+            "std": float(values.std())
+        }
+    return {
+        "created_at": datetime.now().isoformat(),
+        "source": source,
+        "rows": int(len(X)),
+        "features": features
+    }
+
+
+def psi(live, reference):
+    """Population Stability Index between two count vectors over the same bins"""
+    p = np.maximum(live / max(live.sum(), 1), MIN_BIN_SHARE)
+    q = np.maximum(reference / max(reference.sum(), 1), MIN_BIN_SHARE)
+    return float(np.sum((p - q) * np.log(p / q)))
+
+
+def ks_statistic(live, reference):
+    """Kolmogorov-Smirnov distance between the binned CDFs"""
+    p = np.cumsum(live) / max(live.sum(), 1)
+    q = np.cumsum(reference) / max(reference.sum(), 1)
+    return float(np.abs(p - q).max())
+
+
+class DriftMonitor:
+    """
+    Compares live model inputs with the training distribution.
+
+    Live inputs are binned on the reference (training-set quantile) edges
+    into a ring of fixed-size histograms, one per time slot. The window is
+    the sum of the slots that are still current, so memory is
+    slots x features x bins counters no matter how much traffic arrives,
+    and histograms from several workers can be merged by adding counts.
+    """
+
+    def __init__(self, reference_path="models/drift_reference.json", window_seconds=3600,
+                 slots=12, min_samples=200):
+        self.reference_path = reference_path
+        self.window_seconds = window_seconds
+        self.slots = slots
+        self.slot_seconds = window_seconds / slots
+        self.min_samples = min_samples
+        self.lock = threading.Lock()
+        self.reference = None
+        self.observed = 0
+        self._reset_window(0)
+        self.load_reference()
+
+    # ---- reference ---------------------------------------------------------
+
+    def load_reference(self):
+        if not os.path.exists(self.reference_path):
+            return False
+        try:
+            with open(self.reference_path) as f:
+                self.set_reference(json.load(f))
+            print(f"[DriftMonitor] Loaded reference ({self.reference['rows']} rows) from {self.reference_path}")
+            return True
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[DriftMonitor] Failed to load reference: {e}")
+            return False
+
+    def rebuild_reference(self, data_path="data/Clean_Final_NVMe_Dataset.csv"):
+        """Recompute reference histograms from the training dataset and save them"""
+        df = pd.read_csv(data_path, usecols=FEATURES)
+        reference = build_reference(df, source=os.path.basename(data_path))
+
+        directory = os.path.dirname(self.reference_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.reference_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(reference, f, indent=2)
+        os.replace(tmp_path, self.reference_path)
+
+        self.set_reference(reference)
+        print(f"[DriftMonitor] ✓ Reference rebuilt from {data_path} ({reference['rows']} rows)")
+        return reference
+
+    def set_reference(self, reference):
+        """Install a reference; the live window restarts because bin edges changed"""
+        edges = {f: np.asarray(reference["features"][f]["edges"], dtype=np.float64) for f in FEATURES}
+        counts = {f: np.asarray(reference["features"][f]["counts"], dtype=np.float64) for f in FEATURES}
+        with self.lock:
+            self.reference = reference
+            self.edges = edges
+            self.reference_counts = counts
+            self._reset_window(max(len(e) for e in edges.values()) + 1)
+
+    def _reset_window(self, width):
+        self.counts = np.zeros((self.slots, len(FEATURES), width), dtype=np.int64)
+        self.slot_ids = np.full(self.slots, -1, dtype=np.int64)
+
+    # ---- live window -------------------------------------------------------
+
+    def _current_slot(self, now):
+        return int(now // self.slot_seconds)
+
+    def observe(self, df, now=None):
+        """Add input rows (any frame with feature columns) to the current slot"""
+        if self.reference is None or len(df) == 0:
+            return
+        X = prepare_features(df)
+        slot = self._current_slot(time.time() if now is None else now)
+        position = slot % self.slots
+
+        with self.lock:
+            width = self.counts.shape[2]
+            if self.slot_ids[position] != slot:
+                self.counts[position] = 0
+                self.slot_ids[position] = slot
+            for i, feature in enumerate(FEATURES):
+                bins = bin_index(X[feature].to_numpy(dtype=np.float64), self.edges[feature])
+                self.counts[position, i] += np.bincount(bins, minlength=width)
+            self.observed += len(X)
+
+    def window_counts(self, now=None):
+        """Summed histograms of the slots inside the window (features x bins)"""
+        slot = self._current_slot(time.time() if now is None else now)
+        with self.lock:
+            live = (self.slot_ids > slot - self.slots) & (self.slot_ids >= 0)
+            return self.counts[live].sum(axis=0)
+
+    def merge(self, counts, now=None):
+        """Add histograms from another monitor with the same reference into the current slot"""
+        slot = self._current_slot(time.time() if now is None else now)
+        position = slot % self.slots
+        with self.lock:
+            if self.slot_ids[position] != slot:
+                self.counts[position] = 0
+                self.slot_ids[position] = slot
+            self.counts[position] += np.asarray(counts, dtype=np.int64)
+
+    def reset(self):
+        with self.lock:
+            self._reset_window(self.counts.shape[2])
+
+    # ---- scores ------------------------------------------------------------
+
+    @staticmethod
+    def classify(score):
+        if score >= PSI_SIGNIFICANT:
+            return "drift"
+        if score >= PSI_MODERATE:
+            return "moderate"
+        return "stable"
+
+    def scores(self, now=None):
+        """PSI and KS per feature for the current window against the reference"""
+        if self.reference is None:
+            return {"reference_loaded": False, "samples": 0, "features": {}, "max_psi": None,
+                    "drifted_features": [], "status": "no reference"}
+
+        window = self.window_counts(now)
+        samples = int(window[0].sum()) if len(window) else 0
+        enough = samples >= self.min_samples
+
+        features = {}
+        for i, feature in enumerate(FEATURES):
+            reference = self.reference_counts[feature]
+            live = window[i, :len(reference)].astype(np.float64)
+            score = psi(live, reference)
+            features[feature] = {
+                "psi": round(score, 4),
+                "ks": round(ks_statistic(live, reference), 4),
+                "status": self.classify(score) if enough else "insufficient data"
+            }
+
+        max_psi = max(f["psi"] for f in features.values())
+        drifted = [f for f, s in features.items() if s["status"] == "drift"]
+        return {
+            "reference_loaded": True,
+            "reference_created_at": self.reference.get("created_at"),
+            "reference_rows": self.reference.get("rows"),
+            "window_seconds": self.window_seconds,
+            "samples": samples,
+            "min_samples": self.min_samples,
+            "max_psi": max_psi if enough else None,
+            "drifted_features": drifted,
+            "status": (self.classify(max_psi) if enough else "insufficient data"),
+            "features": features
+        }
+
+    def summary(self):
+        """Headline numbers for health checks and the event stream"""
+        scores = self.scores()
+        return {
+            "status": scores["status"],
+            "max_psi": scores["max_psi"],
+            "samples": scores["samples"],
+            "drifted_features": scores["drifted_features"]
+        }
@@ -0,0 +1,310 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from utils.calibration import CALIBRATION_BINS, expected_calibration_error
+from utils.incremental_training import MODEL_TARGETS
+from utils.training_data import load_training_data, split_training_data
+
+# Predictions kept in memory (also written to cache_dir as .npy)
+MAX_CACHED_PREDICTIONS = 32
+
+# Deployment gates: how much worse a candidate may be than the baseline
+# (positive = allowed drop for scores, allowed increase for errors)
+EVAL_GATES = {
+    "roc_auc": 0.005,
+    "pr_auc": 0.01,
+    "f1": 0.01,
+    "brier": 0.005,
+    "ece": 0.02
+}
+LOWER_IS_BETTER = {"brier", "ece", "logloss"}
+
+
+# ---- vectorized binary metrics ---------------------------------------------
+
+def roc_auc(y, proba):
+    """Mann-Whitney U form: mean rank of positives (ties share their average rank)"""
+    pos = int(y.sum())
+    neg = len(y) - pos
+    if pos == 0 or neg == 0:
+        return None
+    _, inverse, counts = np.unique(proba, return_inverse=True, return_counts=True)
+    ends = np.cumsum(counts)
+    ranks = (ends - (counts - 1) / 2.0)[inverse]
+    return float((ranks[y == 1].sum() - pos * (pos + 1) / 2.0) / (pos * neg))
+
+
+def threshold_curve(y, proba):
+    """True / false positives at every distinct threshold, highest threshold first"""
+    order = np.argsort(proba, kind="mergesort")[::-1]
+    p = proba[order]
+    hits = y[order]
+    # Last index of each run of equal scores
+    last = np.r_[np.flatnonzero(np.diff(p)), len(p) - 1]
+    tps = np.cumsum(hits)[last]
+    fps = last + 1 - tps
+    return p[last], tps, fps
+
+
+def pr_auc(tps, fps, pos):
+    """Average precision: precision at each threshold weighted by the recall gained there"""
+    if pos == 0:
+        return None
+    precision = tps / (tps + fps)
+    recall_gain = np.diff(np.r_[0, tps]) / pos
+    return float(np.sum(precision * recall_gain))
+
+
+def confusion(y, predicted):
+    """[[tn, fp], [fn, tp]]"""
+    return np.bincount(2 * y.astype(np.int64) + predicted, minlength=4).reshape(2, 2)
+
+
+def calibration_curve(y, proba, bins=CALIBRATION_BINS):
+    """Per-bin count, mean predicted probability and observed positive rate, plus ECE"""
+    index = np.minimum((proba * bins).astype(np.int64), bins - 1)
+    counts = np.bincount(index, minlength=bins)
+    predicted = np.bincount(index, weights=proba, minlength=bins)
+    observed = np.bincount(index, weights=y, minlength=bins)
+
+    filled = counts > 0
+    mean_predicted = np.where(filled, predicted / np.maximum(counts, 1), np.nan)
+    positive_rate = np.where(filled, observed / np.maximum(counts, 1), np.nan)
+    ece = expected_calibration_error(proba, y, bins)
+
+    curve = [
+        {
+            "bin": [i / bins, (i + 1) / bins],
+            "count": int(counts[i]),
+            "mean_predicted": float(mean_predicted[i]) if filled[i] else None,
+            "positive_rate": float(positive_rate[i]) if filled[i] else None
+        }
+        for i in range(bins)
+    ]
+    return curve, ece
+
+
+def binary_report(y, proba, threshold=0.5, bins=CALIBRATION_BINS):
+    """All metrics for one model on one dataset, from one probability vector"""
+    y = np.asarray(y, dtype=np.int8)
+    proba = np.asarray(proba, dtype=np.float64)
+    pos = int(y.sum())
+
+    matrix = confusion(y, (proba >= threshold).astype(np.int64))
+    (tn, fp), (fn, tp) = matrix.tolist()
+
+    thresholds, tps, fps = threshold_curve(y, proba)
+    f1_curve = 2 * tps / np.maximum(2 * tps + fps + (pos - tps), 1)
+    best = int(np.argmax(f1_curve))
+
+    clipped = np.clip(proba, 1e-15, 1 - 1e-15)
+    curve, ece = calibration_curve(y, proba, bins)
+
+    return {
+        "rows": int(len(y)),
+        "positives": pos,
+        "threshold": threshold,
+        "roc_auc": roc_auc(y, proba),
+        "pr_auc": pr_auc(tps, fps, pos),
+        "accuracy": float((tp + tn) / len(y)),
+        "precision": float(tp / (tp + fp)) if tp + fp else 0.0,
+        "recall": float(tp / (tp + fn)) if tp + fn else 0.0,
+        "f1": float(2 * tp / (2 * tp + fp + fn)) if tp else 0.0,
+        "confusion_matrix": {"tn": tn, "fp": fp, "fn": fn, "tp": tp},
+        "best_f1": float(f1_curve[best]),
+        "best_f1_threshold": float(thresholds[best]),
+        "logloss": float(-np.mean(y * np.log(clipped) + (1 - y) * np.log(1 - clipped))),
+        "brier": float(np.mean((proba - y) ** 2)),
+        "ece": ece,
+        "calibration": curve
+    }
+
+
+def check_gates(candidate, baseline, gates=None):
+    """Compare two reports metric by metric; passed only if every gate holds"""
+    gates = gates or EVAL_GATES
+    checks = []
+    for metric, allowed in gates.items():
+        new, old = candidate.get(metric), baseline.get(metric)
+        if new is None or old is None:
+            continue
+        worse_by = (new - old) if metric in LOWER_IS_BETTER else (old - new)
+        checks.append({
+            "metric": metric,
+            "candidate": new,
+            "baseline": old,
+            "worse_by": worse_by,
+            "allowed": allowed,
+            "passed": worse_by <= allowed
+        })
+    return {"passed": all(c["passed"] for c in checks), "checks": checks}
+
+
+# ---- harness ----------------------------------------------------------------
+
+def dataset_hash(X, y):
+    """Content hash of an evaluation set (features, column order and labels)"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(",".join(X.columns).encode())
+    digest.update(np.ascontiguousarray(X.to_numpy(dtype=np.float32)).tobytes())
+    digest.update(np.ascontiguousarray(y, dtype=np.int8).tobytes())
+    return digest.hexdigest()
+
+
+class ModelEvaluator:
+    """
+    Scores versions of the binary models on held-out data and reports
+    metrics. Predictions are computed in one batched predict_proba per
+    (model version, dataset) and cached in memory and under cache_dir, keyed
+    by the model's content version and the dataset's content hash, so
+    repeated reports, other thresholds and version comparisons reuse them.
+
+    The default dataset is the training split's holdout (same split as
+    train_model); any CSV / Parquet path with Failure_Mode can be used instead.
+    """
+
+    def __init__(self, predictors, data_path="data/Clean_Final_NVMe_Dataset.csv",
+                 cache_dir="models/eval_cache", max_cached=MAX_CACHED_PREDICTIONS):
+        self.predictors = predictors
+        self.data_path = data_path
+        self.cache_dir = cache_dir
+        self.max_cached = max_cached
+        self._datasets = {}
+        self._predictions = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def dataset(self, name, source=None):
+        """(X, y, hash) for a model's targets; reloaded only when the file changes"""
+        path = source or self.data_path
+        holdout = source is None
+        stat = os.stat(path)
+        key = (name, os.path.abspath(path), holdout, stat.st_mtime, stat.st_size)
+
+        with self._lock:
+            cached = self._datasets.get(key)
+        if cached is not None:
+            return cached
+
+        X, y = load_training_data(path, MODEL_TARGETS[name])
+        if len(y) == 0:
+            raise ValueError(f"No rows for model '{name}' in {path}")
+        if holdout:
+            _, X, _, y = split_training_data(X, y, test_size=0.2, random_state=5)
+            X = X.reset_index(drop=True)
+
+        entry = (X, y, dataset_hash(X, y))
+        with self._lock:
+            self._datasets = {k: v for k, v in self._datasets.items() if k[:3] != key[:3]}
+            self._datasets[key] = entry
+        return entry
+
+    def cache_path(self, name, version, data_hash):
+        return os.path.join(self.cache_dir, f"{name}-{version}-{data_hash}.npy")
+
+    def predictions(self, name, version, X, data_hash):
+        """Positive-class probabilities of one model version on a dataset (cached)"""
+        key = (name, version, data_hash)
+        with self._lock:
+            if key in self._predictions:
+                self._predictions.move_to_end(key)
+                self.hits += 1
+                return self._predictions[key]
+
+        path = self.cache_path(name, version, data_hash)
+        if os.path.exists(path):
+            proba = np.load(path)
+            with self._lock:
+                self.hits += 1
+        else:
+            model = self.predictors[name].load_version(version)
+            proba = model.predict_proba(X)[:, 1].astype(np.float32)
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                np.save(path, proba)
+            except OSError as e:
+                print(f"[ModelEvaluator] ⚠️ Predictions not cached on disk: {e}")
+            with self._lock:
+                self.misses += 1
+
+        with self._lock:
+            self._predictions[key] = proba
+            while len(self._predictions) > self.max_cached:
+                self._predictions.popitem(last=False)
+        return proba
+
+    def evaluate(self, name, version=None, source=None, threshold=0.5, bins=CALIBRATION_BINS, calibrated=False):
+        """
+        Metrics report for one model version (None = current), on the raw
+        model probabilities or (calibrated=True) through the version's
+        calibration map, applied to the cached raw predictions
+        """
+        if name not in self.predictors:
+            raise ValueError(f"Model '{name}' cannot be evaluated")
+        predictor = self.predictors[name]
+        version = version or predictor.model_version
+        if predictor.model is None or not version:
+            raise ValueError(f"No trained '{name}' model")
+
+        started = time.perf_counter()
+        X, y, data_hash = self.dataset(name, source)
+        proba = self.predictions(name, version, X, data_hash)
+        calibrator = None
+        if calibrated:
+            calibrator = predictor.load_calibrator(version) if hasattr(predictor, "load_calibrator") else None
+            if calibrator is None:
+                raise ValueError(f"'{name}' version {version} has no calibration map")
+            proba = calibrator.apply(proba)
+
+        report = binary_report(y, proba, threshold, bins)
+        report.update({
+            "model": name,
+            "version": version,
+            "calibrated": calibrated,
+            "calibration_version": calibrator.version if calibrator is not None else None,
+            "dataset": source or f"{self.data_path} (holdout)",
+            "dataset_hash": data_hash,
+            "seconds": round(time.perf_counter() - started, 4)
+        })
+        return report
+
+    def compare(self, name, candidate=None, baseline=None, source=None, threshold=0.5, gates=None,
+                calibrated=False):
+        """
+        Evaluate two versions on the same dataset and apply the deployment
+        gates. Defaults: candidate = current, baseline = newest archived.
+        """
+        if name not in self.predictors:
+            raise ValueError(f"Model '{name}' cannot be evaluated")
+        predictor = self.predictors[name]
+        candidate = candidate or predictor.model_version
+        if not baseline:
+            archived = [v["version"] for v in predictor.list_versions() if v["version"] != candidate]
+            if not archived:
+                raise ValueError(f"No other '{name}' version to compare against")
+            baseline = archived[0]
+
+        new = self.evaluate(name, candidate, source, threshold, calibrated=calibrated)
+        old = self.evaluate(name, baseline, source, threshold, calibrated=calibrated)
+        return {
+            "model": name,
+            "candidate": new,
+            "baseline": old,
+            "gate": check_gates(new, old, gates)
+        }
+
+    def status(self):
+        with self._lock:
+            return {
+                "cached_predictions": len(self._predictions),
+                "cached_datasets": len(self._datasets),
+                "hits": self.hits,
+                "misses": self.misses,
+                "cache_dir": self.cache_dir
+            }
@@ -0,0 +1,211 @@
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+
+def _json_default(value):
+    if hasattr(value, "item"):
+        return value.item()
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def format_sse(event_id, event, data):
+    """One Server-Sent Events frame"""
+    payload = json.dumps(data, default=_json_default)
+    return f"id: {event_id}\nevent: {event}\ndata: {payload}\n\n"
+
+
+class Subscriber:
+    """
+    One connected client. Its buffer is bounded: when a slow client falls
+    behind, the oldest events are dropped and counted instead of growing
+    memory or blocking the producer.
+    """
+
+    def __init__(self, events=None, max_buffer=256):
+        self.events = set(events) if events else None
+        self.buffer = deque(maxlen=max_buffer)
+        self.dropped = 0
+        self.condition = threading.Condition()
+        self.closed = False
+
+    def wants(self, event):
+        return self.events is None or event in self.events
+
+    def push(self, item):
+        with self.condition:
+            if len(self.buffer) == self.buffer.maxlen:
+                self.dropped += 1
+            self.buffer.append(item)
+            self.condition.notify()
+
+    def pop_all(self, timeout):
+        """Wait up to timeout for events; returns the buffered frames (maybe empty)"""
+        with self.condition:
+            if not self.buffer and not self.closed:
+                self.condition.wait(timeout)
+            items = list(self.buffer)
+            self.buffer.clear()
+            dropped, self.dropped = self.dropped, 0
+        return items, dropped
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+
+
+class EventBroadcaster:
+    """
+    Fans events out from producers to every subscriber. Snapshot sources
+    (health, system info) are read once per poll_interval by a single
+    poller thread, which only runs while at least one client is connected
+    and only reads the sources some connected client subscribed to.
+    """
+
+    def __init__(self, poll_interval=10, max_buffer=256, replay_size=100):
+        self.poll_interval = poll_interval
+        self.max_buffer = max_buffer
+        self.subscribers = set()
+        self.lock = threading.Lock()
+        self.next_id = 1
+        self.replay = deque(maxlen=replay_size)
+        self.sources = {}
+        self.last_snapshot = {}
+        self.poller = None
+        self.wakeup = threading.Event()
+
+    def add_source(self, event, read):
+        """Register a snapshot source; read() is polled and published when it changes"""
+        self.sources[event] = read
+
+    def publish(self, event, data):
+        with self.lock:
+            event_id = self.next_id
+            self.next_id += 1
+            frame = format_sse(event_id, event, data)
+            self.replay.append((event_id, event, frame))
+            subscribers = [s for s in self.subscribers if s.wants(event)]
+        for subscriber in subscribers:
+            subscriber.push(frame)
+        return event_id
+
+    def subscribe(self, events=None, last_event_id=None):
+        subscriber = Subscriber(events, self.max_buffer)
+        with self.lock:
+            if last_event_id is not None:
+                for event_id, event, frame in self.replay:
+                    if event_id > last_event_id and subscriber.wants(event):
+                        subscriber.push(frame)
+            else:
+                for event, data in self.last_snapshot.items():
+                    if subscriber.wants(event):
+                        subscriber.push(format_sse(0, event, data))
+            self.subscribers.add(subscriber)
+            if not self._ensure_poller() and any(
+                subscriber.wants(event) and event not in self.last_snapshot for event in self.sources
+            ):
+                # A source nobody watched yet: read it now, not at the next interval
+                self.wakeup.set()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        subscriber.close()
+        with self.lock:
+            self.subscribers.discard(subscriber)
+
+    def _ensure_poller(self):
+        """Start the poller if it is not running; True if it was started (it polls right away)"""
+        if self.sources and (self.poller is None or not self.poller.is_alive()):
+            self.wakeup.clear()
+            self.poller = threading.Thread(target=self._poll, name="event-poller", daemon=True)
+            self.poller.start()
+            return True
+        return False
+
+    def _poll(self):
+        while True:
+            with self.lock:
+                if not self.subscribers:
+                    self.poller = None
+                    return
+                wanted = {
+                    event: read for event, read in self.sources.items()
+                    if any(s.wants(event) for s in self.subscribers)
+                }
+                # Snapshots nobody watches go stale; drop them so a later
+                # subscriber gets a fresh read instead
+                for event in self.sources:
+                    if event not in wanted:
+                        self.last_snapshot.pop(event, None)
+
+            for event, read in wanted.items():
+                try:
+                    data = read()
+                except Exception as e:
+                    print(f"[EventBroadcaster] {event} source failed: {e}")
+                    continue
+                if data != self.last_snapshot.get(event):
+                    self.last_snapshot[event] = data
+                    self.publish(event, data)
+
+            self.wakeup.wait(self.poll_interval)
+            self.wakeup.clear()
+
+    def stream(self, subscriber, heartbeat=15):
+        """Generator of SSE frames for one subscriber; heartbeats keep proxies from closing it"""
+        try:
+            yield f"retry: {int(self.poll_interval * 1000)}\n\n"
+            last_sent = time.monotonic()
+            while not subscriber.closed:
+                frames, dropped = subscriber.pop_all(heartbeat)
+                if dropped:
+                    yield format_sse(0, "lagged", {"dropped": dropped})
+                for frame in frames:
+                    yield frame
+                if frames or dropped:
+                    last_sent = time.monotonic()
+                elif time.monotonic() - last_sent >= heartbeat:
+                    yield ": keep-alive\n\n"
+                    last_sent = time.monotonic()
+        finally:
+            self.unsubscribe(subscriber)
+
+    async def stream_async(self, subscriber, heartbeat=15, poll=0.25):
+        """
+        stream() for an asyncio server: the buffer is checked every poll
+        seconds without blocking, so an idle client costs no thread
+        """
+        try:
+            yield f"retry: {int(self.poll_interval * 1000)}\n\n"
+            last_sent = time.monotonic()
+            while not subscriber.closed:
+                frames, dropped = subscriber.pop_all(0)
+                if dropped:
+                    yield format_sse(0, "lagged", {"dropped": dropped})
+                for frame in frames:
+                    yield frame
+                if frames or dropped:
+                    last_sent = time.monotonic()
+                elif time.monotonic() - last_sent >= heartbeat:
+                    yield ": keep-alive\n\n"
+                    last_sent = time.monotonic()
+                else:
+                    await asyncio.sleep(poll)
+        finally:
+            self.unsubscribe(subscriber)
+
+    def status(self):
+        with self.lock:
+            return {
+                "subscribers": len(self.subscribers),
+                "last_event_id": self.next_id - 1,
+                "poll_interval": self.poll_interval,
+                "poller_running": self.poller is not None and self.poller.is_alive(),
+                "sources": list(self.sources)
+            }
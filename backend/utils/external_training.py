@@ -0,0 +1,205 @@
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import xgboost as xgb
+from xgboost import XGBClassifier
+from sklearn.metrics import f1_score, log_loss
+
+from utils.batch_scoring import FEATURES
+from utils.calibration import CALIBRATION_METHOD, fit_calibrator
+from utils.training_data import READ_CHUNK_ROWS, StratifiedChunkSplit, iter_training_chunks
+
+# Used when there is no current model to take tuned parameters from
+DEFAULT_PARAMS = {
+    "max_depth": 6,
+    "learning_rate": 0.1,
+    "subsample": 0.8,
+    "colsample_bytree": 0.8,
+    "min_child_weight": 1
+}
+DEFAULT_ROUNDS = 500
+
+# Parameters of a fitted XGBClassifier that do not carry over to xgb.train
+SKIPPED_PARAMS = {"n_estimators", "use_label_encoder", "missing", "n_jobs", "random_state",
+                  "callbacks", "early_stopping_rounds", "enable_categorical", "feature_types",
+                  "feature_weights", "eval_metric", "objective", "scale_pos_weight", "device",
+                  "importance_type"}
+
+# 'quantile': quantized in-memory QuantileDMatrix (~1 byte per feature per row)
+# 'external': ExtMemQuantileDMatrix, pages cached on disk under cache_dir
+#             (XGBoost 3.0+; requirements.txt pins 1.7, which has only 'quantile')
+MEMORY_MODES = ("quantile", "external")
+
+
+class ChunkIter(xgb.DataIter):
+    """
+    Feeds one side (train or test) of a streamed source to XGBoost chunk by
+    chunk. XGBoost may iterate several times (sketching, then building
+    pages); every pass re-reads the source and splits it identically.
+    Class counts are collected on the first full pass.
+    """
+
+    def __init__(self, source, targets, part, split, features=FEATURES,
+                 chunk_size=READ_CHUNK_ROWS, cache_prefix=None):
+        self.source = source
+        self.targets = targets
+        self.part = part
+        self.split = split
+        self.features = list(features)
+        self.chunk_size = chunk_size
+        self.counts = np.zeros(len(set(targets.values())), dtype=np.int64)
+        self.passes = 0
+        self._chunks = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data):
+        if self._chunks is None:
+            self.split.reset()
+            self._chunks = iter_training_chunks(self.source, self.targets, self.features, self.chunk_size)
+
+        for X, y in self._chunks:
+            test = self.split.assign(y)
+            keep = test if self.part == "test" else ~test
+            if not keep.any():
+                continue
+            if self.passes == 0:
+                self.counts += np.bincount(y[keep], minlength=len(self.counts))
+            input_data(data=X[keep], label=y[keep], feature_names=self.features)
+            return True
+
+        self.passes += 1
+        return False
+
+    def reset(self):
+        self._chunks = None
+
+
+def base_params(base_model=None):
+    """Booster parameters taken from the current (tuned) model, else defaults"""
+    if base_model is None or not hasattr(base_model, "get_params"):
+        return dict(DEFAULT_PARAMS), DEFAULT_ROUNDS
+
+    params = {
+        key: value for key, value in base_model.get_params().items()
+        if value is not None and key not in SKIPPED_PARAMS
+    }
+    return params, int(base_model.get_params().get("n_estimators") or DEFAULT_ROUNDS)
+
+
+def train_external(source, targets, features=FEATURES, base_model=None, rounds=None,
+                   memory="quantile", test_size=0.2, chunk_size=READ_CHUNK_ROWS,
+                   cache_dir=None, early_stopping_rounds=None, max_bin=256, seed=5,
+                   calibration=CALIBRATION_METHOD):
+    """
+    Train a binary XGBClassifier on a source too large for memory.
+
+    source is a CSV path, a Parquet file/directory or a callable yielding
+    DataFrames (see iter_source_frames). Rows are streamed through ChunkIter
+    into a QuantileDMatrix (memory='quantile') or an ExtMemQuantileDMatrix
+    with on-disk pages (memory='external'), with a streaming stratified
+    holdout of test_size. The calibration map (see utils.calibration) is
+    fitted on the holdout probabilities. Returns (model, report, calibrator).
+    """
+    if memory not in MEMORY_MODES:
+        raise ValueError(f"memory must be one of {MEMORY_MODES}")
+    if memory == "external" and not hasattr(xgb, "ExtMemQuantileDMatrix"):
+        raise ValueError(f"memory='external' needs XGBoost 3.0+ (installed {xgb.__version__}); "
+                         "use memory='quantile'")
+    n_classes = len(set(targets.values()))
+    if n_classes != 2:
+        raise ValueError("train_external trains binary models (two target classes)")
+
+    started = time.perf_counter()
+    own_cache = memory == "external" and cache_dir is None
+    if own_cache:
+        cache_dir = tempfile.mkdtemp(prefix="nvme_extmem_")
+    try:
+        return _train(source, targets, features, base_model, rounds, memory, test_size, chunk_size,
+                      cache_dir, early_stopping_rounds, max_bin, seed, calibration, started)
+    finally:
+        if own_cache:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+def _train(source, targets, features, base_model, rounds, memory, test_size, chunk_size,
+           cache_dir, early_stopping_rounds, max_bin, seed, calibration, started):
+    n_classes = len(set(targets.values()))
+    prefix = os.path.join(cache_dir, "cache") if memory == "external" else None
+    if prefix:
+        os.makedirs(cache_dir, exist_ok=True)
+
+    train_iter = ChunkIter(source, targets, "train", StratifiedChunkSplit(n_classes, test_size, seed),
+                           features, chunk_size, cache_prefix=prefix and prefix + "-train")
+    test_iter = ChunkIter(source, targets, "test", StratifiedChunkSplit(n_classes, test_size, seed),
+                          features, chunk_size, cache_prefix=prefix and prefix + "-test")
+
+    matrix = xgb.ExtMemQuantileDMatrix if memory == "external" else xgb.QuantileDMatrix
+    print(f"[ExternalTraining] Building {matrix.__name__} from streamed chunks...")
+    try:
+        dtrain = matrix(train_iter, max_bin=max_bin)
+        dtest = matrix(test_iter, max_bin=max_bin, ref=dtrain)
+    except xgb.core.XGBoostError:
+        if not train_iter.counts.any() or not test_iter.counts.any():
+            raise ValueError(f"Not enough rows for Failure_Mode {sorted(targets)} in the training source")
+        raise
+
+    neg, pos = train_iter.counts[:2]
+    if pos == 0 or neg == 0:
+        raise ValueError(f"Training split needs both classes (class counts {train_iter.counts.tolist()})")
+
+    params, default_rounds = base_params(base_model)
+    rounds = rounds or default_rounds
+    params.update({
+        "objective": "binary:logistic",
+        "eval_metric": "logloss",
+        "tree_method": "hist",
+        "max_bin": max_bin,
+        "scale_pos_weight": float(neg / pos),
+        "seed": seed
+    })
+
+    print(f"[ExternalTraining] Training {rounds} rounds on {dtrain.num_row()} rows "
+          f"(holdout {dtest.num_row()})")
+    booster = xgb.train(
+        params, dtrain,
+        num_boost_round=rounds,
+        evals=[(dtest, "holdout")],
+        early_stopping_rounds=early_stopping_rounds,
+        verbose_eval=max(rounds // 10, 1)
+    )
+
+    if early_stopping_rounds:
+        booster = booster[: booster.best_iteration + 1]
+
+    proba = booster.predict(dtest)
+    y_test = dtest.get_label().astype(np.int8)
+    predicted = (proba >= 0.5).astype(np.int8)
+
+    # Same interface as the RandomizedSearchCV models (predict_proba, importances, get_params)
+    model = XGBClassifier(**{k: v for k, v in params.items() if k not in ("seed", "max_bin")},
+                          n_estimators=booster.num_boosted_rounds(), max_bin=max_bin, random_state=seed)
+    model.load_model(bytearray(booster.save_raw(raw_format="ubj")))
+
+    # Out-of-fold predictions would need extra passes over the source; the
+    # streamed holdout has never been trained on
+    calibrator = fit_calibrator(proba, y_test, calibration)
+
+    return model, {
+        "status": "success",
+        "memory": memory,
+        "rows_train": int(dtrain.num_row()),
+        "rows_holdout": int(dtest.num_row()),
+        "class_counts_train": train_iter.counts.tolist(),
+        "class_counts_holdout": test_iter.counts.tolist(),
+        "rounds": int(booster.num_boosted_rounds()),
+        "stopped_early": bool(early_stopping_rounds) and booster.num_boosted_rounds() < rounds,
+        "accuracy": float((predicted == y_test).mean()),
+        "f1": float(f1_score(y_test, predicted)),
+        "logloss": float(log_loss(y_test, proba, labels=[0, 1])),
+        "params": params,
+        "calibration": calibrator.summary() if calibrator else None,
+        "seconds": round(time.perf_counter() - started, 1)
+    }, calibrator
@@ -0,0 +1,168 @@
+import numpy as np
+
+from xgboost import XGBClassifier
+from sklearn.model_selection import RandomizedSearchCV
+from sklearn.metrics import f1_score
+from sklearn.utils.class_weight import compute_sample_weight
+from scipy.stats import randint, uniform
+
+from utils.batch_scoring import FEATURES
+from utils.training_data import load_training_data, split_training_data
+from utils.versioned_model import VersionedModel
+
+# Failure_Mode values in Clean_Final_NVMe_Dataset.csv, in model class order
+FAILURE_MODES = [0, 1, 4, 5]
+MODE_LABELS = {
+    0: "Healthy",
+    1: "Wear-Out",
+    4: "Controller",
+    5: "Early-Life Defect"
+}
+
+# Which mode probability stands in for each binary predictor's risk
+RISK_MODES = {
+    "wearout": 1,
+    "controller": 4
+}
+
+
+class FailureModePredictor(VersionedModel):
+    """
+    One multi-class XGBoost model over all Failure_Mode classes. A single
+    predict_proba pass yields every mode probability, replacing the separate
+    wear-out (0 vs 1) and controller (0 vs 4) traversals when enabled.
+    """
+
+    modes = FAILURE_MODES
+
+    def __init__(self, model_path="models/failure_mode_model.pkl"):
+        super().__init__(model_path)
+        self.FEATURES = list(FEATURES)
+
+        self.load_model()
+
+    def train_model(self, data_path='data/Clean_Final_NVMe_Dataset.csv', n_iter=30):
+        """Train one multi-class model on every Failure_Mode (0, 1, 4, 5)"""
+        print("[FailureModePredictor] Training multi-class failure mode model...")
+
+        # XGBoost needs classes 0..k-1; read as float32 / int8 without intermediate frames
+        X, y = load_training_data(data_path, {mode: i for i, mode in enumerate(FAILURE_MODES)}, self.FEATURES)
+
+        if len(y) == 0:
+            raise ValueError("Dataset has no rows with a known Failure_Mode")
+
+        X_train, X_test, y_train, y_test = split_training_data(X, y, test_size=0.2, random_state=5)
+        del X, y
+
+        missing = set(range(len(FAILURE_MODES))) - set(np.unique(y_train))
+        if missing:
+            raise ValueError(f"No samples for Failure_Mode {[FAILURE_MODES[i] for i in missing]}")
+
+        # Handle imbalance
+        sample_weight = compute_sample_weight("balanced", y_train)
+
+        xgb_model = XGBClassifier(
+            objective="multi:softprob",
+            eval_metric="mlogloss",
+            random_state=5
+        )
+
+        param_grid = {
+            "n_estimators": randint(100, 800),
+            "max_depth": randint(2, 12),
+            "learning_rate": uniform(0.01, 0.3),
+            "subsample": uniform(0.5, 0.5),
+            "colsample_bytree": uniform(0.5, 0.5),
+            "gamma": uniform(0, 5),
+            "reg_lambda": uniform(0.1, 20),
+            "reg_alpha": uniform(0, 10),
+            "min_child_weight": randint(1, 15)
+        }
+
+        search = RandomizedSearchCV(
+            estimator=xgb_model,
+            param_distributions=param_grid,
+            n_iter=n_iter,
+            scoring="f1_macro",
+            cv=3,
+            verbose=1,
+            n_jobs=-1,
+            random_state=5
+        )
+
+        search.fit(X_train, y_train, sample_weight=sample_weight)
+
+        # refit=True already trained best_estimator_ on all of X_train
+        self.model = search.best_estimator_
+
+        self.save_model()
+
+        y_pred = self.model.predict(X_test)
+        per_class = f1_score(y_test, y_pred, average=None)
+
+        return {
+            "status": "success",
+            "accuracy": float(self.model.score(X_test, y_test)),
+            "f1_macro": float(f1_score(y_test, y_pred, average="macro")),
+            "f1_per_mode": {MODE_LABELS[m]: float(s) for m, s in zip(FAILURE_MODES, per_class)},
+            "best_params": search.best_params_,
+            "best_cv_score": float(search.best_score_)
+        }
+
+    def predict_proba_batch(self, input_df):
+        """All mode probabilities (percent) for every row; columns follow FAILURE_MODES"""
+        if self.model is None:
+            return np.zeros((len(input_df), len(FAILURE_MODES)), dtype=np.float32)
+
+        X = input_df.reindex(columns=self.FEATURES).fillna(0)
+
+        return self.model.predict_proba(X) * 100
+
+    def contributions(self):
+        """Gain-based feature importance (percent), shared by every mode"""
+        importance = dict(zip(self.FEATURES, self.model.feature_importances_))
+        total = sum(importance.values())
+        if total <= 0:
+            return {f: 0.0 for f in self.FEATURES}
+        percent = {f: float(v / total * 100) for f, v in importance.items()}
+        return dict(sorted(percent.items(), key=lambda x: x[1], reverse=True))
+
+    def predict(self, input_df):
+        """
+        Mode probabilities for the first row plus wear-out and controller
+        results in the same shape the binary predictors return
+        """
+        if self.model is None:
+            return None
+
+        return self.predict_many(input_df.iloc[:1])[0]
+
+    def predict_many(self, input_df):
+        """predict() results for every row, from one predict_proba call"""
+        if self.model is None:
+            return None
+
+        contributions = self.contributions()
+        rows = []
+        for proba in self.predict_proba_batch(input_df):
+            probabilities = {MODE_LABELS[m]: round(float(p), 2) for m, p in zip(FAILURE_MODES, proba)}
+            most_likely = FAILURE_MODES[int(np.argmax(proba))]
+
+            results = {}
+            for name, mode in RISK_MODES.items():
+                risk = float(proba[FAILURE_MODES.index(mode)])
+                results[name] = {
+                    "risk_percentage": risk,
+                    "contributions": dict(contributions),
+                    "status": "High Risk" if risk > 50 else "Normal"
+                }
+
+            results["failure_modes"] = {
+                "probabilities": probabilities,
+                "most_likely_mode": most_likely,
+                "most_likely": MODE_LABELS[most_likely],
+                "failure_probability": round(100 - probabilities[MODE_LABELS[0]], 2),
+                "model_version": self.model_version
+            }
+            rows.append(results)
+        return rows
@@ -0,0 +1,498 @@
+import hashlib
+import json
+import os
+import secrets
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+import numpy as np
+import pandas as pd
+
+from utils.batch_scoring import FEATURES, BatchScorer, prepare_features
+
+# Drives are hashed into this many virtual shards; each shard belongs to one
+# worker (rendezvous hashing), so losing a worker moves only its own shards
+VIRTUAL_SHARDS = 256
+
+# Frames smaller than this are scored in-process: shipping them to workers
+# costs more than it saves
+FLEET_MIN_ROWS = 2000
+
+# A worker that does not answer a shard within this many seconds is dropped
+WORKER_TIMEOUT_SECONDS = 120
+
+# A failed worker is retried (HTTP nodes) or respawned (local processes) after this long
+WORKER_RETRY_SECONDS = 30
+
+# How long start() waits for spawned local workers to connect
+CONNECT_TIMEOUT_SECONDS = 60
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fleet_worker.py")
+
+
+class WorkerError(Exception):
+    """
+    A worker could not score a shard; its rows are reassigned. fatal: the
+    connection is unusable (lost, timed out) rather than the request refused.
+    """
+
+    def __init__(self, message, fatal=True):
+        super().__init__(message)
+        self.fatal = fatal
+
+
+def parse_address(address):
+    """'host:port' -> (host, port)"""
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def drive_shards(df, shards=VIRTUAL_SHARDS):
+    """
+    Virtual shard of every row: a hash of its Drive_ID (stable across
+    processes and restarts, unlike hash()); rows without one are spread by
+    position
+    """
+    positions = np.arange(len(df), dtype=np.uint64)
+    if "Drive_ID" not in df.columns:
+        return (positions % np.uint64(shards)).astype(np.int64)
+    ids = df["Drive_ID"]
+    hashed = pd.util.hash_array(ids.fillna("").astype(str).to_numpy(dtype=object))
+    keys = np.where(ids.isna().to_numpy(), positions, hashed)
+    return (keys % np.uint64(shards)).astype(np.int64)
+
+
+def shard_owners(names, shards=VIRTUAL_SHARDS):
+    """Index into names of the worker owning each virtual shard (highest random weight)"""
+    weights = np.array([
+        [int.from_bytes(hashlib.blake2b(f"{shard}:{name}".encode(), digest_size=8).digest(), "big")
+         for name in names]
+        for shard in range(shards)
+    ], dtype=np.uint64)
+    return weights.argmax(axis=1)
+
+
+def build_scorer(threshold_registry=None):
+    """
+    BatchScorer over freshly loaded predictors, configured like app.py
+    (NVME_MODEL_FORMAT, NVME_FAILURE_MODE_MODEL)
+    """
+    from utils.wearout_predictor import WearoutPredictor
+    from utils.thermal_predictor import ThermalPredictor
+    from utils.power_predictor import PowerPredictor
+    from utils.controller_predictor import ControllerPredictor
+    from utils.failure_mode_predictor import FailureModePredictor
+
+    failure_mode = None
+    if os.environ.get("NVME_FAILURE_MODE_MODEL", "auto") != "off":
+        failure_mode = FailureModePredictor()
+    return BatchScorer(
+        WearoutPredictor(),
+        ThermalPredictor(),
+        PowerPredictor(),
+        ControllerPredictor(),
+        threshold_registry=threshold_registry,
+        failure_mode=failure_mode
+    )
+
+
+def score_shard(scorer, features, temp_threshold):
+    """Risks for a shard's feature matrix (columns in FEATURES order)"""
+    frame = pd.DataFrame(np.asarray(features, dtype=np.float64).reshape(-1, len(FEATURES)), columns=FEATURES)
+    return scorer.score(frame, temp_threshold=np.asarray(temp_threshold, dtype=np.float64)).reset_index(drop=True)
+
+
+def serve_shards(conn, scorer_factory=build_scorer):
+    """
+    Worker side of the socket protocol: score every shard received on conn
+    until the coordinator says stop or goes away. Predictors are loaded once
+    and reloaded when the coordinator's model version differs (retrained).
+    """
+    scorer = scorer_factory()
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            return
+        if message.get("op") == "stop":
+            return
+
+        try:
+            if message["model_version"] != scorer.model_version():
+                scorer = scorer_factory()
+            if message["model_version"] != scorer.model_version():
+                conn.send({
+                    "ok": False,
+                    "error": f"worker has models {scorer.model_version()}, coordinator {message['model_version']}"
+                })
+                continue
+            started = time.perf_counter()
+            risks = score_shard(scorer, message["features"], message["temp_threshold"])
+            reply = {"ok": True, "risks": risks, "seconds": time.perf_counter() - started}
+        except Exception as e:
+            reply = {"ok": False, "error": str(e)}
+
+        try:
+            conn.send(reply)
+        except (EOFError, OSError):
+            return
+
+
+def connect_worker(address, authkey, name=None, scorer_factory=build_scorer):
+    """Connect to a coordinator at 'host:port', announce this worker and serve shards"""
+    conn = Client(parse_address(address), authkey=authkey)
+    conn.send({"op": "hello", "name": name or f"{os.uname().nodename}-{os.getpid()}", "pid": os.getpid()})
+    try:
+        serve_shards(conn, scorer_factory)
+    finally:
+        conn.close()
+
+
+class FleetWorker:
+    """Bookkeeping shared by socket and HTTP workers; subclasses implement _score"""
+    kind = None
+
+    def __init__(self, name):
+        self.name = name
+        self.down_until = 0.0
+        self.tasks = 0
+        self.rows = 0
+        self.failures = 0
+        self.busy_seconds = 0.0
+        self.last_error = None
+
+    def available(self, now):
+        return now >= self.down_until
+
+    def score(self, features, temp_threshold, model_version, timeout):
+        started = time.perf_counter()
+        risks = self._score(features, temp_threshold, model_version, timeout)
+        if len(risks) != len(features):
+            raise WorkerError(f"returned {len(risks)} rows for {len(features)}", fatal=False)
+        self.busy_seconds += time.perf_counter() - started
+        self.tasks += 1
+        self.rows += len(features)
+        return risks
+
+    def close(self):
+        pass
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "available": self.available(time.time()),
+            "tasks": self.tasks,
+            "rows": self.rows,
+            "failures": self.failures,
+            "rows_per_second": round(self.rows / self.busy_seconds, 1) if self.busy_seconds else None,
+            "last_error": self.last_error
+        }
+
+
+class SocketWorker(FleetWorker):
+    """Worker process (spawned locally or on another node) connected to the coordinator's listener"""
+    kind = "socket"
+
+    def __init__(self, name, conn, process=None):
+        super().__init__(name)
+        self.conn = conn
+        self.process = process
+        self.lock = threading.Lock()
+        if process is not None:
+            self.kind = "local"
+
+    def _score(self, features, temp_threshold, model_version, timeout):
+        with self.lock:
+            try:
+                self.conn.send({
+                    "op": "score",
+                    "features": features,
+                    "temp_threshold": temp_threshold,
+                    "model_version": model_version
+                })
+                # A late reply would be read as the answer to the next shard,
+                # so a timeout makes the connection unusable
+                if not self.conn.poll(timeout):
+                    raise WorkerError(f"no reply within {timeout:g}s")
+                reply = self.conn.recv()
+            except (EOFError, OSError) as e:
+                raise WorkerError(f"connection lost: {e or type(e).__name__}")
+        if not reply.get("ok"):
+            raise WorkerError(reply.get("error"), fatal=False)
+        return reply["risks"]
+
+    def close(self):
+        try:
+            self.conn.send({"op": "stop"})
+        except (OSError, ValueError):
+            pass
+        self.conn.close()
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+
+
+class HttpWorker(FleetWorker):
+    """Another backend node, sent shards over POST /api/fleet/shard"""
+    kind = "http"
+
+    def __init__(self, url):
+        super().__init__(url.rstrip("/"))
+
+    def _score(self, features, temp_threshold, model_version, timeout):
+        req = urllib.request.Request(
+            self.name + "/api/fleet/shard",
+            data=json.dumps({
+                "features": features.tolist(),
+                "temp_threshold": temp_threshold.tolist(),
+                "model_version": model_version
+            }).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        try:
+            with urllib.request.urlopen(req, timeout=timeout) as resp:
+                reply = json.loads(resp.read())
+        except urllib.error.HTTPError as e:
+            try:
+                error = json.loads(e.read()).get("error")
+            except ValueError:
+                error = None
+            raise WorkerError(f"HTTP {e.code}: {error or e.reason}", fatal=False)
+        except (OSError, ValueError) as e:
+            raise WorkerError(str(e), fatal=False)
+        # JSON objects come back with sorted keys; restore the scorer's column order
+        return pd.DataFrame(reply["risks"], columns=reply.get("columns"))
+
+
+class FleetCoordinator:
+    """
+    Spreads large scoring calls over worker processes and nodes. Rows are
+    partitioned by a hash of Drive_ID into virtual shards, each shard goes to
+    its owning worker, and the results are gathered back into input order.
+    The output is identical to scorer.score(df).
+
+    Workers are local processes spawned at start() (fleet_worker.py), worker
+    processes on other nodes that connect to the listener, and other backend
+    nodes reached over HTTP. A worker that fails or times out is dropped;
+    its shards go to their next-ranked worker in the same call, and when no
+    worker is left the coordinator scores the rest itself. Dropped local
+    processes are respawned and HTTP nodes retried after retry_seconds.
+    """
+
+    def __init__(self, scorer, version=None, local_workers=0, nodes=None, listen=None, authkey=None,
+                 min_rows=FLEET_MIN_ROWS, timeout=WORKER_TIMEOUT_SECONDS,
+                 retry_seconds=WORKER_RETRY_SECONDS, shards=VIRTUAL_SHARDS):
+        self.scorer = scorer
+        self.version = version or scorer.model_version
+        self.local_workers = local_workers
+        self.listen = listen or ("127.0.0.1:0" if local_workers else None)
+        self.authkey = authkey or secrets.token_bytes(16)
+        self.min_rows = min_rows
+        self.timeout = timeout
+        self.retry_seconds = retry_seconds
+        self.shards = shards
+        self.workers = {url.rstrip("/"): HttpWorker(url) for url in (nodes or [])}
+        self.lock = threading.Lock()
+        self.connected = threading.Condition(self.lock)
+        self.listener = None
+        self.address = None
+        self.processes = {}         # local worker name -> Popen, until it connects
+        self.respawn_at = {}        # local worker name -> time to respawn it
+        self.executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="fleet")
+        self._owners = {}
+        self.stats = {"calls": 0, "rows": 0, "local_rows": 0, "reassigned_rows": 0, "fallback_rows": 0}
+
+    @property
+    def enabled(self):
+        return bool(self.workers) or self.listener is not None
+
+    def start(self, wait=CONNECT_TIMEOUT_SECONDS):
+        """Open the listener, spawn the local workers and wait for them to connect"""
+        if self.listen and self.listener is None:
+            self.listener = Listener(parse_address(self.listen), authkey=self.authkey)
+            host, port = self.listener.address
+            self.address = f"{host}:{port}"
+            threading.Thread(target=self._accept_loop, name="fleet-accept", daemon=True).start()
+
+        for i in range(self.local_workers):
+            self._spawn(f"local-{i + 1}")
+
+        deadline = time.time() + wait
+        with self.connected:
+            while self.processes and time.time() < deadline:
+                self.connected.wait(deadline - time.time())
+            missing = sorted(self.processes)
+
+        if missing:
+            print(f"[FleetCoordinator] ⚠️ {len(missing)} local worker(s) did not connect within {wait:g}s")
+        print(f"[FleetCoordinator] ✓ {len(self.workers)} worker(s)"
+              + (f", listening on {self.address}" if self.address else ""))
+
+    def _spawn(self, name):
+        threads = max(1, (os.cpu_count() or 1) // max(self.local_workers, 1))
+        env = {
+            **os.environ,
+            "NVME_FLEET_AUTHKEY": self.authkey.hex(),
+            "OMP_NUM_THREADS": os.environ.get("OMP_NUM_THREADS", str(threads))
+        }
+        process = subprocess.Popen(
+            [sys.executable, WORKER_SCRIPT, "--connect", self.address, "--name", name],
+            env=env
+        )
+        with self.lock:
+            self.processes[name] = process
+
+    def _accept_loop(self):
+        while True:
+            try:
+                conn = self.listener.accept()
+            except (OSError, AuthenticationError) as e:
+                if self.listener is None:
+                    return
+                print(f"[FleetCoordinator] ⚠️ Rejected worker connection: {e}")
+                continue
+
+            try:
+                hello = conn.recv() if conn.poll(10) else {}
+            except (EOFError, OSError):
+                hello = {}
+            if hello.get("op") != "hello":
+                conn.close()
+                continue
+
+            with self.connected:
+                name = hello.get("name") or f"worker-{hello.get('pid')}"
+                if name in self.workers:
+                    name = f"{name}-{hello.get('pid')}"
+                self.workers[name] = SocketWorker(name, conn, self.processes.pop(name, None))
+                self._owners.clear()
+                self.connected.notify_all()
+            print(f"[FleetCoordinator] ✓ Worker {name} connected (pid {hello.get('pid')})")
+
+    def _available(self):
+        now = time.time()
+        with self.lock:
+            for name, process in list(self.processes.items()):
+                if process.poll() is not None:
+                    print(f"[FleetCoordinator] ❌ Worker {name} exited with code {process.returncode} before connecting")
+                    del self.processes[name]
+                    self.respawn_at[name] = now + self.retry_seconds
+            for name, at in list(self.respawn_at.items()):
+                if now >= at and self.address:
+                    del self.respawn_at[name]
+                    self._spawn_later(name)
+            return [w for w in self.workers.values() if w.available(now)]
+
+    def _spawn_later(self, name):
+        # Called with self.lock held; _spawn takes it again
+        threading.Thread(target=self._spawn, args=(name,), daemon=True).start()
+
+    def _fail(self, worker, error):
+        worker.failures += 1
+        worker.last_error = str(error)
+        print(f"[FleetCoordinator] ❌ Worker {worker.name} failed: {error}")
+        with self.lock:
+            if isinstance(worker, SocketWorker) and error.fatal:
+                self.workers.pop(worker.name, None)
+                self._owners.clear()
+                if worker.process is not None:
+                    self.respawn_at[worker.name] = time.time() + self.retry_seconds
+            else:
+                worker.down_until = time.time() + self.retry_seconds
+        if isinstance(worker, SocketWorker) and error.fatal:
+            worker.close()
+
+    def owners(self, names):
+        """Owning worker index per virtual shard for this set of workers (cached)"""
+        key = tuple(names)
+        owners = self._owners.get(key)
+        if owners is None:
+            owners = self._owners[key] = shard_owners(key, self.shards)
+        return owners
+
+    def score(self, df):
+        """Same result as scorer.score(df), computed by the workers when the frame is large enough"""
+        with self.lock:
+            self.stats["calls"] += 1
+            self.stats["rows"] += len(df)
+        workers = self._available() if self.enabled else []
+        if len(df) < self.min_rows or not workers:
+            with self.lock:
+                self.stats["local_rows"] += len(df)
+            return self.scorer.score(df)
+
+        features = prepare_features(df).to_numpy(dtype=np.float64)
+        temp_threshold = np.asarray(self.scorer.temp_thresholds(df), dtype=np.float64)
+        shards = drive_shards(df, self.shards)
+        version = self.version()
+
+        parts = []
+        pending = np.arange(len(df))
+        while len(pending):
+            workers = self._available()
+            if not workers:
+                with self.lock:
+                    self.stats["fallback_rows"] += len(pending)
+                parts.append((pending, score_shard(self.scorer, features[pending], temp_threshold[pending])))
+                break
+
+            owner = self.owners([w.name for w in workers])[shards[pending]]
+            futures = []
+            for i, worker in enumerate(workers):
+                rows = pending[owner == i]
+                if len(rows):
+                    futures.append((worker, rows, self.executor.submit(
+                        worker.score, features[rows], temp_threshold[rows], version, self.timeout
+                    )))
+
+            failed = []
+            for worker, rows, future in futures:
+                try:
+                    parts.append((rows, future.result()))
+                except WorkerError as e:
+                    self._fail(worker, e)
+                    failed.append(rows)
+
+            pending = np.concatenate(failed) if failed else pending[:0]
+            with self.lock:
+                self.stats["reassigned_rows"] += len(pending)
+
+        positions = np.concatenate([rows for rows, _ in parts])
+        risks = pd.concat([risks for _, risks in parts], ignore_index=True)
+        risks = risks.iloc[np.argsort(positions, kind="stable")]
+        risks.index = df.index
+        return risks
+
+    def stop(self):
+        with self.lock:
+            workers = list(self.workers.values())
+            self.workers = {}
+            self.respawn_at.clear()
+            listener, self.listener = self.listener, None
+        for worker in workers:
+            worker.close()
+        if listener is not None:
+            listener.close()
+
+    def status(self):
+        with self.lock:
+            workers = [w.to_dict() for w in self.workers.values()]
+            stats = dict(self.stats)
+            starting = sorted(self.processes) + sorted(self.respawn_at)
+        return {
+            "enabled": self.enabled,
+            "address": self.address,
+            "min_rows": self.min_rows,
+            "shards": self.shards,
+            "workers": workers,
+            "starting": starting,
+            **stats
+        }
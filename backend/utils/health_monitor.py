@@ -0,0 +1,90 @@
+import threading
+import time
+from datetime import datetime
+
+
+class HealthMonitor:
+    """
+    Refreshes dependency checks (database, models, smartctl) on a background
+    thread and serves the cached results, so health probes never do I/O
+    themselves no matter how often they are called.
+    """
+
+    def __init__(self, checks, interval=15, required=()):
+        self.checks = checks
+        self.interval = interval
+        self.required = tuple(required)
+        self.results = {}
+        self.checked_at = None
+        self.started_at = datetime.now()
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._loop, name="health-monitor", daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _loop(self):
+        while not self.stop_event.is_set():
+            self.refresh()
+            self.stop_event.wait(self.interval)
+
+    def refresh(self):
+        """Run every check once; a check that raises counts as failed"""
+        results = {}
+        for name, check in self.checks.items():
+            started = time.perf_counter()
+            try:
+                value = check()
+                error = None
+            except Exception as e:
+                value = False
+                error = str(e)
+            results[name] = {
+                "value": value,
+                "error": error,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2)
+            }
+
+        with self.lock:
+            self.results = results
+            self.checked_at = datetime.now()
+
+    def value(self, name, default=None):
+        with self.lock:
+            result = self.results.get(name)
+        return result["value"] if result else default
+
+    def values(self):
+        with self.lock:
+            return {name: result["value"] for name, result in self.results.items()}
+
+    def is_ready(self):
+        """Ready when the last refresh is recent and every required check passed"""
+        with self.lock:
+            if self.checked_at is None:
+                return False
+            if (datetime.now() - self.checked_at).total_seconds() > 3 * self.interval:
+                return False
+            return all(self.results.get(name, {}).get("value") for name in self.required)
+
+    def snapshot(self):
+        with self.lock:
+            checked_at = self.checked_at
+            results = {name: dict(result) for name, result in self.results.items()}
+
+        age = (datetime.now() - checked_at).total_seconds() if checked_at else None
+        return {
+            "checks": results,
+            "required": list(self.required),
+            "checked_at": checked_at.isoformat() if checked_at else None,
+            "age_seconds": round(age, 2) if age is not None else None,
+            "interval_seconds": self.interval,
+            "stale": age is None or age > 3 * self.interval
+        }
@@ -0,0 +1,226 @@
+import threading
+import uuid
+
+import joblib
+import numpy as np
+from xgboost import XGBClassifier
+from sklearn.metrics import f1_score, log_loss
+from sklearn.model_selection import train_test_split
+from sklearn.utils.class_weight import compute_sample_weight
+
+from utils.batch_scoring import prepare_features
+from utils.failure_mode_predictor import FAILURE_MODES
+from utils.training_data import load_training_data, split_training_data
+
+# Failure_Mode label -> model class index, per predictor (same filtering as train_model)
+MODEL_TARGETS = {
+    "wearout": {0: 0, 1: 1},
+    "controller": {0: 0, 4: 1},
+    "failure_mode": {mode: i for i, mode in enumerate(FAILURE_MODES)}
+}
+
+# Boosting rounds appended to the current model per update
+INCREMENTAL_ROUNDS = 50
+MIN_NEW_ROWS = 20
+
+# Overrides applied on top of the current model's parameters for updates.
+# min_child_weight was tuned on the full dataset; on a small batch the model
+# is already confident about, hessian sums stay below it and every new tree
+# would be a zero leaf.
+UPDATE_PARAMS = {"min_child_weight": 0.1}
+
+# Validation gating: how much the candidate may lose on the reference holdout
+MAX_F1_DROP = 0.005
+MAX_LOGLOSS_INCREASE = 0.01
+
+# Share of the new labels held back to check the update helps on fresh data
+LABEL_HOLDOUT = 0.2
+
+# Share of the new labels held back to refit a calibrated model's map; kept
+# apart from both gating sets so the gates judge the map on unseen rows
+CALIBRATION_HOLDOUT = 0.2
+
+
+def _metrics(model, X, y, n_classes):
+    proba = model.predict_proba(X)
+    predicted = proba.argmax(axis=1)
+    return {
+        "f1": float(f1_score(y, predicted, average="binary" if n_classes == 2 else "macro")),
+        "logloss": float(log_loss(y, proba, labels=list(range(n_classes)))),
+        "accuracy": float((predicted == y).mean()),
+        "rows": int(len(y))
+    }
+
+
+class IncrementalTrainer:
+    """
+    Continues boosting a predictor's current XGBoost model on newly labeled
+    input_history rows (fit with xgb_model= the current booster), instead of
+    a full RandomizedSearchCV.
+
+    The candidate is saved only if it passes validation gating: no more than
+    MAX_F1_DROP / MAX_LOGLOSS_INCREASE worse on the original training
+    holdout, and no worse log loss on a held-back slice of the new labels.
+    """
+
+    def __init__(self, store, predictors, data_path="data/Clean_Final_NVMe_Dataset.csv",
+                 rounds=INCREMENTAL_ROUNDS, min_rows=MIN_NEW_ROWS):
+        self.store = store
+        self.predictors = predictors
+        self.data_path = data_path
+        self.rounds = rounds
+        self.min_rows = min_rows
+        self.locks = {name: threading.Lock() for name in predictors}
+        self._reference = {}
+
+    def is_running(self, name):
+        return self.locks[name].locked()
+
+    def pending(self, name):
+        """Label watermark of the current model and new label counts that apply to it"""
+        watermark = self.store.label_watermark(name, self.predictors[name].model_version)
+        counts = self.store.count_labels(watermark)
+        targets = MODEL_TARGETS[name]
+        return {
+            "label_watermark": watermark,
+            "new_labels": {str(mode): counts.get(mode, 0) for mode in targets},
+            "new_rows": sum(counts.get(mode, 0) for mode in targets),
+            "running": self.is_running(name)
+        }
+
+    def reference_set(self, name):
+        """The original train/test split's test rows (never seen by the model), cached"""
+        if name not in self._reference:
+            targets = MODEL_TARGETS[name]
+            try:
+                X, y = load_training_data(self.data_path, targets)
+            except (OSError, ValueError) as e:
+                print(f"[IncrementalTrainer] No reference holdout ({e}); gating on new labels only")
+                self._reference[name] = None
+                return None
+
+            _, X_test, _, y_test = split_training_data(X, y, test_size=0.2, random_state=5)
+            self._reference[name] = (X_test, y_test)
+        return self._reference[name]
+
+    @staticmethod
+    def base_model(predictor):
+        """The current model as an XGBClassifier (compact formats have no booster to continue)"""
+        if hasattr(predictor.model, "get_booster"):
+            return predictor.model
+        return joblib.load(predictor.model_path)
+
+    def update(self, name, labeled, rounds=None):
+        """
+        Boost the current model on labeled rows (frame with feature columns,
+        Failure_Mode and label_id) and save it if it passes gating.
+        Returns a summary dict; raises ValueError if there is not enough data.
+        """
+        lock = self.locks[name]
+        if not lock.acquire(blocking=False):
+            raise ValueError(f"Incremental training for '{name}' is already running")
+
+        try:
+            return self._update(name, labeled, rounds or self.rounds)
+        finally:
+            lock.release()
+
+    def _update(self, name, labeled, rounds):
+        predictor = self.predictors[name]
+        if predictor.model is None:
+            raise ValueError(f"No trained '{name}' model to continue from")
+
+        targets = MODEL_TARGETS[name]
+        n_classes = len(set(targets.values()))
+        watermark = int(labeled["label_id"].max()) if len(labeled) else 0
+
+        labeled = labeled[labeled["Failure_Mode"].isin(targets)]
+        if len(labeled) < self.min_rows:
+            raise ValueError(f"Only {len(labeled)} new labeled rows for '{name}' (need {self.min_rows})")
+
+        X = prepare_features(labeled)
+        y = labeled["Failure_Mode"].map(targets).to_numpy()
+        counts = np.bincount(y, minlength=n_classes)
+        if (counts == 0).any():
+            missing = [mode for mode, i in targets.items() if counts[i] == 0]
+            raise ValueError(f"New labels for '{name}' have no rows of Failure_Mode {missing}")
+
+        X_cal, y_cal = None, None
+        calibrated = hasattr(predictor, "fit_calibration") and predictor.calibrator is not None
+        if calibrated and counts.min() >= 2 and len(y) * CALIBRATION_HOLDOUT >= n_classes:
+            X, X_cal, y, y_cal = train_test_split(
+                X, y, test_size=CALIBRATION_HOLDOUT, stratify=y, random_state=5
+            )
+
+        if np.bincount(y, minlength=n_classes).min() >= 2 and len(y) * LABEL_HOLDOUT >= n_classes:
+            X_fit, X_new, y_fit, y_new = train_test_split(
+                X, y, test_size=LABEL_HOLDOUT, stratify=y, random_state=5
+            )
+        else:
+            X_fit, y_fit, X_new, y_new = X, y, None, None
+
+        reference = self.reference_set(name)
+        if reference is None and X_new is None:
+            raise ValueError("No validation data: reference dataset missing and too few new labels to hold out")
+
+        base = self.base_model(predictor)
+        base_version = predictor.model_version
+        print(f"[IncrementalTrainer] Boosting '{name}' {base_version} for {rounds} rounds on {len(y_fit)} rows")
+
+        candidate = XGBClassifier(**{**base.get_params(), **UPDATE_PARAMS, "n_estimators": rounds})
+        sample_weight = compute_sample_weight("balanced", y_fit) if n_classes > 2 else None
+        candidate.fit(X_fit, y_fit, sample_weight=sample_weight, xgb_model=base.get_booster())
+
+        metrics = {}
+        checks = []
+        if reference is not None:
+            before = _metrics(base, reference[0], reference[1], n_classes)
+            after = _metrics(candidate, reference[0], reference[1], n_classes)
+            metrics["reference"] = {"before": before, "after": after}
+            checks.append(after["f1"] >= before["f1"] - MAX_F1_DROP)
+            checks.append(after["logloss"] <= before["logloss"] + MAX_LOGLOSS_INCREASE)
+        if X_new is not None:
+            before = _metrics(base, X_new, y_new, n_classes)
+            after = _metrics(candidate, X_new, y_new, n_classes)
+            metrics["new_labels"] = {"before": before, "after": after}
+            checks.append(after["logloss"] <= before["logloss"])
+
+        accepted = all(checks)
+        new_version = None
+        if accepted:
+            predictor.model = candidate
+            if calibrated:
+                # The old map belongs to the old trees; refit it on the calibration
+                # slice, which neither the candidate nor the gates have seen
+                if X_cal is not None:
+                    metrics["calibration"] = predictor.fit_calibration(
+                        candidate.predict_proba(X_cal)[:, 1], y_cal, predictor.calibrator.method
+                    )
+                else:
+                    print(f"[IncrementalTrainer] ⚠️ Too few new labels for a calibration slice; "
+                          f"'{name}' calibration map dropped")
+                    predictor.calibrator = None
+                    metrics["calibration"] = None
+            predictor.save_model()
+            predictor.load_model()
+            new_version = predictor.model_version
+            print(f"[IncrementalTrainer] ✓ '{name}' updated {base_version} -> {new_version}")
+        else:
+            print(f"[IncrementalTrainer] ⚠️ '{name}' candidate rejected by validation gating")
+
+        run_id = uuid.uuid4().hex[:12]
+        self.store.save_training_run(run_id, name, base_version, new_version, accepted,
+                                     watermark, len(y_fit), metrics)
+
+        return {
+            "run_id": run_id,
+            "model": name,
+            "accepted": accepted,
+            "base_version": base_version,
+            "new_version": new_version,
+            "rounds": rounds,
+            "rows_used": int(len(y_fit)),
+            "rows_per_class": {str(mode): int(counts[i]) for mode, i in targets.items()},
+            "label_watermark": watermark,
+            "metrics": metrics
+        }
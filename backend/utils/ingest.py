@@ -0,0 +1,117 @@
+import gzip
+import json
+
+import numpy as np
+import pandas as pd
+
+from utils.batch_scoring import FEATURES
+
+INGEST_CHUNK_SIZE = 5000
+
+# Plausible range per feature (counters default to 0..inf); rows outside
+# any range are rejected
+FEATURE_RANGES = {
+    "Temperature_C": (-40, 150),
+    "Percent_Life_Used": (0, 255)
+}
+
+# Columns kept from an ingested sample besides the model features
+PASSTHROUGH_COLUMNS = ["Drive_ID", "Vendor", "Model", "Firmware_Version", "timestamp", "temp_threshold", "notes"]
+
+MAX_ERROR_SAMPLES = 20
+
+
+def open_body(stream, compressed=False):
+    """Wrap a request body stream; gzip is decoded on the fly, never buffered whole"""
+    if compressed:
+        return gzip.GzipFile(fileobj=stream, mode="rb")
+    return stream
+
+
+def iter_ndjson_chunks(stream, chunk_size=INGEST_CHUNK_SIZE):
+    """
+    Parse newline-delimited JSON objects line by line. Yields
+    (DataFrame, malformed_line_numbers) per chunk_size records; the frame
+    is indexed by each record's line number in the body.
+    """
+    records = []
+    lines = []
+    malformed = []
+    for line_no, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            malformed.append(line_no)
+            continue
+        if not isinstance(record, dict):
+            malformed.append(line_no)
+            continue
+
+        records.append(record)
+        lines.append(line_no)
+        if len(records) >= chunk_size:
+            yield _records_frame(records, lines), malformed
+            records, lines, malformed = [], [], []
+
+    if records or malformed:
+        yield _records_frame(records, lines), malformed
+
+
+def _records_frame(records, lines):
+    frame = pd.DataFrame.from_records(records)
+    frame.index = pd.Index(lines, dtype=np.int64)
+    return frame
+
+
+def iter_csv_chunks(stream, chunk_size=INGEST_CHUNK_SIZE):
+    """
+    Parse a CSV body in chunks; yields (DataFrame, []) to match
+    iter_ndjson_chunks. The frame index is the running data row number.
+    """
+    for chunk in pd.read_csv(stream, chunksize=chunk_size):
+        yield chunk, []
+
+
+def validate_samples(df):
+    """
+    Vectorized validation of one chunk. Missing features count as 0 (same
+    as /api/predict); non-numeric or out-of-range values reject the row.
+    Returns (valid_df, rejected_mask, reasons) where reasons holds the
+    first failing check of each rejected row.
+    """
+    reasons = pd.Series("", index=df.index, dtype=object)
+
+    features = pd.DataFrame(index=df.index)
+    for feature in FEATURES:
+        if feature in df.columns:
+            raw = df[feature]
+            values = pd.to_numeric(raw, errors="coerce")
+            bad = values.isna() & raw.notna()
+            reasons = reasons.mask(bad & (reasons == ""), f"{feature} is not numeric")
+            features[feature] = values.fillna(0)
+        else:
+            features[feature] = 0.0
+
+    bounds = [FEATURE_RANGES.get(f, (0, np.inf)) for f in FEATURES]
+    lows = np.array([low for low, _ in bounds])
+    highs = np.array([high for _, high in bounds])
+
+    matrix = features.to_numpy(dtype=np.float64)
+    out_of_range = (matrix < lows) | (matrix > highs)
+    for i in np.flatnonzero(out_of_range.any(axis=0)):
+        reasons = reasons.mask(
+            out_of_range[:, i] & (reasons == ""),
+            f"{FEATURES[i]} outside {lows[i]:g}..{highs[i]:g}"
+        )
+
+    rejected = (reasons != "").to_numpy()
+
+    valid = features[~rejected].copy()
+    for column in PASSTHROUGH_COLUMNS:
+        if column in df.columns:
+            valid[column] = df.loc[~rejected, column]
+
+    return valid, rejected, reasons[rejected]
@@ -0,0 +1,244 @@
+import json
+import os
+import threading
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+
+class JobQueueFull(Exception):
+    """Raised when the job queue already holds max_pending jobs"""
+
+
+class Job:
+    """State of one background scoring job"""
+
+    def __init__(self, kind, params, results_dir):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.params = params
+        self.results_path = os.path.join(results_dir, f"{self.id}.ndjson")
+        self.status = "queued"
+        self.total = params.get("total")
+        self.processed = 0
+        self.chunks_done = 0
+        self.error = None
+        self.created_at = datetime.now()
+        self.started_at = None
+        self.finished_at = None
+        self.summary = {}
+        self.cancel_event = threading.Event()
+        self.done_event = threading.Event()
+        self.cleanup = None
+
+    @property
+    def finished(self):
+        return self.status in ("completed", "failed", "cancelled")
+
+    def to_dict(self):
+        progress = None
+        if self.total:
+            progress = round(min(self.processed / self.total, 1.0) * 100, 2)
+
+        def fmt(dt):
+            return dt.isoformat() if dt else None
+
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "processed": self.processed,
+            "total": self.total,
+            "progress_percent": progress,
+            "chunks_done": self.chunks_done,
+            "error": self.error,
+            "summary": self.summary,
+            "created_at": fmt(self.created_at),
+            "started_at": fmt(self.started_at),
+            "finished_at": fmt(self.finished_at)
+        }
+
+
+def _json_default(value):
+    if isinstance(value, (np.integer,)):
+        return int(value)
+    if isinstance(value, (np.floating,)):
+        return float(value)
+    if isinstance(value, (datetime, pd.Timestamp)):
+        return value.isoformat()
+    return str(value)
+
+
+class JobManager:
+    """
+    Runs chunked scoring jobs on a bounded worker pool that is separate from
+    the Flask request threads. Results are spooled to NDJSON files so memory
+    stays flat no matter how many rows a job scores.
+    """
+
+    def __init__(self, results_dir="jobs", max_workers=2, max_pending=16, max_finished=100):
+        self.results_dir = results_dir
+        self.max_pending = max_pending
+        self.max_finished = max_finished
+        self.jobs = {}
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job-worker")
+        os.makedirs(self.results_dir, exist_ok=True)
+
+    def submit(self, kind, chunk_source, process_chunk, params=None, on_complete=None, cleanup=None):
+        """
+        Queue a job.
+
+        chunk_source:  callable returning an iterator of DataFrames
+        process_chunk: callable(chunk_df) -> DataFrame or list of dicts to write out
+        on_complete:   optional callable(job) run after the last chunk
+        cleanup:       optional callable() run once when the job ends, however
+                       it ends (e.g. delete an uploaded file)
+        """
+        params = dict(params or {})
+
+        with self.lock:
+            pending = sum(1 for j in self.jobs.values() if not j.finished)
+            if pending >= self.max_pending:
+                raise JobQueueFull(f"{pending} jobs already pending (max {self.max_pending})")
+
+            job = Job(kind, params, self.results_dir)
+            job.cleanup = cleanup
+            self.jobs[job.id] = job
+            self._prune_finished()
+
+        self.executor.submit(self._run, job, chunk_source, process_chunk, on_complete)
+        print(f"[JobManager] Queued {kind} job {job.id}")
+        return job
+
+    def _run(self, job, chunk_source, process_chunk, on_complete):
+        with self.lock:
+            if job.cancel_event.is_set():
+                # cancelled while queued: cancel() already finished it
+                return
+            job.status = "running"
+            job.started_at = datetime.now()
+
+        try:
+            with open(job.results_path, "w") as out:
+                for chunk in chunk_source():
+                    if job.cancel_event.is_set():
+                        job.status = "cancelled"
+                        break
+
+                    if chunk is None or len(chunk) == 0:
+                        continue
+
+                    results = process_chunk(chunk)
+                    if isinstance(results, pd.DataFrame):
+                        results = results.to_dict(orient="records")
+
+                    for record in results:
+                        out.write(json.dumps(record, default=_json_default) + "\n")
+                    out.flush()
+
+                    job.processed += len(chunk)
+                    job.chunks_done += 1
+
+            if job.status == "running":
+                if on_complete:
+                    on_complete(job)
+                job.status = "completed"
+            print(f"[JobManager] Job {job.id} {job.status} ({job.processed} rows)")
+
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            print(f"[JobManager] Job {job.id} failed: {traceback.format_exc()}")
+
+        finally:
+            job.finished_at = datetime.now()
+            self._finish(job)
+
+    @staticmethod
+    def _finish(job):
+        """Run the job's cleanup once and wake up result readers"""
+        cleanup, job.cleanup = job.cleanup, None
+        if cleanup is not None:
+            try:
+                cleanup()
+            except Exception as e:
+                print(f"[JobManager] Cleanup for job {job.id} failed: {e}")
+        job.done_event.set()
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def list(self):
+        with self.lock:
+            jobs = sorted(self.jobs.values(), key=lambda j: j.created_at, reverse=True)
+        return [j.to_dict() for j in jobs]
+
+    def cancel(self, job_id):
+        """Request cancellation; a queued job ends now, a running one before its next chunk"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        with self.lock:
+            if job.finished:
+                return job
+            job.cancel_event.set()
+            queued = job.status == "queued"
+            if queued:
+                job.status = "cancelled"
+                job.finished_at = datetime.now()
+        if queued:
+            self._finish(job)
+        return job
+
+    def iter_results(self, job_id, follow=False, poll_interval=0.5):
+        """
+        Yield result lines for a job; with follow=True keep tailing until it
+        finishes or is cancelled (a cancelled job's remaining lines are
+        returned without waiting for its current chunk)
+        """
+        job = self.jobs.get(job_id)
+        if job is None:
+            return
+
+        # A job that just started may not have created its spool file yet
+        while follow and not os.path.exists(job.results_path) \
+                and not job.finished and not job.cancel_event.is_set():
+            job.done_event.wait(poll_interval)
+
+        if not os.path.exists(job.results_path):
+            return
+
+        with open(job.results_path, "rb") as f:
+            while True:
+                line = f.readline()
+                if line.endswith(b"\n"):
+                    yield line.decode("utf-8")
+                    continue
+                if line:
+                    # partial line still being written - rewind and wait
+                    f.seek(-len(line), os.SEEK_CUR)
+
+                if not follow or job.finished or job.cancel_event.is_set():
+                    rest = f.read()
+                    if rest:
+                        yield rest.decode("utf-8")
+                    return
+                job.done_event.wait(poll_interval)
+
+    def _prune_finished(self):
+        """Drop the oldest finished jobs (and their spool files) beyond max_finished"""
+        finished = sorted(
+            (j for j in self.jobs.values() if j.finished),
+            key=lambda j: j.finished_at or j.created_at
+        )
+        for job in finished[:max(0, len(finished) - self.max_finished)]:
+            self.jobs.pop(job.id, None)
+            try:
+                os.remove(job.results_path)
+            except OSError:
+                pass
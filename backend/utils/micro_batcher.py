@@ -0,0 +1,162 @@
+import asyncio
+import threading
+import time
+from collections import deque
+
+import pandas as pd
+
+# Defaults for coalescing concurrent /api/predict calls
+MAX_BATCH_ROWS = 64
+MAX_WAIT_MS = 2.0
+
+
+class _Pending:
+    __slots__ = ("frame", "enqueued", "done", "result", "error", "future")
+
+    def __init__(self, frame, future=None):
+        self.frame = frame
+        self.enqueued = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.future = future
+
+    def finish(self):
+        self.done.set()
+        if self.future is not None:
+            self.future.get_loop().call_soon_threadsafe(self._resolve)
+
+    def _resolve(self):
+        if self.future.done():
+            return
+        if self.error is not None:
+            self.future.set_exception(self.error)
+        else:
+            self.future.set_result(self.result)
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent small scoring requests into one vectorized call.
+
+    score(frame) must return one result per row. Callers block in submit()
+    while a single dispatcher thread drains the queue: everything queued
+    while the previous batch was being scored goes into the next one, up to
+    max_rows. The dispatcher only holds a batch open (at most max_wait_ms
+    after its oldest request arrived) when the previous batch had more than
+    one request, so a lone request under light load is scored immediately.
+    """
+
+    def __init__(self, score, max_rows=MAX_BATCH_ROWS, max_wait_ms=MAX_WAIT_MS, name="micro-batcher"):
+        self.score = score
+        self.max_rows = max_rows
+        self.max_wait = max_wait_ms / 1000
+        self.name = name
+        self.queue = deque()
+        self.queued_rows = 0
+        self.condition = threading.Condition()
+        self.thread = None
+        self.last_batch_requests = 0
+        self.stats = {"batches": 0, "requests": 0, "rows": 0, "largest_batch": 0,
+                      "failed_batches": 0, "wait_ms_total": 0.0}
+
+    def _ensure_thread(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+            self.thread.start()
+
+    def _enqueue(self, pending):
+        with self.condition:
+            self._ensure_thread()
+            self.queue.append(pending)
+            self.queued_rows += len(pending.frame)
+            self.condition.notify()
+
+    def submit(self, frame, timeout=30):
+        """Score frame as part of a batch; returns its list of per-row results"""
+        pending = _Pending(frame)
+        self._enqueue(pending)
+
+        if not pending.done.wait(timeout):
+            raise TimeoutError(f"[MicroBatcher] No result within {timeout}s")
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    async def submit_async(self, frame, timeout=30):
+        """submit() for event-loop callers: awaits the batch without holding a thread"""
+        pending = _Pending(frame, asyncio.get_running_loop().create_future())
+        self._enqueue(pending)
+        try:
+            return await asyncio.wait_for(pending.future, timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"[MicroBatcher] No result within {timeout}s")
+
+    def _take_batch(self):
+        with self.condition:
+            while not self.queue:
+                self.condition.wait()
+
+            if self.last_batch_requests > 1:
+                deadline = self.queue[0].enqueued + self.max_wait
+                while self.queued_rows < self.max_rows:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+
+            batch = [self.queue.popleft()]
+            rows = len(batch[0].frame)
+            while self.queue and rows + len(self.queue[0].frame) <= self.max_rows:
+                rows += len(self.queue[0].frame)
+                batch.append(self.queue.popleft())
+            self.queued_rows -= rows
+            self.last_batch_requests = len(batch)
+            return batch, rows
+
+    def _loop(self):
+        while True:
+            batch, rows = self._take_batch()
+            started = time.perf_counter()
+
+            try:
+                frame = batch[0].frame if len(batch) == 1 else pd.concat(
+                    [p.frame for p in batch], ignore_index=True
+                )
+                results = self.score(frame)
+                offset = 0
+                for pending in batch:
+                    pending.result = results[offset:offset + len(pending.frame)]
+                    offset += len(pending.frame)
+            except Exception as e:
+                self.stats["failed_batches"] += 1
+                if len(batch) == 1:
+                    batch[0].error = e
+                else:
+                    # One bad request must not fail the others: score them one by one
+                    for pending in batch:
+                        try:
+                            pending.result = self.score(pending.frame)
+                        except Exception as item_error:
+                            pending.error = item_error
+
+            self.stats["batches"] += 1
+            self.stats["requests"] += len(batch)
+            self.stats["rows"] += rows
+            self.stats["largest_batch"] = max(self.stats["largest_batch"], len(batch))
+            self.stats["wait_ms_total"] += sum(started - p.enqueued for p in batch) * 1000
+
+            for pending in batch:
+                pending.finish()
+
+    def status(self):
+        stats = dict(self.stats)
+        wait_ms_total = stats.pop("wait_ms_total")
+        return {
+            **stats,
+            "max_rows": self.max_rows,
+            "max_wait_ms": self.max_wait * 1000,
+            "queued": len(self.queue),
+            "mean_batch_size": round(stats["requests"] / stats["batches"], 2) if stats["batches"] else 0.0,
+            "mean_queue_wait_ms": round(wait_ms_total / stats["requests"], 3) if stats["requests"] else 0.0
+        }
@@ -0,0 +1,239 @@
+import json
+import os
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+from utils.storage import HISTORY_COLUMN_MAP
+
+# input_history columns copied to the archive (notes stay in the database)
+ARCHIVE_COLUMNS = ['timestamp', 'drive_id'] + list(HISTORY_COLUMN_MAP) + ['temp_threshold', 'data_source']
+
+# Hive-style directories: <root>/date=YYYY-MM-DD/data_source=<source>/part-*.parquet
+PARTITION_COLUMNS = ["date", "data_source"]
+
+STATE_FILE = "_archive_state.json"
+
+# Rows younger than this are left for the next run, so an insert that
+# committed after a higher id is not skipped by the high-water mark
+SETTLE_SECONDS = 60
+
+
+def _require_pyarrow():
+    """pyarrow is optional; only the archive needs it"""
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+        return pyarrow
+    except ImportError:
+        raise RuntimeError("The Parquet archive requires pyarrow (pip install pyarrow)")
+
+
+def archive_schema(pa):
+    """Fixed file schema, so every part file has the same column types"""
+    fields = [("id", pa.int64()), ("timestamp", pa.timestamp("s")), ("Drive_ID", pa.string())]
+    fields += [(feature, pa.float64()) for feature in HISTORY_COLUMN_MAP.values()]
+    fields += [("temp_threshold", pa.float64())]
+    return pa.schema(fields)
+
+
+def table_schema(pa):
+    """File schema plus the partition columns (written as directories, not into files)"""
+    return archive_schema(pa).append(pa.field("date", pa.string())).append(pa.field("data_source", pa.string()))
+
+
+def partitioning(pa):
+    import pyarrow.dataset as ds
+    return ds.partitioning(pa.schema([(c, pa.string()) for c in PARTITION_COLUMNS]), flavor="hive")
+
+
+class ParquetArchive:
+    """
+    Append-only Parquet copy of input_history for offline analytics,
+    partitioned by date and data_source.
+
+    export() copies rows with id above the high-water mark in keyset chunks
+    and advances the mark after each chunk is written. Part file names are
+    derived from the chunk's first id only: a chunk re-run after a crash
+    starts at the same id (its upper end may move with newer settled rows)
+    and overwrites the same files instead of duplicating rows.
+
+    read() uses pyarrow datasets: only the requested columns are read and
+    date/data_source filters prune whole partition directories.
+    """
+
+    def __init__(self, root="data/archive", settle_seconds=SETTLE_SECONDS):
+        self.root = root
+        self.settle_seconds = settle_seconds
+        self.state_path = os.path.join(root, STATE_FILE)
+        self.lock = threading.Lock()
+
+    # ---- state -------------------------------------------------------------
+
+    def state(self):
+        try:
+            with open(self.state_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"high_water_mark": 0, "rows": 0, "runs": 0, "updated_at": None}
+
+    def _save_state(self, state):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    @staticmethod
+    def available():
+        try:
+            _require_pyarrow()
+            return True
+        except RuntimeError:
+            return False
+
+    @property
+    def high_water_mark(self):
+        return int(self.state()["high_water_mark"])
+
+    # ---- export ------------------------------------------------------------
+
+    def iter_export(self, store, chunk_size=50000, max_rows=None):
+        """
+        Append history rows newer than the high-water mark, one keyset chunk
+        at a time; yields each chunk after it is written and the mark moved
+        """
+        pa = _require_pyarrow()
+        import pyarrow.parquet as pq
+
+        if not self.lock.acquire(blocking=False):
+            raise RuntimeError("An archive export is already running")
+
+        try:
+            state = self.state()
+            upper = store.max_settled_id(self.settle_seconds)
+            schema = table_schema(pa)
+            exported = 0
+
+            if upper is not None and upper > int(state["high_water_mark"]):
+                for chunk in store.iter_history_chunks(chunk_size=chunk_size, columns=ARCHIVE_COLUMNS,
+                                                       after_id=int(state["high_water_mark"])):
+                    chunk = chunk[chunk["id"] <= upper]
+                    if chunk.empty:
+                        break
+
+                    frame = self._prepare(chunk)
+                    first_id, last_id = int(frame["id"].iloc[0]), int(frame["id"].iloc[-1])
+                    table = pa.Table.from_pandas(frame[schema.names], schema=schema, preserve_index=False)
+                    pq.write_to_dataset(
+                        table,
+                        self.root,
+                        partitioning=partitioning(pa),
+                        basename_template=f"part-{first_id:012d}-{{i}}.parquet",
+                        existing_data_behavior="overwrite_or_ignore"
+                    )
+
+                    exported += len(frame)
+                    state["high_water_mark"] = last_id
+                    state["rows"] = int(state["rows"]) + len(frame)
+                    state["updated_at"] = datetime.now().isoformat()
+                    self._save_state(state)
+                    yield frame
+
+                    if max_rows and exported >= max_rows:
+                        break
+
+            state["runs"] = int(state.get("runs", 0)) + 1
+            self._save_state(state)
+        finally:
+            self.lock.release()
+
+    def export(self, store, chunk_size=50000, max_rows=None):
+        """Run iter_export to completion; returns a run report"""
+        start_mark = self.high_water_mark
+        exported = 0
+        partitions = set()
+        for frame in self.iter_export(store, chunk_size, max_rows):
+            exported += len(frame)
+            partitions.update(map(tuple, frame[PARTITION_COLUMNS].drop_duplicates().to_numpy()))
+
+        high_water_mark = self.high_water_mark
+        if exported:
+            print(f"[ParquetArchive] ✓ Archived {exported} rows (ids {start_mark + 1}-{high_water_mark})")
+        return {
+            "rows_exported": exported,
+            "partitions_touched": len(partitions),
+            "previous_high_water_mark": start_mark,
+            "high_water_mark": high_water_mark
+        }
+
+    @staticmethod
+    def _prepare(chunk):
+        frame = chunk.rename(columns={"drive_id": "Drive_ID"})
+        frame["timestamp"] = pd.to_datetime(frame["timestamp"]).astype("datetime64[s]")
+        frame["date"] = frame["timestamp"].dt.strftime("%Y-%m-%d")
+        frame["data_source"] = frame["data_source"].fillna("unknown").astype(str)
+        if "Drive_ID" in frame.columns:
+            frame["Drive_ID"] = frame["Drive_ID"].astype("string")
+        return frame
+
+    # ---- read --------------------------------------------------------------
+
+    def dataset(self):
+        pa = _require_pyarrow()
+        import pyarrow.dataset as ds
+        return ds.dataset(self.root, format="parquet", partitioning=partitioning(pa),
+                          exclude_invalid_files=True, ignore_prefixes=["_", "."])
+
+    def read(self, columns=None, start=None, end=None, data_source=None, filter=None):
+        """
+        Load archived rows as a DataFrame. start/end (dates or ISO strings)
+        and data_source prune partitions; filter is an extra pyarrow
+        expression pushed down to the row-group statistics.
+        """
+        pa = _require_pyarrow()
+        import pyarrow.dataset as ds
+
+        dataset = self.dataset() if os.path.isdir(self.root) else None
+        if dataset is None or not dataset.files:
+            return pd.DataFrame(columns=columns or table_schema(pa).names)
+
+        expression = None
+
+        def add(condition):
+            nonlocal expression
+            expression = condition if expression is None else expression & condition
+
+        if start:
+            add(ds.field("date") >= str(pd.Timestamp(start).date()))
+        if end:
+            add(ds.field("date") <= str(pd.Timestamp(end).date()))
+        if data_source:
+            sources = [data_source] if isinstance(data_source, str) else list(data_source)
+            add(ds.field("data_source").isin(sources))
+        if filter is not None:
+            add(filter)
+
+        return dataset.to_table(columns=columns, filter=expression).to_pandas()
+
+    def status(self):
+        state = self.state()
+        files = 0
+        size = 0
+        partitions = set()
+        if os.path.isdir(self.root):
+            for directory, _, names in os.walk(self.root):
+                parts = [n for n in names if n.endswith(".parquet")]
+                if parts:
+                    partitions.add(os.path.relpath(directory, self.root))
+                files += len(parts)
+                size += sum(os.path.getsize(os.path.join(directory, n)) for n in parts)
+        return {
+            **state,
+            "root": os.path.abspath(self.root),
+            "files": files,
+            "partitions": len(partitions),
+            "size_mb": round(size / 1024 / 1024, 3)
+        }
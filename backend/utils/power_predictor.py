@@ -1,4 +1,5 @@
 import pandas as pd
+import numpy as np
 import math
 
 class PowerPredictor:
@@ -48,4 +49,27 @@ class PowerPredictor:
             'risk_percentage': float(total_risk * 100),
             'contributions': contributions,
             'status': 'High Risk' if total_risk * 100 > 50 else 'Normal'
-        }
\ No newline at end of file
+        }
+
+    def predict_batch(self, input_df, max_unsafe_shutdowns=10, max_crc_errors=20,
+                      max_write_error_rate=50, max_media_errors=10,
+                      max_power_on_hours=50000):
+        """Vectorized power risk for every row of input_df"""
+
+        def column(name, default):
+            if name in input_df.columns:
+                return input_df[name].to_numpy(dtype=np.float64)
+            return np.full(len(input_df), default, dtype=np.float64)
+
+        unsafe_score = np.minimum(column('Unsafe_Shutdowns', 0) / max_unsafe_shutdowns, 1.0)
+        crc_score = np.minimum(column('CRC_Errors', 0) / max_crc_errors, 1.0)
+        write_score = np.minimum(column('Write_Error_Rate', 0) / max_write_error_rate, 1.0)
+        media_score = np.minimum(column('Media_Errors', 0) / max_media_errors, 1.0)
+
+        poh = column('Power_On_Hours', 10000)
+        poh_score = np.minimum(np.log10(1 + poh) / math.log10(1 + max_power_on_hours), 1.0)
+
+        total_risk = (0.35 * unsafe_score + 0.20 * crc_score + 0.15 * write_score
+                      + 0.15 * media_score + 0.15 * poh_score)
+
+        return total_risk * 100
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+from utils.batch_scoring import WARNING_RISK, CRITICAL_RISK
+
+STATUS_LABELS = ["Healthy", "Warning", "Critical"]
+
+# Fixed delta-histogram bins (new_risk - old_risk, percentage points)
+DELTA_BIN_EDGES = np.array([-100, -50, -20, -10, -5, -1, 1, 5, 10, 20, 50, 100], dtype=np.float64)
+
+
+def risk_status_index(risk):
+    """0 = Healthy, 1 = Warning, 2 = Critical (same cutoffs as generate_summary)"""
+    return (risk >= WARNING_RISK).astype(np.int64) + (risk >= CRITICAL_RISK).astype(np.int64)
+
+
+class RescoreSummary:
+    """
+    Running summary of old-vs-new model risks. Only fixed-size counters are
+    kept, so memory does not depend on how many rows are re-scored.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.sum_old = 0.0
+        self.sum_new = 0.0
+        self.sum_abs_delta = 0.0
+        self.max_increase = 0.0
+        self.max_decrease = 0.0
+        self.transitions = np.zeros((3, 3), dtype=np.int64)
+        self.delta_hist = np.zeros(len(DELTA_BIN_EDGES) - 1, dtype=np.int64)
+
+    def update(self, old_risk, new_risk):
+        old_risk = np.asarray(old_risk, dtype=np.float64)
+        new_risk = np.asarray(new_risk, dtype=np.float64)
+        if old_risk.size == 0:
+            return
+
+        delta = new_risk - old_risk
+
+        self.rows += old_risk.size
+        self.sum_old += float(old_risk.sum())
+        self.sum_new += float(new_risk.sum())
+        self.sum_abs_delta += float(np.abs(delta).sum())
+        self.max_increase = max(self.max_increase, float(delta.max()))
+        self.max_decrease = min(self.max_decrease, float(delta.min()))
+
+        np.add.at(self.transitions, (risk_status_index(old_risk), risk_status_index(new_risk)), 1)
+        self.delta_hist += np.histogram(np.clip(delta, -100, 100), bins=DELTA_BIN_EDGES)[0]
+
+    def to_dict(self):
+        n = max(self.rows, 1)
+        return {
+            "rows": self.rows,
+            "mean_old_risk": round(self.sum_old / n, 4),
+            "mean_new_risk": round(self.sum_new / n, 4),
+            "mean_abs_delta": round(self.sum_abs_delta / n, 4),
+            "max_increase": round(self.max_increase, 4),
+            "max_decrease": round(self.max_decrease, 4),
+            "status_transitions": {
+                old: {new: int(self.transitions[i, j]) for j, new in enumerate(STATUS_LABELS)}
+                for i, old in enumerate(STATUS_LABELS)
+            },
+            "delta_histogram": {
+                "edges": DELTA_BIN_EDGES.tolist(),
+                "counts": self.delta_hist.tolist()
+            }
+        }
+
+
+def rescore_chunk(predictor, chunk, old_model, new_model, summary, old_calibrator=None, new_calibrator=None):
+    """
+    Score a history chunk with two model versions (each with its own
+    calibration map, if any); returns per-row old/new risks
+    """
+    old_risk = np.asarray(predictor.predict_batch(chunk, model=old_model, calibrator=old_calibrator),
+                          dtype=np.float64)
+    new_risk = np.asarray(predictor.predict_batch(chunk, model=new_model, calibrator=new_calibrator),
+                          dtype=np.float64)
+
+    summary.update(old_risk, new_risk)
+
+    return pd.DataFrame({
+        "input_id": chunk["id"].to_numpy(),
+        "old_risk": old_risk,
+        "new_risk": new_risk,
+        "delta": new_risk - old_risk
+    })
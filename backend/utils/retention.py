@@ -0,0 +1,61 @@
+import json
+import os
+from datetime import datetime, timedelta
+
+# Raw input_history rows older than raw_days are purged once their
+# aggregates are in the rollup tables. hourly_rollup_days bounds the hourly
+# rollup table; daily rollups are kept indefinitely.
+DEFAULT_RETENTION_POLICIES = {
+    "manual": {"raw_days": 365},
+    "system": {"raw_days": 90},
+    "sample": {"raw_days": 7},
+    "default": {"raw_days": 180}
+}
+
+DEFAULT_HOURLY_ROLLUP_DAYS = 90
+
+
+def load_retention_policies():
+    """
+    Retention policies per data_source. Override with a JSON object in
+    NVME_RETENTION_POLICIES or a file path in NVME_RETENTION_POLICIES_FILE,
+    e.g. {"system": {"raw_days": 30}}; keys are merged over the defaults.
+    """
+    policies = {k: dict(v) for k, v in DEFAULT_RETENTION_POLICIES.items()}
+
+    raw = os.environ.get("NVME_RETENTION_POLICIES")
+    path = os.environ.get("NVME_RETENTION_POLICIES_FILE")
+    try:
+        if path and os.path.exists(path):
+            with open(path) as f:
+                raw = f.read()
+        if raw:
+            for source, policy in json.loads(raw).items():
+                policies.setdefault(source, {}).update(policy)
+    except (ValueError, OSError) as e:
+        print(f"[Retention] Ignoring invalid retention policy override: {e}")
+
+    for source, policy in policies.items():
+        if int(policy.get("raw_days", 0)) <= 0:
+            raise ValueError(f"raw_days for '{source}' must be a positive number of days")
+
+    return policies
+
+
+def retention_cutoffs(policies, now=None):
+    """
+    Day-aligned purge cutoff per policy key. Aligning to midnight means a
+    day's rows are either all kept or all purged for a given source.
+    """
+    now = now or datetime.now()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    return {
+        source: today - timedelta(days=int(policy["raw_days"]))
+        for source, policy in policies.items()
+    }
+
+
+def hourly_rollup_cutoff(now=None):
+    days = int(os.environ.get("NVME_HOURLY_ROLLUP_DAYS", DEFAULT_HOURLY_ROLLUP_DAYS))
+    now = now or datetime.now()
+    return now.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days)
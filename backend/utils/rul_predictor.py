@@ -0,0 +1,340 @@
+import threading
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from xgboost import XGBRegressor
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import mean_absolute_error, r2_score
+
+from utils.versioned_model import VersionedModel
+
+# Wear is Percent_Life_Used per 1000 power-on hours
+RATE_SCALE_HOURS = 1000.0
+
+# Rows with fewer power-on hours give unstable lifetime-average rates
+MIN_TRAIN_HOURS = 100
+
+# End of life: where wear-out failures (Failure_Mode 1) start in the dataset.
+# Until a model is trained, the NVMe "100% used" point is used.
+END_OF_LIFE_QUANTILE = 0.05
+DEFAULT_END_OF_LIFE = 100.0
+
+# Per-drive fit: minimum samples / power-on span before the slope is trusted,
+# and the span at which it gets equal weight with the model prior. SMART
+# percentage used is reported in whole percent, so short spans are noisy.
+MIN_FIT_SAMPLES = 3
+MIN_FIT_SPAN_HOURS = 24
+PRIOR_SPAN_HOURS = 500
+
+# Clip for power-on hours per wall-clock hour when converting to calendar days
+MIN_DUTY_CYCLE = 0.05
+
+RATE_FEATURES = [
+    "Power_On_Hours",
+    "Total_TBW_TB",
+    "Total_TBR_TB",
+    "Write_TB_per_1000h",
+    "Read_TB_per_1000h",
+    "Temperature_C",
+    "Media_Errors",
+    "Unsafe_Shutdowns",
+    "CRC_Errors",
+    "Read_Error_Rate",
+    "Write_Error_Rate"
+]
+
+# Running sums kept per drive for an incremental least-squares fit of
+# Percent_Life_Used against power-on hours (x is offset by the drive's x0)
+SUM_COLUMNS = ["n", "sx", "sy", "sxx", "sxy"]
+STAT_COLUMNS = SUM_COLUMNS + ["x0", "min_poh", "max_poh", "first_ts", "last_ts", "last_id"]
+
+
+def _numeric(df, column):
+    if column not in df.columns:
+        return pd.Series(0.0, index=df.index)
+    return pd.to_numeric(df[column], errors="coerce").fillna(0).astype(np.float64)
+
+
+def rate_features(df):
+    """Model features plus workload intensity (TB per 1000 power-on hours)"""
+    hours = _numeric(df, "Power_On_Hours").clip(lower=1)
+    features = pd.DataFrame({f: _numeric(df, f) for f in RATE_FEATURES if "_per_" not in f}, index=df.index)
+    features["Write_TB_per_1000h"] = _numeric(df, "Total_TBW_TB") / hours * RATE_SCALE_HOURS
+    features["Read_TB_per_1000h"] = _numeric(df, "Total_TBR_TB") / hours * RATE_SCALE_HOURS
+    return features[RATE_FEATURES]
+
+
+def _epoch_seconds(df):
+    if "timestamp" not in df.columns:
+        return pd.Series(time.time(), index=df.index)
+    ts = pd.to_datetime(df["timestamp"], errors="coerce")
+    seconds = (ts - pd.Timestamp(0)).dt.total_seconds()
+    return seconds.fillna(time.time())
+
+
+class WearRateCache:
+    """
+    Per-drive least-squares wear-rate fits, kept as running sums (n, Σx, Σy,
+    Σx², Σxy) so new samples update a drive's fit in O(1) without re-reading
+    its history. Stats live in one DataFrame indexed by drive id; updates and
+    fits are vectorized groupby/column operations over whole batches.
+
+    Drives are loaded from the history store the first time they are asked
+    for; after that only samples with a higher input id are folded in, so a
+    row is never counted twice.
+    """
+
+    def __init__(self):
+        self.stats = pd.DataFrame(columns=STAT_COLUMNS, dtype=np.float64)
+        self.stats.index.name = "Drive_ID"
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.stats)
+
+    def __contains__(self, drive_id):
+        return str(drive_id) in self.stats.index
+
+    def missing(self, drive_ids):
+        drive_ids = pd.Index(pd.unique(pd.Series(drive_ids, dtype=object).dropna().astype(str)))
+        return list(drive_ids.difference(self.stats.index))
+
+    def load(self, drive_ids, history):
+        """Register drives and fit them from their full stored history"""
+        empty = pd.DataFrame(np.nan, index=pd.Index(drive_ids, name="Drive_ID"), columns=STAT_COLUMNS)
+        empty["n"] = 0.0
+        with self.lock:
+            new = empty.loc[empty.index.difference(self.stats.index)]
+            self.stats = pd.concat([self.stats, new]) if len(self.stats) else new
+        self.update(history)
+
+    def ensure_loaded(self, store, drive_ids):
+        """Fit drives not cached yet from their stored history"""
+        missing = self.missing(drive_ids)
+        if missing:
+            self.load(missing, store.get_drive_history(missing, columns=["power_on_hours", "percent_life_used"]))
+        return len(missing)
+
+    def update(self, frame, only_known=False):
+        """
+        Fold samples (Drive_ID, Power_On_Hours, Percent_Life_Used, optional
+        id / timestamp) into the per-drive sums. only_known skips drives that
+        are not cached yet; they are loaded in full on first use instead.
+        """
+        if frame is None or len(frame) == 0 or "Drive_ID" not in frame.columns:
+            return 0
+
+        frame = frame[frame["Drive_ID"].notna()]
+        df = pd.DataFrame({
+            "Drive_ID": frame["Drive_ID"].astype(str),
+            "poh": _numeric(frame, "Power_On_Hours"),
+            "y": _numeric(frame, "Percent_Life_Used"),
+            "ts": _epoch_seconds(frame),
+            "id": pd.to_numeric(frame["id"], errors="coerce") if "id" in frame.columns else np.nan
+        })
+
+        with self.lock:
+            stats = self.stats
+            if only_known:
+                df = df[df["Drive_ID"].isin(stats.index)]
+            last_id = df["Drive_ID"].map(stats["last_id"])
+            df = df[~(df["id"] <= last_id)]
+            if df.empty:
+                return 0
+
+            x0 = df["Drive_ID"].map(stats["x0"]).fillna(df.groupby("Drive_ID")["poh"].transform("min"))
+            df["x"] = df["poh"] - x0
+            df["x0"] = x0
+            df["xx"] = df["x"] * df["x"]
+            df["xy"] = df["x"] * df["y"]
+
+            g = df.groupby("Drive_ID", sort=False)
+            agg = pd.DataFrame({
+                "n": g.size().astype(np.float64),
+                "sx": g["x"].sum(),
+                "sy": g["y"].sum(),
+                "sxx": g["xx"].sum(),
+                "sxy": g["xy"].sum(),
+                "x0": g["x0"].first(),
+                "min_poh": g["poh"].min(),
+                "max_poh": g["poh"].max(),
+                "first_ts": g["ts"].min(),
+                "last_ts": g["ts"].max(),
+                "last_id": g["id"].max()
+            })[STAT_COLUMNS]
+
+            both = agg.index.intersection(stats.index)
+            if len(both):
+                old = stats.loc[both]
+                new = agg.loc[both]
+                merged = pd.DataFrame(index=both)
+                merged[SUM_COLUMNS] = old[SUM_COLUMNS].fillna(0) + new[SUM_COLUMNS]
+                merged["x0"] = old["x0"].fillna(new["x0"])
+                merged["min_poh"] = np.fmin(old["min_poh"], new["min_poh"])
+                merged["max_poh"] = np.fmax(old["max_poh"], new["max_poh"])
+                merged["first_ts"] = np.fmin(old["first_ts"], new["first_ts"])
+                merged["last_ts"] = np.fmax(old["last_ts"], new["last_ts"])
+                merged["last_id"] = np.fmax(old["last_id"], new["last_id"])
+                stats.loc[both, STAT_COLUMNS] = merged[STAT_COLUMNS]
+
+            added = agg.loc[agg.index.difference(stats.index)]
+            if len(added):
+                self.stats = pd.concat([stats, added]) if len(stats) else added
+
+        return int(agg["n"].sum())
+
+    def fit(self, drive_ids):
+        """Wear rate per 1000 power-on hours, span and duty cycle for each drive (NaN if unknown)"""
+        with self.lock:
+            s = self.stats.reindex(pd.Index(drive_ids, dtype=object).astype(str)).astype(np.float64)
+
+        n = s["n"].fillna(0)
+        denom = n * s["sxx"] - s["sx"] ** 2
+        slope = (n * s["sxy"] - s["sx"] * s["sy"]) / denom.where(denom > 0)
+        span = s["max_poh"] - s["min_poh"]
+
+        usable = (n >= MIN_FIT_SAMPLES) & (span >= MIN_FIT_SPAN_HOURS) & (slope > 0)
+        wall_hours = (s["last_ts"] - s["first_ts"]) / 3600
+        duty = (span / wall_hours.where(wall_hours > 0)).clip(MIN_DUTY_CYCLE, 1.0)
+
+        return pd.DataFrame({
+            "rate": (slope * RATE_SCALE_HOURS).where(usable),
+            "samples": n.to_numpy(),
+            "span_hours": span.fillna(0).to_numpy(),
+            "duty_cycle": duty.where(span > 0)
+        }, index=s.index)
+
+    def forget(self, drive_ids=None):
+        with self.lock:
+            if drive_ids is None:
+                self.stats = self.stats.iloc[0:0]
+            else:
+                self.stats = self.stats.drop(pd.Index(drive_ids).astype(str), errors="ignore")
+
+
+class RULPredictor(VersionedModel):
+    """
+    Remaining useful life from wear: (end-of-life % - current %) / wear rate.
+
+    The wear rate blends the drive's own fit over its stored history
+    (WearRateCache) with an XGBoost regressor trained on the dataset's
+    lifetime-average wear rates for the drive's workload profile. The
+    regressor carries drives with little or no history; the drive's own
+    slope takes over as its power-on span grows.
+    """
+
+    def __init__(self, model_path="models/rul_model.pkl"):
+        super().__init__(model_path)
+        self.end_of_life_percent = DEFAULT_END_OF_LIFE
+
+        self.load_model()
+
+    def _read_model(self, path):
+        saved = joblib.load(path)
+        self.model = saved["model"]
+        self.end_of_life_percent = float(saved["end_of_life_percent"])
+
+    def _write_model(self, path):
+        joblib.dump({"model": self.model, "end_of_life_percent": self.end_of_life_percent}, path)
+
+    def train_model(self, data_path='data/Clean_Final_NVMe_Dataset.csv'):
+        """Train the wear-rate regressor and learn the end-of-life point"""
+        print("[RULPredictor] Training wear-rate model...")
+
+        columns = [f for f in RATE_FEATURES if "_per_" not in f] + ["Percent_Life_Used", "Failure_Mode"]
+        df = pd.read_csv(data_path, usecols=columns)
+        df = df[df["Power_On_Hours"] >= MIN_TRAIN_HOURS].copy()
+
+        if df.empty:
+            raise ValueError(f"No rows with at least {MIN_TRAIN_HOURS} power-on hours")
+
+        wearout = df.loc[df["Failure_Mode"] == 1, "Percent_Life_Used"].dropna()
+        end_of_life = float(wearout.quantile(END_OF_LIFE_QUANTILE)) if len(wearout) else DEFAULT_END_OF_LIFE
+
+        X = rate_features(df)
+        rate = df["Percent_Life_Used"].fillna(0) / df["Power_On_Hours"] * RATE_SCALE_HOURS
+        # Rates span orders of magnitude; fit in log space
+        y = np.log1p(rate)
+
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=5)
+
+        model = XGBRegressor(
+            objective="reg:squarederror",
+            n_estimators=400,
+            max_depth=6,
+            learning_rate=0.05,
+            subsample=0.8,
+            colsample_bytree=0.8,
+            random_state=5
+        )
+        model.fit(X_train, y_train)
+
+        self.model = model
+        self.end_of_life_percent = end_of_life
+        self.save_model()
+
+        predicted = np.expm1(model.predict(X_test))
+        actual = np.expm1(y_test)
+
+        return {
+            "status": "success",
+            "end_of_life_percent": round(end_of_life, 2),
+            "r2_log_rate": float(r2_score(y_test, model.predict(X_test))),
+            "mae_rate_per_1000h": float(mean_absolute_error(actual, predicted)),
+            "median_rate_per_1000h": float(np.median(actual))
+        }
+
+    def predict_rate_batch(self, input_df):
+        """Expected wear rate (% per 1000 power-on hours) from each row's workload profile"""
+        if self.model is None:
+            # Untrained: the drive's lifetime average
+            hours = _numeric(input_df, "Power_On_Hours").clip(lower=1)
+            return (_numeric(input_df, "Percent_Life_Used") / hours * RATE_SCALE_HOURS).to_numpy()
+
+        return np.clip(np.expm1(self.model.predict(rate_features(input_df))), 0, None)
+
+    def estimate(self, input_df, cache=None):
+        """
+        RUL for every row of input_df (model features, optional Drive_ID).
+        Rows with a Drive_ID use that drive's cached history fit when cache is given.
+        """
+        prior = self.predict_rate_batch(input_df)
+
+        if cache is not None and "Drive_ID" in input_df.columns:
+            fits = cache.fit(input_df["Drive_ID"].fillna("").astype(str).tolist())
+            history_rate = fits["rate"].to_numpy(dtype=np.float64)
+            samples = fits["samples"].to_numpy(dtype=np.float64)
+            span = fits["span_hours"].to_numpy(dtype=np.float64)
+            duty = fits["duty_cycle"].to_numpy(dtype=np.float64)
+        else:
+            history_rate = np.full(len(input_df), np.nan)
+            samples = np.zeros(len(input_df))
+            span = np.zeros(len(input_df))
+            duty = np.full(len(input_df), np.nan)
+
+        has_history = ~np.isnan(history_rate)
+        weight = np.where(has_history, span / (span + PRIOR_SPAN_HOURS), 0.0)
+        rate = weight * np.nan_to_num(history_rate) + (1 - weight) * prior
+
+        life_used = _numeric(input_df, "Percent_Life_Used").to_numpy()
+        remaining = np.clip(self.end_of_life_percent - life_used, 0, None)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rul_hours = np.where(rate > 0, remaining / rate * RATE_SCALE_HOURS, np.inf)
+        rul_hours = np.where(remaining <= 0, 0.0, rul_hours)
+        duty = np.where(np.isnan(duty), 1.0, duty)
+        rul_days = rul_hours / (24 * duty)
+
+        return pd.DataFrame({
+            "percent_life_used": life_used,
+            "end_of_life_percent": self.end_of_life_percent,
+            "wear_rate_per_1000h": rate,
+            "rate_source": np.where(has_history, np.where(weight >= 0.5, "history", "blend"),
+                                    "model" if self.model is not None else "lifetime_average"),
+            "history_samples": samples.astype(np.int64),
+            "history_span_hours": span,
+            "duty_cycle": duty,
+            "rul_power_on_hours": rul_hours,
+            "rul_days": rul_days
+        }, index=input_df.index)
@@ -0,0 +1,266 @@
+import threading
+import time
+from datetime import datetime
+
+from system_info_extractor import SMARTCTL_DEVICE, get_system_info
+
+# Smallest change of each SMART field (vs. the last emitted sample) that is
+# worth a new history row and a re-score. Counters are cumulative, so slow
+# growth still crosses the threshold eventually.
+CHANGE_THRESHOLDS = {
+    "Temperature_C": 3,
+    "Percent_Life_Used": 1,
+    "Total_TBW_TB": 0.1,
+    "Total_TBR_TB": 0.5,
+    "Power_On_Hours": 24,
+    "Media_Errors": 1,
+    "Unsafe_Shutdowns": 1,
+    "CRC_Errors": 1,
+    "Read_Error_Rate": 1,
+    "Write_Error_Rate": 1
+}
+
+# Adaptive interval: back to min_interval on a change, x BACKOFF per quiet poll
+MIN_INTERVAL_SECONDS = 60
+MAX_INTERVAL_SECONDS = 900
+BACKOFF = 1.5
+
+# A heartbeat record is emitted when nothing changed for this long
+HEARTBEAT_SECONDS = 3600
+
+
+def diff_samples(previous, current, thresholds=CHANGE_THRESHOLDS, temp_threshold=None):
+    """
+    Meaningful changes between two feature dicts: {field: [old, new]}.
+    Temperature also counts when it crosses the drive's warning threshold,
+    however small the step.
+    """
+    changes = {}
+    for field, minimum in thresholds.items():
+        old, new = previous.get(field), current.get(field)
+        if old is None or new is None:
+            if old != new:
+                changes[field] = [old, new]
+            continue
+        if abs(new - old) >= minimum:
+            changes[field] = [old, new]
+
+    if temp_threshold is not None and "Temperature_C" not in changes:
+        old, new = previous.get("Temperature_C"), current.get("Temperature_C")
+        if old is not None and new is not None and (old >= temp_threshold) != (new >= temp_threshold):
+            changes["Temperature_C"] = [old, new]
+    return changes
+
+
+class DriveState:
+    def __init__(self, device, interval):
+        self.device = device
+        self.interval = interval
+        self.next_due = 0.0
+        self.lock = threading.Lock()
+        self.sample = None          # last successful system-info result
+        self.sampled_at = None
+        self.emitted = None         # sample of the last emitted record
+        self.emitted_at = None
+        self.last_error = None
+        self.polls = 0
+        self.failures = 0
+        self.records = {"initial": 0, "change": 0, "drive_changed": 0, "heartbeat": 0}
+
+    def to_dict(self):
+        return {
+            "device": self.device,
+            "interval_seconds": round(self.interval, 1),
+            "last_sample_at": datetime.fromtimestamp(self.sampled_at).isoformat() if self.sampled_at else None,
+            "last_record_at": datetime.fromtimestamp(self.emitted_at).isoformat() if self.emitted_at else None,
+            "polls": self.polls,
+            "failures": self.failures,
+            "records": dict(self.records),
+            "last_error": self.last_error,
+            "drive": (self.sample or {}).get("drive")
+        }
+
+
+class SmartPoller:
+    """
+    Samples each NVMe device with smartctl at an adaptive interval and diffs
+    every sample against the last one it emitted. A record goes to on_record
+    only on a meaningful change (CHANGE_THRESHOLDS, threshold crossings,
+    drive identity changes) or, when nothing changed, as a heartbeat every
+    heartbeat_seconds, so history writes and scoring follow real change
+    rather than the poll rate.
+
+    The latest sample per device doubles as a cache for on-demand reads
+    (latest): smartctl runs at most once per max_age per device, and
+    concurrent readers of a stale device share a single run.
+    """
+
+    def __init__(self, devices=None, read=get_system_info, min_interval=MIN_INTERVAL_SECONDS,
+                 max_interval=MAX_INTERVAL_SECONDS, heartbeat_seconds=HEARTBEAT_SECONDS,
+                 backoff=BACKOFF, thresholds=CHANGE_THRESHOLDS):
+        self.read = read
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.heartbeat_seconds = heartbeat_seconds
+        self.backoff = backoff
+        self.thresholds = thresholds
+        self.states = {d: DriveState(d, min_interval) for d in (devices or [SMARTCTL_DEVICE])}
+        self.default_device = next(iter(self.states))
+        self.on_record = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, on_record=None):
+        """Poll every device in a daemon thread; records go to on_record(record)"""
+        if self.running:
+            return self._thread
+        self.on_record = on_record
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="smart-poller", daemon=True)
+        self._thread.start()
+        print(f"[SmartPoller] ✓ Polling {', '.join(self.states)} every "
+              f"{self.min_interval:g}-{self.max_interval:g}s (heartbeat {self.heartbeat_seconds:g}s)")
+        return self._thread
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            state = min(self.states.values(), key=lambda s: s.next_due)
+            wait = state.next_due - time.time()
+            if wait > 0:
+                self._stop.wait(wait)
+                continue
+            try:
+                self.poll(state.device)
+            except Exception as e:
+                print(f"[SmartPoller] ❌ Poll of {state.device} failed: {e}")
+                state.next_due = time.time() + state.interval
+
+    def poll(self, device=None):
+        """Read one device now, diff and emit; returns the record or None"""
+        state = self.states[device or self.default_device]
+        with state.lock:
+            return self._poll(state)[1]
+
+    def _poll(self, state, sample=None):
+        """Read (unless given a sample), diff and emit; returns (sample, record)"""
+        if sample is None:
+            sample = self.read(state.device)
+        now = time.time()
+        state.polls += 1
+
+        if not sample.get("success"):
+            state.failures += 1
+            state.last_error = sample.get("message")
+            state.interval = min(state.interval * self.backoff, self.max_interval)
+            state.next_due = now + state.interval
+            return sample, None
+
+        state.sample = sample
+        state.sampled_at = now
+        state.last_error = None
+
+        record = self._record(state, sample, now)
+        if record is not None and record["type"] != "heartbeat":
+            state.interval = self.min_interval
+        else:
+            state.interval = min(state.interval * self.backoff, self.max_interval)
+        state.next_due = now + state.interval
+
+        if record is not None:
+            state.emitted = sample
+            state.emitted_at = now
+            state.records[record["type"]] += 1
+            record["interval_seconds"] = round(state.interval, 1)
+            self._emit(record)
+        return sample, record
+
+    def _record(self, state, sample, now):
+        """Record to emit for this sample, or None (no meaningful change, no heartbeat due)"""
+        if not self.running:
+            return None
+
+        previous = state.emitted
+        if previous is None:
+            kind, changes = "initial", {}
+        elif previous.get("drive") != sample.get("drive"):
+            kind, changes = "drive_changed", {"drive": [previous.get("drive"), sample.get("drive")]}
+        else:
+            changes = diff_samples(previous["data"], sample["data"], self.thresholds, sample.get("temp_threshold"))
+            if changes:
+                kind = "change"
+            elif now - state.emitted_at >= self.heartbeat_seconds:
+                kind = "heartbeat"
+            else:
+                return None
+
+        drive = sample.get("drive") or {}
+        return {
+            "type": kind,
+            "device": state.device,
+            "drive_id": drive.get("Serial_Number") or state.device,
+            "timestamp": datetime.fromtimestamp(now).isoformat(),
+            "changes": changes,
+            "sample": sample
+        }
+
+    def _emit(self, record):
+        if self.on_record is None:
+            return
+        try:
+            self.on_record(record)
+        except Exception as e:
+            print(f"[SmartPoller] ❌ Record handler failed for {record['device']}: {e}")
+
+    def cached(self, device=None, max_age=None):
+        """Last successful sample if younger than max_age seconds, else None"""
+        state = self.states.get(device or self.default_device)
+        if state is None or state.sample is None:
+            return None
+        if max_age is not None and time.time() - state.sampled_at > max_age:
+            return None
+        return state.sample
+
+    def observe(self, device, sample):
+        """Feed a sample read elsewhere (e.g. the async server) through diffing and emission"""
+        state = self.states.get(device or self.default_device)
+        if state is None:
+            return None
+        with state.lock:
+            return self._poll(state, sample)[1]
+
+    def latest(self, device=None, max_age=0):
+        """
+        System-info result for a device, from the cache when younger than
+        max_age seconds; otherwise smartctl runs once (concurrent callers wait
+        for that run instead of starting their own)
+        """
+        device = device or self.default_device
+        sample = self.cached(device, max_age)
+        if sample is not None:
+            return sample
+
+        state = self.states.get(device)
+        if state is None:
+            return self.read(device)
+
+        with state.lock:
+            sample = self.cached(device, max_age)
+            if sample is not None:
+                return sample
+            return self._poll(state)[0]
+
+    def status(self):
+        return {
+            "running": self.running,
+            "min_interval_seconds": self.min_interval,
+            "max_interval_seconds": self.max_interval,
+            "heartbeat_seconds": self.heartbeat_seconds,
+            "devices": [state.to_dict() for state in self.states.values()]
+        }
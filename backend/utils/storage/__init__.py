@@ -0,0 +1,22 @@
+from utils.storage.base import (
+    HistoryStore,
+    HISTORY_COLUMN_MAP,
+    HISTORY_CHUNK_SIZE,
+    PREDICTION_COLUMNS,
+    ROLLUP_TABLES
+)
+
+
+def get_history_store(backend="mysql", db_config=None, sqlite_path=None):
+    """Create the configured history store ('mysql' or 'sqlite')"""
+    backend = (backend or "mysql").lower()
+
+    if backend == "sqlite":
+        from utils.storage.sqlite_store import SQLiteHistoryStore
+        return SQLiteHistoryStore(sqlite_path or "data/nvme_history.db")
+
+    if backend == "mysql":
+        from utils.storage.mysql_store import MySQLHistoryStore
+        return MySQLHistoryStore(db_config or {})
+
+    raise ValueError(f"Unknown storage backend: {backend}")
@@ -0,0 +1,105 @@
+import asyncio
+
+import aiomysql
+
+from utils.storage.base import HISTORY_COLUMNS, format_timestamp
+from utils.storage.async_store import AsyncHistoryStore
+
+
+class AsyncMySQLHistoryStore(AsyncHistoryStore):
+    """
+    History reads (list, entry, count, ping) on an aiomysql connection pool.
+    Writes keep the shared HistoryStore SQL (rollup upserts, transactions)
+    and run on the facade's thread pool.
+    """
+
+    errors = (aiomysql.Error, OSError)
+
+    def __init__(self, store, db_config, workers=8, pool_size=20):
+        super().__init__(store, workers=workers)
+        self.db_config = db_config
+        self.pool_size = pool_size
+        self._pool = None
+        self._pool_lock = asyncio.Lock()
+
+    def describe(self):
+        return f"{self.store.describe()} (aiomysql pool of {self.pool_size})"
+
+    async def pool(self):
+        if self._pool is None:
+            async with self._pool_lock:
+                if self._pool is None:
+                    self._pool = await aiomysql.create_pool(
+                        host=self.db_config.get('host', 'localhost'),
+                        port=int(self.db_config.get('port', 3306)),
+                        user=self.db_config.get('user'),
+                        password=self.db_config.get('password', ''),
+                        db=self.db_config.get('database'),
+                        minsize=1,
+                        maxsize=self.pool_size,
+                        autocommit=True
+                    )
+        return self._pool
+
+    async def fetch(self, query, params=()):
+        pool = await self.pool()
+        async with pool.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(query, tuple(params))
+                return await cursor.fetchall()
+
+    async def is_available(self):
+        try:
+            await self.fetch("SELECT 1")
+            return True
+        except self.errors as e:
+            print(f"❌ MySQL Connection Error: {e}")
+            return False
+
+    async def get_input_history(self, limit=100):
+        """Latest input rows, newest first"""
+        try:
+            results = await self.fetch(f"""
+                SELECT {", ".join(HISTORY_COLUMNS)}
+                FROM input_history
+                ORDER BY timestamp DESC
+                LIMIT %s
+            """, (limit,))
+        except self.errors as e:
+            print(f"❌ MySQL Error: {e}")
+            return []
+
+        for row in results:
+            row['timestamp'] = format_timestamp(row['timestamp'])
+            row['created_at'] = format_timestamp(row['created_at'])
+        return list(results)
+
+    async def get_history_entry(self, entry_id):
+        try:
+            rows = await self.fetch("SELECT * FROM input_history WHERE id = %s", (entry_id,))
+        except self.errors as e:
+            print(f"❌ MySQL Error: {e}")
+            return None
+
+        if not rows:
+            return None
+        result = rows[0]
+        result['timestamp'] = format_timestamp(result['timestamp'])
+        result['created_at'] = format_timestamp(result['created_at'])
+        return result
+
+    async def count_history(self, start=None, end=None, entry_ids=None):
+        clauses, params = self.store._history_filters(start, end, entry_ids)
+        where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        try:
+            rows = await self.fetch("SELECT COUNT(*) AS total FROM input_history" + where, params)
+        except self.errors as e:
+            print(f"❌ MySQL Error: {e}")
+            return 0
+        return rows[0]['total']
+
+    async def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            await self._pool.wait_closed()
+        await super().close()
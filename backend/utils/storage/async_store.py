@@ -0,0 +1,51 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+# Threads for store calls without a native async path
+ASYNC_STORE_WORKERS = 8
+
+
+class AsyncHistoryStore:
+    """
+    Awaitable facade over a HistoryStore for the async server.
+
+    Every store method is available as a coroutine that runs on a small
+    dedicated thread pool, so blocking database calls never run on the event
+    loop and at most `workers` of them hit the database at once, however many
+    requests are waiting. Backends with an async driver override the hot
+    read paths (see AsyncMySQLHistoryStore).
+    """
+
+    def __init__(self, store, workers=ASYNC_STORE_WORKERS):
+        self.store = store
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="async-store")
+
+    def __getattr__(self, name):
+        attribute = getattr(self.store, name)
+        if not callable(attribute):
+            return attribute
+
+        async def call(*args, **kwargs):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, functools.partial(attribute, *args, **kwargs))
+
+        call.__name__ = name
+        return call
+
+    def describe(self):
+        return f"{self.store.describe()} (thread pool)"
+
+    async def close(self):
+        self.executor.shutdown(wait=False)
+
+
+def get_async_history_store(store, backend="mysql", db_config=None, workers=ASYNC_STORE_WORKERS, pool_size=20):
+    """Async facade for the configured store: aiomysql pool for MySQL reads when installed"""
+    if (backend or "mysql").lower() == "mysql":
+        try:
+            from utils.storage.async_mysql_store import AsyncMySQLHistoryStore
+            return AsyncMySQLHistoryStore(store, db_config or {}, workers=workers, pool_size=pool_size)
+        except ImportError:
+            print("⚠️ aiomysql not installed; MySQL calls run on a thread pool (pip install aiomysql)")
+    return AsyncHistoryStore(store, workers=workers)
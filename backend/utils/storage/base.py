@@ -0,0 +1,1123 @@
+import json
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+# Maps input_history columns to the model feature names
+HISTORY_COLUMN_MAP = {
+    'power_on_hours': 'Power_On_Hours',
+    'total_tbw_tb': 'Total_TBW_TB',
+    'total_tbr_tb': 'Total_TBR_TB',
+    'temperature_c': 'Temperature_C',
+    'percent_life_used': 'Percent_Life_Used',
+    'media_errors': 'Media_Errors',
+    'unsafe_shutdowns': 'Unsafe_Shutdowns',
+    'crc_errors': 'CRC_Errors',
+    'read_error_rate': 'Read_Error_Rate',
+    'write_error_rate': 'Write_Error_Rate'
+}
+
+INPUT_COLUMNS = list(HISTORY_COLUMN_MAP) + ['temp_threshold', 'data_source', 'notes', 'drive_id']
+
+HISTORY_COLUMNS = ['id', 'timestamp'] + INPUT_COLUMNS + ['created_at']
+
+HISTORY_CHUNK_SIZE = 5000
+
+PREDICTION_COLUMNS = [
+    'input_id', 'model_version', 'timestamp',
+    'wearout_risk', 'thermal_risk', 'power_risk', 'controller_risk',
+    'overall_risk', 'status', 'highest_risk', 'top_contributions'
+]
+
+# Rollup tables keep running sums per (bucket, data_source) so fleet
+# statistics are read from O(buckets) rows instead of re-aggregating
+# input_history on every query
+ROLLUP_TABLES = {
+    'hour': 'input_rollup_hourly',
+    'day': 'input_rollup_daily'
+}
+
+ROLLUP_SUM_COLUMNS = [
+    'total_inputs', 'sum_power_hours', 'sum_temperature', 'sum_life_used',
+    'sum_total_data_tb', 'sum_temp_threshold', 'temp_threshold_count'
+]
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def format_timestamp(value):
+    """Datetime (MySQL) or ISO text (SQLite) -> 'YYYY-MM-DD HH:MM:SS'"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.strftime(TIMESTAMP_FORMAT)
+    text = str(value)
+    try:
+        return datetime.fromisoformat(text).strftime(TIMESTAMP_FORMAT)
+    except ValueError:
+        return text
+
+
+def to_db_timestamp(value):
+    """Normalise a datetime / date / ISO string parameter to the stored text form"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return datetime.fromisoformat(value).strftime(TIMESTAMP_FORMAT)
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, datetime.min.time())
+    return value.strftime(TIMESTAMP_FORMAT)
+
+
+class HistoryStore:
+    """
+    Persistence for input_history and the tables derived from it
+    (prediction_history, rollups, re-scoring results).
+
+    The SQL here is shared; backends provide the connection and a handful of
+    dialect hooks (parameter style, rollup bucket expressions, upserts,
+    limited deletes and row estimates).
+    """
+
+    name = "base"
+    param = "%s"
+    now_sql = "NOW()"
+    errors = (Exception,)
+
+    # ---- backend hooks ---------------------------------------------------
+
+    def connect(self):
+        raise NotImplementedError
+
+    def release(self, conn):
+        conn.close()
+
+    def describe(self):
+        return self.name
+
+    def rollup_bucket_sql(self, granularity):
+        raise NotImplementedError
+
+    def upsert_sql(self, key_columns, add_columns=(), max_columns=(), replace_columns=()):
+        """Conflict clause appended to an INSERT to merge with an existing row"""
+        raise NotImplementedError
+
+    def limited_delete_sql(self, table, where, order_by):
+        """DELETE of at most one batch of matching rows (final placeholder is the limit)"""
+        raise NotImplementedError
+
+    def row_estimate_sql(self, table):
+        """Cheap approximate row count: the id span (gaps from deletes count as rows)"""
+        return f"SELECT COALESCE(MAX(id) - MIN(id) + 1, 0) FROM {table}"
+
+    # ---- helpers ---------------------------------------------------------
+
+    def sql(self, query):
+        """Rewrite %s placeholders to the backend's parameter style"""
+        if self.param == "%s":
+            return query
+        return query.replace("%s", self.param)
+
+    def get_connection(self):
+        try:
+            return self.connect()
+        except self.errors as e:
+            print(f"❌ {self.name} Connection Error: {e}")
+            return None
+
+    @contextmanager
+    def cursor(self):
+        """Yield (conn, cursor); raises ConnectionError if the store is unreachable"""
+        conn = self.get_connection()
+        if not conn:
+            raise ConnectionError(f"Could not connect to {self.name} store")
+        cursor = conn.cursor()
+        try:
+            yield conn, cursor
+        finally:
+            cursor.close()
+            self.release(conn)
+
+    def execute(self, cursor, query, params=()):
+        cursor.execute(self.sql(query), tuple(params))
+
+    def executemany(self, cursor, query, rows, batch_size=1000):
+        query = self.sql(query)
+        for i in range(0, len(rows), batch_size):
+            cursor.executemany(query, rows[i:i + batch_size])
+
+    @staticmethod
+    def rows_as_dicts(cursor):
+        columns = [d[0] for d in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def is_available(self):
+        """Can a connection be opened right now?"""
+        conn = self.get_connection()
+        if conn:
+            self.release(conn)
+            return True
+        return False
+
+    # ---- input_history -----------------------------------------------------
+
+    def save_input(self, input_data, temp_threshold=None, data_source="manual", notes="", drive_id=None):
+        """Insert one input row (feature-name keyed dict); returns (success, entry_id)"""
+        try:
+            with self.cursor() as (conn, cursor):
+                values = [input_data.get(f, 0) for f in HISTORY_COLUMN_MAP.values()]
+                values += [temp_threshold, data_source, notes, drive_id]
+
+                self.execute(cursor, f"""
+                    INSERT INTO input_history (timestamp, {", ".join(INPUT_COLUMNS)})
+                    VALUES ({self.now_sql}, {", ".join(["%s"] * len(INPUT_COLUMNS))})
+                """, values)
+                entry_id = cursor.lastrowid
+
+                self.update_rollups(cursor, "id = %s", (entry_id,))
+                conn.commit()
+
+            print(f"✓ Saved input as entry #{entry_id}")
+            return True, entry_id
+
+        except (ConnectionError,) + self.errors as e:
+            print(f"❌ {self.name} Error: {e}")
+            return False, None
+
+    def begin_write(self, cursor):
+        """Start a write transaction whose reads see only committed + own rows"""
+
+    def save_inputs_bulk(self, frame, batch_size=1000):
+        """
+        Insert many input rows in one transaction using multi-row INSERTs.
+        frame is a DataFrame with model feature columns plus optional
+        timestamp / temp_threshold / data_source / notes / Drive_ID. Rollups
+        are folded in from the frame itself. Returns the new ids in frame
+        order (empty list on failure).
+
+        Ids are read back as "id > max id seen at transaction start"; the
+        transaction snapshot (MySQL REPEATABLE READ, SQLite write lock) keeps
+        other writers' rows out of that range.
+        """
+        if frame is None or len(frame) == 0:
+            return []
+
+        frame = self._input_frame(frame)
+        columns = ['timestamp'] + INPUT_COLUMNS
+        rows = list(frame[columns].itertuples(index=False, name=None))
+
+        try:
+            with self.cursor() as (conn, cursor):
+                self.begin_write(cursor)
+                self.execute(cursor, "SELECT COALESCE(MAX(id), 0) FROM input_history")
+                max_before = cursor.fetchone()[0]
+
+                self.executemany(cursor, f"""
+                    INSERT INTO input_history ({", ".join(columns)})
+                    VALUES ({", ".join(["%s"] * len(columns))})
+                """, rows, batch_size)
+
+                self.execute(
+                    cursor,
+                    "SELECT id FROM input_history WHERE id > %s ORDER BY id LIMIT %s",
+                    (max_before, len(rows))
+                )
+                ids = [row[0] for row in cursor.fetchall()]
+
+                self._upsert_rollup_rows(cursor, frame)
+                conn.commit()
+
+            if len(ids) != len(rows):
+                print(f"⚠️ Bulk insert wrote {len(rows)} rows but read back {len(ids)} ids")
+            return ids
+
+        except (ConnectionError,) + self.errors as e:
+            print(f"❌ {self.name} Error: {e}")
+            return []
+
+    def _input_frame(self, frame):
+        """Normalise a feature-named frame to input_history column names and types"""
+        out = pd.DataFrame(index=frame.index)
+        for column, feature in HISTORY_COLUMN_MAP.items():
+            source = feature if feature in frame.columns else column
+            if source in frame.columns:
+                out[column] = pd.to_numeric(frame[source], errors='coerce').fillna(0).astype(float)
+            else:
+                out[column] = 0.0
+
+        now = datetime.now().strftime(TIMESTAMP_FORMAT)
+        if 'timestamp' in frame.columns:
+            stamps = pd.to_datetime(frame['timestamp'], errors='coerce')
+            out['timestamp'] = stamps.dt.strftime(TIMESTAMP_FORMAT).fillna(now)
+        else:
+            out['timestamp'] = now
+
+        if 'temp_threshold' in frame.columns:
+            threshold = pd.to_numeric(frame['temp_threshold'], errors='coerce')
+            out['temp_threshold'] = threshold.astype(object).where(threshold.notna(), None)
+        else:
+            out['temp_threshold'] = None
+        out['data_source'] = frame['data_source'].astype(str) if 'data_source' in frame.columns else 'bulk'
+        out['notes'] = frame['notes'].astype(str) if 'notes' in frame.columns else ''
+        if 'Drive_ID' in frame.columns:
+            drive_ids = frame['Drive_ID']
+            out['drive_id'] = drive_ids.astype(str).where(drive_ids.notna(), None)
+        else:
+            out['drive_id'] = None
+        return out
+
+    def get_input_history(self, limit=100):
+        """Latest input rows, newest first"""
+        try:
+            with self.cursor() as (conn, cursor):
+                self.execute(cursor, f"""
+                    SELECT {", ".join(HISTORY_COLUMNS)}
+                    FROM input_history
+                    ORDER BY timestamp DESC
+                    LIMIT %s
+                """, (limit,))
+                results = self.rows_as_dicts(cursor)
+
+            for row in results:
+                row['timestamp'] = format_timestamp(row['timestamp'])
+                row['created_at'] = format_timestamp(row['created_at'])
+
+            print(f"✓ Retrieved {len(results)} records from {self.name}")
+            return results
+
+        except (ConnectionError,) + self.errors as e:
+            print(f"❌ {self.name} Error: {e}")
+            return []
+
+    def get_history_entry(self, entry_id):
+        try:
+            with self.cursor() as (conn, cursor):
+                self.execute(cursor, "SELECT * FROM input_history WHERE id = %s", (entry_id,))
+                rows = self.rows_as_dicts(cursor)
+
+            if not rows:
+                return None
+            result = rows[0]
+            result['timestamp'] = format_timestamp(result['timestamp'])
+            result['created_at'] = format_timestamp(result['created_at'])
+            return result
+
+        except (ConnectionError,) + self.errors as e:
+            print(f"❌ {self.name} Error: {e}")
+            return None
+
+    def delete_history_entry(self, entry_id):
+        """Delete one input row and take it out of the rollups in the same transaction"""
+        try:
+            with self.cursor() as (conn, cursor):
+                self.update_rollups(cursor, "id = %s", (entry_id,), sign=-1)
+                self.execute(cursor, "DELETE FROM input_history WHERE id = %s", (entry_id,))
+                deleted = cursor.rowcount > 0
+                if deleted:
+                    for table in ROLLUP_TABLES.values():
+                        self.execute(cursor, f"DELETE FROM {table} WHERE total_inputs <= 0")
+                conn.commit()
+
+            if deleted:
+                print(f"✓ Deleted entry {entry_id}")
+            return deleted
+
+        except (ConnectionError,) + self.errors as e:
+            print(f"❌ {self.name} Error: {e}")
+            return False
+
+    def clear_all_history(self, batch_size=5000, pause=0.05):
+        """Clear all history (batched so no single long table-wide lock)"""
+        try:
+            with self.cursor() as (conn, cursor):
+                count = self.batched_delete(conn, cursor, "input_history", "id > %s", [0],
+                                            batch_size=batch_size, pause=pause)
+                for table in ROLLUP_TABLES.values():
+                    self.batched_delete(conn, cursor, table, "total_inputs >= %s", [0],
+                                        order_by="bucket_start", batch_size=batch_size, pause=pause)
+
+            print(f"✓ Cleared {count} entries from {self.name}")
+            return count
+
+        except (ConnectionError,) + self.errors as e:
+            print(f"❌ {self.name} Error: {e}")
+            return 0
+
+    def batched_delete(self, conn, cursor, table, where, params, order_by="id",
+                       batch_size=5000, pause=0.05):
+        """
+        Delete matching rows in small ordered batches, committing after each
+        one so locks are held briefly and undo/WAL stay small.
+        """
+        query = self.limited_delete_sql(table, where, order_by)
+        total = 0
+
+        while True:
+            self.execute(cursor, query, list(params) + [batch_size])
+            deleted = cursor.rowcount
+            conn.commit()
+            total += deleted
+            if deleted < batch_size:
+                return total
+            time.sleep(pause)
+
+    @staticmethod
+    def _history_filters(start=None, end=None, entry_ids=None):
+        """WHERE clauses shared by history scans"""
+        clauses = []
+        params = []
+        if start:
+            clauses.append("timestamp >= %s")
+            params.append(to_db_timestamp(start))
+        if end:
+            clauses.append("timestamp <= %s")
+            params.append(to_db_timestamp(end))
+        if entry_ids:
+            clauses.append("id IN (" + ", ".join(["%s"] * len(entry_ids)) + ")")
+            params.extend(entry_ids)
+        return clauses, params
+
+    def count_history(self, start=None, end=None, entry_ids=None):
+        try:
+            clauses, params = self._history_filters(start, end, entry_ids)
+            where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+            with self.cursor() as (conn, cursor):
+                self.execute(cursor, "SELECT COUNT(*) FROM input_history" + where, params)
+                return cursor.fetchone()[0]
+
+        except (ConnectionError,) + self.errors as e:
+            print(f"❌ {self.name} Error: {e}")
+            return 0
+
+    def estimate_history_count(self):
+        """Approximate input_history size for health checks, without a COUNT(*) scan"""
+        try:
+            with self.cursor() as (conn, cursor):
+                self.execute(cursor, self.row_estimate_sql("input_history"))
+                return int(cursor.fetchone()[0] or 0)
+
+        except (ConnectionError,) + self.errors as e:
+            print(f"❌ {self.name} Error: {e}")
+            return 0
+
+    def iter_history_chunks(self, start=None, end=None, entry_ids=None,
+                            chunk_size=HISTORY_CHUNK_SIZE, columns=None, after_id=0):
+        """
+        Yield input_history rows as feature-named DataFrames of at most
+        chunk_size rows. Keyset pagination on the primary key keeps memory
+        bounded and each query an index range scan. columns limits the
+        stored columns read (id is always included); after_id resumes
+        after a known id.
+        """
+        columns = columns or (['timestamp', 'drive_id'] + list(HISTORY_COLUMN_MAP) + ['temp_threshold', 'data_source'])
+        select = ", ".join(['id'] + [c for c in columns if c != 'id'])
+        clauses, params = self._history_filters(start, end, entry_ids)
+
+        with self.cursor() as (conn, cursor):
+            last_id = after_id
+            while True:
+                where = " AND ".join(clauses + ["id > %s"])
+                self.execute(
+                    cursor,
+                    f"SELECT {select} FROM input_history WHERE {where} ORDER BY id LIMIT %s",
+                    params + [last_id, chunk_size]
+                )
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+
+                chunk = pd.DataFrame.from_records(rows, columns=[d[0] for d in cursor.description])
+                last_id = int(chunk['id'].iloc[-1])
+                if 'timestamp' in chunk.columns:
+                    chunk['timestamp'] = pd.to_datetime(chunk['timestamp'])
+                yield chunk.rename(columns={**HISTORY_COLUMN_MAP, 'drive_id': 'Drive_ID'})
+
+                if len(rows) < chunk_size:
+                    break
+
+    def max_settled_id(self, settle_seconds=60):
+        """
+        Highest input_history id created at least settle_seconds ago (None if
+        none). Walks the primary key backwards, so only recent rows are read.
+        """
+        cutoff = to_db_timestamp(datetime.now() - timedelta(seconds=settle_seconds))
+        try:
+            with self.cursor() as (conn, cursor):
+                self.execute(cursor, "SELECT id FROM input_history WHERE created_at < %s "
+                                     "ORDER BY id DESC LIMIT 1", (cutoff,))
+                row = cursor.fetchone()
+            return int(row[0]) if row else None
+
+        except (ConnectionError,) + self.errors as e:
+            print(f"❌ {self.name} Error: {e}")
+            return None
+
+    def get_drive_history(self, drive_ids, columns=None, batch_size=500):
+        """
+        All stored rows for the given drives (idx_drive_timestamp lookups),
+        as one feature-named DataFrame with id, Drive_ID and timestamp
+        """
+        return self._drive_rows(
+            "SELECT {select} FROM input_history WHERE drive_id IN ({ids}) ORDER BY id",
+            drive_ids, columns, batch_size
+        )
+
+    def get_latest_drive_samples(self, drive_ids, columns=None, batch_size=500):
+        """
+        The newest stored row (highest id) of each given drive, same frame
+        layout as get_drive_history; one index lookup per drive
+        """
+        return self._drive_rows(
+            "SELECT {select} FROM input_history WHERE id IN ("
+            "SELECT MAX(id) FROM input_history WHERE drive_id IN ({ids}) GROUP BY drive_id) ORDER BY id",
+            drive_ids, columns, batch_size
+        )
+
+    def _drive_rows(self, query, drive_ids, columns, batch_size):
+        columns = columns or list(HISTORY_COLUMN_MAP)
+        select = ", ".join(['id', 'drive_id', 'timestamp'] + list(columns))
+        drive_ids = [str(d) for d in drive_ids]
+        frames = []
+
+        with self.cursor() as (conn, cursor):
+            for i in range(0, len(drive_ids), batch_size):
+                batch = drive_ids[i:i + batch_size]
+                self.execute(cursor, query.format(select=select, ids=", ".join(["%s"] * len(batch))), batch)
+                rows = cursor.fetchall()
+                if rows:
+                    frames.append(pd.DataFrame.from_records(rows, columns=[d[0] for d in cursor.description]))
+
+        if not frames:
+            return pd.DataFrame(columns=['id', 'Drive_ID', 'timestamp'] +
+                                [HISTORY_COLUMN_MAP.get(c, c) for c in columns])
+
+        history = pd.concat(frames, ignore_index=True)
+        history['timestamp'] = pd.to_datetime(history['timestamp'])
+        return history.rename(columns={**HISTORY_COLUMN_MAP, 'drive_id': 'Drive_ID'})
+
+    # ---- rollups -----------------------------------------------------------
+
+    def _rollup_upsert_tail(self):
+        return self.upsert_sql(
+            ['bucket_start', 'data_source'],
+            add_columns=ROLLUP_SUM_COLUMNS,
+            max_columns=['max_unsafe_shutdowns']
+        )
+
+    def _rollup_upsert_sql(self, granularity, where, sign=1):
+        """
+        INSERT ... SELECT that folds matching input_history rows into a rollup
+        table, or with sign=-1 subtracts them (max_unsafe_shutdowns cannot be
+        undone and stays an upper bound)
+        """
+        bucket = self.rollup_bucket_sql(granularity)
+        neg = "-" if sign < 0 else ""
+        return f"""
+            INSERT INTO {ROLLUP_TABLES[granularity]} (
+                bucket_start, data_source, total_inputs,
+                sum_power_hours, sum_temperature, sum_life_used, sum_total_data_tb,
+                max_unsafe_shutdowns, sum_temp_threshold, temp_threshold_count
+            )
+            SELECT
+                {bucket},
+                COALESCE(data_source, 'unknown'),
+                {neg}COUNT(*),
+                {neg}COALESCE(SUM(power_on_hours), 0),
+                {neg}COALESCE(SUM(temperature_c), 0),
+                {neg}COALESCE(SUM(percent_life_used), 0),
+                {neg}COALESCE(SUM(total_tbw_tb + total_tbr_tb), 0),
+                {"COALESCE(MAX(unsafe_shutdowns), 0)" if sign > 0 else "0"},
+                {neg}COALESCE(SUM(temp_threshold), 0),
+                {neg}COUNT(temp_threshold)
+            FROM input_history
+            WHERE {where}
+            GROUP BY {bucket}, COALESCE(data_source, 'unknown')
+            {self._rollup_upsert_tail()}
+        """
+
+    def update_rollups(self, cursor, where, params, sign=1):
+        """
+        Fold input_history rows selected by where/params (e.g. a new id) into
+        both rollup tables, inside the caller's transaction; sign=-1 takes
+        them out again before a delete. A missing rollup table only logs a
+        warning.
+        """
+        for granularity in ROLLUP_TABLES:
+            try:
+                self.execute(cursor, self._rollup_upsert_sql(granularity, where, sign), params)
+            except self.errors as e:
+                print(f"⚠️ Rollup update ({granularity}) failed: {e}")
+
+    def _upsert_rollup_rows(self, cursor, frame):
+        """Fold an in-memory frame (input_history column names) into the rollups"""
+        stamps = pd.to_datetime(frame['timestamp'])
+        data = pd.DataFrame({
+            'data_source': frame['data_source'].fillna('unknown'),
+            'power_on_hours': frame['power_on_hours'],
+            'temperature_c': frame['temperature_c'],
+            'percent_life_used': frame['percent_life_used'],
+            'total_data_tb': frame['total_tbw_tb'] + frame['total_tbr_tb'],
+            'unsafe_shutdowns': frame['unsafe_shutdowns'],
+            'temp_threshold': pd.to_numeric(frame['temp_threshold'], errors='coerce')
+        })
+
+        columns = ['bucket_start', 'data_source'] + ROLLUP_SUM_COLUMNS[:5] + \
+            ['max_unsafe_shutdowns'] + ROLLUP_SUM_COLUMNS[5:]
+        for granularity, table in ROLLUP_TABLES.items():
+            data['bucket_start'] = stamps.dt.floor('h' if granularity == 'hour' else 'D').dt.strftime(TIMESTAMP_FORMAT)
+            grouped = data.groupby(['bucket_start', 'data_source']).agg(
+                total_inputs=('power_on_hours', 'size'),
+                sum_power_hours=('power_on_hours', 'sum'),
+                sum_temperature=('temperature_c', 'sum'),
+                sum_life_used=('percent_life_used', 'sum'),
+                sum_total_data_tb=('total_data_tb', 'sum'),
+                max_unsafe_shutdowns=('unsafe_shutdowns', 'max'),
+                sum_temp_threshold=('temp_threshold', 'sum'),
+                temp_threshold_count=('temp_threshold', 'count')
+            ).reset_index()
+
+            rows = [
+                (r[0], r[1], int(r[2]), float(r[3]), float(r[4]), float(r[5]), float(r[6]),
+                 int(r[7]), float(r[8]), int(r[9]))
+                for r in grouped[columns].itertuples(index=False, name=None)
+            ]
+            try:
+                self.executemany(cursor, f"""
+                    INSERT INTO {table} ({", ".join(columns)})
+                    VALUES ({", ".join(["%s"] * len(columns))})
+                    {self._rollup_upsert_tail()}
+                """, rows)
+            except self.errors as e:
+                print(f"⚠️ Rollup update ({granularity}) failed: {e}")
+
+    def rebuild_rollups(self, start, end, cutoffs=None):
+        """
+        Recompute rollup buckets from raw input_history for [start, end], one
+        day per transaction. Used for backfills and to resync after raw rows
+        were deleted. Only (day, data_source) pairs that still have raw rows
+        are rebuilt, so aggregates kept after a retention purge survive.
+        cutoffs (retention cutoff per data_source, "default" for the rest)
+        also skips days that retention may have purged in part, whose
+        rollups hold more than the remaining raw rows.
+        Returns the number of days rebuilt.
+        """
+        try:
+            day = datetime.fromisoformat(str(start)).replace(hour=0, minute=0, second=0, microsecond=0)
+            last_day = datetime.fromisoformat(str(end)).replace(hour=0, minute=0, second=0, microsecond=0)
+            days = 0
+
+            with self.cursor() as (conn, cursor):
+                while day <= last_day:
+                    day_start, day = day, day + timedelta(days=1)
+                    bounds = (to_db_timestamp(day_start), to_db_timestamp(day))
+
+                    self.execute(
+                        cursor,
+                        "SELECT DISTINCT COALESCE(data_source, 'unknown') FROM input_history "
+                        "WHERE timestamp >= %s AND timestamp < %s",
+                        bounds
+                    )
+                    sources = [row[0] for row in cursor.fetchall()]
+                    if cutoffs:
+                        sources = [
+                            source for source in sources
+                            if day_start >= cutoffs.get(source, cutoffs.get("default", day_start))
+                        ]
+                    if not sources:
+                        continue
+
+                    in_sources = ", ".join(["%s"] * len(sources))
+                    for granularity, table in ROLLUP_TABLES.items():
+                        self.execute(
+                            cursor,
+                            f"DELETE FROM {table} WHERE bucket_start >= %s AND bucket_start < %s "
+                            f"AND data_source IN ({in_sources})",
+                            bounds + tuple(sources)
+                        )
+                        self.execute(
+                            cursor,
+                            self._rollup_upsert_sql(
+                                granularity,
+                                "timestamp >= %s AND timestamp < %s "
+                                f"AND COALESCE(data_source, 'unknown') IN ({in_sources})"
+                            ),
+                            bounds + tuple(sources)
+                        )
+                    conn.commit()
+                    days += 1
+
+            print(f"✓ Rebuilt rollups for {days} days")
+            return days
+
+        except (ConnectionError,) + self.errors as e:
+            print(f"❌ {self.name} Error: {e}")
+            return 0
+
+    @staticmethod
+    def _rollup_filters(start=None, end=None, data_source=None):
+        clauses = []
+        params = []
+        if start:
+            clauses.append("bucket_start >= %s")
+            params.append(to_db_timestamp(start))
+        if end:
+            clauses.append("bucket_start <= %s")
+            params.append(to_db_timestamp(end))
+        if data_source:
+            clauses.append("data_source = %s")
+            params.append(data_source)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def get_rollup_totals(self, granularity='hour', start=None, end=None, data_source=None):
+        """Totals over every matching rollup bucket (not just one page of them)"""
+        where, params = self._rollup_filters(start, end, data_source)
+        try:
+            with self.cursor() as (conn, cursor):
+                self.execute(
+                    cursor,
+                    "SELECT SUM(total_inputs), SUM(sum_temperature), SUM(sum_life_used), "
+                    f"MAX(max_unsafe_shutdowns) FROM {ROLLUP_TABLES[granularity]}" + where,
+                    params
+                )
+                total_inputs, sum_temperature, sum_life_used, max_unsafe = cursor.fetchone()
+
+        except (ConnectionError,) + self.errors as e:
+            print(f"❌ {self.name} Error: {e}")
+            return {"total_inputs": 0, "avg_temperature": None, "avg_life_used": None, "max_unsafe_shutdowns": None}
+
+        total_inputs = int(total_inputs or 0)
+        return {
+            "total_inputs": total_inputs,
+            "avg_temperature": float(sum_temperature) / total_inputs if total_inputs else None,
+            "avg_life_used": float(sum_life_used) / total_inputs if total_inputs else None,
+            "max_unsafe_shutdowns": max_unsafe
+        }
+
+    def get_rollup_stats(self, granularity='hour', start=None, end=None, data_source=None, limit=1000):
+        """Read rollup buckets and derive the averages the old input_analysis view exposed"""
+        where, params = self._rollup_filters(start, end, data_source)
+
+        try:
+            with self.cursor() as (conn, cursor):
+                self.execute(
+                    cursor,
+                    f"SELECT * FROM {ROLLUP_TABLES[granularity]}" + where +
+                    " ORDER BY bucket_start DESC, data_source LIMIT %s",
+                    params + [limit]
+                )
+                rows = self.rows_as_dicts(cursor)
+
+        except (ConnectionError,) + self.errors as e:
+            print(f"❌ {self.name} Error: {e}")
+            return []
+
+        buckets = []
+        for row in rows:
+            n = row['total_inputs'] or 1
+            buckets.append({
+                "bucket_start": format_timestamp(row['bucket_start']),
+                "data_source": row['data_source'],
+                "total_inputs": row['total_inputs'],
+                "avg_power_hours": row['sum_power_hours'] / n,
+                "avg_temperature": row['sum_temperature'] / n,
+                "avg_life_used": row['sum_life_used'] / n,
+                "avg_total_data_tb": row['sum_total_data_tb'] / n,
+                "max_unsafe_shutdowns": row['max_unsafe_shutdowns'],
+                "avg_temp_threshold": (row['sum_temp_threshold'] / row['temp_threshold_count']
+                                       if row['temp_threshold_count'] else None)
+            })
+        return buckets
+
+    # ---- retention ---------------------------------------------------------
+
+    @staticmethod
+    def _retention_filter(source, policies):
+        """WHERE fragment selecting rows governed by one retention policy"""
+        if source != "default":
+            return "data_source = %s", [source]
+        explicit = [s for s in policies if s != "default"]
+        if not explicit:
+            return "1 = 1", []
+        placeholders = ", ".join(["%s"] * len(explicit))
+        return f"(data_source IS NULL OR data_source NOT IN ({placeholders}))", explicit
+
+    def downsample_before_purge(self, conn, cursor, where, params):
+        """
+        Make sure every (day, data_source) about to be purged is represented in
+        the rollups. Buckets already present were folded in at insert time; only
+        missing ones (rows older than the rollup tables) are aggregated here.
+        """
+        self.execute(
+            cursor,
+            "SELECT DISTINCT DATE(timestamp), COALESCE(data_source, 'unknown') "
+            f"FROM input_history WHERE {where}",
+            params
+        )
+        pending = [(str(day), source) for day, source in cursor.fetchall()]
+        if not pending:
+            return 0
+
+        days = sorted({day for day, _ in pending})
+        self.execute(
+            cursor,
+            "SELECT DATE(bucket_start), data_source FROM input_rollup_daily "
+            "WHERE bucket_start >= %s AND bucket_start < %s",
+            (to_db_timestamp(days[0]), to_db_timestamp(datetime.fromisoformat(days[-1]) + timedelta(days=1)))
+        )
+        present = {(str(day), source) for day, source in cursor.fetchall()}
+
+        backfilled = 0
+        for day, source in pending:
+            if (day, source) in present:
+                continue
+            day_start = datetime.fromisoformat(day)
+            self.update_rollups(
+                cursor,
+                "timestamp >= %s AND timestamp < %s AND COALESCE(data_source, 'unknown') = %s",
+                (to_db_timestamp(day_start), to_db_timestamp(day_start + timedelta(days=1)), source)
+            )
+            backfilled += 1
+        conn.commit()
+        return backfilled
+
+    def run_retention(self, policies, cutoffs, hourly_cutoff, dry_run=False,
+                      batch_size=5000, pause=0.05, max_id=None):
+        """
+        Apply retention policies: downsample, then purge raw rows in batches.
+        max_id limits the purge to rows with id <= max_id (already archived).
+        """
+        report = {}
+        try:
+            with self.cursor() as (conn, cursor):
+                for source, cutoff in cutoffs.items():
+                    where, params = self._retention_filter(source, policies)
+                    where = f"{where} AND timestamp < %s"
+                    params = params + [to_db_timestamp(cutoff)]
+                    if max_id is not None:
+                        where = f"{where} AND id <= %s"
+                        params = params + [int(max_id)]
+
+                    if dry_run:
+                        self.execute(cursor, f"SELECT COUNT(*) FROM input_history WHERE {where}", params)
+                        report[source] = {
+                            "cutoff": cutoff.isoformat(),
+                            "rows_eligible": cursor.fetchone()[0]
+                        }
+                        continue
+
+                    backfilled = self.downsample_before_purge(conn, cursor, where, params)
+                    purged = self.batched_delete(conn, cursor, "input_history", where, params,
+                                                 batch_size=batch_size, pause=pause)
+                    report[source] = {
+                        "cutoff": cutoff.isoformat(),
+                        "buckets_backfilled": backfilled,
+                        "rows_purged": purged
+                    }
+                    print(f"✓ Retention [{source}]: purged {purged} rows older than {cutoff:%Y-%m-%d}")
+
+                hourly_params = [to_db_timestamp(hourly_cutoff)]
+                if dry_run:
+                    self.execute(
+                        cursor,
+                        f"SELECT COUNT(*) FROM {ROLLUP_TABLES['hour']} WHERE bucket_start < %s",
+                        hourly_params
+                    )
+                    hourly = cursor.fetchone()[0]
+                else:
+                    hourly = self.batched_delete(
+                        conn, cursor, ROLLUP_TABLES['hour'], "bucket_start < %s", hourly_params,
+                        order_by="bucket_start", batch_size=batch_size, pause=pause
+                    )
+                report["hourly_rollups"] = {
+                    "cutoff": hourly_cutoff.isoformat(),
+                    "rows_eligible" if dry_run else "rows_purged": hourly
+                }
+
+            return report
+
+        except (ConnectionError,) + self.errors as e:
+            print(f"❌ {self.name} Error: {e}")
+            return None
+
+    # ---- prediction_history ------------------------------------------------
+
+    def save_predictions_bulk(self, rows, batch_size=1000):
+        """
+        Bulk-write prediction rows (dicts keyed by PREDICTION_COLUMNS).
+        Re-writing the same (input_id, model_version) replaces the stored values.
+        """
+        if not rows:
+            return 0
+
+        now = datetime.now()
+        values = []
+        for row in rows:
+            record = [row.get(c) for c in PREDICTION_COLUMNS]
+            record[2] = to_db_timestamp(record[2] or now)
+            values.append(tuple(record))
+
+        query = f"""
+            INSERT INTO prediction_history ({", ".join(PREDICTION_COLUMNS)})
+            VALUES ({", ".join(["%s"] * len(PREDICTION_COLUMNS))})
+            {self.upsert_sql(['input_id', 'model_version'], replace_columns=PREDICTION_COLUMNS[3:])}
+        """
+        try:
+            with self.cursor() as (conn, cursor):
+                self.executemany(cursor, query, values, batch_size)
+                conn.commit()
+            return len(values)
+
+        except (ConnectionError,) + self.errors as e:
+            print(f"❌ {self.name} Error: {e}")
+            return 0
+
+    def get_prediction_trend(self, start=None, end=None, model_version=None, limit=1000):
+        """Stored risks over time (indexed range read on prediction_history)"""
+        clauses = []
+        params = []
+        if model_version:
+            clauses.append("model_version = %s")
+            params.append(model_version)
+        if start:
+            clauses.append("timestamp >= %s")
+            params.append(to_db_timestamp(start))
+        if end:
+            clauses.append("timestamp <= %s")
+            params.append(to_db_timestamp(end))
+        where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+
+        try:
+            with self.cursor() as (conn, cursor):
+                self.execute(
+                    cursor,
+                    "SELECT input_id, model_version, timestamp, wearout_risk, thermal_risk, power_risk, "
+                    "controller_risk, overall_risk, status, highest_risk FROM prediction_history" + where +
+                    " ORDER BY timestamp DESC LIMIT %s",
+                    params + [limit]
+                )
+                results = self.rows_as_dicts(cursor)
+
+            for row in results:
+                row['timestamp'] = format_timestamp(row['timestamp'])
+            return results
+
+        except (ConnectionError,) + self.errors as e:
+            print(f"❌ {self.name} Error: {e}")
+            return []
+
+    # ---- re-scoring ----------------------------------------------------------
+
+    def save_rescore_results(self, run_id, results, batch_size=1000):
+        """Bulk-write per-row old/new risks for a re-scoring run"""
+        rows = [
+            (run_id, int(input_id), float(old), float(new))
+            for input_id, old, new in zip(results['input_id'], results['old_risk'], results['new_risk'])
+        ]
+        try:
+            with self.cursor() as (conn, cursor):
+                self.executemany(cursor, """
+                    INSERT INTO rescore_results (run_id, input_id, old_risk, new_risk)
+                    VALUES (%s, %s, %s, %s)
+                """, rows, batch_size)
+                conn.commit()
+            return True
+
+        except (ConnectionError,) + self.errors as e:
+            print(f"❌ {self.name} Error: {e}")
+            return False
+
+    def save_rescore_run(self, run_id, model_name, old_version, new_version, summary):
+        """Record the summary of a finished re-scoring run"""
+        try:
+            with self.cursor() as (conn, cursor):
+                self.execute(cursor, f"""
+                    INSERT INTO rescore_runs (run_id, model_name, old_version, new_version,
+                                              rows_scored, summary, finished_at)
+                    VALUES (%s, %s, %s, %s, %s, %s, {self.now_sql})
+                """, (run_id, model_name, old_version, new_version,
+                      summary.get('rows', 0), json.dumps(summary)))
+                conn.commit()
+            return True
+
+        except (ConnectionError,) + self.errors as e:
+            print(f"❌ {self.name} Error: {e}")
+            return False
+
+    # ---- labels ------------------------------------------------------------
+
+    def save_labels(self, labels, label_source="manual", batch_size=1000):
+        """
+        Store confirmed failure modes for input_history rows. labels is a
+        list of (input_id, failure_mode); the last one wins per row. A row
+        that already has a label gets a new label id, so incremental training
+        (which consumes labels by id watermark) sees the correction.
+        Returns (saved, unknown_input_ids), or (0, None) on failure.
+        """
+        labels = {int(input_id): int(mode) for input_id, mode in labels}
+        if not labels:
+            return 0, []
+
+        ids = list(labels)
+        now = to_db_timestamp(datetime.now())
+        try:
+            with self.cursor() as (conn, cursor):
+                self.begin_write(cursor)
+
+                existing = set()
+                for i in range(0, len(ids), batch_size):
+                    batch = ids[i:i + batch_size]
+                    self.execute(cursor, "SELECT id FROM input_history WHERE id IN (" +
+                                 ", ".join(["%s"] * len(batch)) + ")", batch)
+                    existing.update(int(row[0]) for row in cursor.fetchall())
+
+                known = [i for i in ids if i in existing]
+                for i in range(0, len(known), batch_size):
+                    batch = known[i:i + batch_size]
+                    self.execute(cursor, "DELETE FROM input_labels WHERE input_id IN (" +
+                                 ", ".join(["%s"] * len(batch)) + ")", batch)
+
+                self.executemany(cursor, """
+                    INSERT INTO input_labels (input_id, failure_mode, label_source, labeled_at)
+                    VALUES (%s, %s, %s, %s)
+                """, [(i, labels[i], label_source, now) for i in known], batch_size)
+                conn.commit()
+
+            return len(known), [i for i in ids if i not in existing]
+
+        except (ConnectionError,) + self.errors as e:
+            print(f"❌ {self.name} Error: {e}")
+            return 0, None
+
+    def get_labels(self, after_id=0, limit=100):
+        """Labels with their input row's drive/timestamp, oldest label id first"""
+        try:
+            with self.cursor() as (conn, cursor):
+                self.execute(cursor, """
+                    SELECT l.id AS label_id, l.input_id, l.failure_mode, l.label_source, l.labeled_at,
+                           h.drive_id, h.timestamp
+                    FROM input_labels l JOIN input_history h ON h.id = l.input_id
+                    WHERE l.id > %s ORDER BY l.id LIMIT %s
+                """, (after_id, limit))
+                results = self.rows_as_dicts(cursor)
+
+            for row in results:
+                row['labeled_at'] = format_timestamp(row['labeled_at'])
+                row['timestamp'] = format_timestamp(row['timestamp'])
+            return results
+
+        except (ConnectionError,) + self.errors as e:
+            print(f"❌ {self.name} Error: {e}")
+            return []
+
+    def count_labels(self, after_id=0):
+        """Label counts per failure mode above a label id watermark"""
+        try:
+            with self.cursor() as (conn, cursor):
+                self.execute(cursor, """
+                    SELECT failure_mode, COUNT(*) FROM input_labels
+                    WHERE id > %s GROUP BY failure_mode
+                """, (after_id,))
+                return {int(mode): int(count) for mode, count in cursor.fetchall()}
+
+        except (ConnectionError,) + self.errors as e:
+            print(f"❌ {self.name} Error: {e}")
+            return {}
+
+    def iter_labeled_chunks(self, after_id=0, modes=None, chunk_size=HISTORY_CHUNK_SIZE):
+        """
+        Yield labeled input rows (model feature columns plus Failure_Mode and
+        label_id) with label id above after_id, keyset-paginated on label id
+        """
+        select = ", ".join(f"h.{c}" for c in HISTORY_COLUMN_MAP)
+        clauses = ["l.id > %s"]
+        params = []
+        if modes:
+            clauses.append("l.failure_mode IN (" + ", ".join(["%s"] * len(modes)) + ")")
+            params.extend(int(m) for m in modes)
+
+        with self.cursor() as (conn, cursor):
+            last_id = after_id
+            while True:
+                self.execute(
+                    cursor,
+                    f"SELECT l.id AS label_id, l.input_id, l.failure_mode, {select} "
+                    f"FROM input_labels l JOIN input_history h ON h.id = l.input_id "
+                    f"WHERE {' AND '.join(clauses)} ORDER BY l.id LIMIT %s",
+                    [last_id] + params + [chunk_size]
+                )
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+
+                chunk = pd.DataFrame.from_records(rows, columns=[d[0] for d in cursor.description])
+                last_id = int(chunk['label_id'].iloc[-1])
+                yield chunk.rename(columns={**HISTORY_COLUMN_MAP, 'failure_mode': 'Failure_Mode'})
+
+                if len(rows) < chunk_size:
+                    break
+
+    # ---- incremental training ----------------------------------------------
+
+    def label_watermark(self, model_name, model_version):
+        """
+        Highest label id already boosted into model_version: the watermark of
+        the accepted run that produced it. A version no run produced (e.g. a
+        full retrain) has consumed no labels, so this is 0.
+        """
+        try:
+            with self.cursor() as (conn, cursor):
+                self.execute(cursor, """
+                    SELECT MAX(label_watermark) FROM training_runs
+                    WHERE model_name = %s AND accepted = %s AND new_version = %s
+                """, (model_name, True, model_version))
+                value = cursor.fetchone()[0]
+            return int(value or 0)
+
+        except (ConnectionError,) + self.errors as e:
+            print(f"❌ {self.name} Error: {e}")
+            return 0
+
+    def save_training_run(self, run_id, model_name, base_version, new_version, accepted,
+                          label_watermark, rows_used, metrics):
+        """Record an incremental training run and its gating result"""
+        try:
+            with self.cursor() as (conn, cursor):
+                self.execute(cursor, """
+                    INSERT INTO training_runs (run_id, model_name, base_version, new_version, accepted,
+                                               label_watermark, rows_used, metrics)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                """, (run_id, model_name, base_version, new_version, bool(accepted),
+                      int(label_watermark), int(rows_used), json.dumps(metrics)))
+                conn.commit()
+            return True
+
+        except (ConnectionError,) + self.errors as e:
+            print(f"❌ {self.name} Error: {e}")
+            return False
+
+    def get_training_runs(self, model_name=None, limit=20):
+        where = " WHERE model_name = %s" if model_name else ""
+        params = [model_name] if model_name else []
+        try:
+            with self.cursor() as (conn, cursor):
+                self.execute(
+                    cursor,
+                    "SELECT run_id, model_name, base_version, new_version, accepted, label_watermark, "
+                    "rows_used, metrics, created_at FROM training_runs" + where +
+                    " ORDER BY created_at DESC, label_watermark DESC LIMIT %s",
+                    params + [limit]
+                )
+                results = self.rows_as_dicts(cursor)
+
+            for row in results:
+                row['accepted'] = bool(row['accepted'])
+                row['created_at'] = format_timestamp(row['created_at'])
+                if isinstance(row['metrics'], str):
+                    row['metrics'] = json.loads(row['metrics'])
+            return results
+
+        except (ConnectionError,) + self.errors as e:
+            print(f"❌ {self.name} Error: {e}")
+            return []
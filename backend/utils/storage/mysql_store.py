@@ -0,0 +1,43 @@
+import mysql.connector
+from mysql.connector import Error
+
+from utils.storage.base import HistoryStore
+
+
+class MySQLHistoryStore(HistoryStore):
+    """input_history on a MySQL server (schema in setup_mysql.sql)"""
+
+    name = "MySQL"
+    param = "%s"
+    now_sql = "NOW()"
+    errors = (Error,)
+
+    ROLLUP_BUCKETS = {
+        'hour': "TIMESTAMP(DATE(timestamp), MAKETIME(HOUR(timestamp), 0, 0))",
+        'day': "TIMESTAMP(DATE(timestamp))"
+    }
+
+    def __init__(self, db_config):
+        self.db_config = db_config
+
+    def connect(self):
+        return mysql.connector.connect(**self.db_config)
+
+    def describe(self):
+        return f"MySQL {self.db_config.get('database')} @ {self.db_config.get('host')}"
+
+    def rollup_bucket_sql(self, granularity):
+        return self.ROLLUP_BUCKETS[granularity]
+
+    def upsert_sql(self, key_columns, add_columns=(), max_columns=(), replace_columns=()):
+        updates = [f"{c} = {c} + VALUES({c})" for c in add_columns]
+        updates += [f"{c} = GREATEST({c}, VALUES({c}))" for c in max_columns]
+        updates += [f"{c} = VALUES({c})" for c in replace_columns]
+        return "ON DUPLICATE KEY UPDATE " + ", ".join(updates)
+
+    def limited_delete_sql(self, table, where, order_by):
+        return f"DELETE FROM {table} WHERE {where} ORDER BY {order_by} LIMIT %s"
+
+    def row_estimate_sql(self, table):
+        return ("SELECT TABLE_ROWS FROM information_schema.TABLES "
+                f"WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = '{table}'")
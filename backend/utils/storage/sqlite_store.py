@@ -0,0 +1,181 @@
+import os
+import sqlite3
+import threading
+
+from utils.storage.base import HistoryStore
+
+# Same tables as setup_mysql.sql, in SQLite types. Timestamps are stored as
+# 'YYYY-MM-DD HH:MM:SS' text so they sort and compare correctly.
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS input_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    power_on_hours REAL,
+    total_tbw_tb REAL,
+    total_tbr_tb REAL,
+    temperature_c REAL,
+    percent_life_used REAL,
+    media_errors INTEGER,
+    unsafe_shutdowns INTEGER,
+    crc_errors INTEGER,
+    read_error_rate REAL,
+    write_error_rate REAL,
+    temp_threshold REAL,
+    data_source TEXT,
+    notes TEXT,
+    drive_id TEXT,
+    created_at TEXT DEFAULT (datetime('now', 'localtime'))
+);
+CREATE INDEX IF NOT EXISTS idx_timestamp ON input_history (timestamp);
+CREATE INDEX IF NOT EXISTS idx_source_timestamp ON input_history (data_source, timestamp);
+
+CREATE TABLE IF NOT EXISTS prediction_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    input_id INTEGER NOT NULL REFERENCES input_history(id) ON DELETE CASCADE,
+    model_version TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    wearout_risk REAL,
+    thermal_risk REAL,
+    power_risk REAL,
+    controller_risk REAL,
+    overall_risk REAL,
+    status TEXT NOT NULL,
+    highest_risk TEXT NOT NULL,
+    top_contributions TEXT,
+    created_at TEXT DEFAULT (datetime('now', 'localtime')),
+    UNIQUE (input_id, model_version)
+);
+CREATE INDEX IF NOT EXISTS idx_prediction_timestamp ON prediction_history (timestamp);
+CREATE INDEX IF NOT EXISTS idx_prediction_version_timestamp ON prediction_history (model_version, timestamp);
+
+CREATE TABLE IF NOT EXISTS rescore_runs (
+    run_id TEXT PRIMARY KEY,
+    model_name TEXT NOT NULL,
+    old_version TEXT NOT NULL,
+    new_version TEXT NOT NULL,
+    rows_scored INTEGER,
+    summary TEXT,
+    created_at TEXT DEFAULT (datetime('now', 'localtime')),
+    finished_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS rescore_results (
+    run_id TEXT NOT NULL,
+    input_id INTEGER NOT NULL,
+    old_risk REAL,
+    new_risk REAL,
+    PRIMARY KEY (run_id, input_id)
+);
+
+CREATE TABLE IF NOT EXISTS input_labels (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    input_id INTEGER NOT NULL UNIQUE REFERENCES input_history(id) ON DELETE CASCADE,
+    failure_mode INTEGER NOT NULL,
+    label_source TEXT,
+    labeled_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS training_runs (
+    run_id TEXT PRIMARY KEY,
+    model_name TEXT NOT NULL,
+    base_version TEXT NOT NULL,
+    new_version TEXT,
+    accepted INTEGER NOT NULL,
+    label_watermark INTEGER NOT NULL,
+    rows_used INTEGER,
+    metrics TEXT,
+    created_at TEXT DEFAULT (datetime('now', 'localtime'))
+);
+CREATE INDEX IF NOT EXISTS idx_training_model ON training_runs (model_name, accepted, label_watermark);
+"""
+
+SQLITE_ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS {table} (
+    bucket_start TEXT NOT NULL,
+    data_source TEXT NOT NULL,
+    total_inputs INTEGER NOT NULL DEFAULT 0,
+    sum_power_hours REAL NOT NULL DEFAULT 0,
+    sum_temperature REAL NOT NULL DEFAULT 0,
+    sum_life_used REAL NOT NULL DEFAULT 0,
+    sum_total_data_tb REAL NOT NULL DEFAULT 0,
+    max_unsafe_shutdowns INTEGER NOT NULL DEFAULT 0,
+    sum_temp_threshold REAL NOT NULL DEFAULT 0,
+    temp_threshold_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket_start, data_source)
+);
+"""
+
+
+class SQLiteHistoryStore(HistoryStore):
+    """
+    Embedded input_history for edge collectors and load tests. Runs in WAL
+    mode so readers never block the writer, and keeps one connection per
+    thread instead of reconnecting for every call.
+    """
+
+    name = "SQLite"
+    param = "?"
+    now_sql = "datetime('now', 'localtime')"
+    errors = (sqlite3.Error,)
+
+    ROLLUP_BUCKETS = {
+        'hour': "strftime('%Y-%m-%d %H:00:00', timestamp)",
+        'day': "strftime('%Y-%m-%d 00:00:00', timestamp)"
+    }
+
+    def __init__(self, path="data/nvme_history.db"):
+        self.path = path
+        self.local = threading.local()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self.connect()
+        conn.executescript(SQLITE_SCHEMA)
+        self._migrate(conn)
+        for table in ("input_rollup_hourly", "input_rollup_daily"):
+            conn.executescript(SQLITE_ROLLUP_SCHEMA.format(table=table))
+        conn.commit()
+
+    def _migrate(self, conn):
+        """Add columns introduced after a database file was created"""
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(input_history)")}
+        if "drive_id" not in columns:
+            conn.execute("ALTER TABLE input_history ADD COLUMN drive_id TEXT")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_drive_timestamp ON input_history (drive_id, timestamp)")
+
+    def connect(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self.local.conn = conn
+        return conn
+
+    def begin_write(self, cursor):
+        # Take the write lock up front so ids read back belong to this transaction
+        cursor.execute("BEGIN IMMEDIATE")
+
+    def release(self, conn):
+        # Per-thread connection is reused; just make sure nothing is left open
+        if conn.in_transaction:
+            conn.rollback()
+
+    def describe(self):
+        return f"SQLite {os.path.abspath(self.path)}"
+
+    def rollup_bucket_sql(self, granularity):
+        return self.ROLLUP_BUCKETS[granularity]
+
+    def upsert_sql(self, key_columns, add_columns=(), max_columns=(), replace_columns=()):
+        updates = [f"{c} = {c} + excluded.{c}" for c in add_columns]
+        updates += [f"{c} = MAX({c}, excluded.{c})" for c in max_columns]
+        updates += [f"{c} = excluded.{c}" for c in replace_columns]
+        return f"ON CONFLICT ({', '.join(key_columns)}) DO UPDATE SET " + ", ".join(updates)
+
+    def limited_delete_sql(self, table, where, order_by):
+        return (f"DELETE FROM {table} WHERE rowid IN "
+                f"(SELECT rowid FROM {table} WHERE {where} ORDER BY {order_by} LIMIT %s)")
@@ -1,4 +1,12 @@
 import math
+import numpy as np
+
+# Thermal limit (°C) used when neither the drive nor the threshold registry reports one
+DEFAULT_TEMP_THRESHOLD = 84
+
+# Upper edges of the temperature-ratio bands and the stress assigned to each band
+TEMP_RATIO_EDGES = np.array([0.4, 0.5, 0.6, 0.7, 0.75, 0.8, 0.85, 0.9, 0.95])
+TEMP_STRESS_LEVELS = np.array([0.05, 0.10, 0.20, 0.35, 0.50, 0.65, 0.80, 0.90, 0.97, 1.00])
 
 class ThermalPredictor:
 
@@ -67,4 +75,28 @@ class ThermalPredictor:
 
     def predict(self, input_df):
         """Fallback default threshold"""
-        return self.predict_with_threshold(input_df, 75)
+        return self.predict_with_threshold(input_df, DEFAULT_TEMP_THRESHOLD)
+
+    def predict_batch(self, input_df, temp_threshold=DEFAULT_TEMP_THRESHOLD):
+        """Vectorized thermal risk for every row; temp_threshold may be a scalar or per-row array"""
+
+        def column(name, default):
+            if name in input_df.columns:
+                return input_df[name].to_numpy(dtype=np.float64)
+            return np.full(len(input_df), default, dtype=np.float64)
+
+        temperature = column('Temperature_C', 45)
+        power_hours = column('Power_On_Hours', 10000)
+        life_used = column('Percent_Life_Used', 50)
+
+        threshold = np.broadcast_to(np.asarray(temp_threshold, dtype=np.float64), temperature.shape)
+        safe_threshold = np.where(threshold > 0, threshold, 1.0)
+        temp_ratio = np.where(threshold > 0, temperature / safe_threshold, 0.5)
+
+        temp_stress = TEMP_STRESS_LEVELS[np.digitize(temp_ratio, TEMP_RATIO_EDGES)]
+        age_stress = np.minimum(np.log10(1 + power_hours) / math.log10(1 + 50000), 1.0)
+        wear_stress = np.minimum(life_used / 100, 1.0)
+
+        total_risk = 0.5 * temp_stress + 0.3 * age_stress + 0.2 * wear_stress
+
+        return np.round(total_risk * 100, 2)
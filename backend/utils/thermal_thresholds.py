@@ -0,0 +1,192 @@
+import json
+import os
+import threading
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+# Columns identifying a drive type (as in Clean_Final_NVMe_Dataset.csv)
+DRIVE_KEY_COLUMNS = ["Vendor", "Model", "Firmware_Version"]
+
+# Plausible SMART "Warning Comp. Temp. Threshold" values in °C
+MIN_THRESHOLD_C = 40
+MAX_THRESHOLD_C = 120
+
+
+def _clean(value):
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return ""
+    return str(value).strip()
+
+
+class ThermalThresholdRegistry:
+    """
+    Warning-temperature thresholds per vendor/model/firmware, learned from
+    SMART readings across the fleet.
+
+    Each key keeps a count per reported value and resolves to the most
+    common one, so a single misreported drive does not move the threshold.
+    Lookups fall back from (vendor, model, firmware) to (vendor, model) to
+    vendor. Per-level lookup tables are rebuilt lazily after changes and
+    lookup_batch() resolves a whole frame with index joins, no per-row work.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.readings = {}
+        self.lock = threading.Lock()
+        self.version = 0
+        self._index_version = -1
+        self._levels = []
+
+        if path and os.path.exists(path):
+            self.load()
+
+    # ---- updates -----------------------------------------------------------
+
+    def record(self, vendor, model, firmware, threshold_c, count=1):
+        """Add one reading; returns False if the value is implausible"""
+        try:
+            threshold_c = round(float(threshold_c), 1)
+        except (TypeError, ValueError):
+            return False
+        if not MIN_THRESHOLD_C <= threshold_c <= MAX_THRESHOLD_C:
+            return False
+
+        key = (_clean(vendor), _clean(model), _clean(firmware))
+        if not key[0] and not key[1]:
+            return False
+
+        with self.lock:
+            self.readings.setdefault(key, Counter())[threshold_c] += count
+            self.version += 1
+        return True
+
+    def record_frame(self, df, threshold_column="temp_threshold"):
+        """Add readings from every row that has drive key columns and a threshold"""
+        if threshold_column not in df.columns or not set(DRIVE_KEY_COLUMNS) & set(df.columns):
+            return 0
+
+        frame = pd.DataFrame({c: df[c] if c in df.columns else "" for c in DRIVE_KEY_COLUMNS})
+        frame = frame.fillna("").astype(str).apply(lambda s: s.str.strip())
+        frame["threshold"] = pd.to_numeric(df[threshold_column], errors="coerce").round(1)
+        frame = frame[frame["threshold"].between(MIN_THRESHOLD_C, MAX_THRESHOLD_C)]
+        frame = frame[(frame["Vendor"] != "") | (frame["Model"] != "")]
+        if frame.empty:
+            return 0
+
+        grouped = frame.groupby(DRIVE_KEY_COLUMNS + ["threshold"]).size()
+        with self.lock:
+            for (vendor, model, firmware, threshold), count in grouped.items():
+                self.readings.setdefault((vendor, model, firmware), Counter())[float(threshold)] += int(count)
+            self.version += 1
+        return int(grouped.sum())
+
+    # ---- lookups -----------------------------------------------------------
+
+    def _build_index(self):
+        """Most common threshold at each fallback level, as MultiIndex Series"""
+        with self.lock:
+            if self._index_version == self.version:
+                return self._levels
+            version = self.version
+            readings = {key: Counter(counts) for key, counts in self.readings.items()}
+
+        levels = []
+        for depth in (3, 2, 1):
+            merged = {}
+            for key, counts in readings.items():
+                merged.setdefault(key[:depth], Counter()).update(counts)
+            if merged:
+                keys = list(merged)
+                values = [merged[k].most_common(1)[0][0] for k in keys]
+                if depth == 1:
+                    index = pd.Index([k[0] for k in keys], name="Vendor")
+                else:
+                    index = pd.MultiIndex.from_tuples(keys, names=DRIVE_KEY_COLUMNS[:depth])
+                levels.append((depth, pd.Series(values, index=index, dtype=np.float64)))
+
+        with self.lock:
+            self._levels = levels
+            self._index_version = version
+        return levels
+
+    def lookup(self, vendor, model="", firmware=""):
+        """Threshold for one drive type, or None when nothing is known"""
+        key = (_clean(vendor), _clean(model), _clean(firmware))
+        for depth, table in self._build_index():
+            value = table.get(key[:depth] if depth > 1 else key[0])
+            if value is not None:
+                return float(value)
+        return None
+
+    def lookup_batch(self, df):
+        """Per-row thresholds for a frame with drive key columns (NaN where unknown)"""
+        result = np.full(len(df), np.nan)
+        if not set(DRIVE_KEY_COLUMNS) & set(df.columns):
+            return result
+
+        keys = pd.DataFrame({c: df[c] if c in df.columns else "" for c in DRIVE_KEY_COLUMNS})
+        keys = keys.fillna("").astype(str).apply(lambda s: s.str.strip())
+
+        for depth, table in self._build_index():
+            missing = np.isnan(result)
+            if not missing.any():
+                break
+            if depth == 1:
+                found = keys["Vendor"].map(table).to_numpy(dtype=np.float64)
+            else:
+                index = pd.MultiIndex.from_frame(keys[DRIVE_KEY_COLUMNS[:depth]])
+                found = table.reindex(index).to_numpy(dtype=np.float64)
+            result = np.where(missing, found, result)
+
+        return result
+
+    # ---- persistence -------------------------------------------------------
+
+    def to_records(self):
+        with self.lock:
+            items = sorted(self.readings.items())
+        return [
+            {
+                "vendor": vendor,
+                "model": model,
+                "firmware": firmware,
+                "threshold_c": counts.most_common(1)[0][0],
+                "readings": sum(counts.values()),
+                "values": {str(v): c for v, c in counts.items()}
+            }
+            for (vendor, model, firmware), counts in items
+        ]
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                records = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[ThermalThresholds] Could not read {self.path}: {e}")
+            return
+
+        with self.lock:
+            self.readings = {
+                (r["vendor"], r["model"], r["firmware"]): Counter({float(v): int(c) for v, c in r["values"].items()})
+                for r in records
+            }
+            self.version += 1
+        print(f"[ThermalThresholds] Loaded {len(self.readings)} drive types from {self.path}")
+
+    def save(self):
+        """Write the table atomically (temp file + rename)"""
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.to_records(), f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def __len__(self):
+        return len(self.readings)
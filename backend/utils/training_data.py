@@ -0,0 +1,138 @@
+import os
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+from utils.batch_scoring import FEATURES
+
+# XGBoost bins features as float32 internally, so reading them as float32
+# loses nothing and halves the memory of float64 columns; labels fit in int8
+FEATURE_DTYPE = np.float32
+LABEL_DTYPE = np.int8
+
+# Rows parsed per read_csv chunk; only the kept rows of each chunk survive
+READ_CHUNK_ROWS = 100000
+
+
+def iter_source_frames(source, columns, chunk_size=READ_CHUNK_ROWS):
+    """
+    DataFrames of `columns`, chunk_size rows at a time, from a CSV file, a
+    Parquet file or directory (needs pyarrow), or a callable taking
+    chunk_size and yielding DataFrames (e.g. labeled history).
+    """
+    if callable(source):
+        for frame in source(chunk_size):
+            yield frame[columns]
+        return
+
+    if os.path.isdir(source) or str(source).endswith(".parquet"):
+        try:
+            import pyarrow.dataset as ds
+        except ImportError:
+            raise RuntimeError("Reading Parquet training data requires pyarrow (pip install pyarrow)")
+        dataset = ds.dataset(source, format="parquet", exclude_invalid_files=True, ignore_prefixes=["_", "."])
+        for batch in dataset.to_batches(columns=columns, batch_size=chunk_size):
+            if batch.num_rows:
+                yield batch.to_pandas()
+        return
+
+    dtypes = {column: FEATURE_DTYPE for column in columns}
+    yield from pd.read_csv(source, usecols=columns, dtype=dtypes, chunksize=chunk_size)
+
+
+def labeled_history_source(store, modes):
+    """Source for iter_source_frames: labeled input_history rows (POST /api/labels), by label id"""
+    def chunks(chunk_size):
+        return store.iter_labeled_chunks(after_id=0, modes=list(modes), chunk_size=chunk_size)
+    return chunks
+
+
+def iter_training_chunks(source, targets, features=FEATURES, chunk_size=READ_CHUNK_ROWS):
+    """
+    (X, y) per chunk for the rows whose Failure_Mode is a key of targets
+    (mode -> class index): X float32 with missing values zeroed, y int8
+    """
+    features = list(features)
+    for chunk in iter_source_frames(source, features + ["Failure_Mode"], chunk_size):
+        modes = chunk["Failure_Mode"].to_numpy(dtype=FEATURE_DTYPE)
+        classes = np.full(len(chunk), -1, dtype=LABEL_DTYPE)
+        for mode, index in targets.items():
+            classes[modes == mode] = index
+        keep = classes >= 0
+        if keep.any():
+            X = chunk[features].to_numpy(dtype=FEATURE_DTYPE)[keep]
+            X[np.isnan(X)] = 0
+            yield X, classes[keep]
+
+
+def load_training_data(data_path, targets, features=FEATURES, chunk_size=READ_CHUNK_ROWS):
+    """
+    Feature matrix and class labels for the rows of a training CSV whose
+    Failure_Mode is a key of targets (mode -> class index).
+
+    Only the feature and label columns are parsed, directly as float32 /
+    int8, one chunk at a time; rows are selected with a boolean mask per
+    chunk and missing values are zeroed in place. Returns (X, y): X is a
+    float32 DataFrame over a single contiguous array, y an int8 array.
+    """
+    blocks = []
+    labels = []
+    for X, y in iter_training_chunks(data_path, targets, features, chunk_size):
+        blocks.append(X)
+        labels.append(y)
+
+    if not blocks:
+        return pd.DataFrame(columns=list(features), dtype=FEATURE_DTYPE), np.empty(0, dtype=LABEL_DTYPE)
+
+    X = blocks[0] if len(blocks) == 1 else np.concatenate(blocks)
+    del blocks
+    y = np.concatenate(labels)
+
+    # copy=False wraps the array: one float32 block, no per-column copies
+    return pd.DataFrame(X, columns=list(features), copy=False), y
+
+
+def split_training_data(X, y, test_size=0.2, random_state=5):
+    """
+    Stratified train/test split by row positions. Gives the same partition
+    as train_test_split(X, y, stratify=y) on the same rows, without copying
+    the frame through sklearn's indexing first.
+    """
+    train_index, test_index = train_test_split(
+        np.arange(len(y)),
+        test_size=test_size,
+        stratify=y,
+        random_state=random_state
+    )
+    return X.iloc[train_index], X.iloc[test_index], y[train_index], y[test_index]
+
+
+class StratifiedChunkSplit:
+    """
+    Streaming stratified holdout: within each class, rows are sent to the
+    test side by systematic sampling at rate test_size (with a seeded random
+    phase per class), so every class is split in the same proportion without
+    seeing the whole dataset. The assignment depends only on row order, so
+    repeated passes over the same source split identically; call reset()
+    at the start of each pass.
+    """
+
+    def __init__(self, n_classes, test_size=0.2, seed=5):
+        self.test_size = test_size
+        self.phase = np.random.default_rng(seed).random(n_classes)
+        self.seen = np.zeros(n_classes, dtype=np.int64)
+
+    def reset(self):
+        self.seen[:] = 0
+
+    def assign(self, y):
+        """Boolean mask of the rows of this chunk that belong to the holdout"""
+        test = np.zeros(len(y), dtype=bool)
+        for label in np.unique(y):
+            rows = np.flatnonzero(y == label)
+            rank = self.seen[label] + np.arange(len(rows))
+            position = rank * self.test_size + self.phase[label]
+            test[rows] = np.floor(position + self.test_size) > np.floor(position)
+            self.seen[label] += len(rows)
+        return test
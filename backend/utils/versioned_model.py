@@ -0,0 +1,87 @@
+import hashlib
+import os
+import shutil
+
+import joblib
+
+from utils.calibration import calibration_path
+
+
+class VersionedModel:
+    """
+    A model file on disk with a content-hash version id. Saving archives the
+    file being replaced (and its calibration map, if any) under
+    models/archive as <stem>-<version>.pkl, so earlier versions can be
+    reloaded, compared and re-scored.
+
+    Subclasses override _read_model / _write_model when the artifact holds
+    more than the bare model object.
+    """
+
+    def __init__(self, model_path):
+        self.model_path = model_path
+        self.model = None
+        self.model_version = None
+        self.archive_dir = os.path.join(os.path.dirname(model_path), "archive")
+
+    @property
+    def log_name(self):
+        return type(self).__name__
+
+    def _read_model(self, path):
+        self.model = joblib.load(path)
+
+    def _write_model(self, path):
+        joblib.dump(self.model, path)
+
+    def _after_load(self):
+        """Load anything tied to the model version; returns extra text for the log line"""
+        return ""
+
+    def load_model(self):
+        """Load pre-trained model if exists"""
+        if os.path.exists(self.model_path):
+            try:
+                self._read_model(self.model_path)
+                self.model_version = self.file_version(self.model_path)
+                details = self._after_load()
+                print(f"[{self.log_name}] Loaded model {self.model_version} "
+                      f"({type(self.model).__name__}) from {self.model_path}{details}")
+            except Exception as e:
+                print(f"[{self.log_name}] Failed to load model: {e}")
+                self.model = None
+
+    def save_model(self):
+        """Save model to disk, archiving the previous version first. Returns True if saved."""
+        if self.model is None:
+            return False
+        os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
+        self.archive_current_model()
+        self._write_model(self.model_path)
+        self.model_version = self.file_version(self.model_path)
+        print(f"[{self.log_name}] Saved model {self.model_version} to {self.model_path}")
+        return True
+
+    @staticmethod
+    def file_version(path):
+        """Short content hash used as the model version id"""
+        with open(path, "rb") as f:
+            return hashlib.sha1(f.read()).hexdigest()[:12]
+
+    def archived_path(self, version):
+        stem = os.path.splitext(os.path.basename(self.model_path))[0]
+        return os.path.join(self.archive_dir, f"{stem}-{version}.pkl")
+
+    def archive_current_model(self):
+        """Copy the model file on disk into the archive before it is overwritten"""
+        if not os.path.exists(self.model_path):
+            return
+        version = self.file_version(self.model_path)
+        target = self.archived_path(version)
+        if not os.path.exists(target):
+            os.makedirs(self.archive_dir, exist_ok=True)
+            shutil.copy2(self.model_path, target)
+            print(f"[{self.log_name}] Archived model {version} to {target}")
+        calibration = calibration_path(self.model_path)
+        if os.path.exists(calibration) and not os.path.exists(calibration_path(target)):
+            shutil.copy2(calibration, calibration_path(target))
@@ -27,6 +27,7 @@ document.addEventListener('DOMContentLoaded', async function() {
     await initializeApp();
     setupEventListeners();
     checkBackendConnection();
+    connectLiveStream();
     
     // Initialize laptop status button after everything is loaded
     const laptopCheckbox = document.getElementById('laptopWorking');
@@ -232,6 +233,51 @@ function setupEventListeners() {
 
 }
 
+function renderConnectionStatus(statusEl, connected, databaseConnected) {
+    if (connected) {
+        const dbStatus = databaseConnected ? 'Connected' : 'Disconnected';
+        statusEl.innerHTML = `
+            <div style="background-color: #d4edda; color: #155724; padding: 12px; border-radius: 5px; border: 1px solid #c3e6cb;">
+                <i class="fas fa-check-circle"></i> 
+                <strong>Backend Connected</strong> | Port: 8080 | Database: ${dbStatus}
+            </div>
+        `;
+    } else {
+        statusEl.innerHTML = `
+            <div style="background-color: #f8d7da; color: #721c24; padding: 12px; border-radius: 5px; border: 1px solid #f5c6cb;">
+                <i class="fas fa-exclamation-triangle"></i> 
+                <strong>Backend Connection Issue</strong>
+            </div>
+        `;
+    }
+}
+
+// Live updates pushed by the backend (/api/stream) instead of re-polling
+function connectLiveStream() {
+    if (!window.EventSource) return;
+
+    const stream = new EventSource(`${API_BASE_URL}/stream?events=health,alert`);
+
+    stream.addEventListener('health', (event) => {
+        const health = JSON.parse(event.data);
+        const statusEl = document.getElementById('connectionStatus');
+        if (statusEl) renderConnectionStatus(statusEl, true, health.database_connected);
+    });
+
+    stream.addEventListener('alert', (event) => {
+        const alertData = JSON.parse(event.data);
+        console.warn(`🚨 ${alertData.severity.toUpperCase()} alert for ${alertData.drive_id}: ${alertData.message}`);
+    });
+
+    stream.onerror = () => {
+        // EventSource reconnects on its own; show the outage meanwhile
+        const statusEl = document.getElementById('connectionStatus');
+        if (statusEl && stream.readyState !== EventSource.OPEN) {
+            renderConnectionStatus(statusEl, false);
+        }
+    };
+}
+
 async function checkBackendConnection() {
     const statusEl = document.getElementById('connectionStatus');
     if (!statusEl) {
@@ -247,24 +293,8 @@ async function checkBackendConnection() {
         }
         
         const data = await response.json();
-        
-        if (data.success) {
-            const dbStatus = data.database_connected ? 'Connected' : 'Disconnected';
-            statusEl.innerHTML = `
-                <div style="background-color: #d4edda; color: #155724; padding: 12px; border-radius: 5px; border: 1px solid #c3e6cb;">
-                    <i class="fas fa-check-circle"></i> 
-                    <strong>Backend Connected</strong> | Port: 8080 | Database: ${dbStatus}
-                </div>
-            `;
-            console.log('✅ Backend connected');
-        } else {
-            statusEl.innerHTML = `
-                <div style="background-color: #f8d7da; color: #721c24; padding: 12px; border-radius: 5px; border: 1px solid #f5c6cb;">
-                    <i class="fas fa-exclamation-triangle"></i> 
-                    <strong>Backend Connection Issue</strong>
-                </div>
-            `;
-        }
+        renderConnectionStatus(statusEl, data.success, data.database_connected);
+        if (data.success) console.log('✅ Backend connected');
     } catch (error) {
         statusEl.innerHTML = `
             <div style="background-color: #f8d7da; color: #721c24; padding: 12px; border-radius: 5px; border: 1px solid #f5c6cb;">